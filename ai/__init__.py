@@ -4,16 +4,40 @@ AI layer for LearnPath chatbot
 Key features:
 - LLMClient: protocol for LLM implementations
 - GeminiClient: Gemini API client (generate_text, stream_chat)
-- SYSTEM_PROMPT, ROADMAP_PROMPT_TEMPLATE: prompts for chat and roadmap generation
+- EmbeddingProvider, HashingEmbeddingProvider: text embeddings for semantic memory
+- LLMScheduler, ScheduledLLMClient: process-wide LLM admission (priority lanes, fair queueing)
+- AIMDLimit, is_rate_limited: adaptive lane concurrency driven by latency and 429s
+- GuardedLLMClient: LLMClient behind a CircuitBreaker (fails fast while the upstream is down)
+- HedgePolicy, HedgedLLMClient: hedge chat streams slow to produce their first chunk (p95 delay, capped rate)
+- SYSTEM_PROMPT, ROADMAP_PROMPT_TEMPLATE, MILESTONE_PROMPT_TEMPLATE: prompts for chat, roadmap generation and partial roadmap updates
 """
 
 from .llm_client import LLMClient
 from .gemini_client import GeminiClient
-from .prompts import SYSTEM_PROMPT, ROADMAP_PROMPT_TEMPLATE
+from .embeddings import EmbeddingProvider, HashingEmbeddingProvider
+from .limiter import AIMDLimit, is_rate_limited
+from .guarded_client import GuardedLLMClient
+from .hedging import HedgePolicy, HedgedLLMClient
+from .scheduler import LLMScheduler, ScheduledLLMClient, Ticket, LANE_CHAT, LANE_ROADMAP, LANE_BACKGROUND
+from .prompts import SYSTEM_PROMPT, ROADMAP_PROMPT_TEMPLATE, MILESTONE_PROMPT_TEMPLATE
 
 __all__ = [
     "LLMClient",
     "GeminiClient",
+    "EmbeddingProvider",
+    "HashingEmbeddingProvider",
+    "AIMDLimit",
+    "is_rate_limited",
+    "GuardedLLMClient",
+    "HedgePolicy",
+    "HedgedLLMClient",
+    "LLMScheduler",
+    "ScheduledLLMClient",
+    "Ticket",
+    "LANE_CHAT",
+    "LANE_ROADMAP",
+    "LANE_BACKGROUND",
     "SYSTEM_PROMPT",
-    "ROADMAP_PROMPT_TEMPLATE"
+    "ROADMAP_PROMPT_TEMPLATE",
+    "MILESTONE_PROMPT_TEMPLATE",
 ]
\ No newline at end of file
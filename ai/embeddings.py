@@ -0,0 +1,79 @@
+"""
+embeddings.py
+
+Embedding providers for semantic memory
+
+Key features:
+- EmbeddingProvider: protocol (dim + embed(texts) -> float32 matrix, rows L2-normalized)
+- HashingEmbeddingProvider: deterministic local hashing vectorizer over Vietnamese tokens
+  and character trigrams; no network, stable across processes (blake2b, not hash())
+"""
+
+import hashlib
+from typing import List, Protocol, Sequence
+
+import numpy as np
+
+from utils.text import fold_diacritics, normalize_vi, tokenize_vi
+
+class EmbeddingProvider(Protocol):
+    """
+    Interface for text embedding backends (local hashing, Gemini, ...)
+
+    Responsibilities:
+    - dim: dimensionality of every vector
+    - embed: one L2-normalized float32 row per input text
+    """
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Input strings
+
+        Returns:
+            Array of shape (len(texts), dim), dtype float32, rows with unit norm (or zero)
+        """
+        ...
+
+class HashingEmbeddingProvider:
+    """
+    Feature-hashing vectorizer (signed hashing trick)
+
+    Responsibilities:
+    - Hash word tokens/bigrams (tokenize_vi) and character trigrams into dim buckets
+    - Apply sublinear term weighting and L2 normalization
+    """
+    def __init__(self, dim: int = 512, char_ngrams: int = 3):
+        """
+        Args:
+            dim: Output dimensionality
+            char_ngrams: Character n-gram size over folded text (0 disables)
+        """
+        if dim <= 0:
+            raise ValueError("dim must be positive")
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+
+    def _features(self, text: str) -> List[str]:
+        features = tokenize_vi(text)
+        n = self.char_ngrams
+        if n > 0:
+            folded = f" {fold_diacritics(normalize_vi(text))} "
+            features.extend(f"#{folded[i:i + n]}" for i in range(len(folded) - n + 1))
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                out[row, (value >> 1) % self.dim] += sign
+        out = np.sign(out) * np.log1p(np.abs(out))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out.astype(np.float32, copy=False)
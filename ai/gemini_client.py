@@ -5,15 +5,18 @@ Gemini LLM client implementation and streaming helpers
 
 Key features:
 - Configure and validate Gemini API (api_key, model, system_prompt)
-- generate_text with retry on transient errors
-- stream_chat with history conversion to Gemini format
+- generate_text with the shared RetryPolicy on transient errors; timeouts clamped to the caller's deadline
+- stream_chat with history conversion to Gemini format and cooperative cancellation
+- Upstream 429 / quota errors surface as LLMServiceError code RATE_LIMITED (feeds the adaptive limit)
 """
 
-from typing import Generator, List, Dict, Any
+from http import HTTPStatus
+from typing import Generator, List, Dict, Any, Optional
 from google.api_core import exceptions as google_exceptions
 import google.generativeai as genai
 
-from utils import logger, LLMServiceError, ValidationError, gemini_retry
+from utils import CancellationToken, RetryPolicy, logger, LLMServiceError, ValidationError, time_remaining
+from ai.limiter import RATE_LIMITED
 from ai.llm_client import LLMClient
 from domain import ChatMessage
 
@@ -40,7 +43,8 @@ class GeminiClient:
         model_name: str,
         request_timeout: int,
         stream_timeout: int,
-        system_prompt: str
+        system_prompt: str,
+        retry_policy: Optional[RetryPolicy] = None,
     ):
         """
         Initialize GeminiClient with API config and timeouts.
@@ -51,6 +55,7 @@ class GeminiClient:
             request_timeout: Timeout in seconds for non-streaming requests
             stream_timeout: Timeout in seconds for streaming
             system_prompt: System instruction for the model
+            retry_policy: Retry policy for generate_text (default: 3 attempts, shared retry budget)
 
         Raises:
             ValidationError: If api_key, model_name or system_prompt is invalid
@@ -63,6 +68,7 @@ class GeminiClient:
         self.request_timeout = request_timeout
         self.stream_timeout = stream_timeout
         self.system_prompt = system_prompt
+        self.retry_policy = retry_policy or RetryPolicy("llm_generate", max_attempts=3)
 
         self.model = self._init_model()
     
@@ -106,6 +112,53 @@ class GeminiClient:
                 message=f"Failed to init Gemini client"
             ) from e
     
+    @staticmethod
+    def _timeout(configured: float) -> float:
+        """
+        Request timeout that does not outlive the caller's deadline
+
+        Raises:
+            LLMServiceError: If the deadline has already passed
+        """
+        remaining = time_remaining()
+        if remaining is None:
+            return configured
+        if remaining <= 0:
+            raise LLMServiceError(
+                code="DEADLINE_EXCEEDED",
+                message="Deadline exceeded before calling Gemini",
+                status_code=HTTPStatus.GATEWAY_TIMEOUT.value,
+            )
+        return min(configured, remaining)
+
+    @staticmethod
+    def _rate_limited() -> LLMServiceError:
+        """Error for an upstream 429 / exhausted quota"""
+        return LLMServiceError(
+            code=RATE_LIMITED,
+            message="Gemini rate limit or quota exceeded",
+            status_code=HTTPStatus.TOO_MANY_REQUESTS.value,
+        )
+
+    @staticmethod
+    def _cancel_stream(stream: Any) -> None:
+        """
+        Stop the upstream call behind a partially consumed streaming response
+
+        The SDK response wraps the transport iterator: a gRPC call (cancel) or an
+        HTTP response body (close). Either stops token generation being billed.
+        """
+        upstream = getattr(stream, "_iterator", None)
+        for name in ("cancel", "close"):
+            method = getattr(upstream, name, None)
+            if callable(method):
+                try:
+                    method()
+                    logger.info("Gemini stream cancelled by consumer")
+                except Exception as e:
+                    logger.warning(f"Failed to cancel Gemini stream: {e}")
+                return
+
     @staticmethod
     def _to_gemini_history(history: List[ChatMessage]) -> List[Dict[str, Any]]:
         """
@@ -139,7 +192,6 @@ class GeminiClient:
             )
         return converted
         
-    @gemini_retry(max_retries=3)
     def generate_text(self, prompt: str) -> str:
         """
         Generate text from prompt
@@ -151,17 +203,24 @@ class GeminiClient:
             Generated content; empty string if blocked/filtered
 
         Raises:
-            LLMServiceError: On transient errors (timeout, 5xx) after retries
+            LLMServiceError: On transient errors (timeout, 5xx) after retries, or once the
+                caller's deadline has passed
         """
         if not prompt or not prompt.strip():
             raise ValidationError(message="Prompt must not be empty")
-        
+        return self.retry_policy.call(self._generate_once, prompt)
+
+    def _generate_once(self, prompt: str) -> str:
+        """One generate_content call, its timeout clamped to the remaining deadline"""
+        timeout = self._timeout(self.request_timeout)
         try:
             response = self.model.generate_content(
                 prompt, 
                 safety_settings=_SAFETY_SETTINGS,
-                request_options={"timeout": self.request_timeout}
+                request_options={"timeout": timeout}
             )
+        except google_exceptions.ResourceExhausted as e:
+            raise self._rate_limited() from e
         except google_exceptions.GoogleAPICallError as e:
             raise LLMServiceError(
                 code="GENERATION_FAILED",
@@ -176,26 +235,36 @@ class GeminiClient:
         
         return response.text.strip()
         
-    def stream_chat(self, history: List[ChatMessage], new_message: str) -> Generator[str, None, None]:
+    def stream_chat(
+        self,
+        history: List[ChatMessage],
+        new_message: str,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
         """
         Stream chat response from Gemini
 
         Args:
             history: List of previous chat messages (role/content)
             new_message: User's new message
+            cancel: Optional token; cancelling it (from any thread) cancels the upstream
+                call, which also unblocks a read waiting for the next chunk
 
         Yields:
             Chunks of generated text as they arrive
 
         Raises:
             ValidationError: If new_message empty
-            LLMServiceError: On Gemini streaming failure
+            LLMServiceError: On Gemini streaming failure (not raised after cancellation)
         """
         new_message = new_message.strip()
         if not new_message:
             raise ValidationError(message="New message must be not empty")
+        if cancel is not None and cancel.cancelled:
+            return
         
         gemini_history = self._to_gemini_history(history)
+        unregister = None
         
         try:
             chat = self.model.start_chat(history=gemini_history)
@@ -203,15 +272,33 @@ class GeminiClient:
                 new_message, 
                 stream=True, 
                 safety_settings=_SAFETY_SETTINGS,
-                request_options={"timeout": self.stream_timeout}
+                request_options={"timeout": self._timeout(self.stream_timeout)}
             )
+            if cancel is not None:
+                unregister = cancel.on_cancel(lambda: self._cancel_stream(stream))
 
-            for chunk in stream:
-                if getattr(chunk, "text", None):
-                    yield chunk.text
+            try:
+                for chunk in stream:
+                    if cancel is not None and cancel.cancelled:
+                        return
+                    if getattr(chunk, "text", None):
+                        yield chunk.text
+            except GeneratorExit:
+                self._cancel_stream(stream)
+                raise
         
-        except google_exceptions.GoogleAPICallError as e:
-            raise LLMServiceError(
-                code="STREAM_FAILED", 
-                message="Failed to stream response from Gemini"
-            ) from e
\ No newline at end of file
+        except Exception as e:
+            if cancel is not None and cancel.cancelled:
+                # The transport reports our own cancel as an error; the stream just ends
+                return
+            if isinstance(e, google_exceptions.ResourceExhausted):
+                raise self._rate_limited() from e
+            if isinstance(e, google_exceptions.GoogleAPICallError):
+                raise LLMServiceError(
+                    code="STREAM_FAILED", 
+                    message="Failed to stream response from Gemini"
+                ) from e
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+guarded_client.py
+
+LLMClient wrapper that routes every call through a CircuitBreaker
+
+Key features:
+- GuardedLLMClient: raises CircuitOpenError immediately while the breaker is open, so callers
+  fall back to degraded mode instead of waiting out timeouts and retries
+- Outcomes fed to the breaker: upstream errors fail, completed calls succeed with their
+  latency (time to first chunk for streams); cancellations and invalid input are ignored
+"""
+import time
+from typing import Generator, List, Optional, TYPE_CHECKING
+
+from utils import (
+    CancellationToken,
+    CircuitBreaker,
+    CircuitOpenError,
+    OverloadedError,
+    ValidationError,
+    logger,
+)
+from utils.circuit_breaker import OPEN
+
+if TYPE_CHECKING:
+    from ai.llm_client import LLMClient
+    from domain import ChatMessage
+
+class GuardedLLMClient:
+    """
+    Circuit breaker around an LLMClient (e.g. GeminiClient)
+
+    Responsibilities:
+    - generate_text / stream_chat: acquire the breaker, call the inner client, report the outcome
+    - available: False while the breaker is open
+    """
+    def __init__(self, inner: "LLMClient", breaker: CircuitBreaker):
+        """
+        Args:
+            inner: Client doing the actual calls
+            breaker: Breaker shared by every client of the same upstream
+        """
+        self.inner = inner
+        self.breaker = breaker
+
+    @property
+    def available(self) -> bool:
+        return self.breaker.state != OPEN
+
+    def generate_text(self, prompt: str) -> str:
+        self.breaker.acquire()
+        started = time.monotonic()
+        try:
+            text = self.inner.generate_text(prompt)
+        except BaseException as e:
+            self._report_error(e)
+            raise
+        self.breaker.on_success(time.monotonic() - started)
+        return text
+
+    def stream_chat(
+        self,
+        history: List["ChatMessage"],
+        new_message: str,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
+        self.breaker.acquire()
+        started = time.monotonic()
+        reported = False
+        try:
+            for chunk in self.inner.stream_chat(history, new_message, cancel=cancel):
+                if not reported:
+                    self.breaker.on_success(time.monotonic() - started)
+                    reported = True
+                yield chunk
+        except BaseException as e:
+            if not reported:
+                self._report_error(e, cancel)
+                reported = True
+            raise
+        finally:
+            if not reported:
+                # ended without a chunk: cancelled, or empty (e.g. safety-filtered) answer
+                self.breaker.on_ignored()
+
+    def _report_error(self, error: BaseException, cancel: Optional[CancellationToken] = None) -> None:
+        """Count upstream failures; ignore cancellation, invalid input and local rejections"""
+        local = isinstance(error, (ValidationError, OverloadedError, CircuitOpenError))
+        if (cancel is not None and cancel.cancelled) or local or not isinstance(error, Exception):
+            self.breaker.on_ignored()
+        else:
+            logger.warning(f"LLM call failed ({self.breaker.name} breaker): {error}")
+            self.breaker.on_failure()
@@ -0,0 +1,288 @@
+"""
+hedging.py
+
+Hedged chat streams: race a second identical stream against one that is slow to start
+
+Key features:
+- HedgePolicy: adaptive hedge delay (observed p95 time to first chunk, floored at min_delay)
+  and a hedge budget (at most ~max_rate extra streams per call, same token scheme as retries)
+- HedgedLLMClient: streams in worker threads; when no chunk arrives within the hedge delay a
+  second stream starts, the first one to produce a chunk wins and the other is cancelled
+- Errors are not hedged: a stream failing before its first chunk is left to the caller's
+  retry policy once no other stream is still running
+- Lane aware: with a scheduler, a hedge needs its own slot in the chat lane, taken only if one
+  is free right now (try_acquire), so hedges never push concurrency past the lane limit nor jump
+  ahead of queued calls; hedge slots report no latency, so only the caller's ticket feeds the
+  adaptive limit
+- Metrics: llm_hedge_streams_total{stream, outcome}, llm_hedges_denied_total{reason},
+  llm_hedge_threshold_seconds
+"""
+import contextvars
+import queue
+import threading
+import time
+from collections import deque
+from typing import Deque, Generator, List, Optional, Tuple, TYPE_CHECKING
+
+from ai.scheduler import LANE_CHAT
+from utils import CancellationToken, RetryBudget, closing_stream, logger, metrics
+
+if TYPE_CHECKING:
+    from ai.llm_client import LLMClient
+    from ai.scheduler import LLMScheduler, Ticket
+    from domain import ChatMessage
+
+PRIMARY = "primary"
+HEDGE = "hedge"
+
+# Scheduler flow of hedge slots
+HEDGE_FLOW = "hedge"
+
+_CHUNK = "chunk"
+_END = "end"
+_ERROR = "error"
+
+HEDGE_STREAMS = metrics.counter(
+    "llm_hedge_streams_total",
+    "Chat streams by role (primary / hedge) and outcome (won, lost, failed, cancelled)",
+    ("stream", "outcome"),
+)
+HEDGES_DENIED = metrics.counter(
+    "llm_hedges_denied_total", "Hedges not started: hedge budget spent or lane full", ("reason",)
+)
+HEDGE_THRESHOLD = metrics.gauge(
+    "llm_hedge_threshold_seconds", "Time without a first chunk after which a chat stream is hedged"
+)
+
+class HedgePolicy:
+    """
+    When to hedge a chat stream, and how often
+
+    Responsibilities:
+    - observe(ttft): record the time to first chunk of winning streams (sliding window)
+    - threshold: hedge delay, the `quantile` of observed times (None until `min_samples`)
+    - record_call() / try_hedge(): cap hedges to ~`max_rate` of calls
+    """
+    def __init__(
+        self,
+        *,
+        quantile: float = 0.95,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 1.0,
+        max_rate: float = 0.05,
+        burst: float = 2.0,
+    ):
+        """
+        Args:
+            quantile: Share of streams expected to start before a hedge is sent
+            window: Number of recent first-chunk times kept
+            min_samples: Observations needed before hedging starts
+            min_delay: Lower bound of the hedge delay (seconds)
+            max_rate: Hedges allowed per call (0.05: at most ~5% extra streams)
+            burst: Hedges that may be spent at once after a quiet period
+        """
+        if not 0 < quantile < 1:
+            raise ValueError("quantile must be in (0, 1)")
+        if not 1 <= min_samples <= window:
+            raise ValueError("Require 1 <= min_samples <= window")
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._budget = RetryBudget(ratio=max_rate, capacity=burst, min_per_second=0) if max_rate > 0 else None
+        self._lock = threading.Lock()
+
+    def observe(self, ttft: float) -> None:
+        with self._lock:
+            self._samples.append(ttft)
+
+    @property
+    def threshold(self) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        value = max(self.min_delay, ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))])
+        HEDGE_THRESHOLD.set(value)
+        return value
+
+    def record_call(self) -> None:
+        if self._budget is not None:
+            self._budget.record_call()
+
+    def try_hedge(self) -> bool:
+        """Spend one hedge; False when the budget is exhausted"""
+        if self._budget is not None and self._budget.try_spend():
+            return True
+        HEDGES_DENIED.inc(reason="budget")
+        return False
+
+class _Racer:
+    """One upstream stream of a hedged request"""
+    def __init__(self, role: str, ticket: Optional["Ticket"] = None):
+        self.role = role
+        self.ticket = ticket
+        self.cancel = CancellationToken()
+        self.started = time.monotonic()
+        self.done = False
+        self.outcome: Optional[str] = None
+
+    def settle(self, outcome: str) -> None:
+        """Record the stream's outcome once"""
+        if self.outcome is None:
+            self.outcome = outcome
+            HEDGE_STREAMS.inc(stream=self.role, outcome=outcome)
+
+class HedgedLLMClient:
+    """
+    LLMClient that hedges chat streams slow to produce their first chunk
+
+    Responsibilities:
+    - generate_text: pass through (roadmap calls are long and not latency critical)
+    - stream_chat: run the primary stream in a worker thread; after the policy's threshold
+      start one hedge if the budget allows; yield the winner's chunks, cancel the loser
+    - Propagate caller cancellation to every running stream
+    - Hold a lane slot for each hedge while its stream runs (the primary runs on the caller's)
+    """
+    def __init__(
+        self,
+        inner: "LLMClient",
+        policy: HedgePolicy,
+        scheduler: Optional["LLMScheduler"] = None,
+        lane: str = LANE_CHAT,
+    ):
+        """
+        Args:
+            inner: Client doing the actual calls (each stream gets its own cancel token)
+            policy: Hedge delay and budget, shared by all sessions
+            scheduler: Scheduler whose lane admits the primary call (ChatService); a hedge is
+                only started when the lane has a free slot right now
+            lane: Lane of the hedged calls
+        """
+        self.inner = inner
+        self.policy = policy
+        self.scheduler = scheduler
+        self.lane = lane
+
+    def generate_text(self, prompt: str) -> str:
+        return self.inner.generate_text(prompt)
+
+    def stream_chat(
+        self,
+        history: List["ChatMessage"],
+        new_message: str,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
+        self.policy.record_call()
+        threshold = self.policy.threshold
+        events: "queue.Queue[Tuple[_Racer, str, object]]" = queue.Queue()
+        racers: List[_Racer] = []
+        unlinks = []
+
+        def start(role: str, ticket: Optional["Ticket"] = None) -> _Racer:
+            racer = _Racer(role, ticket)
+            if cancel is not None:
+                unlinks.append(cancel.on_cancel(racer.cancel.cancel))
+            racers.append(racer)
+            context = contextvars.copy_context()  # keep the caller's deadline() in the worker
+            threading.Thread(
+                target=context.run,
+                args=(self._pump, racer, history, new_message, events),
+                name=f"llm-stream-{role}",
+                daemon=True,
+            ).start()
+            return racer
+
+        primary = start(PRIMARY)
+        hedge_at = None if threshold is None else primary.started + threshold
+        winner: Optional[_Racer] = None
+        error: Optional[BaseException] = None
+        try:
+            while True:
+                timeout = None
+                if winner is None and hedge_at is not None:
+                    timeout = max(0.0, hedge_at - time.monotonic())
+                try:
+                    racer, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedge_at = None
+                    if cancel is None or not cancel.cancelled:
+                        admitted, ticket = self._admit_hedge()
+                        if admitted:
+                            logger.info(f"Chat stream hedged: no first chunk after {threshold:.2f}s")
+                            start(HEDGE, ticket)
+                    continue
+
+                if winner is not None and racer is not winner:
+                    continue
+                if kind == _CHUNK:
+                    if winner is None:
+                        winner = racer
+                        hedge_at = None
+                        racer.settle("won")
+                        self.policy.observe(time.monotonic() - racer.started)
+                        for other in racers:
+                            if other is not racer:
+                                other.settle("lost")
+                                other.cancel.cancel("hedge_lost")
+                    yield payload
+                    continue
+
+                racer.done = True
+                if racer is winner:
+                    if kind == _ERROR:
+                        raise payload
+                    return
+                racer.settle("cancelled" if racer.cancel.cancelled else "failed")
+                if kind == _ERROR and error is None:
+                    error = payload
+                if racer is primary:
+                    hedge_at = None  # failures are retried by the caller, not hedged
+                if all(r.done for r in racers):
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            for unlink in unlinks:
+                unlink()
+            for racer in racers:
+                racer.settle("cancelled")
+                racer.cancel.cancel("closed")
+
+    def _admit_hedge(self) -> Tuple[bool, Optional["Ticket"]]:
+        """Take a free lane slot (when scheduled), then a hedge from the budget"""
+        ticket = None
+        if self.scheduler is not None:
+            ticket = self.scheduler.try_acquire(self.lane, HEDGE_FLOW)
+            if ticket is None:
+                HEDGES_DENIED.inc(reason="lane_full")
+                return False, None
+        if not self.policy.try_hedge():
+            if ticket is not None:
+                ticket.release()
+            return False, None
+        return True, ticket
+
+    def _pump(
+        self,
+        racer: _Racer,
+        history: List["ChatMessage"],
+        new_message: str,
+        events: "queue.Queue[Tuple[_Racer, str, object]]",
+    ) -> None:
+        """Worker body: forward one stream's chunks, end or error to the consumer"""
+        try:
+            stream = self.inner.stream_chat(history, new_message, cancel=racer.cancel)
+            with closing_stream(stream):
+                for chunk in stream:
+                    if racer.cancel.cancelled:
+                        break
+                    events.put((racer, _CHUNK, chunk))
+        except Exception as e:
+            events.put((racer, _ERROR, e))
+            return
+        finally:
+            if racer.ticket is not None:
+                racer.ticket.release()  # no latency sample: the lane limit follows the caller's calls
+        events.put((racer, _END, None))
@@ -0,0 +1,95 @@
+"""
+limiter.py
+
+Adaptive concurrency limit for LLM calls (additive increase, multiplicative decrease)
+
+Key features:
+- AIMDLimit: grows by ~1 per window of successful calls under the latency target, shrinks by
+  a factor on a 429 / overload or a slow call (at most once per cooldown)
+- is_rate_limited(): recognize upstream rate limiting (RATE_LIMITED code, 429 or quota errors)
+"""
+import time
+from typing import Callable, Optional
+
+from utils import LLMServiceError
+
+RATE_LIMITED = "RATE_LIMITED"
+
+class AIMDLimit:
+    """
+    Concurrency limit that follows the capacity the upstream actually delivers
+
+    Responsibilities:
+    - on_sample(latency, overloaded): update the limit from one finished call, return it
+    - Keep the limit within [min_limit, max_limit]
+
+    Not thread-safe on its own; LLMScheduler calls it under its lock.
+    """
+    def __init__(
+        self,
+        max_limit: int,
+        *,
+        latency_target: float,
+        min_limit: int = 1,
+        initial: Optional[int] = None,
+        backoff: float = 0.75,
+        cooldown: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_limit: Upper bound (the configured lane concurrency)
+            latency_target: Calls slower than this (seconds) count as congestion
+            min_limit: Lower bound, so a lane never stops entirely
+            initial: Starting limit (default: max_limit)
+            backoff: Factor applied on congestion (0 < backoff < 1)
+            cooldown: Minimum seconds between two decreases; one burst of failures
+                from the same window shrinks the limit once
+            clock: Monotonic time source (injectable for tests)
+
+        Raises:
+            ValueError: On inconsistent bounds or factor
+        """
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Require 1 <= min_limit <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self._clock = clock
+        self._limit = float(max_limit if initial is None else min(max(initial, min_limit), max_limit))
+        self._last_decrease = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def on_sample(self, latency: Optional[float], overloaded: bool = False) -> int:
+        """
+        Record one finished call
+
+        Args:
+            latency: Seconds the call took to answer (None: no latency signal)
+            overloaded: The upstream rejected the call for capacity (429) or it was shed
+
+        Returns:
+            The new integer limit
+        """
+        if overloaded or (latency is not None and latency > self.latency_target):
+            now = self._clock()
+            if now - self._last_decrease >= self.cooldown:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                self._last_decrease = now
+        elif latency is not None:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+        return self.limit
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True if the error means the upstream is out of capacity or quota"""
+    if isinstance(error, LLMServiceError) and error.code == RATE_LIMITED:
+        return True
+    text = str(error)
+    return "429" in text or "quota" in text.lower()
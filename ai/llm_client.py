@@ -5,11 +5,12 @@ Protocol definition for LLM client implementations (Gemini, OpenAI, etc.)
 
 Key features:
 - generate_text: single prompt → full response
-- stream_chat: history + new message → streaming chunks
+- stream_chat: history + new message → streaming chunks (cooperatively cancellable)
 """
 
-from typing import Protocol, List, Generator
+from typing import Protocol, List, Generator, Optional
 from domain import ChatMessage
+from utils import CancellationToken
 
 class LLMClient(Protocol):
     """
@@ -32,13 +33,20 @@ class LLMClient(Protocol):
         """
         ...
 
-    def stream_chat(self, history: List[ChatMessage], new_message: str) -> Generator[str, None, None]:
+    def stream_chat(
+        self,
+        history: List[ChatMessage],
+        new_message: str,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
         """
         Stream chat response given history and new user message.
 
         Args:
             history: Previous messages in the conversation
             new_message: Latest user message
+            cancel: Optional token; once cancelled the upstream call is stopped and the
+                stream ends quietly (no error)
 
         Yields:
             Chunks of the model response as they arrive
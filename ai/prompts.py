@@ -6,6 +6,7 @@ Prompt templates and system instructions for the LearnPath Gemini-based assistan
 Key features:
 - SYSTEM_PROMPT: system instruction for chat behavior (Vietnamese, education-focused)
 - ROADMAP_PROMPT_TEMPLATE: template for generating roadmap JSON from user profile
+- MILESTONE_PROMPT_TEMPLATE: template for regenerating selected weeks of an existing roadmap
 """
 
 from string import Template
@@ -98,4 +99,50 @@ Ví dụ mẫu (chỉ để tham khảo, không copy):
 - Mỗi milestone PHẢI có ít nhất 1 resource
 4. Nội dung phải bằng Tiếng Việt
 """
+)
+
+MILESTONE_PROMPT_TEMPLATE = Template(
+"""
+Người dùng đang theo lộ trình học tập "$topic" gồm $duration_week tuần.
+
+Thông tin hiện tại của người dùng:
+- Mục tiêu: $goal
+- Trình độ hiện tại: $level
+- Thời gian hàng ngày: $time_commitment
+- Phong cách học: $learning_style
+- Nền tảng: $background
+- Ràng buộc: $constraints
+
+Các tuần trong lộ trình (giữ nguyên các tuần không được yêu cầu thay đổi):
+$outline
+
+Yêu cầu thay đổi của người dùng: $instruction
+
+Hãy tạo lại NỘI DUNG cho các tuần sau: $weeks
+
+YÊU CẦU QUAN TRỌNG:
+1. Chỉ output chuỗi JSON thuần tuý, không có text giải thích, không có markdown (không dùng markdown block ```json)
+2. Output là MỘT mảng JSON, mỗi phần tử là một milestone với cấu trúc:
+{
+    "week": <số tuần>,
+    "topic": "Chủ đề tuần <số tuần>",
+    "description": "Mô tả chi tiết những gì cần học trong tuần <số tuần>",
+    "estimated_time": "Thời gian ước tính cho tuần <số tuần> (nếu có)",
+    "learning_objectives": ["Mục tiêu học tập (nếu có)"],
+    "resources": [
+        {
+            "title": "Tên tài liệu",
+            "url": "https://example.com",
+            "type": "video | article | book | course | practice | project | documentation",
+            "description": "Mô tả tài liệu (nếu có)",
+            "difficulty": "beginner | intermediate | advanced"
+        }
+    ]
+}
+3. Ràng buộc validation:
+- Mảng PHẢI chứa đúng các tuần: $weeks (mỗi tuần đúng một lần)
+- Nội dung phải nối tiếp hợp lý với các tuần giữ nguyên ở trên
+- Mỗi milestone PHẢI có ít nhất 1 resource
+4. Nội dung phải bằng Tiếng Việt
+"""
 )
\ No newline at end of file
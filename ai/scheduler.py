@@ -0,0 +1,365 @@
+"""
+scheduler.py
+
+Process-wide admission control for LLM calls: priority lanes with weighted fair queueing
+
+Key features:
+- LLMScheduler: one lane per kind of work (chat, roadmap, background), each with its own
+  concurrency limit so a burst in one lane cannot starve another
+- Weighted fair queueing across flows (sessions) inside a lane: start-time fair queueing on
+  virtual finish tags, so a session with many queued calls does not delay others
+- Ticket: submit() returns immediately; wait()/position drive queue-position status updates;
+  release() frees the slot; cancel() leaves the queue
+- try_acquire(): a slot only if one is free right now (optional extra work such as hedges)
+- Adaptive limits: a lane with an AIMDLimit resizes from release feedback (latency, 429s)
+- Load shedding: with max_queue set, submit() fails fast with OverloadedError once a lane's
+  queue is full instead of queueing without bound
+- ScheduledLLMClient: LLMClient wrapper that takes a slot in a lane for every call
+- Queue depth, in-flight, limit, shed and wait-time metrics per lane
+"""
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from typing import Callable, Dict, Generator, List, Mapping, Optional, Tuple, TYPE_CHECKING
+from uuid import uuid4
+
+from ai.limiter import AIMDLimit, is_rate_limited
+from utils import CancellationToken, OverloadedError, LLMServiceError, logger, metrics
+
+if TYPE_CHECKING:
+    from ai.llm_client import LLMClient
+    from domain import ChatMessage
+
+LANE_CHAT = "chat"
+LANE_ROADMAP = "roadmap"
+LANE_BACKGROUND = "background"
+
+DEFAULT_LANE_LIMITS: Dict[str, int] = {LANE_CHAT: 16, LANE_ROADMAP: 2, LANE_BACKGROUND: 1}
+
+QUEUE_DEPTH = metrics.gauge("llm_queue_depth", "LLM calls waiting for a slot", ("lane",))
+IN_FLIGHT = metrics.gauge("llm_in_flight", "LLM calls holding a slot", ("lane",))
+ADMITTED = metrics.counter("llm_admitted_total", "LLM calls granted a slot", ("lane",))
+QUEUE_WAIT = metrics.counter("llm_queue_wait_seconds_total", "Time LLM calls spent queued", ("lane",))
+LIMIT = metrics.gauge("llm_concurrency_limit", "Current concurrency limit of the lane", ("lane",))
+SHED = metrics.counter("llm_shed_total", "LLM calls rejected because the lane queue was full", ("lane",))
+
+_WAITING, _GRANTED, _DONE = 0, 1, 2
+
+class Ticket:
+    """
+    A request for one slot in a lane
+
+    Responsibilities:
+    - wait(timeout): block until granted (True) or timeout/cancel (False)
+    - position: 1-based place in the lane queue (0 once granted)
+    - release(latency, overloaded): give the slot back (idempotent), optionally reporting how the
+      call went so an adaptive lane can resize; also usable as a context manager
+    - cancel(): leave the queue, or release if already granted
+    """
+    def __init__(self, scheduler: LLMScheduler, lane: str, flow: str, tag: Tuple[float, int]):
+        self._scheduler = scheduler
+        self.lane = lane
+        self.flow = flow
+        self.tag = tag
+        self.state = _WAITING
+        self.submitted_at = scheduler._clock()
+        self.granted_at: Optional[float] = None
+        self._event = threading.Event()
+
+    @property
+    def granted(self) -> bool:
+        return self.state == _GRANTED
+
+    @property
+    def cancelled(self) -> bool:
+        return self.state == _DONE and self.granted_at is None
+
+    @property
+    def position(self) -> int:
+        return self._scheduler._position(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the slot is granted; False on timeout or if the ticket was cancelled"""
+        self._event.wait(timeout)
+        return self.state == _GRANTED
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        """
+        Give the slot back
+
+        Args:
+            latency: Seconds until the upstream answered (first chunk for streams); None if unknown
+            overloaded: The upstream rejected the call for capacity (429)
+        """
+        self._scheduler._release(self, latency, overloaded)
+
+    def cancel(self) -> None:
+        self._scheduler._release(self)
+
+    def __enter__(self) -> Ticket:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+class _Lane:
+    """Queue and accounting of one lane (guarded by the scheduler lock)"""
+    def __init__(self, name: str, limit: int, limiter: Optional[AIMDLimit] = None):
+        self.name = name
+        self.limiter = limiter
+        self.limit = limiter.limit if limiter is not None else limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.heap: List[Tuple[Tuple[float, int], Ticket]] = []
+        self.virtual_time = 0.0
+        self.flow_finish: Dict[str, float] = {}
+
+class LLMScheduler:
+    """
+    Admission control in front of LLMClient
+
+    Responsibilities:
+    - submit(lane, flow): enqueue with a virtual finish tag = max(lane clock, flow's last tag) + cost / weight
+    - try_acquire(lane, flow): grant at once or not at all, never queueing ahead of waiting calls
+    - Grant slots in tag order while the lane is under its concurrency limit
+    - Resize adaptive lanes from release feedback; shed submissions beyond max_queue
+    - Expose per-lane queue depth, in-flight count, limit and queueing time
+    """
+    def __init__(
+        self,
+        lane_limits: Optional[Mapping[str, int]] = None,
+        *,
+        limiters: Optional[Mapping[str, AIMDLimit]] = None,
+        max_queue: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            lane_limits: Concurrency limit per lane name (default: DEFAULT_LANE_LIMITS)
+            limiters: Adaptive limit per lane; replaces the static limit of that lane
+            max_queue: Waiting calls allowed per lane before submit() sheds (None: unbounded)
+            clock: Monotonic time source (injectable for tests)
+        """
+        limits = dict(DEFAULT_LANE_LIMITS if lane_limits is None else lane_limits)
+        limiters = dict(limiters or {})
+        if any(limit < 1 for limit in limits.values()):
+            raise ValueError("Lane limits must be >= 1")
+        if max_queue is not None and max_queue < 0:
+            raise ValueError("max_queue must be >= 0")
+        self._lanes = {
+            name: _Lane(name, limits.get(name, 1), limiters.get(name))
+            for name in {**limits, **limiters}
+        }
+        self.max_queue = max_queue
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._seq = 0
+        for lane in self._lanes.values():
+            self._publish(lane)
+
+    @property
+    def lanes(self) -> List[str]:
+        return list(self._lanes)
+
+    def submit(self, lane: str, flow: str, *, weight: float = 1.0, cost: float = 1.0) -> Ticket:
+        """
+        Enqueue a call; the ticket may already be granted when returned
+
+        Args:
+            lane: Lane name
+            flow: Fairness key (session id); flows share the lane in proportion to weight
+            weight: Share of this flow relative to others
+            cost: Relative size of the call
+
+        Raises:
+            ValueError: If the lane does not exist
+            OverloadedError: If the lane is at its limit and its queue is full
+        """
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown lane {lane!r}")
+        with self._lock:
+            state = self._lanes[lane]
+            if self.max_queue is not None and state.in_flight >= state.limit and state.waiting >= self.max_queue:
+                SHED.inc(lane=lane)
+                logger.warning(f"LLM lane {lane} overloaded (limit={state.limit}, waiting={state.waiting}); shedding")
+                raise OverloadedError()
+            return self._enqueue(state, flow, weight, cost)
+
+    def try_acquire(self, lane: str, flow: str, *, weight: float = 1.0, cost: float = 1.0) -> Optional[Ticket]:
+        """
+        Take a slot only if the lane is under its limit with nobody queued
+
+        Returns:
+            Granted Ticket, or None (nothing is queued)
+
+        Raises:
+            ValueError: If the lane does not exist
+        """
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown lane {lane!r}")
+        with self._lock:
+            state = self._lanes[lane]
+            if state.waiting or state.in_flight >= state.limit:
+                return None
+            return self._enqueue(state, flow, weight, cost)
+
+    def _enqueue(self, state: _Lane, flow: str, weight: float, cost: float) -> Ticket:
+        """Tag, queue and dispatch a new ticket (caller holds the lock)"""
+        start = max(state.virtual_time, state.flow_finish.get(flow, 0.0))
+        finish = start + cost / weight
+        state.flow_finish[flow] = finish
+        self._seq += 1
+        ticket = Ticket(self, state.name, flow, (finish, self._seq))
+        heapq.heappush(state.heap, (ticket.tag, ticket))
+        state.waiting += 1
+        self._dispatch(state)
+        self._publish(state)
+        if len(state.flow_finish) > 1024 + 2 * state.waiting:
+            state.flow_finish = {f: t for f, t in state.flow_finish.items() if t > state.virtual_time}
+        return ticket
+
+    def acquire(
+        self,
+        lane: str,
+        flow: str,
+        *,
+        weight: float = 1.0,
+        cost: float = 1.0,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Ticket:
+        """
+        Submit and block until granted; returns a cancelled ticket if the token fires first
+
+        Raises:
+            OverloadedError: If the lane sheds the call (see submit)
+        """
+        ticket = self.submit(lane, flow, weight=weight, cost=cost)
+        if ticket.granted:
+            return ticket
+        unregister = cancel.on_cancel(ticket.cancel) if cancel is not None else None
+        try:
+            ticket.wait()
+        finally:
+            if unregister is not None:
+                unregister()
+        return ticket
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-lane current limit, in-flight and waiting counts"""
+        with self._lock:
+            return {
+                name: {"limit": lane.limit, "in_flight": lane.in_flight, "waiting": lane.waiting}
+                for name, lane in self._lanes.items()
+            }
+
+    def _dispatch(self, lane: _Lane) -> None:
+        """Grant queued tickets in tag order while under the limit (caller holds the lock)"""
+        now = self._clock()
+        while lane.heap and lane.in_flight < lane.limit:
+            tag, ticket = heapq.heappop(lane.heap)
+            if ticket.state != _WAITING:
+                continue  # cancelled while queued
+            lane.waiting -= 1
+            lane.in_flight += 1
+            lane.virtual_time = max(lane.virtual_time, tag[0])
+            ticket.state = _GRANTED
+            ticket.granted_at = now
+            ticket._event.set()
+            ADMITTED.inc(lane=lane.name)
+            QUEUE_WAIT.inc(now - ticket.submitted_at, lane=lane.name)
+
+    def _release(self, ticket: Ticket, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        with self._lock:
+            lane = self._lanes[ticket.lane]
+            if ticket.state == _WAITING:
+                lane.waiting -= 1  # stays in the heap, skipped by _dispatch
+            elif ticket.state == _GRANTED:
+                lane.in_flight -= 1
+                if lane.limiter is not None and (latency is not None or overloaded):
+                    limit = lane.limiter.on_sample(latency, overloaded)
+                    if limit != lane.limit:
+                        logger.info(f"LLM lane {lane.name} limit {lane.limit} -> {limit}")
+                        lane.limit = limit
+            else:
+                return
+            ticket.state = _DONE
+            ticket._event.set()
+            self._dispatch(lane)
+            self._publish(lane)
+
+    def _position(self, ticket: Ticket) -> int:
+        with self._lock:
+            if ticket.state != _WAITING:
+                return 0
+            lane = self._lanes[ticket.lane]
+            return 1 + sum(1 for tag, other in lane.heap if other.state == _WAITING and tag < ticket.tag)
+
+    @staticmethod
+    def _publish(lane: _Lane) -> None:
+        QUEUE_DEPTH.set(lane.waiting, lane=lane.name)
+        IN_FLIGHT.set(lane.in_flight, lane=lane.name)
+        LIMIT.set(lane.limit, lane=lane.name)
+
+class ScheduledLLMClient:
+    """
+    LLMClient that takes a scheduler slot in a fixed lane for every call
+
+    Responsibilities:
+    - generate_text: block for a slot, call the inner client, release with its latency
+    - stream_chat: hold the slot for the whole stream (released on completion or close),
+      reporting time to first chunk
+    - Report upstream rate limiting (429) so an adaptive lane shrinks
+    """
+    def __init__(self, inner: LLMClient, scheduler: LLMScheduler, lane: str, flow: Optional[str] = None):
+        """
+        Args:
+            inner: Client doing the actual calls
+            scheduler: Shared scheduler
+            lane: Lane for all calls of this client
+            flow: Fairness key; None gives every call its own flow (FIFO within the lane)
+        """
+        self.inner = inner
+        self.scheduler = scheduler
+        self.lane = lane
+        self.flow = flow
+
+    def generate_text(self, prompt: str) -> str:
+        ticket = self.scheduler.acquire(self.lane, self.flow or uuid4().hex)
+        started = self.scheduler._clock()
+        try:
+            text = self.inner.generate_text(prompt)
+        except LLMServiceError as e:
+            ticket.release(self.scheduler._clock() - started, overloaded=is_rate_limited(e))
+            raise
+        except BaseException:
+            ticket.release()
+            raise
+        ticket.release(self.scheduler._clock() - started)
+        return text
+
+    def stream_chat(
+        self,
+        history: List[ChatMessage],
+        new_message: str,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
+        ticket = self.scheduler.acquire(self.lane, self.flow or uuid4().hex, cancel=cancel)
+        if not ticket.granted:
+            return
+        started = self.scheduler._clock()
+        first_chunk: Optional[float] = None
+        overloaded = False
+        try:
+            for chunk in self.inner.stream_chat(history, new_message, cancel=cancel):
+                if first_chunk is None:
+                    first_chunk = self.scheduler._clock() - started
+                yield chunk
+        except LLMServiceError as e:
+            overloaded = is_rate_limited(e)
+            if first_chunk is None:
+                first_chunk = self.scheduler._clock() - started
+            raise
+        finally:
+            ticket.release(first_chunk, overloaded)
@@ -0,0 +1,24 @@
+"""
+HTTP API layer for LearnPath chatbot (headless alternative to the Streamlit UI)
+
+Key features:
+- ChatApi: ASGI app streaming AppService.handle_message events as Server-Sent Events
+- ChatSocket: multiplexed WebSocket streams (chat, roadmap submit and progress) with per-stream cancel
+- drive_events: pump a blocking event generator from asyncio and close it on stop
+- encode_event, event_name: SSE wire format of application events (orjson)
+- Run with: python -m api (uvicorn)
+"""
+
+from .sse import encode_event, event_name
+from .streaming import drive_events
+from .websocket import ChatSocket
+from .server import ChatApi, SESSION_COOKIE
+
+__all__ = [
+    "ChatApi",
+    "ChatSocket",
+    "drive_events",
+    "SESSION_COOKIE",
+    "encode_event",
+    "event_name",
+]
@@ -0,0 +1,43 @@
+"""
+__main__.py
+
+Command-line entry point for the HTTP/SSE API server
+
+Key features:
+- build_api(): wire ChatApi with the session store built by services.bootstrap, the same
+  composition root as app.py (breaker-guarded Gemini client, hedged chat streams, shared LLM
+  scheduler, roadmap jobs, answer cache, thread-safe indexed session histories)
+- main(): serve it with uvicorn (python -m api --host 0.0.0.0 --port 8000)
+"""
+from __future__ import annotations
+
+import argparse
+from typing import Optional
+
+def build_api():
+    """Build ChatApi on the process-wide session store"""
+    from api.server import ChatApi
+    from config import settings
+    from services import build_components, build_session_store
+
+    return ChatApi(
+        build_session_store(build_components(settings)),
+        max_threads=settings.API_WORKER_THREADS,
+        secure_cookie=settings.API_SECURE_COOKIE,
+    )
+
+def main(argv: Optional[list] = None) -> int:
+    """CLI entry point: serve the API with uvicorn"""
+    import uvicorn
+    from config import settings
+
+    parser = argparse.ArgumentParser(description="LearnPath HTTP/SSE API server")
+    parser.add_argument("--host", default=settings.API_HOST, help="Bind address")
+    parser.add_argument("--port", type=int, default=settings.API_PORT, help="Bind port")
+    args = parser.parse_args(argv)
+
+    uvicorn.run(build_api(), host=args.host, port=args.port, log_level=settings.LOG_LEVEL.lower())
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
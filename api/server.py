@@ -0,0 +1,260 @@
+"""
+server.py
+
+Headless ASGI application exposing AppService over HTTP and Server-Sent Events
+
+Key features:
+- ChatApi: framework-free ASGI app (run with uvicorn: python -m api)
+- POST /chat {"message": ...} streams handle_message() events as SSE (text, status,
+  error, session_expired, then done)
+- POST /session/reset clears the session history; GET /health reports store occupancy;
+  GET /metrics exposes the metrics registry (Prometheus text format)
+- WebSocket /ws multiplexes chat and roadmap submit/progress streams with per-stream cancel (ChatSocket)
+- Sessions keyed by cookie (or X-Session-Id header) and kept in the process-wide SessionStore
+- Blocking generator steps run on a bounded thread pool; client disconnect closes the stream
+"""
+from __future__ import annotations
+
+import asyncio
+from http import HTTPStatus
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import CookieError, SimpleCookie
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import uuid4
+
+import orjson
+
+from api.sse import DONE_FRAME, dumps, encode_event
+from api.streaming import drive_events
+from api.websocket import ChatSocket
+from domain import Event
+from services.session_store import SessionStore, is_valid_session_id
+from utils import CancellationToken, LearnPathException, ValidationError, logger, metrics
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Headers = List[Tuple[bytes, bytes]]
+
+SESSION_COOKIE = "learnpath_session"
+SESSION_HEADER = b"x-session-id"
+
+_SSE_HEADERS: Headers = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),
+]
+_JSON_CONTENT_TYPE = (b"content-type", b"application/json")
+_METRICS_CONTENT_TYPE = (b"content-type", b"text/plain; version=0.0.4; charset=utf-8")
+
+class ChatApi:
+    """
+    ASGI application around a SessionStore of AppService instances
+
+    Responsibilities:
+    - Route HTTP requests; resolve or mint the session id and set the session cookie
+    - Stream handle_message() events as SSE without blocking the event loop
+    - Allow one in-flight message per session (409 otherwise)
+    - Close the event generator when the client disconnects or the stream ends
+    """
+    def __init__(
+        self,
+        store: SessionStore,
+        *,
+        max_threads: int = 32,
+        max_body_bytes: int = 16 * 1024,
+        max_streams: int = 8,
+        secure_cookie: bool = False,
+    ):
+        """
+        Args:
+            store: Process-wide session store (its factory builds each session's AppService)
+            max_threads: Worker threads for blocking AppService calls (bounds concurrent LLM streams)
+            max_body_bytes: Largest accepted request body
+            max_streams: Concurrent streams per WebSocket connection
+            secure_cookie: Add the Secure attribute to the session cookie (HTTPS deployments)
+        """
+        self._store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="api")
+        self.max_body_bytes = max_body_bytes
+        self.max_streams = max_streams
+        self._cookie_attrs = "; Path=/; HttpOnly; SameSite=Lax" + ("; Secure" if secure_cookie else "")
+        self._busy: Set[str] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        route = (scope["method"], scope["path"])
+        if route == ("GET", "/health"):
+            await self._send_json(send, 200, {"status": "ok", **self._store.stats()})
+        elif route == ("GET", "/metrics"):
+            await send({"type": "http.response.start", "status": 200, "headers": [_METRICS_CONTENT_TYPE]})
+            await send({"type": "http.response.body", "body": metrics.render_prometheus().encode("utf-8")})
+        elif route == ("POST", "/chat"):
+            await self._chat(scope, receive, send)
+        elif route == ("POST", "/session/reset"):
+            await self._reset(scope, send)
+        else:
+            await self._send_error(send, LearnPathException(message="Not found", code="NOT_FOUND", status_code=HTTPStatus.NOT_FOUND.value))
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _chat(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Stream the answer to one user message as SSE"""
+        try:
+            body = await self._read_body(receive)
+        except ValidationError as e:
+            await self._send_error(send, e)
+            return
+        try:
+            message = orjson.loads(body).get("message") if body else None
+        except (orjson.JSONDecodeError, AttributeError):
+            message = None
+        if not isinstance(message, str):
+            await self._send_error(send, ValidationError(message="Body must be a JSON object with a string 'message'"))
+            return
+
+        session_id, cookie = self._session_id(scope)
+        if session_id in self._busy:
+            await self._send_error(send, _session_busy(), cookie)
+            return
+        self._busy.add(session_id)
+        loop = asyncio.get_running_loop()
+        try:
+            app = await loop.run_in_executor(self._executor, self._store.checkout, session_id)
+        except Exception as e:
+            # Nothing was sent yet: answer with a JSON error instead of dropping the response
+            self._busy.discard(session_id)
+            if not isinstance(e, LearnPathException):
+                logger.exception(f"Session checkout failed: {e}")
+                e = LearnPathException()
+            await self._send_error(send, e, cookie)
+            return
+        disconnected = asyncio.Event()
+        watcher = asyncio.create_task(self._watch_disconnect(receive, disconnected))
+
+        async def emit(event: Event) -> None:
+            await send({"type": "http.response.body", "body": encode_event(event), "more_body": True})
+
+        try:
+            await send({"type": "http.response.start", "status": 200, "headers": _SSE_HEADERS + cookie})
+            cancel = CancellationToken()
+            if await drive_events(self._executor, app.handle_message(message, cancel=cancel), emit, disconnected, cancel):
+                await send({"type": "http.response.body", "body": DONE_FRAME, "more_body": False})
+            else:
+                logger.info("Client disconnected mid-stream; event stream closed")
+        finally:
+            watcher.cancel()
+            await loop.run_in_executor(self._executor, self._store.checkin, session_id)
+            self._busy.discard(session_id)
+
+    async def _websocket(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Accept a WebSocket on /ws and serve multiplexed streams for the caller's session"""
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+        if scope["path"] != "/ws":
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        session_id, cookie = self._session_id(scope)
+        await send({"type": "websocket.accept", "headers": cookie})
+        socket = ChatSocket(self._store, self._executor, self._busy, session_id, send, max_streams=self.max_streams)
+        await socket.run(receive)
+
+    async def _reset(self, scope: Scope, send: Send) -> None:
+        """Start a new conversation for the caller's session"""
+        session_id, cookie = self._session_id(scope)
+        if session_id in self._busy:
+            await self._send_error(send, _session_busy(), cookie)
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._store.discard, session_id)
+        await self._send_json(send, 200, {"status": "reset"}, cookie)
+
+    async def _read_body(self, receive: Receive) -> bytes:
+        """
+        Read the full request body
+
+        Raises:
+            ValidationError: If the body exceeds max_body_bytes
+        """
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                raise ValidationError(
+                    message=f"Request body exceeds {self.max_body_bytes} bytes",
+                    status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE.value,
+                )
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    async def _watch_disconnect(receive: Receive, disconnected: asyncio.Event) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+                return
+
+    def _session_id(self, scope: Scope) -> Tuple[str, Headers]:
+        """Return the caller's session id and the Set-Cookie header to send (empty if unchanged)"""
+        session_id = _header(scope["headers"], SESSION_HEADER) or _cookie(scope["headers"], SESSION_COOKIE)
+        if session_id and is_valid_session_id(session_id):
+            return session_id, []
+        session_id = uuid4().hex
+        return session_id, [(b"set-cookie", f"{SESSION_COOKIE}={session_id}{self._cookie_attrs}".encode("ascii"))]
+
+    @staticmethod
+    async def _send_json(send: Send, status: int, payload: Any, headers: Iterable[Tuple[bytes, bytes]] = ()) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": [_JSON_CONTENT_TYPE, *headers]})
+        await send({"type": "http.response.body", "body": dumps(payload)})
+
+    @classmethod
+    async def _send_error(cls, send: Send, error: LearnPathException, headers: Iterable[Tuple[bytes, bytes]] = ()) -> None:
+        await cls._send_json(send, error.status_code, error.to_dict(), headers)
+
+def _session_busy() -> LearnPathException:
+    return LearnPathException(
+        message="A message is already being answered for this session",
+        code="SESSION_BUSY",
+        status_code=HTTPStatus.CONFLICT.value,
+    )
+
+def _header(headers: Iterable[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+def _cookie(headers: Iterable[Tuple[bytes, bytes]], name: str) -> Optional[str]:
+    raw = _header(headers, b"cookie")
+    if not raw:
+        return None
+    try:
+        morsel = SimpleCookie(raw).get(name)
+    except CookieError:
+        return None
+    return morsel.value if morsel is not None else None
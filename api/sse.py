@@ -0,0 +1,47 @@
+"""
+sse.py
+
+Server-Sent Events encoding of application events
+
+Key features:
+- event_name(): stable wire name per Event type (text, status, error, session_expired,
+  roadmap_queued, roadmap_ready)
+- encode_event(): one SSE frame; payload serialized with orjson (dataclasses natively,
+  pydantic models through model_dump)
+- dumps(): the same JSON encoder for plain API responses
+"""
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+
+from domain import ErrorOccurred, Event, RoadmapQueued, RoadmapReady, SessionExpired, StatusUpdate, TextChunk
+
+EVENT_NAMES = {
+    TextChunk: "text",
+    StatusUpdate: "status",
+    ErrorOccurred: "error",
+    SessionExpired: "session_expired",
+    RoadmapQueued: "roadmap_queued",
+    RoadmapReady: "roadmap_ready",
+}
+
+# Sent once after the last event of a stream
+DONE_FRAME = b"event: done\ndata: {}\n\n"
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(payload: Any) -> bytes:
+    """Serialize payload to JSON bytes (UTF-8, no ASCII escaping)"""
+    return orjson.dumps(payload, default=_default)
+
+def event_name(event: Event) -> str:
+    """Wire name of an event type"""
+    return EVENT_NAMES.get(type(event), "event")
+
+def encode_event(event: Event) -> bytes:
+    """Encode one event as an SSE frame (`event: <name>` + one `data:` line)"""
+    return b"event: " + event_name(event).encode("ascii") + b"\ndata: " + dumps(event) + b"\n\n"
@@ -0,0 +1,61 @@
+"""
+streaming.py
+
+Drive blocking event generators from asyncio
+
+Key features:
+- drive_events(): step a sync generator on a thread pool, hand each event to an async
+  emitter, stop early when a stop event is set, and always close the generator
+- On stop the CancellationToken is fired first, so a step blocked on the next LLM chunk
+  returns promptly; closing then propagates GeneratorExit down the pipeline
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, Generator, Optional
+
+from domain import Event
+from utils import CancellationToken
+
+_END = object()
+
+async def drive_events(
+    executor: Executor,
+    events: Generator[Event, None, None],
+    emit: Callable[[Event], Awaitable[None]],
+    stop: asyncio.Event,
+    cancel: Optional[CancellationToken] = None,
+) -> bool:
+    """
+    Pump events from a blocking generator until it ends or stop is set
+
+    A generator cannot be closed while a step is executing, so on stop the in-flight
+    step is allowed to finish (its event is dropped) before the generator is closed.
+
+    Args:
+        executor: Thread pool running the blocking generator steps
+        events: Generator to drive (closed on return)
+        emit: Coroutine called with each event, in order
+        stop: Set to stop early (client cancel or disconnect)
+        cancel: Token the generator was started with; cancelled when stop is set
+
+    Returns:
+        True if the generator was exhausted, False if stopped early
+    """
+    loop = asyncio.get_running_loop()
+    stopped = asyncio.ensure_future(stop.wait())
+    try:
+        while True:
+            step = loop.run_in_executor(executor, next, events, _END)
+            await asyncio.wait({step, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            if stop.is_set():
+                if cancel is not None:
+                    cancel.cancel("client")
+                await asyncio.wait({step})
+                return False
+            event = step.result()
+            if event is _END:
+                return True
+            await emit(event)
+    finally:
+        stopped.cancel()
+        await loop.run_in_executor(executor, events.close)
@@ -0,0 +1,203 @@
+"""
+websocket.py
+
+Multiplexed WebSocket protocol over one connection per client
+
+Key features:
+- ChatSocket: several in-flight streams per connection, each tagged by a client-chosen id
+- Client ops (JSON text frames): {"op": "chat", "id", "message"},
+  {"op": "submit_roadmap", "id", "profile", "duration_week"?} (roadmap_queued with the job id,
+  then progress), {"op": "roadmap", "id", "job_id"} (resume polling a job), {"op": "cancel", "id"}
+- Server frames: {"id", "event", "data"} per application event, then "done" or "cancelled";
+  "rejected" carries LearnPathException.to_dict for invalid ops
+- Cancel (or disconnect) fires the stream's CancellationToken and closes its generator,
+  which cancels the upstream LLM call
+"""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, Generator, Optional, Set, Tuple
+
+import orjson
+from pydantic import ValidationError as PydanticValidationError
+
+from api.sse import dumps, event_name
+from api.streaming import drive_events
+from domain import Event, UserProfile
+from services.app_service import AppService
+from services.session_store import SessionStore
+from utils import CancellationToken, LearnPathException, ValidationError, logger
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+
+class ChatSocket:
+    """
+    One accepted WebSocket connection bound to a session
+
+    Responsibilities:
+    - Parse client ops and start, cancel or reject streams
+    - Run each stream as its own task; serialize frames onto the socket
+    - Keep at most one chat stream per session (shared busy set with the SSE endpoint)
+    - Stop every stream when the connection closes
+    """
+    def __init__(
+        self,
+        store: SessionStore,
+        executor: Executor,
+        busy: Set[str],
+        session_id: str,
+        send: Send,
+        *,
+        max_streams: int = 8,
+    ):
+        """
+        Args:
+            store: Process-wide session store
+            executor: Thread pool for blocking AppService calls
+            busy: Session ids with a chat stream in flight (shared across connections)
+            session_id: Session this connection belongs to
+            send: ASGI send callable of the connection
+            max_streams: Concurrent streams allowed on this connection
+        """
+        self._store = store
+        self._executor = executor
+        self._busy = busy
+        self.session_id = session_id
+        self._send = send
+        self.max_streams = max_streams
+        self._send_lock = asyncio.Lock()
+        self._streams: Dict[str, Tuple[asyncio.Task, asyncio.Event]] = {}
+
+    async def run(self, receive: Receive) -> None:
+        """Serve client ops until the connection closes, then stop all streams"""
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message["type"] == "websocket.receive":
+                    await self._dispatch(message.get("text") or message.get("bytes") or b"")
+        finally:
+            for _, stop in self._streams.values():
+                stop.set()
+            tasks = [task for task, _ in self._streams.values()]
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _dispatch(self, raw: str | bytes) -> None:
+        try:
+            op = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            op = None
+        if not isinstance(op, dict) or not isinstance(op.get("id"), str):
+            await self._reject(None, ValidationError(message="Frame must be a JSON object with a string 'id'"))
+            return
+        stream_id, kind = op["id"], op.get("op")
+
+        if kind == "cancel":
+            entry = self._streams.get(stream_id)
+            if entry is None:
+                await self._reject(stream_id, ValidationError(message="No such stream"))
+                return
+            entry[1].set()
+            await self._frame(stream_id, "cancelled")
+            return
+
+        if stream_id in self._streams:
+            await self._reject(stream_id, ValidationError(message="Stream id already in use"))
+            return
+        if len(self._streams) >= self.max_streams:
+            await self._reject(stream_id, LearnPathException(
+                message=f"At most {self.max_streams} concurrent streams per connection",
+                code="TOO_MANY_STREAMS",
+                status_code=HTTPStatus.TOO_MANY_REQUESTS.value,
+            ))
+            return
+
+        if kind == "chat" and isinstance(op.get("message"), str):
+            if self.session_id in self._busy:
+                await self._reject(stream_id, LearnPathException(
+                    message="A message is already being answered for this session",
+                    code="SESSION_BUSY",
+                    status_code=HTTPStatus.CONFLICT.value,
+                ))
+                return
+            self._busy.add(self.session_id)
+            message = op["message"]
+            cancel = CancellationToken()
+            self._start(stream_id, lambda app: app.handle_message(message, cancel=cancel), chat=True, cancel=cancel)
+        elif kind == "submit_roadmap" and isinstance(op.get("profile"), dict):
+            duration_week = op.get("duration_week")
+            if duration_week is not None and (
+                not isinstance(duration_week, int) or isinstance(duration_week, bool) or duration_week < 1
+            ):
+                await self._reject(stream_id, ValidationError(message="duration_week must be a positive integer"))
+                return
+            try:
+                profile = UserProfile.model_validate(op["profile"])
+            except PydanticValidationError as e:
+                await self._reject(stream_id, ValidationError(message=f"Invalid profile: {e.error_count()} error(s)"))
+                return
+            self._start(stream_id, lambda app: app.generate_roadmap(profile, duration_week), chat=False)
+        elif kind == "roadmap" and isinstance(op.get("job_id"), str):
+            job_id = op["job_id"]
+            self._start(stream_id, lambda app: app.poll_roadmap_job(job_id), chat=False)
+        else:
+            await self._reject(stream_id, ValidationError(message="Unknown op or missing field"))
+
+    def _start(
+        self,
+        stream_id: str,
+        open_stream: Callable[[AppService], Generator[Event, None, None]],
+        chat: bool,
+        cancel: Optional[CancellationToken] = None,
+    ) -> None:
+        stop = asyncio.Event()
+        task = asyncio.create_task(self._run_stream(stream_id, open_stream, stop, chat, cancel))
+        self._streams[stream_id] = (task, stop)
+
+    async def _run_stream(
+        self,
+        stream_id: str,
+        open_stream: Callable[[AppService], Generator[Event, None, None]],
+        stop: asyncio.Event,
+        chat: bool,
+        cancel: Optional[CancellationToken],
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        async def emit(event: Event) -> None:
+            await self._frame(stream_id, event_name(event), event)
+
+        checked_out = False
+        try:
+            get = self._store.checkout if chat else self._store.get
+            app = await loop.run_in_executor(self._executor, get, self.session_id)
+            checked_out = chat
+            if await drive_events(self._executor, open_stream(app), emit, stop, cancel):
+                await self._frame(stream_id, "done")
+        except Exception as e:
+            logger.exception(f"WebSocket stream failed: {e}")
+            await self._reject(stream_id, LearnPathException())
+        finally:
+            self._streams.pop(stream_id, None)
+            if checked_out:
+                await loop.run_in_executor(self._executor, self._store.checkin, self.session_id)
+            if chat:
+                self._busy.discard(self.session_id)
+
+    async def _frame(self, stream_id: str | None, event: str, data: Any = None) -> None:
+        payload = {"id": stream_id, "event": event}
+        if data is not None:
+            payload["data"] = data
+        async with self._send_lock:
+            try:
+                await self._send({"type": "websocket.send", "text": dumps(payload).decode("utf-8")})
+            except OSError:
+                pass  # connection already gone; run() stops the streams
+
+    async def _reject(self, stream_id: str | None, error: LearnPathException) -> None:
+        await self._frame(stream_id, "rejected", error.to_dict())
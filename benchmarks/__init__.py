@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks for LearnPath chatbot hot paths
+
+Run a suite as a module from the repository root, e.g.:
+    python -m benchmarks.bench_parsing
+"""
@@ -0,0 +1,100 @@
+"""
+_common.py
+
+Shared helpers for benchmark scripts
+
+Key features:
+- make_roadmap(weeks), make_history(n): realistic synthetic domain objects
+- measure(fn): best-of-N timing with auto-calibrated loop count
+- print_table: aligned result table
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Sequence
+
+from domain import ChatMessage, Milestone, Resource, Roadmap
+
+_RESOURCE_POOL = [
+    ("Python Tutorial", "https://docs.python.org/3/tutorial/", "documentation", "beginner"),
+    ("Automate the Boring Stuff", "https://automatetheboringstuff.com/", "book", "beginner"),
+    ("CS50P", "https://cs50.harvard.edu/python/", "course", "intermediate"),
+    ("Real Python Articles", "https://realpython.com/", "article", "intermediate"),
+    ("Exercism Python Track", "https://exercism.org/tracks/python", "practice", "advanced"),
+]
+
+def make_roadmap(weeks: int) -> Roadmap:
+    """Roadmap with `weeks` milestones, 3 resources each drawn from a shared pool"""
+    milestones = []
+    for week in range(1, weeks + 1):
+        resources = [
+            Resource(title=title, url=url, type=type_, difficulty=difficulty,
+                     description=f"Tài liệu tham khảo cho tuần {week}")
+            for title, url, type_, difficulty in _RESOURCE_POOL[week % 3: week % 3 + 3]
+        ]
+        milestones.append(Milestone(
+            week=week,
+            topic=f"Chủ đề tuần {week}",
+            description=f"Học các khái niệm quan trọng của tuần {week} và làm bài tập thực hành",
+            estimated_time="5 giờ",
+            learning_objectives=["Hiểu lý thuyết", "Làm bài tập", "Ôn tập"],
+            resources=resources,
+        ))
+    return Roadmap(
+        topic="Học Python",
+        description="Lộ trình học Python từ cơ bản đến nâng cao",
+        duration_week=weeks,
+        milestones=milestones,
+        prerequisites=["Biết dùng máy tính"],
+    )
+
+def make_history(n: int) -> List[ChatMessage]:
+    """Alternating user/assistant conversation of n messages"""
+    start = datetime(2026, 1, 1, 8, 0, 0)
+    return [
+        ChatMessage(
+            role="user" if i % 2 == 0 else "assistant",
+            content=(
+                f"Câu hỏi số {i}: làm sao để học Python hiệu quả?"
+                if i % 2 == 0 else
+                f"Trả lời {i}: bạn nên bắt đầu với cú pháp cơ bản, sau đó luyện tập mỗi ngày. " * 3
+            ),
+            timestamp=start + timedelta(seconds=30 * i),
+        )
+        for i in range(n)
+    ]
+
+def measure(fn: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> float:
+    """Return best mean seconds per call over `repeat` rounds of an auto-sized loop"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+def fmt_time(seconds: float) -> str:
+    """Format seconds with an adaptive unit"""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence[object]]) -> None:
+    """Print rows as an aligned plain-text table"""
+    cells = [[str(h) for h in headers]] + [[str(c) for c in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for i, row in enumerate(cells):
+        print("  ".join(c.rjust(w) for c, w in zip(row, widths)))
+        if i == 0:
+            print("  ".join("-" * w for w in widths))
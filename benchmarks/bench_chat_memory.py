@@ -0,0 +1,88 @@
+"""
+bench_chat_memory.py
+
+Columnar ChatMemory versus a deque of ChatMessage objects (the previous layout):
+retained memory per message (tracemalloc), append cost and tail-read latency
+
+Contents are created before measuring, so memory figures are per-message storage overhead
+on top of the text itself
+
+Usage:
+    python -m benchmarks.bench_chat_memory
+"""
+import gc
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+
+from benchmarks._common import fmt_time, measure, print_table
+from domain import ChatMessage
+from memory import ChatMemory
+
+SIZES = (1_000, 10_000, 100_000)
+TAIL = 20
+
+def _fields(n: int):
+    start = datetime(2026, 1, 1, 8, 0, 0)
+    return [
+        ("user" if i % 2 == 0 else "assistant", f"Tin nhắn số {i} về lộ trình học Python", start + timedelta(seconds=i))
+        for i in range(n)
+    ]
+
+def _fill_deque(fields):
+    storage = deque()
+    for role, content, ts in fields:
+        storage.append(ChatMessage(role=role, content=content, timestamp=ts))
+    return storage
+
+def _fill_columnar(fields):
+    memory = ChatMemory()
+    for role, content, ts in fields:
+        memory.add(role, content, ts)
+    return memory
+
+def _retained(build, fields) -> int:
+    """Bytes still allocated after build(fields), excluding the inputs"""
+    gc.collect()
+    tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot()
+    result = build(fields)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(snapshot, "filename"))
+    del result
+    return size
+
+def _elapsed(build, fields) -> float:
+    start = time.perf_counter()
+    build(fields)
+    return time.perf_counter() - start
+
+def main() -> None:
+    rows = []
+    for size in SIZES:
+        fields = _fields(size)
+        deque_bytes = _retained(_fill_deque, fields)
+        columnar_bytes = _retained(_fill_columnar, fields)
+        storage = _fill_deque(fields)
+        memory = _fill_columnar(fields)
+        rows.append((
+            f"{size:,}",
+            f"{deque_bytes / size:.0f}",
+            f"{columnar_bytes / size:.0f}",
+            f"{deque_bytes / max(columnar_bytes, 1):.1f}x",
+            fmt_time(_elapsed(_fill_deque, fields) / size),
+            fmt_time(_elapsed(_fill_columnar, fields) / size),
+            fmt_time(measure(lambda: list(storage)[-TAIL:])),
+            fmt_time(measure(lambda: memory.load_recent(TAIL))),
+        ))
+    print_table(
+        ("messages", "deque B/msg", "columnar B/msg", "ratio",
+         "deque append", "columnar append", f"deque tail {TAIL}", f"columnar tail {TAIL}"),
+        rows,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+bench_codec.py
+
+Compare the compact binary codec (memory.codec) against JSON for size, encode and decode speed
+
+JSON baseline is what the roadmap job store uses today:
+model_dump_json to encode and cached TypeAdapter.validate_json to decode
+
+Usage:
+    python -m benchmarks.bench_codec
+"""
+from benchmarks._common import fmt_time, make_history, make_roadmap, measure, print_table
+from domain import CHAT_HISTORY_ADAPTER, ROADMAP_ADAPTER
+from memory import decode_messages, decode_roadmap, encode_messages, encode_roadmap
+
+ROADMAP_WEEKS = (1, 4, 12, 26, 52)
+HISTORY_SIZES = (10, 100, 1_000, 10_000)
+
+def bench_roadmaps() -> None:
+    rows = []
+    for weeks in ROADMAP_WEEKS:
+        roadmap = make_roadmap(weeks)
+        raw_json = roadmap.model_dump_json()
+        raw_bin = encode_roadmap(roadmap)
+        rows.append((
+            weeks,
+            f"{len(raw_json):,}", f"{len(raw_bin):,}", f"{len(raw_json) / len(raw_bin):.1f}x",
+            fmt_time(measure(roadmap.model_dump_json)),
+            fmt_time(measure(lambda: encode_roadmap(roadmap))),
+            fmt_time(measure(lambda: ROADMAP_ADAPTER.validate_json(raw_json))),
+            fmt_time(measure(lambda: decode_roadmap(raw_bin))),
+        ))
+    print("Roadmap")
+    print_table(
+        ("weeks", "json B", "bin B", "ratio", "json enc", "bin enc", "json dec", "bin dec"),
+        rows,
+    )
+
+def bench_histories() -> None:
+    rows = []
+    for size in HISTORY_SIZES:
+        history = make_history(size)
+        raw_json = CHAT_HISTORY_ADAPTER.dump_json(history)
+        raw_bin = encode_messages(history)
+        rows.append((
+            f"{size:,}",
+            f"{len(raw_json):,}", f"{len(raw_bin):,}", f"{len(raw_json) / len(raw_bin):.1f}x",
+            fmt_time(measure(lambda: CHAT_HISTORY_ADAPTER.dump_json(history), repeat=3)),
+            fmt_time(measure(lambda: encode_messages(history), repeat=3)),
+            fmt_time(measure(lambda: CHAT_HISTORY_ADAPTER.validate_json(raw_json), repeat=3)),
+            fmt_time(measure(lambda: decode_messages(raw_bin), repeat=3)),
+        ))
+    print("\nChat history")
+    print_table(
+        ("messages", "json B", "bin B", "ratio", "json enc", "bin enc", "json dec", "bin dec"),
+        rows,
+    )
+
+if __name__ == "__main__":
+    bench_roadmaps()
+    bench_histories()
@@ -0,0 +1,90 @@
+"""
+bench_concurrent_memory.py
+
+Mixed read/write throughput with several threads: ConcurrentChatMemory (lock-free snapshot
+reads) versus ChatMemory behind one lock (what callers would need today)
+
+Each reader repeatedly takes the last 20 messages and iterates the full history;
+each writer appends messages
+
+Usage:
+    python -m benchmarks.bench_concurrent_memory
+"""
+import threading
+import time
+
+from benchmarks._common import make_history, print_table
+from memory import ChatMemory, ConcurrentChatMemory
+
+PRELOAD = 2_000
+DURATION = 1.0
+THREAD_MIXES = ((1, 1), (4, 1), (8, 2))
+
+class LockedChatMemory:
+    """ChatMemory with every call serialized by one lock (baseline)"""
+    def __init__(self):
+        self._inner = ChatMemory()
+        self._lock = threading.Lock()
+
+    def add_message(self, message) -> None:
+        with self._lock:
+            self._inner.add_message(message)
+
+    def load_recent(self, n: int):
+        with self._lock:
+            return self._inner.load_recent(n)
+
+    def load_history(self):
+        with self._lock:
+            return self._inner.load_history()
+
+def _run(memory, readers: int, writers: int, messages) -> tuple:
+    for m in messages[:PRELOAD]:
+        memory.add_message(m)
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0}
+    lock = threading.Lock()
+
+    def read() -> None:
+        n = 0
+        while not stop.is_set():
+            memory.load_recent(20)
+            for _ in (memory if isinstance(memory, ConcurrentChatMemory) else memory.load_history()):
+                pass
+            n += 1
+        with lock:
+            counts["reads"] += n
+
+    def write() -> None:
+        n = 0
+        while not stop.is_set():
+            memory.add_message(messages[n % len(messages)])
+            n += 1
+        with lock:
+            counts["writes"] += n
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    threads += [threading.Thread(target=write) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(DURATION)
+    stop.set()
+    for t in threads:
+        t.join()
+    return counts["reads"] / DURATION, counts["writes"] / DURATION
+
+def main() -> None:
+    messages = make_history(PRELOAD)
+    rows = []
+    for readers, writers in THREAD_MIXES:
+        locked_r, locked_w = _run(LockedChatMemory(), readers, writers, messages)
+        cow_r, cow_w = _run(ConcurrentChatMemory(), readers, writers, messages)
+        rows.append((
+            f"{readers}r/{writers}w",
+            f"{locked_r:,.0f}", f"{cow_r:,.0f}",
+            f"{locked_w:,.0f}", f"{cow_w:,.0f}",
+        ))
+    print_table(("threads", "locked reads/s", "cow reads/s", "locked writes/s", "cow writes/s"), rows)
+
+if __name__ == "__main__":
+    main()
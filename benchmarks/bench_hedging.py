@@ -0,0 +1,76 @@
+"""
+bench_hedging.py
+
+Chat time to first chunk with occasional stalled upstream connections: direct streams versus
+HedgedLLMClient (p95 hedge delay, 5% hedge budget)
+
+The simulated upstream starts most streams after ~BASE_TTFT, but STALL_RATE of them stall for
+STALL_SECONDS before the first chunk (until cancelled)
+
+Usage:
+    python -m benchmarks.bench_hedging
+"""
+import random
+import time
+from typing import List, Optional
+
+from ai import HedgedLLMClient, HedgePolicy
+from benchmarks._common import fmt_time, print_table
+from utils import CancellationToken
+
+CALLS = 400
+BASE_TTFT = 0.005
+STALL_RATE = 0.03
+STALL_SECONDS = 0.5
+
+class StallingUpstream:
+    """Chat upstream whose first chunk is fast except for an occasional stalled connection"""
+    def __init__(self, seed: int = 7):
+        self._rng = random.Random(seed)
+        self.streams = 0
+
+    def stream_chat(self, history, new_message, cancel: Optional[CancellationToken] = None):
+        self.streams += 1
+        delay = STALL_SECONDS if self._rng.random() < STALL_RATE else BASE_TTFT * (1 + self._rng.random())
+        if cancel is not None:
+            if cancel.wait(delay):
+                return
+        else:
+            time.sleep(delay)
+        yield "chunk"
+
+def _run(client, upstream: StallingUpstream) -> List[float]:
+    latencies = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        stream = client.stream_chat([], "hi")
+        next(stream)
+        latencies.append(time.perf_counter() - start)
+        stream.close()
+    return sorted(latencies)
+
+def _percentile(values: List[float], p: float) -> float:
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+def main() -> None:
+    rows = []
+    direct = StallingUpstream()
+    hedged = StallingUpstream()
+    policy = HedgePolicy(min_samples=20, min_delay=0.0, max_rate=0.05)
+    for label, client, upstream in (
+        ("direct", direct, direct),
+        ("hedged", HedgedLLMClient(hedged, policy), hedged),
+    ):
+        latencies = _run(client, upstream)
+        extra = upstream.streams / CALLS - 1
+        rows.append((
+            label,
+            fmt_time(_percentile(latencies, 0.5)),
+            fmt_time(_percentile(latencies, 0.99)),
+            f"{extra:.1%}",
+        ))
+    print(f"Time to first chunk: {CALLS} streams, {STALL_RATE:.0%} stalled for {STALL_SECONDS}s")
+    print_table(("mode", "p50", "p99", "extra streams"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+bench_parsing.py
+
+Compare json.loads + model_validate against one-pass validate_json with cached TypeAdapters
+
+Covers roadmaps from 1 to 52 weeks (ROADMAP_ADAPTER, ROADMAP_LIST_ADAPTER) and
+histories from 10 to 10k messages (CHAT_HISTORY_ADAPTER)
+
+Usage:
+    python -m benchmarks.bench_parsing
+"""
+import json
+
+from benchmarks._common import fmt_time, make_history, make_roadmap, measure, print_table
+from domain import CHAT_HISTORY_ADAPTER, ROADMAP_ADAPTER, ROADMAP_LIST_ADAPTER, ChatMessage, Roadmap
+
+ROADMAP_WEEKS = (1, 4, 12, 26, 52)
+HISTORY_SIZES = (10, 100, 1_000, 10_000)
+
+def bench_roadmaps() -> None:
+    rows = []
+    for weeks in ROADMAP_WEEKS:
+        raw = make_roadmap(weeks).model_dump_json()
+        two_pass = measure(lambda: Roadmap.model_validate(json.loads(raw)))
+        one_pass = measure(lambda: ROADMAP_ADAPTER.validate_json(raw))
+        rows.append((weeks, f"{len(raw):,}", fmt_time(two_pass), fmt_time(one_pass), f"{two_pass / one_pass:.2f}x"))
+    print("Roadmap parsing")
+    print_table(("weeks", "bytes", "loads+validate", "validate_json", "speedup"), rows)
+
+def bench_roadmap_lists() -> None:
+    raw = json.dumps([make_roadmap(w).model_dump(mode="json") for w in ROADMAP_WEEKS])
+    two_pass = measure(lambda: [Roadmap.model_validate(r) for r in json.loads(raw)])
+    one_pass = measure(lambda: ROADMAP_LIST_ADAPTER.validate_json(raw))
+    print(f"\nlist[Roadmap] ({len(ROADMAP_WEEKS)} roadmaps)")
+    print_table(
+        ("bytes", "loads+validate", "validate_json", "speedup"),
+        [(f"{len(raw):,}", fmt_time(two_pass), fmt_time(one_pass), f"{two_pass / one_pass:.2f}x")],
+    )
+
+def bench_histories() -> None:
+    rows = []
+    for size in HISTORY_SIZES:
+        history = make_history(size)
+        raw = CHAT_HISTORY_ADAPTER.dump_json(history)
+        dicts = [m.model_dump(mode="json") for m in history]
+        two_pass = measure(lambda: [ChatMessage.model_validate(m) for m in json.loads(raw)], repeat=3)
+        one_pass = measure(lambda: CHAT_HISTORY_ADAPTER.validate_json(raw), repeat=3)
+        from_dicts = measure(lambda: CHAT_HISTORY_ADAPTER.validate_python(dicts), repeat=3)
+        rows.append((
+            f"{size:,}", f"{len(raw):,}", fmt_time(two_pass), fmt_time(one_pass),
+            fmt_time(from_dicts), f"{two_pass / one_pass:.2f}x",
+        ))
+    print("\nlist[ChatMessage] parsing (history restore)")
+    print_table(
+        ("messages", "bytes", "loads+validate", "validate_json", "validate_python", "speedup"),
+        rows,
+    )
+
+if __name__ == "__main__":
+    bench_roadmaps()
+    bench_roadmap_lists()
+    bench_histories()
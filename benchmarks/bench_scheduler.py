@@ -0,0 +1,82 @@
+"""
+bench_scheduler.py
+
+Chat latency under mixed load: every caller hitting the LLM directly versus LLMScheduler
+lanes (chat / roadmap) in front of it
+
+The simulated backend serves at most CAPACITY calls at once; a burst of roadmap generations
+(long calls) arrives just before a steady stream of short chat calls
+
+Usage:
+    python -m benchmarks.bench_scheduler
+"""
+import threading
+import time
+from typing import Callable, List, Optional
+
+from ai import LANE_CHAT, LANE_ROADMAP, LLMScheduler
+from benchmarks._common import fmt_time, print_table
+
+CAPACITY = 8
+ROADMAP_CALLS = 24
+ROADMAP_SECONDS = 0.2
+CHAT_CALLS = 40
+CHAT_SECONDS = 0.02
+CHAT_INTERVAL = 0.01
+
+def _run(scheduler: Optional[LLMScheduler]) -> List[float]:
+    backend = threading.BoundedSemaphore(CAPACITY)
+    chat_latencies: List[float] = []
+    lock = threading.Lock()
+
+    def call(lane: str, flow: str, seconds: float) -> None:
+        ticket = scheduler.acquire(lane, flow) if scheduler is not None else None
+        try:
+            with backend:
+                time.sleep(seconds)
+        finally:
+            if ticket is not None:
+                ticket.release()
+
+    def roadmap(i: int) -> None:
+        call(LANE_ROADMAP, f"job-{i}", ROADMAP_SECONDS)
+
+    def chat(i: int) -> None:
+        start = time.perf_counter()
+        call(LANE_CHAT, f"session-{i % 10}", CHAT_SECONDS)
+        with lock:
+            chat_latencies.append(time.perf_counter() - start)
+
+    threads = _spawn(roadmap, ROADMAP_CALLS, 0.0)
+    time.sleep(0.005)
+    threads += _spawn(chat, CHAT_CALLS, CHAT_INTERVAL)
+    for t in threads:
+        t.join()
+    return sorted(chat_latencies)
+
+def _spawn(target: Callable[[int], None], n: int, interval: float) -> List[threading.Thread]:
+    threads = []
+    for i in range(n):
+        t = threading.Thread(target=target, args=(i,))
+        t.start()
+        threads.append(t)
+        if interval:
+            time.sleep(interval)
+    return threads
+
+def _percentile(values: List[float], p: float) -> float:
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+def main() -> None:
+    rows = []
+    for label, scheduler in (
+        ("direct", None),
+        ("scheduler", LLMScheduler({LANE_CHAT: CAPACITY - 2, LANE_ROADMAP: 2})),
+    ):
+        latencies = _run(scheduler)
+        rows.append((label, fmt_time(_percentile(latencies, 0.5)), fmt_time(_percentile(latencies, 0.99))))
+    print(f"Chat latency: {ROADMAP_CALLS} roadmap calls + {CHAT_CALLS} chat calls, backend capacity {CAPACITY}")
+    print_table(("mode", "p50", "p99"), rows)
+
+if __name__ == "__main__":
+    main()
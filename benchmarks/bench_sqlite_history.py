@@ -0,0 +1,55 @@
+"""
+bench_sqlite_history.py
+
+SQLiteChatHistory throughput: appends/sec by group-commit batch size and
+tail-read latency (load_recent) versus full load_history at 10k+ messages per session
+
+Usage:
+    python -m benchmarks.bench_sqlite_history
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._common import fmt_time, make_history, measure, print_table
+from memory import SQLiteChatHistory
+
+APPEND_MESSAGES = 10_000
+BATCH_SIZES = (1, 8, 32, 256)
+SESSION_SIZES = (10_000, 50_000)
+TAIL = 20
+
+def bench_appends(workdir: Path) -> None:
+    messages = make_history(APPEND_MESSAGES)
+    rows = []
+    for batch_size in BATCH_SIZES:
+        history = SQLiteChatHistory(workdir / f"append-{batch_size}.sqlite3", "s", batch_size=batch_size)
+        start = time.perf_counter()
+        for m in messages:
+            history.add_message(m)
+        history.flush()
+        elapsed = time.perf_counter() - start
+        history.close()
+        rows.append((batch_size, f"{APPEND_MESSAGES / elapsed:,.0f}", fmt_time(elapsed / APPEND_MESSAGES)))
+    print(f"Appends ({APPEND_MESSAGES:,} messages, WAL, synchronous=NORMAL)")
+    print_table(("batch", "appends/s", "per append"), rows)
+
+def bench_reads(workdir: Path) -> None:
+    rows = []
+    for size in SESSION_SIZES:
+        path = workdir / f"read-{size}.sqlite3"
+        history = SQLiteChatHistory(path, "s")
+        history.add_messages(make_history(size))
+        # Neighbour session so the index actually has to seek
+        SQLiteChatHistory(path, "other").add_messages(make_history(1_000))
+        tail = measure(lambda: history.load_recent(TAIL), repeat=3)
+        full = measure(history.load_history, repeat=3, min_time=0.5)
+        rows.append((f"{size:,}", fmt_time(tail), fmt_time(full), f"{full / tail:,.0f}x"))
+        history.close()
+    print(f"\nReads (load_recent({TAIL}) vs load_history)")
+    print_table(("messages", "load_recent", "load_history", "ratio"), rows)
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_appends(Path(tmp))
+        bench_reads(Path(tmp))
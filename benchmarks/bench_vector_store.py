@@ -0,0 +1,56 @@
+"""
+bench_vector_store.py
+
+VectorStore query latency: exact matrix scan versus IVF probing, with IVF recall@10
+against exact results, and batched (search_many) throughput
+
+Usage:
+    python -m benchmarks.bench_vector_store
+"""
+import numpy as np
+
+from benchmarks._common import fmt_time, measure, print_table
+from memory import VectorStore
+
+DIM = 256
+SIZES = (10_000, 100_000, 300_000)
+QUERIES = 64
+K = 10
+
+def _unit(rows: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((rows, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def _clustered(rows: int, seed: int) -> np.ndarray:
+    """Vectors around 500 topics (closer to real embeddings than uniform noise)"""
+    rng = np.random.default_rng(seed)
+    centers = _unit(500, seed + 1)
+    vectors = centers[rng.integers(0, 500, rows)] + 0.35 * rng.standard_normal((rows, DIM)).astype(np.float32) / np.sqrt(DIM)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def main() -> None:
+    rows = []
+    for size in SIZES:
+        vectors = _clustered(size, seed=size)
+        queries = _clustered(QUERIES, seed=size + 7)
+        texts = [""] * size
+        exact = VectorStore(dim=DIM, capacity=size, ivf_threshold=size + 1)
+        exact.add("u", texts, vectors)
+        ivf = VectorStore(dim=DIM, capacity=size, ivf_threshold=1, nprobe=8)
+        ivf.add("u", texts, vectors)
+
+        recall = np.mean([
+            len({h.id for h in exact.search(q, K)} & {h.id for h in ivf.search(q, K)}) / K
+            for q in queries
+        ])
+        rows.append((
+            f"{size:,}",
+            fmt_time(measure(lambda: exact.search(queries[0], K), repeat=3, min_time=0.1)),
+            fmt_time(measure(lambda: exact.search_many(queries, K), repeat=3, min_time=0.1) / QUERIES),
+            fmt_time(measure(lambda: ivf.search(queries[0], K), repeat=3, min_time=0.1)),
+            f"{recall:.2f}",
+        ))
+    print_table(("items", "exact/query", f"exact batched/query (m={QUERIES})", "ivf/query", f"ivf recall@{K}"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ Key features:
 - settings: singleton Settings instance (from .env)
 - Settings: Pydantic settings class for GEMINI_* and LOG_*
 - messages: user-facing message keys and provider
-- Constants: MAX_INPUT_LENGTH, DEFAULT_CONTEXT_MESSAGES
+- Constants: MAX_INPUT_LENGTH, DEFAULT_CONTEXT_MESSAGES, DEFAULT_RELEVANT_TURNS
 """
 
 from .settings import settings, Settings
@@ -18,6 +18,7 @@ from .messages import (
 from .constants import (
     MAX_INPUT_LENGTH,
     DEFAULT_CONTEXT_MESSAGES,
+    DEFAULT_RELEVANT_TURNS,
 )
 
 __all__ = [
@@ -29,4 +30,5 @@ __all__ = [
     "default_messages",
     "MAX_INPUT_LENGTH",
     "DEFAULT_CONTEXT_MESSAGES",
+    "DEFAULT_RELEVANT_TURNS",
 ]
@@ -6,7 +6,10 @@ Shared constants for the application
 Key features:
 - MAX_INPUT_LENGTH: validation limit for user message
 - DEFAULT_CONTEXT_MESSAGES: context window sizes
+- DEFAULT_RELEVANT_TURNS: older turns retrieved by relevance on top of the recent window
 """
 MAX_INPUT_LENGTH = 2000
 
-DEFAULT_CONTEXT_MESSAGES = 20
\ No newline at end of file
+DEFAULT_CONTEXT_MESSAGES = 20
+
+DEFAULT_RELEVANT_TURNS = 3
\ No newline at end of file
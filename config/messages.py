@@ -16,6 +16,7 @@ class MessageKey(str, Enum):
     # Errors
     LLM_ERROR = "llm_error"
     LLM_STREAM_INTERRUPTED = "llm_stream_interrupted"
+    LLM_UNAVAILABLE = "llm_unavailable"
     UNEXPECTED_ERROR = "unexpected_error"
 
     # Validation
@@ -26,6 +27,8 @@ class MessageKey(str, Enum):
 
     # UI state
     THINKING = "thinking"
+    QUEUED = "queued"
+    OVERLOADED = "overloaded"
 
     # Profile
     PROFILE_ANALYZING = "profile_analyzing"
@@ -60,6 +63,7 @@ class DefaultMessageProvider:
 
     _TEMPLATES: dict[MessageKey, str] = {
         MessageKey.LLM_ERROR: "Không thể kết nối hoặc tải tin nhắn. Vui lòng thử lại sau.",
+        MessageKey.LLM_UNAVAILABLE: "Dịch vụ AI đang tạm thời gián đoạn. Vui lòng thử lại sau ít phút.",
         MessageKey.LLM_STREAM_INTERRUPTED: "\n\nKết nối bị gián đoạn. Câu trả lời phía trên chưa hoàn chỉnh. Vui lòng hỏi lại để nhận câu trả lời đầy đủ.*",
         MessageKey.UNEXPECTED_ERROR: "Đã xảy ra lỗi không mong muốn. Vui lòng thử lại sau.",
 
@@ -72,6 +76,8 @@ class DefaultMessageProvider:
         ),
 
         MessageKey.THINKING: "Đang suy nghĩ...",
+        MessageKey.QUEUED: "Hệ thống đang bận, yêu cầu của bạn đang ở vị trí {position} trong hàng chờ...",
+        MessageKey.OVERLOADED: "Hệ thống đang quá tải. Vui lòng thử lại sau ít phút.",
 
         MessageKey.PROFILE_ANALYZING: "Đang phân tích thông tin...",
         MessageKey.PROFILE_EXTRACTED: "Đã trích xuất thông tin hồ sơ: mục tiêu {goal}, trình độ {level}, thời gian học {time}.",
@@ -6,6 +6,15 @@ Application configuration and environment-based settings loaded from .env
 Key features:
 - GEMINI_API_KEY, GEMINI_MODEL: API and model config (required/optional)
 - LOG_LEVEL, LOG_TO_FILE, LOG_FILE_*: logging config and file rotation
+- ROADMAP_JOB_*: background roadmap job store and worker pool
+- SESSION_*: process-wide session store spill directory, memory budget and timeout
+- ANSWER_CACHE_*: near-duplicate first-turn answer cache (threshold, TTL, size)
+- API_*: headless HTTP/SSE API server (bind address, worker threads, cookie flags)
+- LLM_*_CONCURRENCY: per-lane limits of the LLM scheduler (chat, roadmap, background)
+- LLM_*_LATENCY_TARGET, LLM_MAX_QUEUE: adaptive lane limits and load shedding
+- RETRY_BUDGET_RATIO, *_DEADLINE_SECONDS: process-wide retry budget and caller deadlines
+- CIRCUIT_*: LLM circuit breaker (failure rate, window, slow-call threshold, open duration)
+- CHAT_HEDGE_*: hedged chat streams (on/off, delay quantile and floor, maximum hedge rate)
 - Validation for API key format and log retention
 """
 
@@ -89,6 +98,177 @@ class Settings(BaseSettings):
         description="Number of days to retain log files"
     )
 
+    # Background roadmap jobs
+    ROADMAP_JOB_DB_PATH: str = Field(
+        default="data/roadmap_jobs.sqlite3",
+        description="SQLite file storing roadmap job state and results"
+    )
+    ROADMAP_JOB_WORKERS: int = Field(
+        default=2,
+        ge=1,
+        description="Maximum number of roadmap generations running concurrently"
+    )
+    ROADMAP_JOB_DEADLINE_SECONDS: float = Field(
+        default=180.0,
+        gt=0,
+        description="Time one roadmap job may spend on LLM calls and retries"
+    )
+
+    # Process-wide session store
+    SESSION_SPILL_DIR: str = Field(
+        default="data/sessions",
+        description="Directory where idle sessions are spilled when over the memory budget"
+    )
+    SESSION_MEMORY_BUDGET_MB: int = Field(
+        default=256,
+        ge=1,
+        description="Estimated memory allowed for in-memory sessions before LRU spilling"
+    )
+    SESSION_TIMEOUT_MINUTES: int = Field(
+        default=30,
+        ge=1,
+        description="Inactivity after which a session (in memory or spilled) is discarded"
+    )
+
+    # Near-duplicate answer cache
+    ANSWER_CACHE_ENABLED: bool = Field(
+        default=True,
+        description="Reuse answers to near-identical first-turn questions across sessions"
+    )
+    ANSWER_CACHE_THRESHOLD: float = Field(
+        default=0.8,
+        gt=0,
+        le=1,
+        description="Minimum Jaccard similarity between questions to reuse an answer"
+    )
+    ANSWER_CACHE_TTL_HOURS: float = Field(
+        default=24,
+        gt=0,
+        description="Lifetime of a cached answer"
+    )
+    ANSWER_CACHE_MAX_ENTRIES: int = Field(
+        default=5000,
+        ge=1,
+        description="Maximum cached answers (least recently used are evicted)"
+    )
+
+    # Headless HTTP/SSE API (python -m api)
+    API_HOST: str = Field(
+        default="127.0.0.1",
+        description="Bind address of the API server"
+    )
+    API_PORT: int = Field(
+        default=8000,
+        ge=1,
+        le=65535,
+        description="Bind port of the API server"
+    )
+    API_WORKER_THREADS: int = Field(
+        default=32,
+        ge=1,
+        description="Threads running blocking AppService calls (bounds concurrent LLM streams)"
+    )
+    API_SECURE_COOKIE: bool = Field(
+        default=False,
+        description="Mark the session cookie Secure (enable behind HTTPS)"
+    )
+
+    # LLM scheduler lanes
+    LLM_CHAT_CONCURRENCY: int = Field(
+        default=16,
+        ge=1,
+        description="Interactive chat streams allowed to call the LLM at once"
+    )
+    LLM_ROADMAP_CONCURRENCY: int = Field(
+        default=2,
+        ge=1,
+        description="Roadmap generations allowed to call the LLM at once"
+    )
+    LLM_BACKGROUND_CONCURRENCY: int = Field(
+        default=1,
+        ge=1,
+        description="Background LLM calls (summaries, prefetch) allowed at once"
+    )
+    LLM_CHAT_LATENCY_TARGET: float = Field(
+        default=5.0,
+        gt=0,
+        description="Time to first chunk (seconds) above which the chat lane limit shrinks"
+    )
+    LLM_ROADMAP_LATENCY_TARGET: float = Field(
+        default=45.0,
+        gt=0,
+        description="Roadmap generation time (seconds) above which the roadmap lane limit shrinks"
+    )
+    LLM_MAX_QUEUE: int = Field(
+        default=64,
+        ge=0,
+        description="Calls allowed to wait per lane; further calls fail fast as overloaded"
+    )
+
+    # Retries
+    RETRY_BUDGET_RATIO: float = Field(
+        default=0.1,
+        ge=0,
+        le=1,
+        description="Retries allowed per LLM call, process-wide (0.1 = at most ~10% extra calls)"
+    )
+    CHAT_DEADLINE_SECONDS: float = Field(
+        default=150.0,
+        gt=0,
+        description="Time a chat answer may spend on stream attempts and backoff before giving up"
+    )
+
+    # Circuit breaker
+    CIRCUIT_FAILURE_RATE: float = Field(
+        default=0.5,
+        gt=0,
+        le=1,
+        description="Share of failed or slow LLM calls in the window that opens the circuit"
+    )
+    CIRCUIT_MIN_CALLS: int = Field(
+        default=10,
+        ge=1,
+        description="LLM calls needed in the window before the failure rate can open the circuit"
+    )
+    CIRCUIT_WINDOW: int = Field(
+        default=20,
+        ge=1,
+        description="Number of most recent LLM call outcomes considered by the circuit breaker"
+    )
+    CIRCUIT_SLOW_CALL_SECONDS: float = Field(
+        default=30.0,
+        gt=0,
+        description="LLM calls (time to first chunk for streams) slower than this count as failures"
+    )
+    CIRCUIT_OPEN_SECONDS: float = Field(
+        default=30.0,
+        gt=0,
+        description="Time the circuit stays open (answering in degraded mode) before probing the LLM"
+    )
+
+    # Hedged chat streams
+    CHAT_HEDGE_ENABLED: bool = Field(
+        default=True,
+        description="Start a second chat stream when the first is slow to produce its first chunk"
+    )
+    CHAT_HEDGE_QUANTILE: float = Field(
+        default=0.95,
+        gt=0,
+        lt=1,
+        description="Quantile of observed time to first chunk after which a chat stream is hedged"
+    )
+    CHAT_HEDGE_MIN_DELAY: float = Field(
+        default=1.0,
+        ge=0,
+        description="Minimum time (seconds) without a first chunk before a chat stream is hedged"
+    )
+    CHAT_HEDGE_MAX_RATE: float = Field(
+        default=0.05,
+        ge=0,
+        le=1,
+        description="Hedged streams allowed per chat stream, process-wide (0.05 = at most ~5% extra)"
+    )
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
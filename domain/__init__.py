@@ -2,8 +2,11 @@
 Domain layer for LearnPath chatbot
 
 Key features:
-- Re-export Resource, Milestone, Roadmap, UserProfile, ChatMessage, Intent from models
-- Re-export Event, TextChunk, StatusUpdate, ErrorOccurred, SessionExpired from events
+- Re-export Resource, Milestone, Roadmap, UserProfile, RoadmapChange, ChatMessage, Intent from models
+- Re-export Event, TextChunk, StatusUpdate, ErrorOccurred, SessionExpired, RoadmapQueued,
+  RoadmapReady from events
+- Re-export cached TypeAdapters (ROADMAP_ADAPTER, ROADMAP_LIST_ADAPTER, CHAT_HISTORY_ADAPTER,
+  MILESTONES_ADAPTER) from adapters
 - Independent of application and infrastructure layers
 """
 
@@ -12,6 +15,7 @@ from .models import (
     Milestone,
     Roadmap,
     UserProfile,
+    RoadmapChange,
     ChatMessage,
     Intent
 )
@@ -20,7 +24,16 @@ from .events import (
     TextChunk,
     StatusUpdate,
     ErrorOccurred,
-    SessionExpired
+    SessionExpired,
+    RoadmapQueued,
+    RoadmapReady
+)
+from .adapters import (
+    ROADMAP_ADAPTER,
+    ROADMAP_LIST_ADAPTER,
+    CHAT_HISTORY_ADAPTER,
+    MILESTONES_ADAPTER,
+    is_json_error
 )
 
 __all__ = [
@@ -28,6 +41,7 @@ __all__ = [
     "Milestone",
     "Roadmap",
     "UserProfile",
+    "RoadmapChange",
     "ChatMessage",
     "Intent",
     "Event",
@@ -35,4 +49,11 @@ __all__ = [
     "StatusUpdate",
     "ErrorOccurred",
     "SessionExpired",
+    "RoadmapQueued",
+    "RoadmapReady",
+    "ROADMAP_ADAPTER",
+    "ROADMAP_LIST_ADAPTER",
+    "CHAT_HISTORY_ADAPTER",
+    "MILESTONES_ADAPTER",
+    "is_json_error",
 ]
\ No newline at end of file
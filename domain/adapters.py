@@ -0,0 +1,31 @@
+"""
+adapters.py
+
+Reusable pydantic TypeAdapters for hot parsing paths
+
+Key features:
+- ROADMAP_ADAPTER, ROADMAP_LIST_ADAPTER, CHAT_HISTORY_ADAPTER built once at import
+- MILESTONES_ADAPTER: partial-update output, a milestone array or {"milestones": [...]}
+- validate_json parses and validates in one pass in pydantic-core (no intermediate dicts)
+- is_json_error: tell malformed JSON apart from schema violations
+"""
+from typing import List, Union
+
+from pydantic import BaseModel, TypeAdapter, ValidationError as PydanticValidationError
+
+from domain.models import ChatMessage, Milestone, Roadmap
+
+class MilestoneBatch(BaseModel):
+    """Object-wrapped milestone array some LLM answers use instead of a bare array"""
+    milestones: List[Milestone]
+
+ROADMAP_ADAPTER: TypeAdapter[Roadmap] = TypeAdapter(Roadmap)
+ROADMAP_LIST_ADAPTER: TypeAdapter[List[Roadmap]] = TypeAdapter(List[Roadmap])
+CHAT_HISTORY_ADAPTER: TypeAdapter[List[ChatMessage]] = TypeAdapter(List[ChatMessage])
+MILESTONES_ADAPTER: TypeAdapter[Union[List[Milestone], MilestoneBatch]] = TypeAdapter(
+    Union[List[Milestone], MilestoneBatch]
+)
+
+def is_json_error(error: PydanticValidationError) -> bool:
+    """Return True if validate_json failed because the input is not valid JSON"""
+    return any(e["type"] == "json_invalid" for e in error.errors(include_url=False))
@@ -5,13 +5,15 @@ Unified event types for application stream
 
 Key features:
 - UI consumes handle_message() as Generator[Event]; single source of event semantics
-- Event, TextChunk, StatusUpdate, ErrorOccurred, SessionExpired
+- Event, TextChunk, StatusUpdate, ErrorOccurred, SessionExpired, RoadmapQueued, RoadmapReady
 """
 from __future__ import annotations
 
 from dataclasses import dataclass
 from typing import Literal
 
+from domain.models import Roadmap
+
 @dataclass(frozen=True)
 class Event:
     """Base event; all stream events subclass this and are immutable"""
@@ -24,17 +26,29 @@ class TextChunk(Event):
 
 @dataclass(frozen=True)
 class StatusUpdate(Event):
-    """Status update for loading, analyzing or generating phases"""
-    status: Literal["loading", "analyzing_profile", "generating_roadmap"]
+    """Status update for loading, queued (waiting for an LLM slot), analyzing or generating phases"""
+    status: Literal["loading", "queued", "analyzing_profile", "generating_roadmap"]
     message: str
 
 @dataclass(frozen=True)
 class ErrorOccurred(Event):
     """An error occurred; carries type and user-facing message"""
-    error_type: Literal["validation", "llm", "unexpected"]
+    error_type: Literal["validation", "llm", "overloaded", "unexpected"]
     user_message: str
 
 @dataclass(frozen=True)
 class SessionExpired(Event):
     """Session expired due to inactivity"""
+    message: str
+
+@dataclass(frozen=True)
+class RoadmapQueued(Event):
+    """A background roadmap job was accepted; carries its id for polling it again later"""
+    job_id: str
+    message: str
+
+@dataclass(frozen=True)
+class RoadmapReady(Event):
+    """A background roadmap job finished; carries the generated roadmap"""
+    roadmap: Roadmap
     message: str
\ No newline at end of file
@@ -6,6 +6,7 @@ Domain models for personalized learning roadmaps and chat interactions
 Key features:
 - Resource, Milestone, Roadmap: learning path structure and validation
 - UserProfile: learner input for roadmap generation
+- RoadmapChange: profile/week edits applied incrementally to an existing roadmap
 - ChatMessage: standardized message format for AI-user conversation
 - Intent: user intent classification for routing chat and roadmap flow
 - Pydantic validation for domain invariants (sequential weeks, duration_week match, etc.)
@@ -102,6 +103,24 @@ class UserProfile(BaseModel):
     background: Optional[str] = Field(None, description="Personal background/context")
     constraints: Optional[List[str]] = Field(None, description="Điều kiện/hạn chế của người học (vd: ['Chỉ tài liệu miễn phí', 'Chỉ cuối tuần'])")
 
+class RoadmapChange(BaseModel):
+    """
+    Requested edit to an existing roadmap (profile tweak, week regeneration or duration change)
+    """
+    profile: Optional[UserProfile] = Field(None, description="Updated user profile (new input)")
+    previous_profile: Optional[UserProfile] = Field(None, description="Profile the existing roadmap was generated from")
+    weeks: List[int] = Field(default_factory=list, description="Weeks the user explicitly asked to change")
+    instruction: Optional[str] = Field(None, max_length=1000, description="Free-text change request (e.g. 'Tuần 3 thêm bài tập thực hành')")
+    duration_week: Optional[int] = Field(None, ge=1, description="New total duration in weeks (None keeps current duration)")
+
+    @field_validator('weeks')
+    @classmethod
+    def validate_weeks(cls, v: List[int]) -> List[int]:
+        """Weeks must be positive; duplicates are removed and order normalized"""
+        if any(w < 1 for w in v):
+            raise ValueError(f"Week numbers must be positive. Got {v}")
+        return sorted(set(v))
+
 class ChatMessage(BaseModel):
     """
     Single message in a chat conversation (role, content, timestamp)
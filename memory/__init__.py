@@ -4,9 +4,42 @@ Memory module for managing chat conversation history
 Key features:
 - ChatHistory: protocol for storage interface (add_message, load_history, clean_history)
 - ChatMemory: in-memory implementation for DI and future extension (Redis, DB)
+- ConcurrentChatMemory: thread-safe copy-on-write history with lock-free snapshot reads
+- IndexedChatHistory, BM25Index: incremental keyword retrieval of relevant past turns
+- VectorStore, LongTermMemory: memory-mapped vector index (exact/IVF) for semantic recall
+- WriteBehindHistory: in-memory front with batched background persistence to any backend
+- SQLiteChatHistory: durable SQLite backend (WAL, group commit, tail reads)
+- RedisChatHistory: shared Redis backend (capped lists, pipelined appends, TTL)
+- codec: compact binary encoding of roadmaps and histories for snapshots and stores
 """
 
 from .chat_history import ChatHistory
 from .chat_memory import ChatMemory
+from .concurrent_memory import ConcurrentChatMemory, HistorySnapshot
+from .sqlite_history import SQLiteChatHistory
+from .write_behind import WriteBehindHistory
+from .bm25 import BM25Index
+from .indexed_history import IndexedChatHistory
+from .vector_store import VectorStore, VectorHit
+from .long_term import LongTermMemory
+from .redis_history import RedisChatHistory
+from .codec import encode_roadmap, decode_roadmap, encode_messages, decode_messages
 
-__all__ = ["ChatHistory", "ChatMemory"]
+__all__ = [
+    "ChatHistory",
+    "ChatMemory",
+    "ConcurrentChatMemory",
+    "HistorySnapshot",
+    "SQLiteChatHistory",
+    "RedisChatHistory",
+    "WriteBehindHistory",
+    "BM25Index",
+    "IndexedChatHistory",
+    "VectorStore",
+    "VectorHit",
+    "LongTermMemory",
+    "encode_roadmap",
+    "decode_roadmap",
+    "encode_messages",
+    "decode_messages",
+]
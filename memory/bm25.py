@@ -0,0 +1,143 @@
+"""
+bm25.py
+
+Incremental in-memory inverted index with Okapi BM25 scoring
+
+Key features:
+- BM25Index: add documents one at a time (O(tokens)), no rebuild; clear() to reset
+- remove / discard_before: drop documents (e.g. messages a capped history trimmed)
+- search(query, k, before): scores only postings of the query terms, heap top-k
+- Tokenization is pluggable (defaults to utils.text.tokenize_vi)
+- memory_bytes(): O(1) footprint estimate from document, posting and term counts
+"""
+
+import heapq
+import math
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.text import tokenize_vi
+
+# Approximate bytes per indexed document, posting and distinct term (dict/tuple slots,
+# small ints and term strings; fitted with tracemalloc on CPython 3.11)
+_DOC_BYTES = 232
+_POSTING_BYTES = 88
+_TERM_BYTES = 216
+
+class BM25Index:
+    """
+    Inverted index term -> {doc_id: term frequency} with BM25 ranking
+
+    Responsibilities:
+    - Maintain postings, document lengths and corpus statistics incrementally
+    - Remember each document's terms so it can be removed without its text
+    - Rank documents for a query; optionally only ids below a bound (e.g. older than the recent window)
+    """
+    def __init__(
+        self,
+        *,
+        k1: float = 1.2,
+        b: float = 0.75,
+        tokenizer: Callable[[str], List[str]] = tokenize_vi,
+    ):
+        """
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization strength (0..1)
+            tokenizer: Text -> tokens function
+        """
+        self.k1 = k1
+        self.b = b
+        self._tokenize = tokenizer
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._total_len = 0
+        self._n_postings = 0
+
+    def add(self, doc_id: int, text: str) -> None:
+        """Index text under doc_id (ids must be unique)"""
+        counts = Counter(self._tokenize(text))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        length = sum(counts.values())
+        self._doc_len[doc_id] = length
+        self._doc_terms[doc_id] = tuple(counts)
+        self._total_len += length
+        self._n_postings += len(counts)
+
+    def remove(self, doc_id: int) -> None:
+        """Drop one document (no-op if unknown)"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(doc_id)
+        self._n_postings -= len(terms)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def discard_before(self, bound: int) -> int:
+        """
+        Drop every document with an id below bound (ids assumed added in increasing order)
+
+        Returns:
+            Number of documents removed
+        """
+        stale = []
+        for doc_id in self._doc_terms:
+            if doc_id >= bound:
+                break
+            stale.append(doc_id)
+        for doc_id in stale:
+            self.remove(doc_id)
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop every document"""
+        self._postings.clear()
+        self._doc_len.clear()
+        self._doc_terms.clear()
+        self._total_len = 0
+        self._n_postings = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def memory_bytes(self) -> int:
+        """Estimated bytes held by postings, document lengths and per-document term lists"""
+        return (
+            len(self._doc_len) * _DOC_BYTES
+            + self._n_postings * _POSTING_BYTES
+            + len(self._postings) * _TERM_BYTES
+        )
+
+    def search(self, query: str, k: int = 5, before: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Return the k best (doc_id, score) pairs for query, best first
+
+        Args:
+            query: Free text
+            k: Number of results
+            before: Only consider doc ids strictly below this value
+        """
+        n_docs = len(self._doc_len)
+        if k <= 0 or n_docs == 0:
+            return []
+        avg_len = self._total_len / n_docs or 1.0
+        k1, b = self.k1, self.b
+        scores: Dict[int, float] = {}
+        for term in set(self._tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                if before is not None and doc_id >= before:
+                    continue
+                norm = k1 * (1 - b + b * self._doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -5,10 +5,12 @@ Protocol defining the required interface for any chat history storage
 
 Key features:
 - add_message, load_history, clean_history: contract for chat history backends
+- load_recent, load_page, __len__, __iter__, iter_reverse: windowed reads whose cost
+  depends on the number of messages requested, not on conversation length
 - Enables swapping implementations (in-memory, Redis, database)
 """
 
-from typing import Protocol, List
+from typing import Iterator, List, Optional, Protocol
 
 from domain import ChatMessage
 
@@ -19,7 +21,11 @@ class ChatHistory(Protocol):
     Responsibilities:
     - add_message: append a message in chronological order
     - load_history: return messages oldest-first
+    - load_recent / load_page / iter_reverse: read a window without copying everything
     - clean_history: remove all messages (e.g. new conversation or session reset)
+
+    Sequence numbers (seq) count appended messages from 0 and restart after clean_history;
+    messages trimmed by a capped backend keep their seq gap
     """
     def add_message(self, message: ChatMessage) -> None:
         """Append a new message to the end of the conversation history
@@ -30,18 +36,41 @@ class ChatHistory(Protocol):
 
     def load_history(self) -> List[ChatMessage]:
         """Return the complete list of messages in this conversation
-        
+
         Returns messages in chronological order (oldest first)
         Implementations should return a copy or immutable view if possible
         to prevent accidental modification of internal storage
         """
         ...
-    
+
+    def load_recent(self, n: int) -> List[ChatMessage]:
+        """Return the last n messages in chronological order (fewer if history is shorter)"""
+        ...
+
+    def load_page(self, before_seq: Optional[int], limit: int) -> List[ChatMessage]:
+        """Return up to `limit` messages with seq < before_seq (None = from the end), oldest first
+
+        Used to page backwards: pass the seq of the oldest message already shown
+        """
+        ...
+
+    def iter_reverse(self) -> Iterator[ChatMessage]:
+        """Iterate messages newest-first, lazily"""
+        ...
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        """Iterate messages oldest-first without building a copy of the history"""
+        ...
+
+    def __len__(self) -> int:
+        """Number of messages currently stored"""
+        ...
+
     def clean_history(self):
         """Remove all messages from the current conversation history
-        
+
         Used when:
         - User starts a new conversation
         - Session is being reset
         """
-        ...
\ No newline at end of file
+        ...
@@ -1,27 +1,69 @@
 """
 chat_memory.py
 
-In-memory implementation of chat history storage (list-based)
+In-memory implementation of chat history storage (columnar)
 
 Key features:
 - ChatMemory: add/load/clear messages; data lost on restart
+- Columnar storage: role byte codes in array('B'), epoch-µs timestamps in array('q'),
+  contents in a plain list; ChatMessage objects are only built when read, without
+  revalidation (model_construct: every column was checked on write)
+- MESSAGE_STORAGE_BYTES: fixed per-message cost of the columns besides the content string
+- memory_bytes(): O(1) footprint of the columns, content strings included (for session budgets)
+- Windowed reads (load_recent, load_page, iter_reverse) walk from the tail: O(n requested)
+- Optional max_messages turns storage into a ring buffer (trimmed prefix compacted in bulk)
 - Suitable for testing, prototypes and short-lived sessions
 """
 
-from typing import List
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
 from domain import ChatMessage
+from memory.codec import ROLE_CODES, datetime_to_epoch_us, epoch_us_to_datetime
+
+_ROLE_INDEX = {v: i for i, v in enumerate(ROLE_CODES)}
+
+# Messages materialized per batch while iterating
+_ITER_CHUNK = 128
+
+# Per-message column cost: role byte + timestamp int64 + content list slot (a pointer)
+MESSAGE_STORAGE_BYTES = array("B").itemsize + array("q").itemsize + struct.calcsize("P")
 
 class ChatMemory:
     """
     Handle in-memory chat history (add, load, clear)
 
     Responsibilities:
-    - Store messages in an in-memory list
-    - Provide add_message, load_history, clean_history
+    - Store messages as parallel columns instead of one pydantic object each
+    - Provide add_message, load_history, clean_history and windowed reads
+    - Materialize ChatMessage lazily, in batches, only for the window requested
+
+    Physical index i holds seq _base_seq + i; live messages are [_start, len(_contents))
     """
-    def __init__(self):
-        """Initialize chat memory with an empty storage list"""
-        self._storage: List[ChatMessage] = []
+    __slots__ = (
+        "max_messages", "_roles", "_stamps", "_offsets", "_contents", "_content_bytes", "_start", "_base_seq",
+    )
+
+    def __init__(self, max_messages: Optional[int] = None):
+        """
+        Initialize chat memory with empty columns
+
+        Args:
+            max_messages: Optional cap; oldest messages are dropped beyond it
+        """
+        self.max_messages = max_messages
+        self._roles = array("B")
+        self._stamps = array("q")
+        # utc offsets of timezone-aware timestamps, by physical index (naive ones are absent)
+        self._offsets: Dict[int, int] = {}
+        self._contents: List[str] = []
+        # sys.getsizeof of every string in _contents, trimmed prefix included until compacted
+        self._content_bytes = 0
+        self._start = 0
+        self._base_seq = 0
 
     def load_history(self) -> List[ChatMessage]:
         """
@@ -30,7 +72,67 @@ class ChatMemory:
         Returns:
             List of ChatMessage in chronological order
         """
-        return list(self._storage)
+        return self._materialize(self._start, len(self._contents))
+
+    def load_recent(self, n: int) -> List[ChatMessage]:
+        """
+        Load the last n messages
+
+        Returns:
+            Up to n ChatMessage in chronological order
+        """
+        if n <= 0:
+            return []
+        end = len(self._contents)
+        return self._materialize(max(self._start, end - n), end)
+
+    def load_page(self, before_seq: Optional[int], limit: int) -> List[ChatMessage]:
+        """
+        Load up to `limit` messages older than before_seq
+
+        Args:
+            before_seq: Exclusive upper bound on seq; None pages from the newest message
+            limit: Maximum messages to return
+
+        Returns:
+            ChatMessage list in chronological order
+        """
+        if limit <= 0:
+            return []
+        end = len(self._contents)
+        if before_seq is not None:
+            end = min(end, before_seq - self._base_seq)
+        if end <= self._start:
+            return []
+        return self._materialize(max(self._start, end - limit), end)
+
+    def iter_reverse(self) -> Iterator[ChatMessage]:
+        """Iterate messages newest-first, materializing one chunk at a time"""
+        end = len(self._contents)
+        while end > self._start:
+            begin = max(self._start, end - _ITER_CHUNK)
+            yield from reversed(self._materialize(begin, end))
+            end = begin
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        begin = self._start
+        while begin < len(self._contents):
+            end = min(len(self._contents), begin + _ITER_CHUNK)
+            yield from self._materialize(begin, end)
+            begin = end
+
+    def __len__(self) -> int:
+        return len(self._contents) - self._start
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the columns and content strings (O(1), trimmed-but-uncompacted prefix included)"""
+        return (
+            sys.getsizeof(self._roles)
+            + sys.getsizeof(self._stamps)
+            + sys.getsizeof(self._offsets)
+            + sys.getsizeof(self._contents)
+            + self._content_bytes
+        )
 
     def add_message(self, message: ChatMessage) -> None:
         """
@@ -39,8 +141,67 @@ class ChatMemory:
         Args:
             message: ChatMessage to append
         """
-        self._storage.append(message)
+        self.add(message.role, message.content, message.timestamp)
+
+    def add(self, role: str, content: str, timestamp: Optional[datetime] = None) -> None:
+        """
+        Append a message from its fields without building a ChatMessage
+
+        Args:
+            role: "system", "user" or "assistant"
+            content: Message text
+            timestamp: Creation time (default: now)
+
+        Raises:
+            KeyError: If role is unknown
+            TypeError: If content is not a string
+        """
+        if not isinstance(content, str):
+            raise TypeError("content must be a string")
+        us, offset = datetime_to_epoch_us(timestamp or datetime.now())
+        if offset is not None:
+            self._offsets[len(self._contents)] = offset
+        self._roles.append(_ROLE_INDEX[role])
+        self._stamps.append(us)
+        self._contents.append(content)
+        self._content_bytes += sys.getsizeof(content)
+        if self.max_messages is not None and len(self) > self.max_messages:
+            self._start += 1
+            if self._start >= max(64, len(self._contents) // 2):
+                self._compact()
 
     def clean_history(self) -> None:
         """Clear all messages from the chat history"""
-        self._storage.clear()
\ No newline at end of file
+        self._roles = array("B")
+        self._stamps = array("q")
+        self._offsets.clear()
+        self._contents.clear()
+        self._content_bytes = 0
+        self._start = 0
+        self._base_seq = 0
+
+    def _compact(self) -> None:
+        """Drop the trimmed prefix from every column in one pass"""
+        cut = self._start
+        del self._roles[:cut]
+        del self._stamps[:cut]
+        self._content_bytes -= sum(sys.getsizeof(c) for c in self._contents[:cut])
+        del self._contents[:cut]
+        if self._offsets:
+            self._offsets = {i - cut: o for i, o in self._offsets.items() if i >= cut}
+        self._base_seq += cut
+        self._start = 0
+
+    def _materialize(self, begin: int, end: int) -> List[ChatMessage]:
+        """Build ChatMessage objects for physical indexes [begin, end) (columns are pre-validated)"""
+        offsets = self._offsets
+        roles, stamps, contents = self._roles, self._stamps, self._contents
+        construct = ChatMessage.model_construct
+        return [
+            construct(
+                role=ROLE_CODES[roles[i]],
+                content=contents[i],
+                timestamp=epoch_us_to_datetime(stamps[i], offsets.get(i)),
+            )
+            for i in range(begin, end)
+        ]
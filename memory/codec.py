@@ -0,0 +1,265 @@
+"""
+codec.py
+
+Compact binary storage format (msgpack) for roadmaps and chat histories
+
+Key features:
+- encode_roadmap / decode_roadmap: string table interning repeated titles/URLs/descriptions
+- encode_messages / decode_messages: columnar rows, role byte codes, delta-encoded epoch-µs timestamps
+- pack_message / unpack_messages: one headerless record per message for list-based stores (Redis)
+- Enum codes for Resource.type, Resource.difficulty and ChatMessage.role
+- Versioned header; decoding rebuilds models through the cached TypeAdapters
+- Any malformed payload (bad msgpack, wrong shape, unknown codes) raises ValidationError
+
+Format stability: code tables below are append-only; never reorder existing entries
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import msgpack
+
+from domain import ChatMessage, Roadmap, ROADMAP_ADAPTER, CHAT_HISTORY_ADAPTER
+from utils import ValidationError
+
+FORMAT_VERSION = 1
+
+_KIND_ROADMAP = 1
+_KIND_MESSAGES = 2
+
+# Append-only code tables
+ROLE_CODES: Tuple[str, ...] = ("system", "user", "assistant")
+RESOURCE_TYPE_CODES: Tuple[str, ...] = ("video", "article", "book", "course", "practice", "project", "documentation")
+DIFFICULTY_CODES: Tuple[str, ...] = ("beginner", "intermediate", "advanced")
+
+_ROLE_INDEX = {v: i for i, v in enumerate(ROLE_CODES)}
+_TYPE_INDEX = {v: i for i, v in enumerate(RESOURCE_TYPE_CODES)}
+_DIFFICULTY_INDEX = {v: i for i, v in enumerate(DIFFICULTY_CODES)}
+
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def datetime_to_epoch_us(value: datetime) -> Tuple[int, Optional[int]]:
+    """
+    Convert datetime to (epoch microseconds, utc offset seconds)
+
+    Naive datetimes are counted from a naive epoch (lossless, no timezone lookup)
+    and return offset None; aware datetimes are counted in UTC and keep their offset
+    """
+    if value.tzinfo is None:
+        return (value - _NAIVE_EPOCH) // timedelta(microseconds=1), None
+    offset = value.utcoffset()
+    return (value - _UTC_EPOCH) // timedelta(microseconds=1), int(offset.total_seconds())
+
+def epoch_us_to_datetime(us: int, offset: Optional[int] = None) -> datetime:
+    """Inverse of datetime_to_epoch_us"""
+    if offset is None:
+        return _NAIVE_EPOCH + timedelta(microseconds=us)
+    return (_UTC_EPOCH + timedelta(microseconds=us)).astimezone(timezone(timedelta(seconds=offset)))
+
+class _StringTable:
+    """Intern strings into a list; each distinct string is stored once"""
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def ref(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self._index[value] = idx
+            self.strings.append(value)
+        return idx
+
+def _check_header(payload: Any, kind: int) -> list:
+    """Validate version/kind header and return the payload body"""
+    if not isinstance(payload, list) or len(payload) < 2:
+        raise ValidationError(message="Invalid binary snapshot")
+    if payload[0] != FORMAT_VERSION:
+        raise ValidationError(message=f"Unsupported snapshot format version {payload[0]}")
+    if payload[1] != kind:
+        raise ValidationError(message=f"Unexpected snapshot kind {payload[1]} (expected {kind})")
+    return payload
+
+@contextmanager
+def _malformed() -> Iterator[None]:
+    """Turn shape errors of a well-formed msgpack payload into ValidationError"""
+    try:
+        yield
+    except (IndexError, KeyError, TypeError, ValueError, OverflowError) as e:
+        raise ValidationError(message="Malformed binary snapshot") from e
+
+def _code(table: Tuple[str, ...], index: int) -> str:
+    """Look up an enum code, rejecting unknown (including negative) indexes"""
+    if not isinstance(index, int) or not 0 <= index < len(table):
+        raise ValueError(f"Unknown code {index!r}")
+    return table[index]
+
+def _unpack(data: bytes) -> Any:
+    try:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    except (msgpack.UnpackException, ValueError) as e:
+        raise ValidationError(message="Corrupted binary snapshot") from e
+
+def encode_roadmap(roadmap: Roadmap) -> bytes:
+    """
+    Encode Roadmap into compact bytes
+
+    Layout: [version, kind, strings, topic, title, description, duration_week,
+             prerequisites, created_at_us, created_at_offset, milestones]
+    All text fields are indexes into `strings`
+    """
+    table = _StringTable()
+    ref = table.ref
+
+    milestones = [
+        [
+            m.week,
+            ref(m.topic),
+            ref(m.description),
+            ref(m.estimated_time),
+            [ref(o) for o in m.learning_objectives] if m.learning_objectives is not None else None,
+            [
+                [
+                    ref(r.title),
+                    ref(str(r.url)),
+                    _TYPE_INDEX[r.type],
+                    ref(r.description),
+                    _DIFFICULTY_INDEX[r.difficulty] if r.difficulty is not None else None,
+                ]
+                for r in m.resources
+            ],
+        ]
+        for m in roadmap.milestones
+    ]
+    created_us, created_offset = datetime_to_epoch_us(roadmap.created_at)
+    body = [
+        ref(roadmap.topic),
+        ref(roadmap.title),
+        ref(roadmap.description),
+        roadmap.duration_week,
+        [ref(p) for p in roadmap.prerequisites] if roadmap.prerequisites is not None else None,
+        created_us,
+        created_offset,
+        milestones,
+    ]
+    return msgpack.packb([FORMAT_VERSION, _KIND_ROADMAP, table.strings, *body], use_bin_type=True)
+
+def decode_roadmap(data: bytes) -> Roadmap:
+    """
+    Decode bytes produced by encode_roadmap
+
+    Raises:
+        ValidationError: On corrupted data, unexpected shape or unsupported version
+    """
+    payload = _check_header(_unpack(data), _KIND_ROADMAP)
+    with _malformed():
+        return _decode_roadmap_body(payload)
+
+def _decode_roadmap_body(payload: list) -> Roadmap:
+    (_, _, strings, topic, title, description, duration_week,
+     prerequisites, created_us, created_offset, milestones) = payload
+
+    def s(idx: Optional[int]) -> Optional[str]:
+        return strings[idx] if idx is not None else None
+
+    return ROADMAP_ADAPTER.validate_python({
+        "topic": s(topic),
+        "title": s(title),
+        "description": s(description),
+        "duration_week": duration_week,
+        "prerequisites": [strings[i] for i in prerequisites] if prerequisites is not None else None,
+        "created_at": epoch_us_to_datetime(created_us, created_offset),
+        "milestones": [
+            {
+                "week": week,
+                "topic": s(m_topic),
+                "description": s(m_description),
+                "estimated_time": s(estimated_time),
+                "learning_objectives": [strings[i] for i in objectives] if objectives is not None else None,
+                "resources": [
+                    {
+                        "title": s(r_title),
+                        "url": strings[url],
+                        "type": _code(RESOURCE_TYPE_CODES, type_code),
+                        "description": s(r_description),
+                        "difficulty": _code(DIFFICULTY_CODES, difficulty) if difficulty is not None else None,
+                    }
+                    for r_title, url, type_code, r_description, difficulty in resources
+                ],
+            }
+            for week, m_topic, m_description, estimated_time, objectives, resources in milestones
+        ],
+    })
+
+def encode_messages(messages: Sequence[ChatMessage]) -> bytes:
+    """
+    Encode chat messages into compact columnar bytes
+
+    Layout: [version, kind, roles(bytes), contents, timestamp_deltas_us, offsets|None]
+    Timestamps are delta-encoded so consecutive messages cost a few bytes each
+    """
+    roles = bytes(_ROLE_INDEX[m.role] for m in messages)
+    contents = [m.content for m in messages]
+    deltas: List[int] = []
+    offsets: List[Optional[int]] = []
+    previous = 0
+    for m in messages:
+        us, offset = datetime_to_epoch_us(m.timestamp)
+        deltas.append(us - previous)
+        offsets.append(offset)
+        previous = us
+    has_offsets = any(o is not None for o in offsets)
+    return msgpack.packb(
+        [FORMAT_VERSION, _KIND_MESSAGES, roles, contents, deltas, offsets if has_offsets else None],
+        use_bin_type=True,
+    )
+
+def decode_messages(data: bytes) -> List[ChatMessage]:
+    """
+    Decode bytes produced by encode_messages
+
+    Raises:
+        ValidationError: On corrupted data, unexpected shape or unsupported version
+    """
+    payload = _check_header(_unpack(data), _KIND_MESSAGES)
+    with _malformed():
+        _, _, roles, contents, deltas, offsets = payload
+        if offsets is None:
+            offsets = [None] * len(deltas)
+
+        rows = []
+        us = 0
+        for role, content, delta, offset in zip(roles, contents, deltas, offsets, strict=True):
+            us += delta
+            rows.append({
+                "role": _code(ROLE_CODES, role),
+                "content": content,
+                "timestamp": epoch_us_to_datetime(us, offset),
+            })
+        return CHAT_HISTORY_ADAPTER.validate_python(rows)
+
+def pack_message(message: ChatMessage) -> bytes:
+    """Encode a single message as a headerless [role, content, ts_us, offset] record"""
+    us, offset = datetime_to_epoch_us(message.timestamp)
+    return msgpack.packb([_ROLE_INDEX[message.role], message.content, us, offset], use_bin_type=True)
+
+def unpack_messages(records: Sequence[bytes]) -> List[ChatMessage]:
+    """
+    Decode records produced by pack_message
+
+    Raises:
+        ValidationError: On corrupted or malformed records
+    """
+    rows = []
+    with _malformed():
+        for record in records:
+            role, content, us, offset = _unpack(record)
+            rows.append({
+                "role": _code(ROLE_CODES, role),
+                "content": content,
+                "timestamp": epoch_us_to_datetime(us, offset),
+            })
+        return CHAT_HISTORY_ADAPTER.validate_python(rows)
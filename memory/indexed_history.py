@@ -0,0 +1,132 @@
+"""
+indexed_history.py
+
+ChatHistory wrapper that keeps a BM25 index of its messages up to date
+
+Key features:
+- IndexedChatHistory: delegates storage to any ChatHistory, indexes each message on add_message
+- relevant_context(query, recent, turns): top-k relevant older turns + the most recent messages,
+  so long sessions keep useful context while the prompt stays small
+- Existing messages of the wrapped history are indexed once at construction
+- Capped backends (max_messages: ChatMemory ring buffer, Redis LTRIM): postings of trimmed
+  messages are evicted on append, so the index never outgrows the history
+- memory_bytes(): in-process footprint, index postings plus the backend's own (when it reports one)
+"""
+from __future__ import annotations
+
+from typing import Iterator, List, Optional, TYPE_CHECKING
+
+from domain import ChatMessage
+from memory.bm25 import BM25Index
+
+if TYPE_CHECKING:
+    from memory.chat_history import ChatHistory
+
+class IndexedChatHistory:
+    """
+    Chat history with incremental keyword retrieval
+
+    Responsibilities:
+    - Mirror ChatHistory seq numbering (from 0, restart on clean_history) as BM25 doc ids
+    - Answer relevance queries without scanning the history
+    - Keep the index to the seqs the backend still holds
+    - Fetch retrieved messages from the wrapped backend by seq (load_page)
+    """
+    def __init__(self, inner: ChatHistory, index: Optional[BM25Index] = None):
+        """
+        Args:
+            inner: Storage backend (ChatMemory, SQLiteChatHistory, ...)
+            index: Optional preconfigured BM25Index
+        """
+        self.inner = inner
+        self.index = index if index is not None else BM25Index()
+        self._next_seq = 0
+        for message in inner:
+            self.index.add(self._next_seq, message.content)
+            self._next_seq += 1
+
+    def add_message(self, message: ChatMessage) -> None:
+        """
+        Add a message to the wrapped history and index it
+
+        Args:
+            message: ChatMessage to append
+        """
+        self.inner.add_message(message)
+        self.index.add(self._next_seq, message.content)
+        self._next_seq += 1
+        cap = getattr(self.inner, "max_messages", None)
+        if cap is not None and len(self.index) > cap:
+            # The backend dropped its oldest messages: drop their postings too
+            self.index.discard_before(self._next_seq - cap)
+
+    def clean_history(self) -> None:
+        """Clear the wrapped history and the index"""
+        self.inner.clean_history()
+        self.index.clear()
+        self._next_seq = 0
+
+    def load_history(self) -> List[ChatMessage]:
+        return self.inner.load_history()
+
+    def load_recent(self, n: int) -> List[ChatMessage]:
+        return self.inner.load_recent(n)
+
+    def load_page(self, before_seq: Optional[int], limit: int) -> List[ChatMessage]:
+        return self.inner.load_page(before_seq, limit)
+
+    def iter_reverse(self) -> Iterator[ChatMessage]:
+        return self.inner.iter_reverse()
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        return iter(self.inner)
+
+    def __len__(self) -> int:
+        return len(self.inner)
+
+    def memory_bytes(self) -> int:
+        """
+        Estimated in-process bytes: BM25 postings plus the wrapped history
+
+        Backends without memory_bytes() (SQLite, Redis) keep messages out of process,
+        so only the index is counted for them
+        """
+        inner_bytes = getattr(self.inner, "memory_bytes", None)
+        return self.index.memory_bytes() + (inner_bytes() if inner_bytes is not None else 0)
+
+    def relevant_context(self, query: str, recent: int, turns: int) -> List[ChatMessage]:
+        """
+        Build chat context: relevant older turns first, then the last `recent` messages
+
+        A hit on a user message brings its answer along and a hit on an assistant
+        message brings its question, so retrieved context reads as whole turns
+
+        Args:
+            query: Current user input
+            recent: Number of most recent messages always included
+            turns: Maximum number of older turns to retrieve
+
+        Returns:
+            ChatMessage list: retrieved turns oldest-first, then recent messages
+        """
+        recent_messages = self.inner.load_recent(recent)
+        cutoff = self._next_seq - len(recent_messages)
+        if turns <= 0 or cutoff <= 0:
+            return recent_messages
+
+        seqs = set()
+        for seq, _ in self.index.search(query, k=turns, before=cutoff):
+            message = self._message_at(seq)
+            if message is None:
+                continue
+            partner = seq + 1 if message.role == "user" else seq - 1
+            seqs.add(seq)
+            if 0 <= partner < cutoff:
+                seqs.add(partner)
+
+        retrieved = [m for m in (self._message_at(seq) for seq in sorted(seqs)) if m is not None]
+        return retrieved + recent_messages
+
+    def _message_at(self, seq: int) -> Optional[ChatMessage]:
+        page = self.inner.load_page(seq + 1, 1)
+        return page[0] if page else None
@@ -0,0 +1,52 @@
+"""
+long_term.py
+
+Semantic long-term memory across a learner's sessions
+
+Key features:
+- LongTermMemory: remember(owner, texts) embeds and stores; recall(owner, query, k) returns
+  the most similar past items above a score threshold
+- Pluggable EmbeddingProvider (HashingEmbeddingProvider for offline use and tests)
+- Backed by VectorStore (RAM or memory-mapped directory)
+"""
+from __future__ import annotations
+
+from typing import List, Sequence, TYPE_CHECKING
+
+from memory.vector_store import VectorHit, VectorStore
+
+if TYPE_CHECKING:
+    from ai.embeddings import EmbeddingProvider
+
+class LongTermMemory:
+    """
+    Facade over an embedding provider and a vector store
+
+    Responsibilities:
+    - Embed texts in one batch per call and store them under an owner key
+    - Recall an owner's most relevant items for a query
+    """
+    def __init__(self, provider: EmbeddingProvider, store: VectorStore, *, min_score: float = 0.2):
+        """
+        Args:
+            provider: Embedding backend; its dim must match the store
+            store: Vector index
+            min_score: Cosine similarity below which recalled items are dropped
+        """
+        if provider.dim != store.dim:
+            raise ValueError(f"Provider dim {provider.dim} does not match store dim {store.dim}")
+        self.provider = provider
+        self.store = store
+        self.min_score = min_score
+
+    def remember(self, owner: str, texts: Sequence[str]) -> List[int]:
+        """Embed and store texts (e.g. user goals, turn summaries) for owner"""
+        texts = [t for t in texts if t and t.strip()]
+        if not texts:
+            return []
+        return self.store.add(owner, texts, self.provider.embed(texts))
+
+    def recall(self, owner: str, query: str, k: int = 3) -> List[VectorHit]:
+        """Return up to k of owner's stored items most similar to query, best first"""
+        hits = self.store.search(self.provider.embed([query])[0], k=k, owner=owner)
+        return [hit for hit in hits if hit.score >= self.min_score]
@@ -0,0 +1,162 @@
+"""
+redis_history.py
+
+Redis implementation of chat history storage (shared by horizontally scaled workers)
+
+Key features:
+- RedisChatHistory: one capped Redis list per session of compact msgpack records
+- RPUSH + LTRIM + EXPIRE + seq INCRBY per append in one MULTI/EXEC round-trip: a batch is
+  applied whole or not at all, so a retried batch is never half duplicated
+- LRANGE tail reads for load_recent(n); load_page/iteration map seq to list indexes
+  through a per-session append counter
+- Key TTL matching the session inactivity timeout (SessionManager.timeout)
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Iterable, Iterator, List, Optional, TYPE_CHECKING
+
+from domain import ChatMessage
+from memory.codec import pack_message, unpack_messages
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+KEY_PREFIX = "learnpath:history:v1:"
+SEQ_KEY_SUFFIX = ":seq"
+
+# Records fetched per LRANGE while iterating
+_ITER_PAGE_SIZE = 256
+
+class RedisChatHistory:
+    """
+    Handle chat history for one session in Redis (add, load, load_recent, clear)
+
+    Responsibilities:
+    - Append messages as packed records to a list capped at max_messages
+    - Refresh the key TTL on every append so idle sessions expire with the session
+    - Serve full, tail and paged reads with LRANGE
+    - Count appends in a companion key so seq survives LTRIM (seq of index 0 = appended - length)
+    """
+    def __init__(
+        self,
+        client: Redis,
+        session_id: str,
+        *,
+        ttl: timedelta | int = timedelta(minutes=30),
+        max_messages: int = 1000,
+    ):
+        """
+        Args:
+            client: redis-py compatible client (redis.Redis, fakeredis.FakeRedis, ...)
+            session_id: Conversation key
+            ttl: Key expiry after the last append; pass SessionManager.timeout to match sessions
+            max_messages: Oldest messages beyond this cap are trimmed
+        """
+        self._client = client
+        self.session_id = session_id
+        self.key = f"{KEY_PREFIX}{session_id}"
+        self.seq_key = f"{self.key}{SEQ_KEY_SUFFIX}"
+        self.ttl_seconds = int(ttl.total_seconds()) if isinstance(ttl, timedelta) else int(ttl)
+        self.max_messages = max_messages
+
+    def add_message(self, message: ChatMessage) -> None:
+        """
+        Add a message to the chat history (single pipelined round-trip)
+
+        Args:
+            message: ChatMessage to append
+        """
+        self.add_messages([message])
+
+    def add_messages(self, messages: Iterable[ChatMessage]) -> None:
+        """Append several messages atomically (MULTI/EXEC) in one round-trip"""
+        records = [pack_message(m) for m in messages]
+        if not records:
+            return
+        pipe = self._client.pipeline(transaction=True)
+        pipe.rpush(self.key, *records)
+        pipe.ltrim(self.key, -self.max_messages, -1)
+        pipe.expire(self.key, self.ttl_seconds)
+        pipe.incrby(self.seq_key, len(records))
+        pipe.expire(self.seq_key, self.ttl_seconds)
+        pipe.execute()
+
+    def load_history(self) -> List[ChatMessage]:
+        """
+        Load the full (capped) chat history
+
+        Returns:
+            List of ChatMessage in chronological order
+        """
+        return unpack_messages(self._client.lrange(self.key, 0, -1))
+
+    def load_recent(self, n: int) -> List[ChatMessage]:
+        """
+        Load only the last n messages
+
+        Returns:
+            Up to n ChatMessage in chronological order
+        """
+        if n <= 0:
+            return []
+        return unpack_messages(self._client.lrange(self.key, -n, -1))
+
+    def load_page(self, before_seq: Optional[int], limit: int) -> List[ChatMessage]:
+        """
+        Load up to `limit` messages older than before_seq
+
+        Args:
+            before_seq: Exclusive upper bound on seq; None pages from the newest message
+            limit: Maximum messages to return
+
+        Returns:
+            ChatMessage list in chronological order
+        """
+        if limit <= 0:
+            return []
+        if before_seq is None:
+            return self.load_recent(limit)
+        first_seq, _ = self._bounds()
+        end = before_seq - first_seq - 1
+        if end < 0:
+            return []
+        start = max(0, end - limit + 1)
+        return unpack_messages(self._client.lrange(self.key, start, end))
+
+    def iter_reverse(self) -> Iterator[ChatMessage]:
+        """Iterate messages newest-first, one LRANGE per page"""
+        first_seq, length = self._bounds()
+        before = first_seq + length
+        while True:
+            page = self.load_page(before, _ITER_PAGE_SIZE)
+            if not page:
+                return
+            yield from reversed(page)
+            before -= len(page)
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        """Iterate messages oldest-first, one LRANGE per page"""
+        start = 0
+        while True:
+            records = self._client.lrange(self.key, start, start + _ITER_PAGE_SIZE - 1)
+            if not records:
+                return
+            yield from unpack_messages(records)
+            start += len(records)
+
+    def clean_history(self) -> None:
+        """Delete the session's history and seq counter keys"""
+        self._client.delete(self.key, self.seq_key)
+
+    def __len__(self) -> int:
+        return int(self._client.llen(self.key))
+
+    def _bounds(self) -> tuple[int, int]:
+        """Return (seq of the oldest stored message, stored length) in one round-trip"""
+        pipe = self._client.pipeline(transaction=True)
+        pipe.get(self.seq_key)
+        pipe.llen(self.key)
+        appended, length = pipe.execute()
+        length = int(length)
+        return int(appended or 0) - length, length
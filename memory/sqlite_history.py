@@ -0,0 +1,248 @@
+"""
+sqlite_history.py
+
+SQLite implementation of chat history storage (durable across restarts)
+
+Key features:
+- SQLiteChatHistory: ChatHistory backend for one session in a shared SQLite file
+- WAL journal, (session_id, seq) clustered primary key, statement cache
+- Group commit: appends are buffered and written in one transaction per batch
+- Failed writes never consume seqs: retrying the same append cannot store it twice
+- load_recent(n) / load_page / iteration: index range scans, never the whole conversation
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from domain import ChatMessage, CHAT_HISTORY_ADAPTER
+from memory.codec import ROLE_CODES, datetime_to_epoch_us, epoch_us_to_datetime
+
+_ROLE_INDEX = {v: i for i, v in enumerate(ROLE_CODES)}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_messages (
+    session_id TEXT    NOT NULL,
+    seq        INTEGER NOT NULL,
+    role       INTEGER NOT NULL,
+    content    TEXT    NOT NULL,
+    ts_us      INTEGER NOT NULL,
+    ts_offset  INTEGER,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+_INSERT = "INSERT INTO chat_messages (session_id, seq, role, content, ts_us, ts_offset) VALUES (?, ?, ?, ?, ?, ?)"
+_SELECT_ALL = "SELECT role, content, ts_us, ts_offset FROM chat_messages WHERE session_id = ? ORDER BY seq"
+_SELECT_TAIL = (
+    "SELECT role, content, ts_us, ts_offset FROM chat_messages "
+    "WHERE session_id = ? ORDER BY seq DESC LIMIT ?"
+)
+_SELECT_PAGE_BEFORE = (
+    "SELECT role, content, ts_us, ts_offset FROM chat_messages "
+    "WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?"
+)
+_SELECT_PAGE_AFTER = (
+    "SELECT seq, role, content, ts_us, ts_offset FROM chat_messages "
+    "WHERE session_id = ? AND seq > ? ORDER BY seq LIMIT ?"
+)
+_SELECT_BOUNDS = "SELECT MIN(seq), MAX(seq) FROM chat_messages WHERE session_id = ?"
+_DELETE = "DELETE FROM chat_messages WHERE session_id = ?"
+
+_Row = Tuple[str, int, int, str, int, Optional[int]]
+
+# Rows fetched per query while iterating
+_ITER_PAGE_SIZE = 256
+
+class SQLiteChatHistory:
+    """
+    Handle chat history for one session in SQLite (add, load, load_recent, clear)
+
+    Responsibilities:
+    - Buffer appends and commit them in groups of batch_size (or on flush/read/close)
+    - Serve reads from the database after flushing pending appends
+    - Assume a single writer per session_id (seq is tracked in-process)
+    - Keep seq assignment atomic with the write: a call that raises has appended nothing
+    """
+    def __init__(self, path: str | Path, session_id: str, *, batch_size: int = 32):
+        """
+        Open (or create) the history database for a session
+
+        Args:
+            path: SQLite file path, or ":memory:" for tests
+            session_id: Conversation key; many sessions can share one file
+            batch_size: Appends buffered before an automatic commit (1 = commit every append)
+        """
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.session_id = session_id
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, cached_statements=64)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._pending: List[_Row] = []
+
+        low, high = self._conn.execute(_SELECT_BOUNDS, (session_id,)).fetchone()
+        self._next_seq = 0 if high is None else high + 1
+        self._length = 0 if high is None else high - low + 1
+
+    def add_message(self, message: ChatMessage) -> None:
+        """
+        Add a message to the chat history (committed with its batch)
+
+        If the batch commit fails, this message is taken back (earlier buffered rows stay
+        pending and are written by the next flush), so the caller may retry it
+
+        Args:
+            message: ChatMessage to append
+        """
+        with self._lock:
+            self._pending.append(self._to_row(message, self._next_seq))
+            self._next_seq += 1
+            if len(self._pending) >= self.batch_size:
+                try:
+                    self._flush_locked()
+                except Exception:
+                    self._pending.pop()
+                    self._next_seq -= 1
+                    raise
+
+    def add_messages(self, messages: Iterable[ChatMessage]) -> None:
+        """
+        Append several messages and commit them in one transaction
+
+        All or nothing: seqs are only consumed once the insert commits, so a retry after a
+        failure stores the messages exactly once
+        """
+        with self._lock:
+            self._flush_locked()
+            rows = [self._to_row(m, self._next_seq + i) for i, m in enumerate(messages)]
+            if not rows:
+                return
+            with self._conn:
+                self._conn.executemany(_INSERT, rows)
+            self._next_seq += len(rows)
+            self._length += len(rows)
+
+    def load_history(self) -> List[ChatMessage]:
+        """
+        Load the full chat history
+
+        Returns:
+            List of ChatMessage in chronological order
+        """
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(_SELECT_ALL, (self.session_id,)).fetchall()
+        return self._to_messages(rows)
+
+    def load_recent(self, n: int) -> List[ChatMessage]:
+        """
+        Load only the last n messages (index range scan from the end)
+
+        Returns:
+            Up to n ChatMessage in chronological order
+        """
+        if n <= 0:
+            return []
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(_SELECT_TAIL, (self.session_id, n)).fetchall()
+        rows.reverse()
+        return self._to_messages(rows)
+
+    def load_page(self, before_seq: Optional[int], limit: int) -> List[ChatMessage]:
+        """
+        Load up to `limit` messages older than before_seq
+
+        Args:
+            before_seq: Exclusive upper bound on seq; None pages from the newest message
+            limit: Maximum messages to return
+
+        Returns:
+            ChatMessage list in chronological order
+        """
+        if limit <= 0:
+            return []
+        if before_seq is None:
+            return self.load_recent(limit)
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(_SELECT_PAGE_BEFORE, (self.session_id, before_seq, limit)).fetchall()
+        rows.reverse()
+        return self._to_messages(rows)
+
+    def iter_reverse(self) -> Iterator[ChatMessage]:
+        """Iterate messages newest-first, one page per query"""
+        with self._lock:
+            before = self._next_seq
+        while True:
+            page = self.load_page(before, _ITER_PAGE_SIZE)
+            if not page:
+                return
+            yield from reversed(page)
+            before -= len(page)
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        """Iterate messages oldest-first, one page per query"""
+        after = -1
+        while True:
+            with self._lock:
+                self._flush_locked()
+                rows = self._conn.execute(_SELECT_PAGE_AFTER, (self.session_id, after, _ITER_PAGE_SIZE)).fetchall()
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield from self._to_messages([row[1:] for row in rows])
+
+    def clean_history(self) -> None:
+        """Delete all messages of this session (pending appends included)"""
+        with self._lock:
+            self._pending.clear()
+            with self._conn:
+                self._conn.execute(_DELETE, (self.session_id,))
+            self._next_seq = 0
+            self._length = 0
+
+    def flush(self) -> None:
+        """Commit pending appends now"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """Flush pending appends and close the connection"""
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._length + len(self._pending)
+
+    def _flush_locked(self) -> None:
+        """Write pending rows in a single transaction (caller holds the lock)"""
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(_INSERT, self._pending)
+        self._length += len(self._pending)
+        self._pending.clear()
+
+    def _to_row(self, message: ChatMessage, seq: int) -> _Row:
+        """Convert message to a table row stored at seq"""
+        ts_us, ts_offset = datetime_to_epoch_us(message.timestamp)
+        return (self.session_id, seq, _ROLE_INDEX[message.role], message.content, ts_us, ts_offset)
+
+    @staticmethod
+    def _to_messages(rows: List[tuple]) -> List[ChatMessage]:
+        """Convert (role, content, ts_us, ts_offset) rows to ChatMessage"""
+        return CHAT_HISTORY_ADAPTER.validate_python([
+            {
+                "role": ROLE_CODES[role],
+                "content": content,
+                "timestamp": epoch_us_to_datetime(ts_us, ts_offset),
+            }
+            for role, content, ts_us, ts_offset in rows
+        ])
@@ -0,0 +1,310 @@
+"""
+vector_store.py
+
+Contiguous float32 vector index (optionally memory-mapped) with exact and IVF search
+
+Key features:
+- VectorStore: one row per item in a (capacity, dim) float32 matrix; on disk it is an
+  np.memmap that grows by doubling, with owner/text metadata in an append-only NDJSON file
+  (rows flushed before their metadata; a torn metadata tail is truncated on open)
+- Exact top-k: one matrix-vector product (search) or matrix-matrix product (search_many)
+- IVF mode above ivf_threshold items: k-means partitions, probe the nprobe closest lists
+  plus items added since training; retrained when the store doubles
+- Owner filter so one store can serve many learners
+"""
+
+import json
+import math
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils import ValidationError, logger
+
+_VECTORS_FILE = "vectors.f32"
+_META_FILE = "meta.ndjson"
+
+# Rows scored per block when scanning (bounds temporary memory)
+_BLOCK_ROWS = 65_536
+
+@dataclass(frozen=True)
+class VectorHit:
+    """Search result: item id, cosine similarity, owner and stored text"""
+    id: int
+    score: float
+    owner: str
+    text: str
+
+class VectorStore:
+    """
+    Append-only vector index with cosine (dot product on unit vectors) search
+
+    Responsibilities:
+    - Store vectors contiguously; persist them with np.memmap when a path is given
+    - Keep owner codes in a NumPy array for vectorized filtering; texts in memory or NDJSON on disk
+    - Switch from exact scan to IVF probing once the store is large
+    """
+    def __init__(
+        self,
+        dim: int,
+        path: Optional[str | Path] = None,
+        *,
+        capacity: int = 1024,
+        ivf_threshold: int = 50_000,
+        nprobe: int = 8,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            dim: Vector dimensionality
+            path: Directory for vectors.f32 / meta.ndjson; None keeps everything in RAM
+            capacity: Initial row capacity
+            ivf_threshold: Item count at which IVF partitions are trained
+            nprobe: Partitions probed per IVF query
+            seed: RNG seed for k-means (deterministic partitions)
+        """
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.RLock()
+        self._path = Path(path) if path is not None else None
+
+        self._owner_ids: Dict[str, int] = {}
+        self._owner_names: List[str] = []
+        self._texts: List[str] = []
+        self._meta_offsets: List[int] = []
+        self._count = 0
+
+        owner_codes = np.empty(0, dtype=np.int32)
+        if self._path is not None:
+            self._path.mkdir(parents=True, exist_ok=True)
+            owner_codes = self._load_meta()
+            capacity = max(capacity, self._count)
+            self._matrix = self._open_memmap(capacity)
+        else:
+            self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._owners = np.full(self._matrix.shape[0], -1, dtype=np.int32)
+        self._owners[: self._count] = owner_codes
+
+        self._centroids: Optional[np.ndarray] = None
+        self._list_order: Optional[np.ndarray] = None
+        self._list_bounds: Optional[np.ndarray] = None
+        self._trained_count = 0
+        if self._count >= ivf_threshold:
+            self._train()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def ivf_enabled(self) -> bool:
+        return self._centroids is not None
+
+    def add(self, owner: str, texts: Sequence[str], vectors: np.ndarray) -> List[int]:
+        """
+        Append items
+
+        Args:
+            owner: Owner key (e.g. learner id)
+            texts: Text stored with each vector
+            vectors: (len(texts), dim) float32, expected L2-normalized
+
+        Returns:
+            Ids of the new items
+
+        Raises:
+            ValidationError: On shape mismatch
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape != (len(texts), self.dim):
+            raise ValidationError(message=f"Expected vectors of shape ({len(texts)}, {self.dim})")
+        with self._lock:
+            start, end = self._count, self._count + len(texts)
+            self._ensure_capacity(end)
+            self._matrix[start:end] = vectors
+            if self._path is not None:
+                self._matrix.flush()  # rows on disk before the metadata lines that make them visible
+            code = self._owner_code(owner)
+            self._owners[start:end] = code
+            self._append_meta(owner, texts)
+            self._count = end
+            if end >= self.ivf_threshold and (self._centroids is None or end >= 2 * self._trained_count):
+                self._train()
+            return list(range(start, end))
+
+    def search(self, query: np.ndarray, k: int = 5, owner: Optional[str] = None) -> List[VectorHit]:
+        """Top-k items for one query vector (optionally only one owner's items)"""
+        return self.search_many(np.asarray(query, dtype=np.float32)[None, :], k, owner)[0]
+
+    def search_many(self, queries: np.ndarray, k: int = 5, owner: Optional[str] = None) -> List[List[VectorHit]]:
+        """
+        Top-k items for each row of queries, scored with batched matrix products
+
+        Args:
+            queries: (m, dim) float32
+            k: Results per query
+            owner: Restrict to this owner's items
+
+        Returns:
+            One best-first hit list per query
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        with self._lock:
+            n = self._count
+            if n == 0 or k <= 0:
+                return [[] for _ in range(len(queries))]
+            code = self._owner_ids.get(owner) if owner is not None else None
+            if owner is not None and code is None:
+                return [[] for _ in range(len(queries))]
+            if self._centroids is not None:
+                return [self._search_ivf(q, k, code) for q in queries]
+            return self._search_exact(queries, k, code)
+
+    def _search_exact(self, queries: np.ndarray, k: int, code: Optional[int]) -> List[List[VectorHit]]:
+        n = self._count
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for begin in range(0, n, _BLOCK_ROWS):
+            end = min(n, begin + _BLOCK_ROWS)
+            scores = queries @ self._matrix[begin:end].T
+            if code is not None:
+                scores[:, self._owners[begin:end] != code] = -np.inf
+            ids = np.broadcast_to(np.arange(begin, end), scores.shape)
+            best_ids = np.concatenate([best_ids, ids], axis=1)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            if best_scores.shape[1] > k:
+                top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_ids = np.take_along_axis(best_ids, top, axis=1)
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+        return [self._hits(ids, scores, k) for ids, scores in zip(best_ids, best_scores)]
+
+    def _search_ivf(self, query: np.ndarray, k: int, code: Optional[int]) -> List[VectorHit]:
+        centroid_scores = self._centroids @ query
+        nprobe = min(self.nprobe, len(centroid_scores))
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        parts = [self._list_order[self._list_bounds[c]: self._list_bounds[c + 1]] for c in probe]
+        parts.append(np.arange(self._trained_count, self._count))
+        candidates = np.concatenate(parts)
+        if code is not None:
+            candidates = candidates[self._owners[candidates] == code]
+        if len(candidates) == 0:
+            return []
+        scores = self._matrix[candidates] @ query
+        return self._hits(candidates, scores, k)
+
+    def _hits(self, ids: np.ndarray, scores: np.ndarray, k: int) -> List[VectorHit]:
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [
+            VectorHit(int(ids[i]), float(scores[i]), self._owner_names[self._owners[ids[i]]], self.text(int(ids[i])))
+            for i in order
+            if np.isfinite(scores[i])
+        ]
+
+    def text(self, item_id: int) -> str:
+        """Return the text stored with item_id"""
+        if self._path is None:
+            return self._texts[item_id]
+        with open(self._path / _META_FILE, "rb") as f:
+            f.seek(self._meta_offsets[item_id])
+            return json.loads(f.readline())["text"]
+
+    def _train(self) -> None:
+        """k-means on a sample, then bucket every item by nearest centroid (caller holds the lock)"""
+        n = self._count
+        n_lists = int(min(4096, max(16, math.sqrt(n))))
+        sample_size = min(n, n_lists * 64)
+        sample = self._matrix[np.sort(self._rng.choice(n, sample_size, replace=False))]
+        centroids = sample[self._rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(10):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+
+        labels = np.empty(n, dtype=np.int32)
+        for begin in range(0, n, _BLOCK_ROWS):
+            end = min(n, begin + _BLOCK_ROWS)
+            labels[begin:end] = np.argmax(self._matrix[begin:end] @ centroids.T, axis=1)
+        self._list_order = np.argsort(labels, kind="stable")
+        self._list_bounds = np.searchsorted(labels[self._list_order], np.arange(n_lists + 1))
+        self._centroids = centroids
+        self._trained_count = n
+        logger.info(f"VectorStore trained IVF ({n_lists} lists over {n} items)")
+
+    def _owner_code(self, owner: str) -> int:
+        code = self._owner_ids.get(owner)
+        if code is None:
+            code = len(self._owner_names)
+            self._owner_ids[owner] = code
+            self._owner_names.append(owner)
+        return code
+
+    def _ensure_capacity(self, rows: int) -> None:
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        if self._path is not None:
+            self._matrix.flush()
+            del self._matrix
+            self._matrix = self._open_memmap(capacity)
+        else:
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[: self._count] = self._matrix[: self._count]
+            self._matrix = grown
+        owners = np.full(capacity, -1, dtype=np.int32)
+        owners[: self._count] = self._owners[: self._count]
+        self._owners = owners
+
+    def _open_memmap(self, capacity: int) -> np.memmap:
+        """Map vectors.f32 with at least `capacity` rows, extending the file if needed"""
+        file = self._path / _VECTORS_FILE
+        row_bytes = self.dim * 4
+        size = file.stat().st_size if file.exists() else 0
+        capacity = max(capacity, size // row_bytes, 1)
+        with open(file, "ab") as f:
+            f.truncate(capacity * row_bytes)
+        return np.memmap(file, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _append_meta(self, owner: str, texts: Sequence[str]) -> None:
+        if self._path is None:
+            self._texts.extend(texts)
+            return
+        meta = self._path / _META_FILE
+        with open(meta, "ab") as f:
+            for text in texts:
+                self._meta_offsets.append(f.tell())
+                f.write(json.dumps({"owner": owner, "text": text}, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def _load_meta(self) -> np.ndarray:
+        """
+        Rebuild count and line offsets from meta.ndjson; return per-item owner codes
+
+        A torn final line (crash mid-append) is truncated away, so the next append
+        starts on a line boundary
+        """
+        codes: List[int] = []
+        meta = self._path / _META_FILE
+        if meta.exists():
+            with open(meta, "r+b") as f:
+                offset = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        logger.warning(f"VectorStore truncating torn metadata line at byte {offset}")
+                        f.truncate(offset)
+                        break
+                    self._meta_offsets.append(offset)
+                    codes.append(self._owner_code(json.loads(line)["owner"]))
+                    offset += len(line)
+        self._count = len(codes)
+        return np.array(codes, dtype=np.int32)
@@ -0,0 +1,264 @@
+"""
+write_behind.py
+
+Write-behind wrapper that makes any durable ChatHistory cheap to append to
+
+Key features:
+- WriteBehindHistory: appends land in an in-memory front history immediately and are
+  persisted to the backend by a background thread, in batches
+- Flush on batch size or time threshold; clean_history is queued in order with appends
+- Bounded queue: producers block (backpressure) when the backend falls behind
+- flush() waits for durability; close() (also registered at exit) drains and stops the flusher,
+  waking blocked producers and ending retries even while the backend is down
+- stats(): queue depth, flushed/failed counts and append-to-durable lag
+"""
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from domain import ChatMessage
+from memory.concurrent_memory import ConcurrentChatMemory
+from utils import logger
+
+if TYPE_CHECKING:
+    from memory.chat_history import ChatHistory
+
+_APPEND = 0
+_CLEAR = 1
+_STOP = 2
+
+_Op = Tuple[int, Optional[ChatMessage], float]
+
+# Seconds a producer blocked on a full queue waits before re-checking for close()
+_PUT_POLL = 0.1
+
+def _close_at_exit(ref: weakref.ReferenceType) -> None:
+    history = ref()
+    if history is not None:
+        history.close()
+
+class WriteBehindHistory:
+    """
+    ChatHistory front that persists to a slower backend asynchronously
+
+    Responsibilities:
+    - Serve all reads from the in-memory front (thread-safe ConcurrentChatMemory)
+    - Queue appends/clears and apply them to the backend in order from one flusher thread
+    - Retry failed batches with backoff; give up (and count the loss) only while closing
+    - close() never waits on a producer stuck behind a full queue: the stop flag is an Event
+    """
+    def __init__(
+        self,
+        backend: ChatHistory,
+        *,
+        max_queue: int = 1024,
+        batch_size: int = 64,
+        flush_interval: float = 0.5,
+        retry_interval: float = 0.5,
+        preload: bool = True,
+    ):
+        """
+        Args:
+            backend: Durable history (SQLiteChatHistory, RedisChatHistory, ...)
+            max_queue: Pending operations before add_message blocks
+            batch_size: Appends written per backend call at most
+            flush_interval: Seconds to wait for a batch to fill before writing it anyway
+            retry_interval: Base delay between retries of a failed batch (doubles up to 30s)
+            preload: Load the backend's existing messages into the front on start
+        """
+        self.backend = backend
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self._front = ConcurrentChatMemory()
+        if preload:
+            for message in backend:
+                self._front.add_message(message)
+        self._queue: queue.Queue[_Op] = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        # Set first thing in close(), without a lock: rejects new writes, wakes blocked
+        # producers and cuts retry backoff short
+        self._stopping = threading.Event()
+        self._close_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._enqueued = 0
+        self._flushed = 0
+        self._failed = 0
+        self._batches = 0
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+        self._thread = threading.Thread(target=self._run, name="history-write-behind", daemon=True)
+        self._thread.start()
+        self._atexit = lambda ref=weakref.ref(self): _close_at_exit(ref)
+        atexit.register(self._atexit)
+
+    def add_message(self, message: ChatMessage) -> None:
+        """
+        Append to the front now and queue the durable write (blocks while the queue is full)
+
+        Args:
+            message: ChatMessage to append
+
+        Raises:
+            RuntimeError: If the history is closed, or close() starts while the queue is full
+        """
+        with self._close_lock:  # close() cannot slip its stop marker in before this put
+            self._enqueue((_APPEND, message, time.monotonic()))
+            self._front.add_message(message)
+        with self._metrics_lock:
+            self._enqueued += 1
+
+    def clean_history(self) -> None:
+        """Clear the front now; the backend is cleared after earlier queued appends"""
+        with self._close_lock:
+            self._enqueue((_CLEAR, None, time.monotonic()))
+            self._front.clean_history()
+
+    def load_history(self) -> List[ChatMessage]:
+        return self._front.load_history()
+
+    def load_recent(self, n: int) -> List[ChatMessage]:
+        return self._front.load_recent(n)
+
+    def load_page(self, before_seq: Optional[int], limit: int) -> List[ChatMessage]:
+        return self._front.load_page(before_seq, limit)
+
+    def iter_reverse(self) -> Iterator[ChatMessage]:
+        return self._front.iter_reverse()
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        return iter(self._front)
+
+    def __len__(self) -> int:
+        return len(self._front)
+
+    def memory_bytes(self) -> int:
+        """Estimated bytes held by the in-memory front (queued writes not counted)"""
+        return self._front.memory_bytes()
+
+    def flush(self) -> None:
+        """Block until every operation queued so far has been applied to the backend"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Drain the queue, stop the flusher thread and flush the backend (idempotent)"""
+        self._stopping.set()  # releases producers blocked in _enqueue, so the lock frees up
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put((_STOP, None, time.monotonic()))
+        self._thread.join()
+        backend_flush = getattr(self.backend, "flush", None)
+        if callable(backend_flush):
+            backend_flush()
+        atexit.unregister(self._atexit)
+
+    def stats(self) -> Dict[str, Any]:
+        """Durability metrics: pending ops, flushed/failed messages, batches and lag in seconds"""
+        with self._metrics_lock:
+            return {
+                "pending": self._queue.qsize(),
+                "enqueued": self._enqueued,
+                "flushed": self._flushed,
+                "failed": self._failed,
+                "batches": self._batches,
+                "last_lag_s": self._last_lag,
+                "max_lag_s": self._max_lag,
+            }
+
+    def _enqueue(self, op: _Op) -> None:
+        """Queue op, waiting for room until close() starts (caller holds _close_lock)"""
+        while True:
+            if self._stopping.is_set():
+                raise RuntimeError("WriteBehindHistory is closed")
+            try:
+                self._queue.put(op, timeout=_PUT_POLL)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self) -> None:
+        """Flusher loop: gather a batch by size/time, apply it, mark it done"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1][0] == _APPEND and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._apply(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1][0] == _STOP:
+                return
+
+    def _apply(self, batch: List[_Op]) -> None:
+        """Write appends in order, honouring queued clears between them"""
+        pending: List[_Op] = []
+        for op in batch:
+            if op[0] == _APPEND:
+                pending.append(op)
+                continue
+            self._write(pending)
+            pending = []
+            if op[0] == _CLEAR:
+                self._with_retry(self.backend.clean_history, 0)
+        self._write(pending)
+
+    def _write(self, ops: List[_Op]) -> None:
+        if not ops:
+            return
+        messages = [message for _, message, _ in ops]
+        written = 0
+
+        def write() -> None:
+            nonlocal written
+            add_messages = getattr(self.backend, "add_messages", None)
+            if callable(add_messages):
+                add_messages(messages)
+                written = len(messages)
+                return
+            # One by one: a retry resumes after the last message the backend accepted
+            while written < len(messages):
+                self.backend.add_message(messages[written])
+                written += 1
+
+        if not self._with_retry(write, len(messages)):
+            with self._metrics_lock:
+                self._flushed += written
+                self._failed += len(messages) - written
+            return
+        lag = time.monotonic() - ops[0][2]
+        with self._metrics_lock:
+            self._flushed += len(messages)
+            self._batches += 1
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+
+    def _with_retry(self, fn, size: int) -> bool:
+        """Call fn until it succeeds; once close() starts, give up after a few attempts (returns False)"""
+        delay = self.retry_interval
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                fn()
+                return True
+            except Exception as e:
+                logger.error(f"Write-behind flush failed (attempt {attempt}, {size} messages): {e}")
+                if self._stopping.is_set() and attempt >= 3:
+                    return False
+                self._stopping.wait(delay)
+                delay = min(delay * 2, 30.0)
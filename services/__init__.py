@@ -6,16 +6,40 @@ Key features:
 - SessionManager: activity timeout and reset
 - RoadmapService: generate learning roadmap based on profile and chat context
 - AppService: orchestrate services, handle events, manage session state
+- RoadmapJobQueue, RoadmapJobStore: background roadmap generation persisted in SQLite
+- RoadmapBatchRunner: offline bulk generation (python -m services.roadmap_batch)
+- AnswerCache: near-duplicate first-turn question cache (MinHash LSH)
+- SessionRegistry: central timer-wheel expiry on a monotonic clock with a background sweeper and cleanup hooks
+- SessionStore: process-wide sessions with a memory budget, LRU spill to disk and registry-driven expiry
+- build_components, AppComponents, build_session_store: composition root shared by app.py and the API
 """
 
+from .answer_cache import AnswerCache
 from .chat_service import ChatService
 from .session_manager import SessionManager
 from .roadmap_service import RoadmapService
+from .roadmap_jobs import JobStatus, RoadmapJob, RoadmapJobStore, RoadmapJobQueue
+from .roadmap_batch import RoadmapBatchRunner, BatchReport
 from .app_service import AppService
+from .session_registry import SessionRegistry
+from .session_store import SessionStore
+from .bootstrap import AppComponents, build_components, build_session_store
 
 __all__ = [
     "ChatService", 
     "SessionManager",
     "RoadmapService",
     "AppService",
+    "JobStatus",
+    "RoadmapJob",
+    "RoadmapJobStore",
+    "RoadmapJobQueue",
+    "RoadmapBatchRunner",
+    "BatchReport",
+    "SessionRegistry",
+    "SessionStore",
+    "AnswerCache",
+    "AppComponents",
+    "build_components",
+    "build_session_store",
 ]
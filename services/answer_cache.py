@@ -0,0 +1,172 @@
+"""
+answer_cache.py
+
+Cross-session cache of answers to near-identical first-turn questions
+
+Key features:
+- AnswerCache: lookup/store keyed by question similarity, not exact text
+- MinHash signatures over character shingles of the normalized question (trailing
+  particles stripped), LSH bands to find candidates in O(bands), exact Jaccard check
+  against the configured threshold
+- TTL per entry and an LRU size cap; thread-safe (shared by all sessions)
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.text import strip_particles
+
+_MERSENNE = (1 << 61) - 1
+
+@dataclass
+class _Entry:
+    shingles: FrozenSet[str]
+    answer: str
+    expires_at: float
+    band_keys: Tuple[Tuple[int, int], ...]
+
+def question_shingles(text: str, n: int = 3) -> FrozenSet[str]:
+    """Character n-grams of the normalized question (diacritics kept; word boundaries marked)"""
+    normalized = f" {strip_particles(text)} "
+    if len(normalized) <= n:
+        return frozenset({normalized})
+    return frozenset(normalized[i:i + n] for i in range(len(normalized) - n + 1))
+
+class AnswerCache:
+    """
+    Near-duplicate question -> answer cache
+
+    Responsibilities:
+    - Compute MinHash signatures (num_perm = bands * rows) with vectorized universal hashing
+    - Index entries by band hash; verify candidates with exact Jaccard >= threshold
+    - Expire entries after ttl and evict least-recently-used entries beyond max_entries
+    """
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.8,
+        ttl: timedelta | float = timedelta(hours=24),
+        max_entries: int = 5000,
+        bands: int = 16,
+        rows: int = 4,
+        seed: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            threshold: Minimum Jaccard similarity of question shingles to reuse an answer
+            ttl: Entry lifetime (timedelta or seconds)
+            max_entries: LRU size cap
+            bands, rows: LSH banding; candidates are found down to ~ (1/bands) ** (1/rows) similarity
+            seed: Seed for the MinHash permutations (fixed so signatures are stable)
+            clock: Monotonic time source (injectable for tests)
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.ttl_seconds = ttl.total_seconds() if isinstance(ttl, timedelta) else float(ttl)
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = rows
+        self._clock = clock
+        rng = np.random.default_rng(seed)
+        num_perm = bands * rows
+        self._a = rng.integers(1, _MERSENNE, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE, num_perm, dtype=np.uint64)
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, int], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, shingles: FrozenSet[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") >> 4 for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        ) % np.uint64(_MERSENNE)
+        # (a * x + b) mod p for every permutation; uint64 wraps, acceptable for hashing purposes
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % np.uint64(_MERSENNE)
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> Tuple[Tuple[int, int], ...]:
+        return tuple(
+            (band, hash(signature[band * self.rows:(band + 1) * self.rows].tobytes()))
+            for band in range(self.bands)
+        )
+
+    def lookup(self, question: str) -> Optional[str]:
+        """Return a cached answer for a near-identical question, or None"""
+        shingles = question_shingles(question)
+        keys = self._band_keys(self._signature(shingles))
+        now = self._clock()
+        with self._lock:
+            candidates: Set[int] = set()
+            for key in keys:
+                candidates |= self._buckets.get(key, set())
+            best_id, best_score = None, 0.0
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+                score = len(shingles & entry.shingles) / len(shingles | entry.shingles)
+                if score >= self.threshold and score > best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id].answer
+
+    def store(self, question: str, answer: str) -> None:
+        """Cache answer for question (evicting the least recently used entry beyond the cap)"""
+        if not answer:
+            return
+        shingles = question_shingles(question)
+        keys = self._band_keys(self._signature(shingles))
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(shingles, answer, self._clock() + self.ttl_seconds, keys)
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, entry_id: int) -> None:
+        """Drop an entry and its bucket memberships (caller holds the lock)"""
+        entry = self._entries.pop(entry_id)
+        for key in entry.band_keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+def chunk_answer(answer: str, size: int = 48) -> List[str]:
+    """Split a cached answer into word-aligned chunks for replay as a stream"""
+    chunks: List[str] = []
+    current = ""
+    for word in answer.split(" "):
+        piece = word if not current else " " + word
+        if current and len(current) + len(piece) > size:
+            chunks.append(current + " ")
+            current = word
+        else:
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
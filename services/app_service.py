@@ -4,16 +4,24 @@ app_service.py
 Application Service: handle user message, coordinate chat and session services
 
 Key features:
-- handle_message(user_input) yields Event stream (TextChunk, StatusUpdate, ErrorOccurred, SessionExpired)
+- handle_message(user_input, cancel) yields Event stream (TextChunk, StatusUpdate, ErrorOccurred, SessionExpired)
+- Cooperative cancellation: reset_session or the caller's token stops the in-flight LLM stream;
+  the partial answer is kept in history
 - Manages chat history, session expiration, error handling
 - Orchestrates domain services (ChatService, SessionManager)
+- submit_roadmap / poll_roadmap_job: background roadmap generation with status heartbeats;
+  generate_roadmap streams both (RoadmapQueued with the job id, then the poll events)
+- LLM outages (open circuit breaker) surface as ErrorOccurred("llm", LLM_UNAVAILABLE)
 """
 from __future__ import annotations
 
-from typing import Generator, List, TYPE_CHECKING
+import time
+from datetime import datetime
+from typing import Generator, Iterator, List, Optional, TYPE_CHECKING
 
 from domain import (
     ChatMessage,
+    UserProfile,
 )
 from domain.events import (
     Event,
@@ -21,19 +29,45 @@ from domain.events import (
     StatusUpdate,
     ErrorOccurred,
     SessionExpired,
+    RoadmapQueued,
+    RoadmapReady,
 )
 from config import (
     MAX_INPUT_LENGTH,
     MessageKey,
     MessageProvider,
 )
-from utils import LLMServiceError, logger
+from services.chat_service import Queued, StreamError
+from services.roadmap_jobs import JobStatus
+from utils import (
+    CancellationToken,
+    CircuitOpenError,
+    LLMServiceError,
+    OverloadedError,
+    ValidationError,
+    closing_stream,
+    logger,
+)
 
 if TYPE_CHECKING:
-    from services.chat_service import ChatService, StreamError
+    from services.chat_service import ChatService
     from services.session_manager import SessionManager
+    from services.roadmap_jobs import RoadmapJobQueue
     from memory import ChatHistory
 
+# ErrorOccurred.error_type per stream error key (anything else is "unexpected")
+_STREAM_ERROR_TYPES = {
+    MessageKey.LLM_ERROR: "llm",
+    MessageKey.LLM_UNAVAILABLE: "llm",
+    MessageKey.OVERLOADED: "overloaded",
+}
+
+# (ErrorOccurred.error_type, message) per failed roadmap job error code with a dedicated message
+_JOB_ERRORS = {
+    OverloadedError.code: ("overloaded", MessageKey.OVERLOADED),
+    CircuitOpenError.code: ("llm", MessageKey.LLM_UNAVAILABLE),
+}
+
 class AppService:
     """
     Application Service: orchestrate use cases and domain services
@@ -51,20 +85,35 @@ class AppService:
         messages: MessageProvider,
         memory: ChatHistory,
         *,
-        chat_context_messages: int
+        chat_context_messages: int,
+        relevant_turns: int = 0,
+        roadmap_jobs: Optional[RoadmapJobQueue] = None,
+        job_poll_interval: float = 1.0,
     ):
         self._chat = chat_service
         self._session = session_manager
         self._memory = memory
         self.messages = messages
         self._chat_context_messages = chat_context_messages
+        self._relevant_turns = relevant_turns
+        self._roadmap_jobs = roadmap_jobs
+        self._job_poll_interval = job_poll_interval
+        # Bumped by every clear: a turn interrupted by a reset keeps its partial answer out of history
+        self._history_epoch = 0
+        self._active_cancel: Optional[CancellationToken] = None
 
-    def handle_message(self, user_input: str) -> Generator[Event, None, None]:
+    def handle_message(
+        self,
+        user_input: str,
+        cancel: Optional[CancellationToken] = None,
+    ) -> Generator[Event, None, None]:
         """
         Handle user message: validate, check session, stream chat response
 
         Args:
             user_input: The user's message input
+            cancel: Optional token to stop the answer early (a private one is used otherwise,
+                so reset_session can still stop it)
 
         Yields:
             Event: Stream of events (TextChunk, StatusUpdate, ErrorOccurred, SessionExpired)
@@ -86,7 +135,7 @@ class AppService:
             return
         
         if self._session.is_expired():
-            self._memory.clean_history()
+            self._clear_history()
             self._session.reset()
             yield SessionExpired(
                 self.messages.get(MessageKey.SESSION_EXPIRED)
@@ -100,8 +149,10 @@ class AppService:
             self.messages.get(MessageKey.THINKING)
         )
 
+        cancel = cancel if cancel is not None else CancellationToken()
+        self._active_cancel = cancel
         try:
-            yield from self._handle_chat_request(user_input)
+            yield from self._handle_chat_request(user_input, cancel)
         except LLMServiceError as e:
             msg = self.messages.get(MessageKey.LLM_ERROR)
             yield ErrorOccurred("llm", msg)
@@ -111,49 +162,183 @@ class AppService:
             msg = self.messages.get(MessageKey.UNEXPECTED_ERROR)
             yield ErrorOccurred("unexpected", msg)
             self._memory.add_message(ChatMessage(role="assistant", content=msg))
+        finally:
+            if self._active_cancel is cancel:
+                self._active_cancel = None
         logger.info("handle_message end")
 
-    def _handle_chat_request(self, user_input: str) -> Generator[Event, None, None]:
-        """Chat request handler: stream chat response, yield TextChunk and ErrorOccurred events"""
+    def _handle_chat_request(self, user_input: str, cancel: CancellationToken) -> Generator[Event, None, None]:
+        """
+        Chat request handler: stream chat response, yield TextChunk and ErrorOccurred events
+
+        The answer is recorded whether the stream completes, is cancelled through the token
+        or is closed by the consumer (partial text), unless history was reset meanwhile
+        """
         logger.info("_handle_chat_request start")
-        full_response = ""
-        history = self._get_recent_history()
-        for item in self._chat.stream_response(user_input, history):
-            if isinstance(item, str):
-                full_response += item
-                yield TextChunk(item)
-            else:
-                assert isinstance(item, StreamError)
-                msg = self.messages.get(item.key)
-                error_type = "llm" if item.key == MessageKey.LLM_ERROR else "unexpected"
-                yield ErrorOccurred(error_type, msg)
-                self._memory.add_message(ChatMessage(role="assistant", content=msg))
+        chunks: List[str] = []
+        epoch = self._history_epoch
+        history = self._get_context(user_input)
+        try:
+            with closing_stream(self._chat.stream_response(user_input, history, cancel=cancel)) as stream:
+                for item in stream:
+                    if isinstance(item, str):
+                        chunks.append(item)
+                        yield TextChunk(item)
+                    elif isinstance(item, Queued):
+                        yield StatusUpdate(
+                            "queued",
+                            self.messages.format(MessageKey.QUEUED, position=str(item.position)),
+                        )
+                    else:
+                        assert isinstance(item, StreamError)
+                        chunks.clear()
+                        msg = self.messages.get(item.key)
+                        error_type = _STREAM_ERROR_TYPES.get(item.key, "unexpected")
+                        yield ErrorOccurred(error_type, msg)
+                        self._memory.add_message(ChatMessage(role="assistant", content=msg))
+                        return
+        finally:
+            if chunks and self._history_epoch == epoch:
+                self._memory.add_message(ChatMessage(role="assistant", content="".join(chunks)))
+        logger.info(
+            f"handle_chat_request end (response len={sum(map(len, chunks))}, cancelled={cancel.cancelled})"
+        )
+
+    def _clear_history(self) -> None:
+        """Clear history and start a new epoch"""
+        self._memory.clean_history()
+        self._history_epoch += 1
+
+    def _get_context(self, user_input: str) -> List[ChatMessage]:
+        """
+        Return chat context for ChatService: the recent window, preceded by relevant
+        older turns when memory supports retrieval (IndexedChatHistory) and relevant_turns > 0
+        """
+        relevant_context = getattr(self._memory, "relevant_context", None)
+        if self._relevant_turns > 0 and relevant_context is not None:
+            return relevant_context(user_input, self._chat_context_messages, self._relevant_turns)
+        return self._memory.load_recent(self._chat_context_messages)
+
+    def cancel_active(self, reason: str = "cancelled") -> bool:
+        """Cancel the answer currently being streamed, if any; return True if one was cancelled"""
+        cancel = self._active_cancel
+        return cancel is not None and cancel.cancel(reason)
+
+    def iter_history(self) -> Iterator[ChatMessage]:
+        """Iterate chat history oldest-first without copying it (for rendering)"""
+        return iter(self._memory)
+
+    def submit_roadmap(self, profile: UserProfile, duration_week: Optional[int] = None) -> str:
+        """
+        Queue background roadmap generation and return immediately
+
+        Args:
+            profile: User profile to generate the roadmap from
+            duration_week: Optional override for total duration in weeks
+
+        Returns:
+            Job id to pass to poll_roadmap_job
+
+        Raises:
+            ValidationError: If no roadmap job queue is configured
+        """
+        if self._roadmap_jobs is None:
+            raise ValidationError(message="Roadmap job queue is not configured")
+        self._session.touch_activity()
+        return self._roadmap_jobs.submit_roadmap(profile, duration_week=duration_week)
+
+    def generate_roadmap(
+        self, profile: UserProfile, duration_week: Optional[int] = None
+    ) -> Generator[Event, None, None]:
+        """
+        Submit a roadmap job and poll it to completion
+
+        Args:
+            profile: User profile to generate the roadmap from
+            duration_week: Optional override for total duration in weeks
+
+        Yields:
+            Event: RoadmapQueued with the job id, then the poll_roadmap_job events
+        """
+        if self._roadmap_jobs is None:
+            yield ErrorOccurred("unexpected", self.messages.get(MessageKey.ROADMAP_ERROR))
+            return
+        job_id = self.submit_roadmap(profile, duration_week)
+        yield RoadmapQueued(job_id, self.messages.get(MessageKey.ROADMAP_LOADING))
+        yield from self.poll_roadmap_job(job_id)
+
+    def poll_roadmap_job(self, job_id: str) -> Generator[Event, None, None]:
+        """
+        Poll a roadmap job until it finishes, emitting heartbeats while it runs
+
+        Args:
+            job_id: Id returned by submit_roadmap
+
+        Yields:
+            Event: StatusUpdate("generating_roadmap") per poll, then RoadmapReady or ErrorOccurred
+        """
+        if self._roadmap_jobs is None:
+            yield ErrorOccurred("unexpected", self.messages.get(MessageKey.ROADMAP_ERROR))
+            return
+
+        loading = self.messages.get(MessageKey.ROADMAP_LOADING)
+        while True:
+            job = self._roadmap_jobs.get_job(job_id)
+            if job is None:
+                logger.warning(f"Unknown roadmap job {job_id}")
+                yield ErrorOccurred("validation", self.messages.get(MessageKey.ROADMAP_ERROR))
                 return
-        if full_response:
-            self._memory.add_message(ChatMessage(role="assistant", content=full_response))
-        logger.info(f"handle_chat_request end (response len={len(full_response)})")
-
-    def _get_recent_history(self) -> List[ChatMessage]:
-        """Return recent chat history for ChatService and RoadmapService"""
-        history = self._memory.load_history()
-        if not history:
-            return []
-        
-        n = self._chat_context_messages
-        return history[-n:] if len(history) > n else history
-    
+            if job.status == JobStatus.DONE and job.roadmap is not None:
+                yield RoadmapReady(job.roadmap, self.messages.get(MessageKey.ROADMAP_CREATED))
+                return
+            if job.status.is_finished:
+                if job.error_code in _JOB_ERRORS:
+                    error_type, key = _JOB_ERRORS[job.error_code]
+                    yield ErrorOccurred(error_type, self.messages.get(key))
+                    return
+                key = (
+                    MessageKey.ROADMAP_GENERATION_FAILED
+                    if job.error_code == "ROADMAP_GENERATION_FAILED"
+                    else MessageKey.ROADMAP_ERROR
+                )
+                yield ErrorOccurred("llm", self.messages.get(key))
+                return
+            yield StatusUpdate("generating_roadmap", loading)
+            time.sleep(self._job_poll_interval)
+
     def reset_session(self):
-        """Clear chat history and reset session state"""
-        self._memory.clean_history()
+        """Stop any in-flight answer, clear chat history and reset session state"""
+        self.cancel_active("reset")
+        self._clear_history()
         self._session.reset()
 
-    def to_session(self, session_state) -> None:
-        """Save application state to session_state dict"""
-        history = self._memory.load_history()
-        session_state["app_history"] = [
-            m.model_dump(mode="json") for m in history
-        ]
-        la = self._session.get_last_activity()
-        session_state["app_session_last_activity"] = (
-            la.timestamp() if la else None
-        )
+    def restore(self, history: Optional[List[ChatMessage]], last_activity: Optional[datetime]) -> None:
+        """
+        Replace chat history and last activity (e.g. when a spilled session is rehydrated)
+
+        Args:
+            history: Messages oldest-first; None or empty keeps the current history
+            last_activity: Last user activity, or None
+        """
+        if history:
+            self._clear_history()
+            for message in history:
+                self._memory.add_message(message)
+        self._session.set_last_activity(last_activity)
+
+    def history_length(self) -> int:
+        """Number of messages in chat history"""
+        return len(self._memory)
+
+    def recent_history(self, n: int) -> List[ChatMessage]:
+        """Return the last n messages oldest-first"""
+        return self._memory.load_recent(n)
+
+    def memory_bytes(self) -> Optional[int]:
+        """In-process footprint reported by the history backend (index included), or None if it reports none"""
+        memory_bytes = getattr(self._memory, "memory_bytes", None)
+        return memory_bytes() if memory_bytes is not None else None
+
+    def get_last_activity(self) -> Optional[datetime]:
+        """Return the session's last activity time, or None"""
+        return self._session.get_last_activity()
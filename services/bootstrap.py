@@ -0,0 +1,185 @@
+"""
+bootstrap.py
+
+Composition root shared by the Streamlit app (app.py) and the HTTP/SSE API (python -m api)
+
+Key features:
+- build_components(config): process-wide pieces built once per server process (Gemini client
+  behind a circuit breaker, LLM scheduler, chat hedge policy, roadmap jobs, answer cache)
+- AppComponents.build_application(): one session's AppService on the shared components, with a
+  thread-safe indexed history (IndexedChatHistory over ConcurrentChatMemory)
+- build_session_store(components): SessionStore with a started SessionRegistry sweeper
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from ai import (
+    AIMDLimit,
+    GeminiClient,
+    GuardedLLMClient,
+    HedgePolicy,
+    HedgedLLMClient,
+    LLMClient,
+    LLMScheduler,
+    ScheduledLLMClient,
+    SYSTEM_PROMPT,
+    LANE_BACKGROUND,
+    LANE_CHAT,
+    LANE_ROADMAP,
+)
+from config import DEFAULT_CONTEXT_MESSAGES, DEFAULT_RELEVANT_TURNS, Settings, default_messages, settings
+from memory import ConcurrentChatMemory, IndexedChatHistory
+from services.answer_cache import AnswerCache
+from services.app_service import AppService
+from services.chat_service import ChatService
+from services.roadmap_jobs import RoadmapJobQueue, RoadmapJobStore
+from services.roadmap_service import RoadmapService
+from services.session_manager import SessionManager
+from services.session_registry import SessionRegistry
+from services.session_store import SessionStore
+from utils import CircuitBreaker
+
+def build_llm_client(config: Settings) -> GeminiClient:
+    """Build GeminiClient from settings"""
+    return GeminiClient(
+        api_key=config.GEMINI_API_KEY,
+        model_name=config.GEMINI_MODEL,
+        request_timeout=60,
+        stream_timeout=120,
+        system_prompt=SYSTEM_PROMPT,
+    )
+
+def build_llm_scheduler(config: Settings) -> LLMScheduler:
+    """Build LLMScheduler from settings: adaptive chat/roadmap lanes, bounded queues"""
+    return LLMScheduler(
+        {
+            LANE_CHAT: config.LLM_CHAT_CONCURRENCY,
+            LANE_ROADMAP: config.LLM_ROADMAP_CONCURRENCY,
+            LANE_BACKGROUND: config.LLM_BACKGROUND_CONCURRENCY,
+        },
+        limiters={
+            LANE_CHAT: AIMDLimit(config.LLM_CHAT_CONCURRENCY, latency_target=config.LLM_CHAT_LATENCY_TARGET),
+            LANE_ROADMAP: AIMDLimit(config.LLM_ROADMAP_CONCURRENCY, latency_target=config.LLM_ROADMAP_LATENCY_TARGET),
+        },
+        max_queue=config.LLM_MAX_QUEUE,
+    )
+
+def build_llm_breaker(config: Settings) -> CircuitBreaker:
+    """Build the Gemini CircuitBreaker from settings"""
+    return CircuitBreaker(
+        "gemini",
+        failure_rate=config.CIRCUIT_FAILURE_RATE,
+        min_calls=min(config.CIRCUIT_MIN_CALLS, config.CIRCUIT_WINDOW),
+        window=config.CIRCUIT_WINDOW,
+        slow_call_seconds=config.CIRCUIT_SLOW_CALL_SECONDS,
+        open_seconds=config.CIRCUIT_OPEN_SECONDS,
+    )
+
+def build_hedge_policy(config: Settings) -> Optional[HedgePolicy]:
+    """Build the chat hedge policy from settings (None when hedging is disabled)"""
+    if not config.CHAT_HEDGE_ENABLED:
+        return None
+    return HedgePolicy(
+        quantile=config.CHAT_HEDGE_QUANTILE,
+        min_delay=config.CHAT_HEDGE_MIN_DELAY,
+        max_rate=config.CHAT_HEDGE_MAX_RATE,
+    )
+
+def build_answer_cache(config: Settings) -> Optional[AnswerCache]:
+    """Build the near-duplicate answer cache from settings (None when disabled)"""
+    if not config.ANSWER_CACHE_ENABLED:
+        return None
+    return AnswerCache(
+        threshold=config.ANSWER_CACHE_THRESHOLD,
+        ttl=timedelta(hours=config.ANSWER_CACHE_TTL_HOURS),
+        max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+    )
+
+def build_roadmap_jobs(config: Settings, llm_client: LLMClient, scheduler: LLMScheduler) -> RoadmapJobQueue:
+    """Build the background roadmap job queue on the roadmap lane"""
+    return RoadmapJobQueue(
+        roadmap_service=RoadmapService(llm_client=ScheduledLLMClient(llm_client, scheduler, LANE_ROADMAP)),
+        store=RoadmapJobStore(config.ROADMAP_JOB_DB_PATH),
+        max_workers=config.ROADMAP_JOB_WORKERS,
+        job_deadline=config.ROADMAP_JOB_DEADLINE_SECONDS,
+    )
+
+@dataclass
+class AppComponents:
+    """
+    Process-wide components shared by every session
+
+    Responsibilities:
+    - Hold the shared chat client, scheduler, breaker, roadmap jobs and answer cache
+    - Build each session's AppService on top of them
+    """
+    config: Settings
+    breaker: CircuitBreaker
+    scheduler: LLMScheduler
+    chat_client: LLMClient
+    roadmap_jobs: RoadmapJobQueue
+    answer_cache: Optional[AnswerCache] = None
+
+    def build_application(self) -> AppService:
+        """Build a new session's AppService (ChatService, SessionManager, indexed history)"""
+        return AppService(
+            chat_service=ChatService(
+                llm_client=self.chat_client,
+                answer_cache=self.answer_cache,
+                scheduler=self.scheduler,
+                deadline=self.config.CHAT_DEADLINE_SECONDS,
+            ),
+            session_manager=SessionManager(timeout_minutes=self.config.SESSION_TIMEOUT_MINUTES),
+            messages=default_messages,
+            memory=IndexedChatHistory(ConcurrentChatMemory()),
+            chat_context_messages=DEFAULT_CONTEXT_MESSAGES,
+            relevant_turns=DEFAULT_RELEVANT_TURNS,
+            roadmap_jobs=self.roadmap_jobs,
+        )
+
+def build_components(config: Optional[Settings] = None) -> AppComponents:
+    """
+    Build the process-wide components from settings
+
+    Args:
+        config: Optional Settings instance; defaults to global settings when None
+
+    Returns:
+        AppComponents: every Gemini call goes through one circuit breaker; chat streams are
+        hedged when enabled, each hedge on a free chat-lane slot; roadmap jobs run on the
+        scheduler's roadmap lane
+    """
+    if config is None:
+        config = settings
+    breaker = build_llm_breaker(config)
+    scheduler = build_llm_scheduler(config)
+    llm_client = GuardedLLMClient(build_llm_client(config), breaker)
+    chat_client: LLMClient = llm_client
+    hedge_policy = build_hedge_policy(config)
+    if hedge_policy is not None:
+        chat_client = HedgedLLMClient(llm_client, hedge_policy, scheduler)
+    return AppComponents(
+        config=config,
+        breaker=breaker,
+        scheduler=scheduler,
+        chat_client=chat_client,
+        roadmap_jobs=build_roadmap_jobs(config, llm_client, scheduler),
+        answer_cache=build_answer_cache(config),
+    )
+
+def build_session_store(components: AppComponents) -> SessionStore:
+    """Build the process-wide SessionStore whose factory builds sessions on the shared components"""
+    config = components.config
+    session_timeout = timedelta(minutes=config.SESSION_TIMEOUT_MINUTES)
+    registry = SessionRegistry(session_timeout)
+    registry.start()
+    return SessionStore(
+        factory=components.build_application,
+        spill_dir=config.SESSION_SPILL_DIR,
+        memory_budget_bytes=config.SESSION_MEMORY_BUDGET_MB * 1024 * 1024,
+        session_timeout=session_timeout,
+        registry=registry,
+    )
@@ -6,37 +6,114 @@ Chat service: load history, stream LLM response
 Key features:
 - stream_response(user_input) yields str chunks or StreamError(key); Application resolves key to message
 - No MessageProvider; facade owns message resolution
+- Optional AnswerCache: context-free first-turn questions replay a near-duplicate's answer
+- Optional CancellationToken: stops the LLM stream; cancellations counted in metrics
+- Shared RetryPolicy: one jittered, budgeted retry before the first chunk, bounded by the deadline;
+  with a HedgedLLMClient a hedged race counts as a single attempt; the deadline is set as the
+  deadline() context variable while the stream is pulled, so GeminiClient clamps each attempt to it
+- Degraded mode while the LLM circuit is open: a near-duplicate cached answer (any turn) or
+  StreamError(LLM_UNAVAILABLE) right away
+- Optional LLMScheduler: chat-lane admission with fair queueing; Queued(position) while waiting,
+  StreamError(OVERLOADED) when the lane sheds; time to first chunk and 429s fed back to its limit
 """
-from typing import Generator, List, Union, Union
+from __future__ import annotations
+
+import time
+from typing import Generator, List, Optional, Union, TYPE_CHECKING
 from dataclasses import dataclass
+from uuid import uuid4
 
-from utils import logger, LLMServiceError
-from ai import LLMClient
+from utils import (
+    CancellationToken,
+    CircuitOpenError,
+    LLMServiceError,
+    OverloadedError,
+    RetryPolicy,
+    closing_stream,
+    iter_until,
+    logger,
+    metrics,
+)
+from ai import LLMClient, is_rate_limited
+from ai.scheduler import LANE_CHAT, LLMScheduler, Ticket
 from domain import ChatMessage
 from config import MessageKey
+from services.answer_cache import chunk_answer
+
+if TYPE_CHECKING:
+    from services.answer_cache import AnswerCache
+
+STREAMS_CANCELLED = metrics.counter(
+    "llm_streams_cancelled_total", "LLM chat streams stopped early by the caller", ("stage",)
+)
+CHUNKS_STREAMED = metrics.counter("llm_stream_chunks_total", "Chunks received from LLM chat streams")
+DEGRADED = metrics.counter(
+    "llm_degraded_total", "Requests answered in degraded mode while the LLM circuit is open", ("kind",)
+)
+
+# Seconds between queue-position updates while waiting for a scheduler slot
+QUEUE_STATUS_INTERVAL = 1.0
 
 @dataclass(frozen=True)
 class StreamError:
     """Stream error result; Application resolves key to user message"""
     key: MessageKey
 
+@dataclass(frozen=True)
+class Queued:
+    """Waiting for an LLM slot; position is the 1-based place in the chat lane queue"""
+    position: int
+
 class ChatService:
     """
     Execute chat: load history, stream LLM response
 
     Responsibilities:
-    - stream_response(user_input): yield str chunks or StreamError(key)
+    - stream_response(user_input): yield str chunks, Queued(position) or StreamError(key)
     - Application (facade) resolves key to message via MessageProvider
+    - Serve and fill the shared answer cache for first-turn questions
+    - Take a chat-lane slot from the shared LLMScheduler before calling the LLM
     """
 
-    def __init__(self, llm_client: LLMClient):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        answer_cache: Optional[AnswerCache] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        flow: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        deadline: Optional[float] = None,
+    ):
         """
         Initialize ChatService with required dependencies
 
         Args:
             llm_client: LLM client implementation for streaming chat responses
+            answer_cache: Optional cross-session cache for context-free first-turn questions
+            scheduler: Optional process-wide LLM scheduler (admission control, fair queueing)
+            flow: Fairness key in the scheduler (default: unique per ChatService, i.e. per session)
+            retry_policy: Retry policy before the first chunk (default: 2 attempts, shared budget)
+            deadline: Seconds a stream may spend on attempts and backoff; no retry is started
+                after it (default: the caller's deadline() if any)
         """
         self.llm = llm_client
+        self.answer_cache = answer_cache
+        self.scheduler = scheduler
+        self.flow = flow or uuid4().hex
+        self.retry_policy = retry_policy or RetryPolicy("chat_stream", max_attempts=2)
+        self.deadline = deadline
+
+    @staticmethod
+    def _is_first_turn(history: List[ChatMessage]) -> bool:
+        """True when the answer cannot depend on earlier conversation (no assistant turn yet)"""
+        return len(history) <= 1 and all(m.role == "user" for m in history)
+
+    @staticmethod
+    def _record_cancel(chunk_received: bool) -> None:
+        """Count an LLM stream stopped early by the caller"""
+        stage = "mid_stream" if chunk_received else "before_first_chunk"
+        STREAMS_CANCELLED.inc(stage=stage)
+        logger.info(f"Chat stream cancelled ({stage})")
 
     def _stream_error_key(self, error: Exception) -> MessageKey:
         """Map streaming exception to MessageKey error code"""
@@ -50,60 +127,174 @@ class ChatService:
         self, 
         user_input: str,
         history: List[ChatMessage],
-    ) -> Generator[Union[str, StreamError], None, None]:
+        cancel: Optional[CancellationToken] = None,
+    ) -> Generator[Union[str, Queued, StreamError], None, None]:
         """
         Stream chat response for the given user input
 
         Args:
             user_input: The user's message that triggered that response
             history: Recent chat history
+            cancel: Optional token; once cancelled the LLM call is stopped, no retry is
+                attempted and the stream ends without an error
 
         Yields:
             str: Response chunks from LLM
+            Queued: While waiting for a scheduler slot (first immediately, then periodically)
             StreamError: On failure; Application resolves key to user message
         """
         logger.info(f"Chat stream start (context_len={len(history)})")
-        max_attempts = 2
-        
-        for attempt in range(1, max_attempts + 1):
-            try: 
-                chunk_received = False
-                stream_generation = self.llm.stream_chat(
-                    history=history,
-                    new_message=user_input
-                )
+        cacheable = self.answer_cache is not None and self._is_first_turn(history)
+        if cacheable:
+            cached = self.answer_cache.lookup(user_input)
+            if cached is not None:
+                logger.info("Chat answer served from cache")
+                yield from chunk_answer(cached)
+                return
 
-                for chunk in stream_generation:
-                    if not chunk_received:
-                        logger.info("Chat first chunk received")
-                    chunk_received = True
-                    yield chunk
-                
-                if chunk_received:
-                    logger.info("Chat stream end")
+        ticket = None
+        first_chunk: Optional[float] = None
+        overloaded = False
+        unavailable = False
+        try:
+            if self.scheduler is not None:
+                try:
+                    ticket = self.scheduler.submit(LANE_CHAT, self.flow)
+                except OverloadedError:
+                    yield StreamError(key=MessageKey.OVERLOADED)
                     return
-                else:
-                    logger.warning(f"Chat stream attempt {attempt}: no chunks received")
-                    if attempt >= max_attempts:
-                        yield StreamError(key=MessageKey.LLM_ERROR)
-                        return
-                        
-            except LLMServiceError as e:
-                is_quota = "429" in str(e) or "quota" in str(e).lower()
-                if is_quota or attempt >= max_attempts:
-                    yield StreamError(key=self._stream_error_key(e))
+                yield from self._wait_for_slot(ticket, cancel)
+                if not ticket.granted:
+                    STREAMS_CANCELLED.inc(stage="queued")
                     return
-                if chunk_received:
-                    logger.error(f"Chat stream failed mid-stream (attempt {attempt}): {e}")
-                    yield StreamError(key=MessageKey.LLM_STREAM_INTERRUPTED)
+
+            started = time.monotonic()
+            chunks: List[str] = []
+            failed = False
+            with closing_stream(self._stream_llm(user_input, history, cancel)) as stream:
+                for item in stream:
+                    if isinstance(item, StreamError):
+                        failed = True
+                        overloaded = item.key == MessageKey.OVERLOADED
+                        unavailable = item.key == MessageKey.LLM_UNAVAILABLE
+                        if unavailable:
+                            fallback = self._degraded_answer(user_input)
+                            if fallback is not None:
+                                yield from chunk_answer(fallback)
+                                continue
+                    else:
+                        if first_chunk is None:
+                            first_chunk = time.monotonic() - started
+                        if cacheable:
+                            chunks.append(item)
+                    yield item
+            if failed and first_chunk is None and not unavailable:
+                first_chunk = time.monotonic() - started
+        finally:
+            if ticket is not None:
+                ticket.release(first_chunk, overloaded)
+        if cancel is not None and cancel.cancelled:
+            return  # partial answer: never cache it
+        if cacheable and chunks and not failed:
+            self.answer_cache.store(user_input, "".join(chunks))
+
+    def _degraded_answer(self, user_input: str) -> Optional[str]:
+        """Cached answer to serve while the LLM is unavailable, looked up regardless of turn"""
+        cached = self.answer_cache.lookup(user_input) if self.answer_cache is not None else None
+        if cached is not None:
+            logger.warning("LLM unavailable: serving cached answer (degraded mode)")
+            DEGRADED.inc(kind="chat_cache")
+        else:
+            DEGRADED.inc(kind="chat_error")
+        return cached
+
+    @staticmethod
+    def _wait_for_slot(ticket: Ticket, cancel: Optional[CancellationToken]) -> Generator[Queued, None, None]:
+        """Yield queue positions until the ticket is granted or cancelled"""
+        if ticket.granted:
+            return
+        logger.info(f"Chat queued for an LLM slot (position={ticket.position})")
+        unregister = cancel.on_cancel(ticket.cancel) if cancel is not None else None
+        try:
+            yield Queued(ticket.position)
+            while not ticket.wait(QUEUE_STATUS_INTERVAL):
+                if ticket.cancelled:
                     return
-                logger.warning(f"Chat stream attempt {attempt} failed before any chunks, retrying: {e}")
+                yield Queued(ticket.position)
+        finally:
+            if unregister is not None:
+                unregister()
+
+    def _stream_llm(
+        self,
+        user_input: str,
+        history: List[ChatMessage],
+        cancel: Optional[CancellationToken] = None,
+    ) -> Generator[Union[str, StreamError], None, None]:
+        """
+        Stream from the LLM; stop quietly when cancelled
+
+        A failure before the first chunk (transient error or empty stream) may be retried as the
+        retry policy allows (attempts, budget, deadline); a 429 or a mid-stream failure is not.
+        """
+        self.retry_policy.record_call()
+        started = time.monotonic()
+        stop_at = None if self.deadline is None else started + self.deadline
+        attempt = 0
+
+        while True:
+            attempt += 1
+            if cancel is not None and cancel.cancelled:
+                self._record_cancel(False)
+                return
+            chunk_received = False
+            error: Optional[Exception] = None
+            try:
+                stream_generation = self.llm.stream_chat(
+                    history=history,
+                    new_message=user_input,
+                    cancel=cancel,
+                )
+
+                with closing_stream(stream_generation):
+                    for chunk in iter_until(stream_generation, stop_at):
+                        if not chunk_received:
+                            logger.info("Chat first chunk received")
+                        chunk_received = True
+                        CHUNKS_STREAMED.inc()
+                        yield chunk
+            except GeneratorExit:
+                self._record_cancel(chunk_received)
+                raise
             except Exception as e:
-                if attempt >= max_attempts:
-                    yield StreamError(key=self._stream_error_key(e))
-                    return
-                if chunk_received:
-                    logger.error(f"Chat stream failed mid-stream (attempt {attempt}): {e}")
-                    yield StreamError(key=MessageKey.LLM_STREAM_INTERRUPTED)
-                    return
-                logger.warning(f"Chat stream attempt {attempt} failed before any chunks, retrying: {e}")
\ No newline at end of file
+                error = e
+
+            if isinstance(error, CircuitOpenError):
+                yield StreamError(key=MessageKey.LLM_UNAVAILABLE)
+                return
+            if cancel is not None and cancel.cancelled:
+                self._record_cancel(chunk_received)
+                return
+            if error is None and chunk_received:
+                logger.info("Chat stream end")
+                return
+            if error is not None and is_rate_limited(error):
+                logger.warning(f"Chat stream rate limited upstream: {error}")
+                yield StreamError(key=MessageKey.OVERLOADED)
+                return
+            if chunk_received:
+                logger.error(f"Chat stream failed mid-stream (attempt {attempt}): {error}")
+                yield StreamError(key=MessageKey.LLM_STREAM_INTERRUPTED)
+                return
+            if error is None:
+                logger.warning(f"Chat stream attempt {attempt}: no chunks received")
+
+            remaining = None if stop_at is None else stop_at - time.monotonic()
+            delay = self.retry_policy.retry_delay(attempt, error, remaining=remaining)
+            if delay is None:
+                yield StreamError(key=MessageKey.LLM_ERROR if error is None else self._stream_error_key(error))
+                return
+            if cancel is not None:
+                cancel.wait(delay)
+            else:
+                time.sleep(delay)
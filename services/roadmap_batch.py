@@ -0,0 +1,311 @@
+"""
+roadmap_batch.py
+
+Offline bulk roadmap generation: JSONL profiles in, streamed NDJSON roadmaps out
+
+Key features:
+- Bounded in-flight concurrency across one or more LLM clients (one per API key)
+- Per-key token-bucket rate limiting
+- Roadmap JSON validation offloaded to a process pool
+- Append-only checkpoint file so a rerun skips completed items (successes and invalid input records)
+- BatchReport with throughput and failure breakdown by error code
+
+Usage:
+    python -m services.roadmap_batch --input profiles.jsonl --output roadmaps.ndjson
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from pydantic import ValidationError as PydanticValidationError
+
+from ai import LLMClient
+from domain import UserProfile
+from services.roadmap_service import RoadmapService
+from utils import KeyedRateLimiter, LearnPathException, ValidationError, logger
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One input record: stable id plus parsed profile (None if the record was invalid)"""
+    item_id: str
+    profile: Optional[UserProfile]
+    error: Optional[str] = None
+
+@dataclass
+class BatchReport:
+    """Outcome counters for a batch run"""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed_seconds: float = 0.0
+    failures: Counter = field(default_factory=Counter)
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def throughput(self) -> float:
+        """Processed items per second"""
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        """Human-readable multi-line summary"""
+        lines = [
+            f"total={self.total} succeeded={self.succeeded} failed={self.failed} skipped={self.skipped}",
+            f"elapsed={self.elapsed_seconds:.1f}s throughput={self.throughput:.2f} items/s",
+        ]
+        for code, count in self.failures.most_common():
+            lines.append(f"  {code}: {count}")
+        return "\n".join(lines)
+
+def validate_roadmap_json(raw_json: str) -> Tuple[bool, str]:
+    """
+    Validate raw LLM output in a worker process
+
+    Returns (ok, payload): normalized roadmap JSON on success, error code otherwise.
+    Error codes are returned instead of raised so nothing custom needs pickling
+    """
+    try:
+        return True, RoadmapService.parse_roadmap(raw_json).model_dump_json()
+    except LearnPathException as e:
+        return False, e.code
+
+def read_profiles(path: Path) -> Iterator[BatchItem]:
+    """Stream BatchItems from a JSONL file; `id` defaults to the 1-based line number"""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                item_id = str(record.pop("id", line_no))
+            except (json.JSONDecodeError, AttributeError):
+                yield BatchItem(str(line_no), None, "INVALID_RECORD")
+                continue
+            try:
+                yield BatchItem(item_id, UserProfile.model_validate(record))
+            except PydanticValidationError:
+                yield BatchItem(item_id, None, "INVALID_PROFILE")
+
+def load_checkpoint(path: Path) -> Set[str]:
+    """Return ids already completed by a previous run"""
+    if not path.exists():
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+class RoadmapBatchRunner:
+    """
+    Generate roadmaps for many profiles with bounded concurrency and checkpointing
+
+    Responsibilities:
+    - Spread items round-robin across LLM clients, rate-limited per key
+    - Generate in threads, validate in a process pool, retry invalid output
+    - Stream one NDJSON line per item; checkpoint successes and invalid input records
+    """
+    def __init__(
+        self,
+        clients: Dict[str, LLMClient],
+        *,
+        concurrency: int = 4,
+        rate_per_key: float = 1.0,
+        burst_per_key: float = 1.0,
+        validator_processes: int = 2,
+        max_retries: int = 2,
+        duration_week: Optional[int] = None,
+    ):
+        """
+        Args:
+            clients: LLM clients keyed by API key label (rate limits apply per key)
+            concurrency: Maximum items in flight
+            rate_per_key: Requests per second allowed for each key
+            burst_per_key: Burst size for each key (>= 1)
+            validator_processes: Worker processes for JSON validation; 0 validates inline
+            max_retries: Generation attempts per item on invalid output
+            duration_week: Optional duration override for every roadmap
+        """
+        if not clients:
+            raise ValidationError(message="At least one LLM client is required")
+        if burst_per_key < 1:
+            raise ValidationError(message="burst_per_key must be >= 1")
+        self._clients = clients
+        self._keys = list(clients)
+        self._prompts = RoadmapService(clients[self._keys[0]], max_retries=max_retries)
+        self._concurrency = concurrency
+        self._limiter = KeyedRateLimiter(rate=rate_per_key, capacity=burst_per_key)
+        self._validator_processes = validator_processes
+        self._max_retries = max_retries
+        self._duration_week = duration_week
+        self._write_lock = threading.Lock()
+
+    def run(self, input_path: Path, output_path: Path, checkpoint_path: Optional[Path] = None) -> BatchReport:
+        """
+        Process every profile in input_path not already in the checkpoint
+
+        Args:
+            input_path: JSONL file of UserProfile records (optional `id` field)
+            output_path: NDJSON file to append results to
+            checkpoint_path: Completed-id file; defaults to output_path + ".checkpoint"
+
+        Returns:
+            BatchReport for this run
+        """
+        checkpoint_path = checkpoint_path or output_path.with_name(output_path.name + ".checkpoint")
+        done = load_checkpoint(checkpoint_path)
+        report = BatchReport()
+        slots = threading.BoundedSemaphore(self._concurrency)
+        started = time.perf_counter()
+
+        validators: Optional[Executor] = (
+            ProcessPoolExecutor(max_workers=self._validator_processes)
+            if self._validator_processes > 0 else None
+        )
+        try:
+            with open(output_path, "a", encoding="utf-8") as out, \
+                    open(checkpoint_path, "a", encoding="utf-8") as ckpt, \
+                    ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix="roadmap-batch") as pool:
+                for index, item in enumerate(read_profiles(input_path)):
+                    report.total += 1
+                    if item.item_id in done:
+                        report.skipped += 1
+                        continue
+                    if item.profile is None:
+                        # deterministic failure: checkpoint it so a rerun does not report it again
+                        self._record(out, ckpt, report, item.item_id, None, item.error, checkpoint=True)
+                        continue
+
+                    slots.acquire()
+                    key = self._keys[index % len(self._keys)]
+                    future = pool.submit(self._process, item, key, validators)
+                    future.add_done_callback(
+                        lambda f, item_id=item.item_id: self._on_done(f, out, ckpt, report, item_id, slots)
+                    )
+        finally:
+            if validators is not None:
+                validators.shutdown()
+
+        report.elapsed_seconds = time.perf_counter() - started
+        logger.info(f"Roadmap batch finished: {report.summary()}")
+        return report
+
+    def _process(self, item: BatchItem, key: str, validators: Optional[Executor]) -> Tuple[Optional[str], Optional[str]]:
+        """Generate and validate one roadmap; return (roadmap_json, error_code)"""
+        prompt = self._prompts.build_prompt(item.profile, self._duration_week)
+        error_code = "ROADMAP_GENERATION_FAILED"
+
+        for attempt in range(1, self._max_retries + 1):
+            self._limiter.acquire(key)
+            try:
+                raw = self._clients[key].generate_text(prompt)
+            except LearnPathException as e:
+                logger.warning(f"Batch item {item.item_id} attempt {attempt} LLM error: {e}")
+                return None, e.code
+
+            if validators is None:
+                ok, payload = validate_roadmap_json(raw)
+            else:
+                ok, payload = validators.submit(validate_roadmap_json, raw).result()
+            if ok:
+                return payload, None
+            error_code = payload
+            logger.warning(f"Batch item {item.item_id} attempt {attempt} invalid output: {payload}")
+
+        return None, error_code
+
+    def _on_done(self, future: Future, out, ckpt, report: BatchReport, item_id: str, slots: threading.BoundedSemaphore) -> None:
+        """Completion callback: record result and free an in-flight slot"""
+        try:
+            try:
+                roadmap_json, error_code = future.result()
+            except Exception as e:
+                logger.exception(f"Batch item {item_id} crashed: {e}")
+                roadmap_json, error_code = None, "UNEXPECTED_ERROR"
+            self._record(out, ckpt, report, item_id, roadmap_json, error_code)
+        finally:
+            slots.release()
+
+    def _record(
+        self,
+        out,
+        ckpt,
+        report: BatchReport,
+        item_id: str,
+        roadmap_json: Optional[str],
+        error_code: Optional[str],
+        checkpoint: bool = False,
+    ) -> None:
+        """Append result line (and checkpoint on success or when asked) under the write lock"""
+        if roadmap_json is not None:
+            line = f'{{"id": {json.dumps(item_id)}, "status": "ok", "roadmap": {roadmap_json}}}\n'
+        else:
+            line = json.dumps({"id": item_id, "status": "failed", "error_code": error_code}) + "\n"
+
+        with self._write_lock:
+            out.write(line)
+            out.flush()
+            if roadmap_json is not None or checkpoint:
+                ckpt.write(item_id + "\n")
+                ckpt.flush()
+            if roadmap_json is not None:
+                report.succeeded += 1
+            else:
+                report.failed += 1
+                report.failures[error_code] += 1
+
+def main(argv: Optional[list] = None) -> int:
+    """CLI entry point; returns process exit code (1 if any item failed)"""
+    from ai import GeminiClient, SYSTEM_PROMPT
+    from config import settings
+
+    parser = argparse.ArgumentParser(description="Bulk roadmap generation from JSONL user profiles")
+    parser.add_argument("--input", type=Path, required=True, help="JSONL file of UserProfile records")
+    parser.add_argument("--output", type=Path, required=True, help="NDJSON output file (appended)")
+    parser.add_argument("--checkpoint", type=Path, default=None, help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--api-key", action="append", dest="api_keys", help="Gemini API key; repeat to spread load")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum items in flight")
+    parser.add_argument("--rate", type=float, default=1.0, help="Requests per second per API key")
+    parser.add_argument("--burst", type=float, default=1.0, help="Burst size per API key")
+    parser.add_argument("--validators", type=int, default=2, help="Validation worker processes (0 = inline)")
+    parser.add_argument("--max-retries", type=int, default=2, help="Attempts per item on invalid output")
+    parser.add_argument("--duration-week", type=int, default=None, help="Override roadmap duration")
+    args = parser.parse_args(argv)
+    if args.burst < 1:
+        parser.error("--burst must be >= 1")
+
+    api_keys = args.api_keys or [settings.GEMINI_API_KEY]
+    clients = {
+        f"key-{i}": GeminiClient(
+            api_key=api_key,
+            model_name=settings.GEMINI_MODEL,
+            request_timeout=60,
+            stream_timeout=120,
+            system_prompt=SYSTEM_PROMPT,
+        )
+        for i, api_key in enumerate(api_keys)
+    }
+    runner = RoadmapBatchRunner(
+        clients,
+        concurrency=args.concurrency,
+        rate_per_key=args.rate,
+        burst_per_key=args.burst,
+        validator_processes=args.validators,
+        max_retries=args.max_retries,
+        duration_week=args.duration_week,
+    )
+    report = runner.run(args.input, args.output, args.checkpoint)
+    print(report.summary())
+    return 1 if report.failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
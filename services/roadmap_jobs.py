@@ -0,0 +1,371 @@
+"""
+roadmap_jobs.py
+
+Background job queue for roadmap generation with SQLite-persisted job state
+
+Key features:
+- submit_roadmap(profile) returns a job id immediately; a bounded thread pool runs RoadmapService
+- Jobs move through queued -> running -> done | failed; state and results persist across restarts
+- Jobs are owned by the queue that runs them (host:pid:boot id) and kept alive by a heartbeat;
+  another process sharing the database only takes over unfinished jobs whose owner is gone or
+  whose heartbeat is stale (on startup and on every heartbeat), so no job runs twice
+- Optional per-job deadline: LLM timeouts and retries inside a job never outlive it
+- Degraded mode: while the LLM circuit is open, a job is answered with the latest roadmap
+  generated for the same profile, or fails at once with CIRCUIT_OPEN
+"""
+from __future__ import annotations
+
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional, TYPE_CHECKING
+
+from domain import Roadmap, UserProfile, ROADMAP_ADAPTER
+from utils import CircuitOpenError, LearnPathException, deadline, logger, metrics
+
+if TYPE_CHECKING:
+    from services.roadmap_service import RoadmapService
+
+DEGRADED = metrics.counter(
+    "llm_degraded_total", "Requests answered in degraded mode while the LLM circuit is open", ("kind",)
+)
+
+class JobStatus(str, Enum):
+    """Lifecycle states of a roadmap job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    @property
+    def is_finished(self) -> bool:
+        return self in (JobStatus.DONE, JobStatus.FAILED)
+
+@dataclass(frozen=True)
+class RoadmapJob:
+    """Snapshot of a roadmap job as stored in the job store"""
+    job_id: str
+    status: JobStatus
+    profile: UserProfile
+    duration_week: Optional[int]
+    roadmap: Optional[Roadmap]
+    error_code: Optional[str]
+    created_at: float
+    updated_at: float
+    owner: Optional[str] = None
+    heartbeat_at: Optional[float] = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roadmap_jobs (
+    job_id        TEXT PRIMARY KEY,
+    status        TEXT NOT NULL,
+    profile       TEXT NOT NULL,
+    duration_week INTEGER,
+    roadmap       TEXT,
+    error_code    TEXT,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL,
+    owner         TEXT,
+    heartbeat_at  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_roadmap_jobs_status ON roadmap_jobs (status);
+CREATE INDEX IF NOT EXISTS idx_roadmap_jobs_profile ON roadmap_jobs (profile, status);
+"""
+
+_COLUMNS = "job_id, status, profile, duration_week, roadmap, error_code, created_at, updated_at, owner, heartbeat_at"
+
+# Columns added after the first schema: (name, type) added to older databases on open
+_MIGRATIONS = (("owner", "TEXT"), ("heartbeat_at", "REAL"))
+
+class RoadmapJobStore:
+    """
+    SQLite persistence for roadmap jobs
+
+    Responsibilities:
+    - create, update status/result and read jobs by id
+    - list unfinished jobs; heartbeat and claim them (compare-and-set on the owner) for recovery
+    - find the latest finished roadmap for a profile (degraded-mode fallback)
+    - Serialize access to one connection shared across worker threads
+    """
+    def __init__(self, path: str | Path):
+        """
+        Open (or create) the job database
+
+        Args:
+            path: SQLite file path, or ":memory:" for tests
+        """
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(roadmap_jobs)")}
+        with self._conn:
+            for name, kind in _MIGRATIONS:
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE roadmap_jobs ADD COLUMN {name} {kind}")
+
+    def create(
+        self,
+        job_id: str,
+        profile: UserProfile,
+        duration_week: Optional[int],
+        owner: Optional[str] = None,
+    ) -> None:
+        """Insert a new job in QUEUED state, owned by `owner` (heartbeat starts now)"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO roadmap_jobs "
+                "(job_id, status, profile, duration_week, created_at, updated_at, owner, heartbeat_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, JobStatus.QUEUED.value, profile.model_dump_json(), duration_week, now, now, owner, now),
+            )
+
+    def heartbeat(self, owner: str) -> None:
+        """Mark every unfinished job of `owner` as still alive"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE roadmap_jobs SET heartbeat_at = ? WHERE owner = ? AND status IN (?, ?)",
+                (time.time(), owner, JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            )
+
+    def claim(self, job_id: str, owner: str, *, previous_owner: Optional[str], stale_before: float) -> bool:
+        """
+        Take over an unfinished job and re-queue it, only if it still belongs to previous_owner
+        and its heartbeat is older than stale_before (atomic across processes)
+
+        Returns:
+            True if this call claimed the job
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE roadmap_jobs SET owner = ?, status = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND status IN (?, ?) AND owner IS ? AND COALESCE(heartbeat_at, 0) < ?",
+                (
+                    owner, JobStatus.QUEUED.value, now, now,
+                    job_id, JobStatus.QUEUED.value, JobStatus.RUNNING.value, previous_owner, stale_before,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def set_status(
+        self,
+        job_id: str,
+        status: JobStatus,
+        *,
+        roadmap: Optional[Roadmap] = None,
+        error_code: Optional[str] = None,
+    ) -> None:
+        """Move a job to a new status, storing result or error code if given"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE roadmap_jobs SET status = ?, roadmap = ?, error_code = ?, updated_at = ? "
+                "WHERE job_id = ?",
+                (
+                    status.value,
+                    roadmap.model_dump_json() if roadmap else None,
+                    error_code,
+                    time.time(),
+                    job_id,
+                ),
+            )
+
+    def get(self, job_id: str) -> Optional[RoadmapJob]:
+        """Return job by id or None if unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM roadmap_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._to_job(row) if row else None
+
+    def list_unfinished(self) -> List[RoadmapJob]:
+        """Return queued or running jobs, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM roadmap_jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def find_roadmap(self, profile: UserProfile, duration_week: Optional[int]) -> Optional[Roadmap]:
+        """Return the most recent roadmap generated for an identical profile and duration, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT roadmap FROM roadmap_jobs WHERE profile = ? AND status = ? AND duration_week IS ? "
+                "AND roadmap IS NOT NULL ORDER BY updated_at DESC LIMIT 1",
+                (profile.model_dump_json(), JobStatus.DONE.value, duration_week),
+            ).fetchone()
+        return ROADMAP_ADAPTER.validate_json(row[0]) if row else None
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_job(row: tuple) -> RoadmapJob:
+        """Convert a database row into RoadmapJob"""
+        job_id, status, profile, duration_week, roadmap, error_code, created_at, updated_at, owner, heartbeat_at = row
+        return RoadmapJob(
+            job_id=job_id,
+            status=JobStatus(status),
+            profile=UserProfile.model_validate_json(profile),
+            duration_week=duration_week,
+            roadmap=ROADMAP_ADAPTER.validate_json(roadmap) if roadmap else None,
+            error_code=error_code,
+            created_at=created_at,
+            updated_at=updated_at,
+            owner=owner,
+            heartbeat_at=heartbeat_at,
+        )
+
+def _owner_gone(owner: str) -> bool:
+    """True if owner ("host:pid:boot") names a process on this host that no longer exists"""
+    host, _, rest = owner.partition(":")
+    pid = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, OSError, OverflowError):
+        return False
+    return False
+
+class RoadmapJobQueue:
+    """
+    Run roadmap generation in a bounded background worker pool
+
+    Responsibilities:
+    - submit_roadmap: persist job, schedule it and return its id without blocking
+    - Worker: mark running, call RoadmapService, persist roadmap or error code
+    - Serve a stored roadmap for the same profile when the LLM circuit is open
+    - Heartbeat its own jobs; take over unfinished jobs of dead or silent owners
+    """
+    def __init__(
+        self,
+        roadmap_service: RoadmapService,
+        store: RoadmapJobStore,
+        max_workers: int = 2,
+        job_deadline: Optional[float] = None,
+        heartbeat_interval: float = 10.0,
+        stale_after: Optional[float] = None,
+    ):
+        """
+        Initialize the queue, recover orphaned jobs and start the heartbeat thread
+
+        Args:
+            roadmap_service: Service used to generate roadmaps
+            store: Persistent job store
+            max_workers: Maximum number of concurrent roadmap generations
+            job_deadline: Seconds one job may run, retries included (None: unbounded)
+            heartbeat_interval: Seconds between heartbeats (and recovery scans)
+            stale_after: Heartbeat age after which another owner's job is taken over
+                (default: 3 heartbeat intervals)
+        """
+        self._service = roadmap_service
+        self._store = store
+        self.job_deadline = job_deadline
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = 3 * heartbeat_interval if stale_after is None else stale_after
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="roadmap-job",
+        )
+        self._stop = threading.Event()
+        self._recover()
+        self._heartbeat = threading.Thread(target=self._beat, name="roadmap-job-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def submit_roadmap(self, profile: UserProfile, duration_week: Optional[int] = None) -> str:
+        """
+        Queue roadmap generation for a profile
+
+        Args:
+            profile: User profile to generate the roadmap from
+            duration_week: Optional override for total duration in weeks
+
+        Returns:
+            Job id to poll with get_job
+        """
+        job_id = uuid.uuid4().hex
+        self._store.create(job_id, profile, duration_week, owner=self.owner_id)
+        self._executor.submit(self._run, job_id, profile, duration_week)
+        logger.info(f"Roadmap job {job_id} queued")
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[RoadmapJob]:
+        """Return current job state or None if the id is unknown"""
+        return self._store.get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs; unfinished jobs are recovered once their heartbeat goes stale"""
+        self._stop.set()
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _beat(self) -> None:
+        """Heartbeat thread: keep own jobs alive, take over orphaned ones"""
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self._store.heartbeat(self.owner_id)
+                self._recover()
+            except Exception as e:
+                logger.error(f"Roadmap job heartbeat failed: {e}")
+
+    def _recover(self) -> None:
+        """Re-queue unfinished jobs whose owner is gone (or unknown) or whose heartbeat is stale"""
+        stale_before = time.time() - self.stale_after
+        for job in self._store.list_unfinished():
+            if job.owner == self.owner_id:
+                continue
+            gone = job.owner is None or _owner_gone(job.owner)
+            if not self._store.claim(
+                job.job_id,
+                self.owner_id,
+                previous_owner=job.owner,
+                stale_before=math.inf if gone else stale_before,
+            ):
+                continue
+            logger.info(f"Recovering roadmap job {job.job_id} ({job.status.value}, owner={job.owner})")
+            self._executor.submit(self._run, job.job_id, job.profile, job.duration_week)
+
+    def _run(self, job_id: str, profile: UserProfile, duration_week: Optional[int]) -> None:
+        """Worker body: generate roadmap and persist the outcome"""
+        self._store.set_status(job_id, JobStatus.RUNNING)
+        try:
+            with deadline(self.job_deadline) if self.job_deadline is not None else nullcontext():
+                roadmap = self._service.generate_roadmap(profile, duration_week=duration_week)
+        except CircuitOpenError as e:
+            roadmap = self._store.find_roadmap(profile, duration_week)
+            if roadmap is None:
+                DEGRADED.inc(kind="roadmap_error")
+                logger.warning(f"Roadmap job {job_id} failed: LLM unavailable and no stored roadmap")
+                self._store.set_status(job_id, JobStatus.FAILED, error_code=e.code)
+                return
+            DEGRADED.inc(kind="roadmap_cache")
+            logger.warning(f"Roadmap job {job_id}: LLM unavailable, serving stored roadmap (degraded mode)")
+        except LearnPathException as e:
+            logger.warning(f"Roadmap job {job_id} failed: {e}")
+            self._store.set_status(job_id, JobStatus.FAILED, error_code=e.code)
+            return
+        except Exception as e:
+            logger.exception(f"Roadmap job {job_id} crashed: {e}")
+            self._store.set_status(job_id, JobStatus.FAILED, error_code="UNEXPECTED_ERROR")
+            return
+        self._store.set_status(job_id, JobStatus.DONE, roadmap=roadmap)
+        logger.info(f"Roadmap job {job_id} done")
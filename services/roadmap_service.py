@@ -5,15 +5,34 @@ Roadmap service for LearnPath chatbot. Builds prompts from UserProfile, calls LL
 for raw JSON roadmaps, parses into Roadmap domain model and applies retry/validation
 
 Key features:
-- generate_roadmap: profile → Roadmap with retry on invalid output
-- Prompt build from ROADMAP_PROMPT_TEMPLATE; parse and validate JSON
+- generate_roadmap: profile → Roadmap with retry on invalid output (shared RetryPolicy and
+  retry budget; transport errors are retried once, by the LLM client, not again here)
+- update_roadmap: regenerate only the weeks affected by a RoadmapChange, keep the rest as-is
+- build_prompt / parse_roadmap: prompt build from ROADMAP_PROMPT_TEMPLATE and JSON validation,
+  public for offline/batch callers; MILESTONE_PROMPT_TEMPLATE for partial updates
 """
-import json
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Set, TypeVar
 
-from ai import LLMClient, ROADMAP_PROMPT_TEMPLATE
-from domain import Roadmap, UserProfile
-from utils import LLMServiceError, ValidationError, logger
+from pydantic import ValidationError as PydanticValidationError
+
+from ai import LLMClient, ROADMAP_PROMPT_TEMPLATE, MILESTONE_PROMPT_TEMPLATE
+from domain import (
+    Milestone,
+    Roadmap,
+    RoadmapChange,
+    UserProfile,
+    MILESTONES_ADAPTER,
+    ROADMAP_ADAPTER,
+    is_json_error,
+)
+from utils import CircuitOpenError, LLMServiceError, OverloadedError, RetryPolicy, ValidationError, logger
+
+T = TypeVar("T")
+
+# Profile fields that change what the whole roadmap is about -> full regeneration
+_FULL_REGENERATION_FIELDS = ("goal", "current_level")
+# Profile fields that change how every week is planned -> regenerate all milestones, keep header
+_PLAN_FIELDS = ("time_commitment", "learning_style", "background", "constraints")
 
 class RoadmapService:
     """
@@ -23,16 +42,24 @@ class RoadmapService:
     - Build roadmap generation prompt from UserProfile
     - Call LLMClient.generate_text to obtain raw JSON
     - Parse JSON into Roadmap domain model; apply retry on invalid output
+    - Apply RoadmapChange by regenerating only the affected milestones
     """
 
     def __init__(
         self,
         llm_client: LLMClient,
         max_retries: int = 2,
+        retry_policy: Optional[RetryPolicy] = None,
     ):
-        """Initialize with LLM client and max retries for roadmap generation"""
+        """Initialize with LLM client and the policy retrying invalid output (max_retries attempts)"""
         self.llm = llm_client
         self.max_retries = max_retries
+        self.retry_policy = retry_policy or RetryPolicy(
+            "roadmap_output",
+            max_attempts=max_retries,
+            base_delay=0.0,
+            retry_on=lambda e: isinstance(e, ValidationError),
+        )
 
     def generate_roadmap(
         self,
@@ -50,36 +77,242 @@ class RoadmapService:
             Roadmap domain object
 
         Raises:
-            ValidationError: If after max_retries the LLM output is still invalid
-            LLMServiceError: Propagated if underlying LLM call fails permanently
+            ValidationError: If the LLM output is still invalid after max_retries, or the
+                LLM call failed (ROADMAP_GENERATION_FAILED)
+            OverloadedError: If the LLM lane sheds the call (not retried)
+            CircuitOpenError: If the LLM circuit breaker is open (not retried)
         """
-        duration = duration_week or self._guess_duration(profile)
+        prompt = self.build_prompt(profile, duration_week)
+        message = (
+            "Không thể tạo lộ trình học tập hợp lệ sau khi thử lại nhiều lần."
+            "Vui lòng thử lại hoặc điều chỉnh thông tin đầu vào."
+        )
+        roadmap = self._with_retry(
+            lambda: self.parse_roadmap(self.llm.generate_text(prompt)),
+            message=message,
+            code="ROADMAP_GENERATION_FAILED",
+        )
+        logger.info("Roadmap generation succeeded")
+        return roadmap
+        
+    def update_roadmap(self, existing: Roadmap, change: RoadmapChange) -> Roadmap:
+        """
+        Apply a change to an existing Roadmap, regenerating only the affected weeks
 
-        last_error: Optional[Exception] = None
+        Goal/level changes regenerate the whole roadmap. Other profile changes, and an
+        instruction that names no weeks, regenerate every milestone but keep the roadmap
+        header. Explicit weeks and weeks added by a longer duration are regenerated; all
+        other milestones are reused unchanged
 
-        for attempt in range(1, self.max_retries + 1):
-            prompt = self._build_prompt(
-                profile = profile,
-                duration_week = duration
-            )
+        Args:
+            existing: Roadmap currently shown to the user
+            change: Requested edit (profile diff, weeks, instruction, duration)
+
+        Returns:
+            Updated Roadmap (existing object if nothing needs to change)
+
+        Raises:
+            ValidationError: If the change is invalid, the LLM output is still invalid after
+                max_retries, or the LLM call failed (ROADMAP_UPDATE_FAILED)
+            OverloadedError: If the LLM lane sheds the call (not retried)
+            CircuitOpenError: If the LLM circuit breaker is open (not retried)
+        """
+        profile = change.profile or change.previous_profile
+        if profile is None:
+            raise ValidationError(message="RoadmapChange must include a profile")
+
+        duration = change.duration_week or existing.duration_week
+
+        if self._profile_changed(change, _FULL_REGENERATION_FIELDS):
+            logger.info("Roadmap update: goal/level changed, regenerating full roadmap")
+            return self.generate_roadmap(profile, duration_week=duration)
 
-            try:
-                raw = self.llm.generate_text(prompt)
-                roadmap = self._parse_and_validate(raw)
-                logger.info(f"Roadmap generation succeeded on attempt {attempt}")
-                return roadmap
-            except (ValidationError, LLMServiceError, json.JSONDecodeError) as e:
-                logger.warning(
-                    f"Roadmap generation attempt {attempt} failed: {e}"
-                )
-                last_error = e
+        affected = self._affected_weeks(existing, change, duration)
+        kept = existing.milestones[:duration]
 
+        if not affected:
+            if duration == existing.duration_week:
+                logger.info("Roadmap update: nothing to change")
+                return existing
+            logger.info(f"Roadmap update: truncating to {duration} weeks")
+            return self._assemble(existing, kept, {}, duration)
+
+        weeks = sorted(affected)
+        logger.info(f"Roadmap update: regenerating weeks {weeks} of {duration}")
+        prompt = self._build_milestone_prompt(
+            profile=profile,
+            existing=existing,
+            kept=kept,
+            weeks=weeks,
+            duration_week=duration,
+            instruction=change.instruction,
+        )
         message = (
-            "Không thể tạo lộ trình học tập hợp lệ sau khi thử lại nhiều lần."
-            "Vui lòng thử lại hoặc điều chỉnh thông tin đầu vào."
+            "Không thể cập nhật lộ trình học tập sau khi thử lại nhiều lần."
+            "Vui lòng thử lại hoặc điều chỉnh yêu cầu thay đổi."
         )
-        raise ValidationError(message=message, code="ROADMAP_GENERATION_FAILED") from last_error
-        
+
+        def regenerate() -> Roadmap:
+            regenerated = self._parse_milestones(self.llm.generate_text(prompt), weeks)
+            return self._assemble(existing, kept, regenerated, duration)
+
+        roadmap = self._with_retry(
+            regenerate,
+            message=message,
+            code="ROADMAP_UPDATE_FAILED",
+        )
+        logger.info("Roadmap update succeeded")
+        return roadmap
+
+    def _with_retry(self, attempt: Callable[[], T], *, message: str, code: str) -> T:
+        """
+        Run one generate-and-parse attempt under the retry policy
+
+        Invalid output is retried within the policy's attempts and budget. LLM errors are
+        not retried here (the client already applied the same policy); shedding and an open
+        circuit propagate so the caller can react (fail fast, serve degraded).
+
+        Raises:
+            ValidationError: With `code` once the attempts fail
+            OverloadedError: If the LLM lane sheds the call
+            CircuitOpenError: If the LLM circuit breaker is open
+        """
+        try:
+            return self.retry_policy.call(attempt)
+        except (OverloadedError, CircuitOpenError):
+            raise
+        except (ValidationError, LLMServiceError) as e:
+            logger.warning(f"Roadmap attempt failed: {e}")
+            raise ValidationError(message=message, code=code) from e
+
+    @staticmethod
+    def _profile_changed(change: RoadmapChange, fields: tuple) -> bool:
+        """Return True if any of the given profile fields differ between previous and new profile"""
+        old, new = change.previous_profile, change.profile
+        if old is None or new is None:
+            return False
+        return any(getattr(old, f) != getattr(new, f) for f in fields)
+
+    def _affected_weeks(self, existing: Roadmap, change: RoadmapChange, duration_week: int) -> Set[int]:
+        """Collect weeks to regenerate: explicit weeks, newly added weeks, all weeks on plan change
+        or on an instruction without weeks (it applies to the whole roadmap)"""
+        out_of_range = [w for w in change.weeks if w > duration_week]
+        if out_of_range:
+            raise ValidationError(
+                message=f"Tuần {out_of_range} nằm ngoài lộ trình {duration_week} tuần"
+            )
+
+        if self._profile_changed(change, _PLAN_FIELDS):
+            return set(range(1, duration_week + 1))
+        if change.instruction and change.instruction.strip() and not change.weeks:
+            return set(range(1, duration_week + 1))
+
+        affected = set(change.weeks)
+        affected.update(range(existing.duration_week + 1, duration_week + 1))
+        return affected
+
+    def _build_milestone_prompt(
+        self,
+        profile: UserProfile,
+        existing: Roadmap,
+        kept: List[Milestone],
+        weeks: List[int],
+        duration_week: int,
+        instruction: Optional[str],
+    ) -> str:
+        """Build partial regeneration prompt from MILESTONE_PROMPT_TEMPLATE"""
+        outline = "\n".join(
+            f"- Tuần {m.week}: {m.topic}" + (" (cần tạo lại)" if m.week in weeks else "")
+            for m in kept
+        )
+        outline += "".join(
+            f"\n- Tuần {w}: (tuần mới, cần tạo)" for w in weeks if w > len(kept)
+        )
+
+        return MILESTONE_PROMPT_TEMPLATE.substitute(
+            topic=existing.topic,
+            duration_week=str(duration_week),
+            goal=profile.goal,
+            level=profile.current_level,
+            time_commitment=profile.time_commitment,
+            learning_style=profile.learning_style or "Không cung cấp",
+            background=profile.background or "Không cung cấp",
+            constraints=", ".join(profile.constraints or ["Không có"]),
+            outline=outline,
+            instruction=instruction or "Không có",
+            weeks=", ".join(str(w) for w in weeks),
+        )
+
+    def _parse_milestones(self, raw_json: str, weeks: List[int]) -> Dict[int, Milestone]:
+        """Parse LLM milestone array, validate each item and map it onto the requested weeks"""
+        try:
+            data = MILESTONES_ADAPTER.validate_json(raw_json)
+        except PydanticValidationError as e:
+            if is_json_error(e):
+                logger.error(f"Failed to decode milestones JSON: {e}")
+                raise ValidationError(message="LLM trả về JSON không hợp lệ") from e
+            logger.error(f"Milestone validation failed: {e}")
+            raise ValidationError(message="LLM phải trả về mảng milestone hợp lệ theo schema") from e
+
+        milestones = data if isinstance(data, list) else data.milestones
+
+        if len(milestones) != len(weeks):
+            raise ValidationError(
+                message=f"Cần {len(weeks)} milestone cho tuần {weeks}, nhận được {len(milestones)}"
+            )
+
+        returned = sorted(m.week for m in milestones)
+        if returned == weeks:
+            return {m.week: m for m in milestones}
+
+        # Right count but wrong numbering: renumber positionally
+        logger.warning(f"Renumbering milestones {returned} -> {weeks}")
+        return {
+            week: m.model_copy(update={"week": week})
+            for week, m in zip(weeks, milestones)
+        }
+
+    @staticmethod
+    def _assemble(
+        existing: Roadmap,
+        kept: List[Milestone],
+        regenerated: Dict[int, Milestone],
+        duration_week: int,
+    ) -> Roadmap:
+        """Splice regenerated milestones into the kept ones and revalidate the whole roadmap"""
+        milestones = [
+            regenerated.get(week) or kept[week - 1]
+            for week in range(1, duration_week + 1)
+        ]
+
+        try:
+            return Roadmap.model_validate({
+                "topic": existing.topic,
+                "title": existing.title,
+                "description": existing.description,
+                "duration_week": duration_week,
+                "milestones": milestones,
+                "prerequisites": existing.prerequisites,
+                "created_at": existing.created_at,
+            })
+        except Exception as e:
+            logger.error(f"Updated roadmap validation failed: {e}")
+            raise ValidationError(message="Roadmap không hợp lệ theo schema") from e
+
+    def build_prompt(self, profile: UserProfile, duration_week: Optional[int] = None) -> str:
+        """
+        Build the full roadmap generation prompt for a profile
+
+        Args:
+            profile: Collected user profile information
+            duration_week: Optional override for total duration in weeks
+
+        Returns:
+            Prompt text for LLMClient.generate_text
+        """
+        duration = duration_week or self._guess_duration(profile)
+        return self._build_prompt(profile=profile, duration_week=duration)
+
     def _build_prompt(self, profile: UserProfile, duration_week: int) -> str:
         """Build roadmap generation prompt from ROADMAP_PROMPT_TEMPLATE"""
         learning_style = profile.learning_style or "Không cung cấp"
@@ -98,21 +331,25 @@ class RoadmapService:
 
         return prompt
     
-    def _parse_and_validate(self, raw_json: str) -> Roadmap:
-        """Parse LLM JSON output and validate against Roadmap schema"""
-        try:
-            data = json.loads(raw_json)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to decode roadmap JSON: {e}")
-            raise ValidationError(message="LLM trả về JSON không hợp lệ") from e
-        
+    @staticmethod
+    def parse_roadmap(raw_json: str) -> Roadmap:
+        """
+        Parse LLM JSON output and validate against Roadmap schema
+
+        Parsing and validation happen in one pass inside pydantic-core (no intermediate dicts).
+        Stateless so it can run in worker processes (see roadmap_batch)
+
+        Raises:
+            ValidationError: If the output is not valid JSON or violates the schema
+        """
         try:
-            roadmap = Roadmap.model_validate(data)
-        except Exception as e:
+            return ROADMAP_ADAPTER.validate_json(raw_json)
+        except PydanticValidationError as e:
+            if is_json_error(e):
+                logger.error(f"Failed to decode roadmap JSON: {e}")
+                raise ValidationError(message="LLM trả về JSON không hợp lệ") from e
             logger.error(f"Roadmap validation failed: {e}")
             raise ValidationError(message="Roadmap không hợp lệ theo schema") from e
-        
-        return roadmap
     
     def _guess_duration(self, profile: UserProfile) -> int:
         """Guess duration_week from profile (simple heuristic)"""
@@ -4,10 +4,13 @@ session_manager.py
 Session manager for tracking user activity and session expiration
 
 Key features:
-- Track last activity timestamp; check if session expired due to inactivity
+- Track last activity on a monotonic clock; check if session expired due to inactivity
 - touch_activity, is_expired, reset for lightweight in-memory session
+- Wall-clock last activity kept only for persistence (get/set_last_activity)
 """
+import time
 from datetime import datetime, timedelta
+from typing import Callable
 
 class SessionManager:
     """
@@ -15,38 +18,52 @@ class SessionManager:
 
     Responsibilities:
     - touch_activity: record current time as last activity
-    - is_expired: true when inactivity exceeds timeout
+    - is_expired: true when inactivity exceeds timeout (monotonic, immune to clock changes)
     - reset: clear last activity (e.g. new session)
+
+    Process-wide expiry and resource cleanup live in SessionRegistry; this class only
+    answers "has this session timed out?" for the session it belongs to.
     """
-    def __init__(self, timeout_minutes: int = 30):
+    def __init__(self, timeout_minutes: int = 30, *, clock: Callable[[], float] = time.monotonic):
         """
         Initialize a new session manager with specified inactivity timeout
 
         Args:
             timeout_minutes: Number of minutes of inactivity before expiration
                 Default: 30 mins
+            clock: Monotonic time source (injectable for tests)
         """
         self.timeout = timedelta(minutes=timeout_minutes)
+        self._clock = clock
         self._last_activity: datetime | None = None
+        self._last_activity_mono: float | None = None
 
     def touch_activity(self) -> None:
         """Record current time as the last user activity"""
         self._last_activity = datetime.now()
+        self._last_activity_mono = self._clock()
 
     def is_expired(self) -> bool:
         """Return True if the session has expired due to inactivity (no activity for timeout period)"""
-        if self._last_activity is None:
+        if self._last_activity_mono is None:
             return False
-        return datetime.now() - self._last_activity > self.timeout
+        return self._clock() - self._last_activity_mono > self.timeout.total_seconds()
 
     def reset(self) -> None:
         """Reset the session to its initial state"""
         self._last_activity = None
+        self._last_activity_mono = None
 
     def get_last_activity(self):
         """Return the last activity datetime (for session persistence) or None"""
         return self._last_activity
     
     def set_last_activity(self, value: datetime | None) -> None:
-        """Restore the last activity (e.g. from session_state)"""
-        self._last_activity = value
\ No newline at end of file
+        """Restore the last activity (e.g. from session_state); its age is mapped onto the monotonic clock"""
+        self._last_activity = value
+        if value is None:
+            self._last_activity_mono = None
+            return
+        now = datetime.now(value.tzinfo) if value.tzinfo else datetime.now()
+        age = max(0.0, (now - value).total_seconds())
+        self._last_activity_mono = self._clock() - age
@@ -0,0 +1,114 @@
+"""
+session_registry.py
+
+Central registry of live sessions with timer-wheel expiry on a monotonic clock
+
+Key features:
+- SessionRegistry: touch(session_id) is O(1) (dict store + lazy wheel reschedule)
+- Background sweeper thread advances the TimerWheel and expires idle sessions in
+  O(1) amortized per session, without waiting for the user's next message
+- Cleanup hooks (history release, cache invalidation, ...) run for every expired session
+"""
+
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, List, Optional
+
+from utils import TimerWheel, logger
+
+ExpiryHook = Callable[[str], None]
+
+class SessionRegistry:
+    """
+    Track last activity of every session and expire idle ones
+
+    Responsibilities:
+    - touch / forget sessions; report whether a session is still live
+    - sweep(): advance the wheel and fire hooks for expired sessions (outside the wheel's lock)
+    - start()/stop(): run sweep() periodically in a daemon thread
+    """
+    def __init__(
+        self,
+        timeout: timedelta = timedelta(minutes=30),
+        *,
+        tick: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            timeout: Inactivity after which a session expires
+            tick: Expiry resolution in seconds (timer wheel slot width)
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.timeout_seconds = timeout.total_seconds()
+        self._clock = clock
+        slots = max(64, int(self.timeout_seconds / tick) + 1)
+        self._wheel = TimerWheel(tick=tick, slots=slots, clock=clock)
+        self._hooks: List[ExpiryHook] = []
+        self._hooks_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_hook(self, hook: ExpiryHook) -> None:
+        """Register a callback invoked with the id of each expired session"""
+        with self._hooks_lock:
+            self._hooks.append(hook)
+
+    def touch(self, session_id: str) -> None:
+        """Record activity now; the session expires `timeout` after its last touch"""
+        self._wheel.schedule(session_id, self._clock() + self.timeout_seconds)
+
+    def schedule(self, session_id: str, remaining: float) -> None:
+        """Track a session that should expire in `remaining` seconds (e.g. restored from disk)"""
+        self._wheel.schedule(session_id, self._clock() + max(0.0, remaining))
+
+    def forget(self, session_id: str) -> None:
+        """Stop tracking a session without firing hooks"""
+        self._wheel.cancel(session_id)
+
+    def is_live(self, session_id: str) -> bool:
+        """True if the session is tracked and its deadline has not passed"""
+        deadline = self._wheel.deadline(session_id)
+        return deadline is not None and deadline > self._clock()
+
+    def __len__(self) -> int:
+        return len(self._wheel)
+
+    def sweep(self) -> List[str]:
+        """Expire due sessions, run hooks for each and return their ids"""
+        expired = self._wheel.advance()
+        if not expired:
+            return expired
+        with self._hooks_lock:
+            hooks = list(self._hooks)
+        for session_id in expired:
+            for hook in hooks:
+                try:
+                    hook(session_id)
+                except Exception as e:
+                    logger.error(f"Session expiry hook failed: {e}")
+        logger.info(f"SessionRegistry expired {len(expired)} session(s)")
+        return expired
+
+    def start(self, interval: float = 1.0) -> None:
+        """Start the background sweeper (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="session-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background sweeper and wait for it to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.exception(f"Session sweeper error: {e}")
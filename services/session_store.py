@@ -0,0 +1,292 @@
+"""
+session_store.py
+
+Process-wide store of AppService instances keyed by session id
+
+Key features:
+- SessionStore: one AppService per browser session, created on demand by a factory
+- Per-session memory accounting: the footprint the history backend reports (columns or
+  message objects, content strings, retrieval index); backends that report none are
+  estimated from message contents, incrementally
+- Global memory budget: least-recently-active sessions are spilled to disk (msgpack codec)
+  and rehydrated transparently on the next access
+- checkout/checkin pin a session for the duration of a turn; pinned sessions are never spilled
+  or expired, so a long-running answer cannot be written to an orphaned AppService
+- Expiry through a SessionRegistry (timer wheel on a monotonic clock): touching a session is O(1),
+  expired sessions are released by the registry's cleanup hook (background sweeper or sweep())
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING
+
+import msgpack
+
+from memory import encode_messages, decode_messages
+from memory.chat_memory import MESSAGE_STORAGE_BYTES
+from utils import ValidationError, logger
+from services.session_registry import SessionRegistry
+
+if TYPE_CHECKING:
+    from services.app_service import AppService
+
+# Fallback fixed cost of one stored message besides its content string, for history
+# backends without memory_bytes() (columnar ChatMemory layout)
+MESSAGE_OVERHEAD_BYTES = MESSAGE_STORAGE_BYTES
+
+_SPILL_FORMAT_VERSION = 1
+_SPILL_SUFFIX = ".session"
+_SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+def is_valid_session_id(session_id: str) -> bool:
+    """True if session_id is safe to use as a store key and spill file name"""
+    return _SESSION_ID_PATTERN.fullmatch(session_id) is not None
+
+@dataclass
+class _Entry:
+    """In-memory session with its accounting state"""
+    app: AppService
+    length: int = 0
+    size: int = 0
+    pins: int = 0
+
+class SessionStore:
+    """
+    Keep live sessions in memory within a byte budget; spill the rest to disk
+
+    Responsibilities:
+    - get: return the session's AppService (in memory, rehydrated from disk, or new)
+    - checkout / checkin: get and pin a session for a turn, then unpin and touch it
+    - touch: after a turn, update accounting, reschedule expiry and evict over budget
+    - sweep: drop expired sessions (memory and spill files) via the session registry
+    - Thread-safe: Streamlit serves sessions from several script threads
+    """
+    def __init__(
+        self,
+        factory: Callable[[], AppService],
+        spill_dir: str | Path,
+        *,
+        memory_budget_bytes: int = 256 * 1024 * 1024,
+        session_timeout: timedelta = timedelta(minutes=30),
+        registry: Optional[SessionRegistry] = None,
+    ):
+        """
+        Args:
+            factory: Builds a fresh AppService for a new or rehydrated session
+            spill_dir: Directory for spilled sessions (created if missing)
+            memory_budget_bytes: Estimated bytes of history kept in memory across sessions
+            session_timeout: Inactivity after which a session is discarded
+            registry: Session registry for expiry (default: private one with session_timeout, no sweeper thread)
+        """
+        self._factory = factory
+        self.spill_dir = Path(spill_dir)
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.session_timeout = session_timeout
+        if registry is None:
+            registry = SessionRegistry(session_timeout)
+        self._registry = registry
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._registry.add_hook(self._on_expired)
+        self._purge_stale_spills()
+
+    def get(self, session_id: str) -> AppService:
+        """
+        Return the AppService for session_id, rehydrating or creating it as needed
+
+        Raises:
+            ValidationError: If session_id is not a safe identifier
+        """
+        return self._get(session_id, pin=False)
+
+    def checkout(self, session_id: str) -> AppService:
+        """
+        Return the AppService for session_id pinned in memory until checkin()
+
+        Use around every turn that appends to the history; a pinned session is never
+        spilled or expired while another thread is still writing to it
+
+        Raises:
+            ValidationError: If session_id is not a safe identifier
+        """
+        return self._get(session_id, pin=True)
+
+    def checkin(self, session_id: str) -> None:
+        """Unpin a session taken with checkout() and touch it"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.pins > 0:
+                entry.pins -= 1
+        self.touch(session_id)
+
+    def _get(self, session_id: str, pin: bool) -> AppService:
+        self._check_id(session_id)
+        self._registry.sweep()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+                if pin:
+                    entry.pins += 1
+                return entry.app
+
+            app = self._factory()
+            path = self._spill_path(session_id)
+            if path.exists():
+                self._rehydrate(app, path)
+            entry = _Entry(app=app, pins=1 if pin else 0)
+            self._entries[session_id] = entry
+            self._account(entry)
+            self._registry.touch(session_id)
+            self._evict_over_budget(keep=session_id)
+            return app
+
+    def touch(self, session_id: str) -> None:
+        """
+        Record activity for session_id: reschedule expiry, refresh accounting, enforce the budget
+
+        Call after each handled message (cost is proportional to new messages only)
+        """
+        self._registry.touch(session_id)
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            self._entries.move_to_end(session_id)
+            self._account(entry)
+            self._evict_over_budget(keep=session_id)
+
+    def discard(self, session_id: str) -> None:
+        """Forget a session entirely (memory, spill file and expiry)"""
+        self._registry.forget(session_id)
+        with self._lock:
+            self._drop(session_id)
+
+    def sweep(self) -> List[str]:
+        """Discard sessions whose inactivity timeout has passed; return their ids"""
+        return self._registry.sweep()
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of store occupancy"""
+        with self._lock:
+            return {
+                "sessions_in_memory": len(self._entries),
+                "sessions_tracked": len(self._registry),
+                "bytes_in_memory": self._bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+            }
+
+    def _on_expired(self, session_id: str) -> None:
+        """Registry cleanup hook: release the expired session's history and spill file"""
+        if self._registry.is_live(session_id):
+            return  # touched again between expiry and this hook
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.pins > 0:
+                return  # mid-turn: checkin() reschedules its expiry
+            self._drop(session_id)
+
+    def _drop(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        self._spill_path(session_id).unlink(missing_ok=True)
+
+    def _account(self, entry: _Entry) -> None:
+        """Update entry size from the backend's footprint, else from new messages (caller holds the lock)"""
+        length = entry.app.history_length()
+        footprint = entry.app.memory_bytes()
+        if footprint is not None:
+            self._bytes += footprint - entry.size
+            entry.size = footprint
+            entry.length = length
+            return
+        if length < entry.length:
+            # History was reset or trimmed: recount what is left
+            self._bytes -= entry.size
+            entry.size = 0
+            entry.length = 0
+        if length > entry.length:
+            added = sum(
+                MESSAGE_OVERHEAD_BYTES + sys.getsizeof(m.content)
+                for m in entry.app.recent_history(length - entry.length)
+            )
+            entry.size += added
+            self._bytes += added
+        entry.length = length
+
+    def _evict_over_budget(self, keep: str) -> None:
+        """Spill least-recently-active unpinned sessions until under budget (caller holds the lock)"""
+        while self._bytes > self.memory_budget_bytes:
+            victim = next(
+                (sid for sid, entry in self._entries.items() if sid != keep and entry.pins == 0),
+                None,
+            )
+            if victim is None:
+                return
+            self._spill(victim)
+
+    def _spill(self, session_id: str) -> None:
+        """Write session to disk and release it from memory (caller holds the lock)"""
+        entry = self._entries.pop(session_id)
+        self._bytes -= entry.size
+        last_activity = entry.app.get_last_activity()
+        payload = msgpack.packb(
+            [
+                _SPILL_FORMAT_VERSION,
+                last_activity.timestamp() if last_activity else None,
+                encode_messages(list(entry.app.iter_history())),
+            ],
+            use_bin_type=True,
+        )
+        path = self._spill_path(session_id)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, path)
+        logger.info(f"SessionStore spilled session ({entry.length} messages, {entry.size} bytes)")
+
+    def _rehydrate(self, app: AppService, path: Path) -> None:
+        """Restore a spilled session into app and remove its file (caller holds the lock)"""
+        try:
+            version, last_activity, history = msgpack.unpackb(path.read_bytes(), raw=False)
+            if version != _SPILL_FORMAT_VERSION:
+                raise ValidationError(message=f"Unsupported session spill version {version}")
+            app.restore(
+                decode_messages(history),
+                datetime.fromtimestamp(last_activity) if last_activity is not None else None,
+            )
+        except (ValidationError, ValueError, TypeError, msgpack.UnpackException) as e:
+            logger.warning(f"Discarding unreadable session spill {path.name}: {e}")
+        finally:
+            path.unlink(missing_ok=True)
+
+    def _purge_stale_spills(self) -> None:
+        """Remove spill files left by a previous process that are past the timeout"""
+        cutoff = time.time() - self.session_timeout.total_seconds()
+        for path in self.spill_dir.glob(f"*{_SPILL_SUFFIX}"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                else:
+                    remaining = path.stat().st_mtime - cutoff
+                    self._registry.schedule(path.stem, remaining)
+            except OSError:
+                continue
+
+    def _spill_path(self, session_id: str) -> Path:
+        return self.spill_dir / f"{session_id}{_SPILL_SUFFIX}"
+
+    @staticmethod
+    def _check_id(session_id: str) -> None:
+        if not is_valid_session_id(session_id):
+            raise ValidationError(message="Invalid session id")
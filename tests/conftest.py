@@ -5,12 +5,20 @@ Pytest fixtures for LearnPath chatbot tests
 
 Key features:
 - mock_genai_model: patch Gemini SDK for GeminiClient tests
+- fresh_retry_budget (autouse): every test starts with a full process-wide retry budget
 - sample_* fixtures: ChatMessage, UserProfile, Resource, Milestone, Roadmap (minimal/full)
 """
 import pytest
 from unittest.mock import MagicMock, patch
 
 from domain import ChatMessage, UserProfile, Roadmap, Milestone, Resource
+from utils import retry_budget
+
+@pytest.fixture(autouse=True)
+def fresh_retry_budget():
+    """Refill the shared retry budget so retries spent by one test never starve another"""
+    retry_budget.reset()
+    yield
 
 @pytest.fixture
 def mock_genai_model():
@@ -0,0 +1,106 @@
+"""
+test_answer_cache.py
+
+Unit tests for AnswerCache and its use in ChatService.stream_response
+
+Key features:
+- Near-duplicate hits, distinct questions miss, TTL and LRU cap
+- chunk_answer replays the exact text
+- ChatService: first-turn cache hit skips the LLM, follow-up turns and failures are not cached
+"""
+from unittest.mock import MagicMock
+
+from domain import ChatMessage
+from services import AnswerCache, ChatService
+from services.answer_cache import chunk_answer
+from services.chat_service import StreamError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestAnswerCache:
+    """Tests for AnswerCache"""
+
+    def test_near_duplicate_questions_hit(self):
+        cache = AnswerCache()
+        cache.store("Python là gì?", "Python là một ngôn ngữ lập trình.")
+
+        assert cache.lookup("python là gì vậy") == "Python là một ngôn ngữ lập trình."
+        assert cache.lookup("  PYTHON LÀ GÌ ạ ") is not None
+        assert cache.lookup("Java là gì?") is None
+        assert cache.hits == 2 and cache.misses == 1
+
+    def test_ttl_expires_entries(self):
+        clock = FakeClock()
+        cache = AnswerCache(ttl=60, clock=clock)
+        cache.store("Git là gì?", "Hệ quản lý phiên bản")
+
+        clock.now = 61
+
+        assert cache.lookup("Git là gì?") is None
+        assert len(cache) == 0
+
+    def test_lru_cap(self):
+        cache = AnswerCache(max_entries=2)
+        cache.store("SQL là gì", "a")
+        cache.store("Docker là gì", "b")
+        cache.lookup("SQL là gì")
+        cache.store("Linux là gì", "c")
+
+        assert cache.lookup("Docker là gì") is None
+        assert cache.lookup("SQL là gì") == "a"
+
+    def test_chunk_answer_round_trip(self):
+        answer = "Python là ngôn ngữ lập trình bậc cao.\nDễ học, cú pháp rõ ràng và có cộng đồng lớn."
+
+        chunks = chunk_answer(answer, size=16)
+
+        assert "".join(chunks) == answer
+        assert len(chunks) > 1
+
+class TestChatServiceAnswerCache:
+    """Tests for ChatService with an AnswerCache"""
+
+    def _service(self, cache):
+        llm = MagicMock()
+        llm.stream_chat.side_effect = lambda history, new_message, cancel=None: iter(["Python là ", "ngôn ngữ lập trình."])
+        return ChatService(llm_client=llm, answer_cache=cache), llm
+
+    def test_first_turn_answer_is_cached_and_replayed(self):
+        cache = AnswerCache()
+        service, llm = self._service(cache)
+        first = [ChatMessage(role="user", content="Python là gì?")]
+
+        streamed = "".join(service.stream_response("Python là gì?", first))
+        replayed = "".join(service.stream_response("python là gì vậy", [ChatMessage(role="user", content="python là gì vậy")]))
+
+        assert streamed == replayed == "Python là ngôn ngữ lập trình."
+        assert llm.stream_chat.call_count == 1
+
+    def test_follow_up_turns_bypass_cache(self):
+        cache = AnswerCache()
+        cache.store("Python là gì?", "cached")
+        service, llm = self._service(cache)
+        history = [
+            ChatMessage(role="user", content="Tôi học Java"),
+            ChatMessage(role="assistant", content="Tốt"),
+            ChatMessage(role="user", content="Python là gì?"),
+        ]
+
+        assert "".join(service.stream_response("Python là gì?", history)) == "Python là ngôn ngữ lập trình."
+        assert llm.stream_chat.call_count == 1
+
+    def test_failed_stream_is_not_cached(self):
+        cache = AnswerCache()
+        llm = MagicMock()
+        llm.stream_chat.side_effect = lambda history, new_message, cancel=None: iter([])
+        service = ChatService(llm_client=llm, answer_cache=cache)
+
+        items = list(service.stream_response("Rust là gì?", [ChatMessage(role="user", content="Rust là gì?")]))
+
+        assert isinstance(items[-1], StreamError)
+        assert len(cache) == 0
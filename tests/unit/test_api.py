@@ -0,0 +1,337 @@
+"""
+test_api.py
+
+Unit tests for the headless ASGI API (ChatApi) and SSE encoding
+
+Key features:
+- POST /chat streams status/text/done frames and records the turn in the session
+- Session cookie is minted once and reused; X-Session-Id header is honoured
+- Error responses use LearnPathException.to_dict (400, 404, 409, 413), also when checkout fails
+- Client disconnect stops the stream and closes the upstream generator
+- WebSocket /ws multiplexes chat and roadmap streams; cancel closes the LLM stream
+- submit_roadmap op: roadmap_queued with the job id, progress heartbeats, then the roadmap
+"""
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import orjson
+
+from api import ChatApi, SESSION_COOKIE, encode_event
+from domain import TextChunk
+from memory import ChatMemory
+from services import (
+    AppService,
+    ChatService,
+    RoadmapJobQueue,
+    RoadmapJobStore,
+    SessionManager,
+    SessionRegistry,
+    SessionStore,
+)
+from utils import ValidationError
+
+def _build_store(tmp_path, stream_response=None, llm=None, roadmap_jobs=None) -> SessionStore:
+    def factory() -> AppService:
+        if llm is not None:
+            chat_service = ChatService(llm_client=llm)
+        else:
+            chat_service = MagicMock()
+            chat_service.stream_response.side_effect = stream_response
+        return AppService(
+            chat_service=chat_service,
+            session_manager=SessionManager(timeout_minutes=30),
+            messages=MagicMock(get=lambda key, **kw: str(key)),
+            memory=ChatMemory(),
+            chat_context_messages=10,
+            roadmap_jobs=roadmap_jobs,
+            job_poll_interval=0.01,
+        )
+    return SessionStore(factory, tmp_path, registry=SessionRegistry(timedelta(minutes=30)))
+
+def _answer(user_input, history, cancel=None):
+    yield "Xin "
+    yield "chào"
+
+async def _request(app, method, path, body=b"", headers=(), on_send=None):
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+    disconnected = asyncio.Event()
+    sent = []
+
+    async def receive():
+        if pending:
+            return pending.pop(0)
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if on_send is not None:
+            on_send(message, disconnected)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers)}
+    await app(scope, receive, send)
+    return sent
+
+def _call(app, *args, **kwargs):
+    return asyncio.run(_request(app, *args, **kwargs))
+
+def _status(sent):
+    return sent[0]["status"]
+
+def _headers(sent):
+    return dict(sent[0]["headers"])
+
+def _body(sent):
+    return b"".join(m.get("body", b"") for m in sent[1:])
+
+def _chat_body(text):
+    return orjson.dumps({"message": text})
+
+class TestChatApi:
+    """Tests for ChatApi routes"""
+
+    def test_chat_streams_events_and_records_turn(self, tmp_path):
+        store = _build_store(tmp_path, _answer)
+        api = ChatApi(store)
+
+        sent = _call(api, "POST", "/chat", _chat_body("xin chào"))
+
+        assert _status(sent) == 200
+        assert _headers(sent)[b"content-type"].startswith(b"text/event-stream")
+        body = _body(sent).decode()
+        assert body.startswith("event: status\n")
+        assert 'event: text\ndata: {"text":"Xin "}\n\n' in body
+        assert body.endswith("event: done\ndata: {}\n\n")
+        session_id = _headers(sent)[b"set-cookie"].decode().split(";")[0].split("=")[1]
+        assert store.get(session_id).history_length() == 2
+
+    def test_cookie_and_header_reuse_session(self, tmp_path):
+        store = _build_store(tmp_path, _answer)
+        api = ChatApi(store)
+
+        first = _call(api, "POST", "/chat", _chat_body("a"))
+        cookie = _headers(first)[b"set-cookie"].split(b";")[0]
+        second = _call(api, "POST", "/chat", _chat_body("b"), headers=[(b"cookie", cookie)])
+        third = _call(api, "POST", "/chat", _chat_body("c"), headers=[(b"x-session-id", b"abc")])
+
+        assert b"set-cookie" not in _headers(second)
+        assert b"set-cookie" not in _headers(third)
+        session_id = cookie.decode().split("=")[1]
+        assert store.get(session_id).history_length() == 4
+        assert store.get("abc").history_length() == 2
+
+    def test_error_responses(self, tmp_path):
+        api = ChatApi(_build_store(tmp_path, _answer), max_body_bytes=64)
+
+        bad = _call(api, "POST", "/chat", b"not json")
+        large = _call(api, "POST", "/chat", _chat_body("x" * 100))
+        missing = _call(api, "GET", "/nope")
+
+        assert _status(bad) == 400
+        assert orjson.loads(_body(bad))["error"]["code"] == "VALIDATION_ERROR"
+        assert _status(large) == 413
+        assert _status(missing) == 404
+
+    def test_busy_session_is_rejected(self, tmp_path):
+        api = ChatApi(_build_store(tmp_path, _answer))
+        api._busy.add("abc")
+
+        sent = _call(api, "POST", "/chat", _chat_body("a"), headers=[(b"x-session-id", b"abc")])
+
+        assert _status(sent) == 409
+        assert orjson.loads(_body(sent))["error"]["code"] == "SESSION_BUSY"
+
+    def test_checkout_error_is_sent_as_json(self, tmp_path):
+        store = _build_store(tmp_path, _answer)
+        store.checkout = MagicMock(side_effect=ValidationError(message="bad session"))
+        store.checkin = MagicMock()
+        api = ChatApi(store)
+
+        sent = _call(api, "POST", "/chat", _chat_body("a"), headers=[(b"x-session-id", b"abc")])
+
+        assert _status(sent) == 400
+        assert orjson.loads(_body(sent))["error"]["code"] == "VALIDATION_ERROR"
+        store.checkin.assert_not_called()
+        assert "abc" not in api._busy
+
+    def test_disconnect_closes_upstream_stream(self, tmp_path):
+        closed = threading.Event()
+
+        def endless(user_input, history, cancel=None):
+            try:
+                while True:
+                    yield "x"
+            finally:
+                closed.set()
+
+        api = ChatApi(_build_store(tmp_path, endless))
+
+        def disconnect_on_text(message, disconnected):
+            if message.get("body", b"").startswith(b"event: text"):
+                disconnected.set()
+
+        sent = _call(api, "POST", "/chat", _chat_body("a"), on_send=disconnect_on_text)
+
+        assert closed.is_set()
+        assert not _body(sent).endswith(b"event: done\ndata: {}\n\n")
+
+    def test_metrics_endpoint_renders_registry(self, tmp_path):
+        api = ChatApi(_build_store(tmp_path, _answer))
+
+        sent = _call(api, "GET", "/metrics")
+
+        assert _status(sent) == 200
+        assert b"# TYPE llm_streams_cancelled_total counter" in _body(sent)
+
+    def test_reset_discards_session(self, tmp_path):
+        store = _build_store(tmp_path, _answer)
+        api = ChatApi(store)
+        headers = [(b"cookie", f"{SESSION_COOKIE}=abc".encode())]
+        _call(api, "POST", "/chat", _chat_body("a"), headers=headers)
+
+        sent = _call(api, "POST", "/session/reset", headers=headers)
+
+        assert _status(sent) == 200
+        assert store.get("abc").history_length() == 0
+
+class _Socket:
+    """Client side of an in-process WebSocket connection to ChatApi"""
+
+    def __init__(self, api, headers=()):
+        self.inbound = asyncio.Queue()
+        self.frames = []
+        self.accepted = None
+        self._api = api
+        self._headers = list(headers)
+        self._task = None
+
+    async def __aenter__(self):
+        async def receive():
+            return await self.inbound.get()
+
+        async def send(message):
+            if message["type"] == "websocket.accept":
+                self.accepted = message
+            elif message["type"] == "websocket.send":
+                self.frames.append(orjson.loads(message["text"]))
+
+        scope = {"type": "websocket", "path": "/ws", "headers": self._headers}
+        await self.inbound.put({"type": "websocket.connect"})
+        self._task = asyncio.create_task(self._api(scope, receive, send))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.inbound.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self._task, timeout=5)
+
+    async def op(self, **payload):
+        await self.inbound.put({"type": "websocket.receive", "text": orjson.dumps(payload).decode()})
+
+    async def until(self, predicate, timeout=5.0):
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not predicate(self.frames):
+            assert asyncio.get_running_loop().time() < deadline, self.frames
+            await asyncio.sleep(0.01)
+
+    def events(self, stream_id):
+        return [f["event"] for f in self.frames if f["id"] == stream_id]
+
+class TestChatSocket:
+    """Tests for the multiplexed WebSocket endpoint"""
+
+    def test_multiplexes_chat_and_roadmap_streams(self, tmp_path):
+        api = ChatApi(_build_store(tmp_path, _answer))
+
+        async def scenario():
+            async with _Socket(api, headers=[(b"x-session-id", b"abc")]) as ws:
+                await ws.op(op="chat", id="c1", message="xin chào")
+                await ws.op(op="roadmap", id="r1", job_id="job-1")
+                await ws.until(lambda frames: {"c1", "r1"} <= {f["id"] for f in frames if f["event"] == "done"})
+                return ws
+
+        ws = asyncio.run(scenario())
+
+        assert ws.events("c1") == ["status", "text", "text", "done"]
+        assert ws.events("r1") == ["error", "done"]
+        assert [f["data"]["text"] for f in ws.frames if f["event"] == "text"] == ["Xin ", "chào"]
+
+    def test_submit_roadmap_streams_job_to_result(self, tmp_path, sample_user_profile, sample_roadmap):
+        service = MagicMock()
+        service.generate_roadmap.side_effect = lambda *a, **kw: time.sleep(0.05) or sample_roadmap
+        jobs = RoadmapJobQueue(service, RoadmapJobStore(":memory:"), max_workers=1)
+        api = ChatApi(_build_store(tmp_path, _answer, roadmap_jobs=jobs))
+
+        async def scenario():
+            async with _Socket(api) as ws:
+                profile = sample_user_profile.model_dump(mode="json")
+                await ws.op(op="submit_roadmap", id="r1", profile=profile, duration_week=4)
+                await ws.until(lambda frames: "done" in ws.events("r1"))
+                return ws
+
+        ws = asyncio.run(scenario())
+        jobs.shutdown()
+
+        events = ws.events("r1")
+        assert events[0] == "roadmap_queued"
+        assert "status" in events
+        assert events[-2:] == ["roadmap_ready", "done"]
+        job_id = ws.frames[0]["data"]["job_id"]
+        assert jobs.get_job(job_id).roadmap.topic == sample_roadmap.topic
+        ready = next(f for f in ws.frames if f["event"] == "roadmap_ready")
+        assert ready["data"]["roadmap"]["topic"] == sample_roadmap.topic
+        assert service.generate_roadmap.call_args.args[0] == sample_user_profile
+
+    def test_cancel_closes_llm_stream(self, tmp_path):
+        closed = threading.Event()
+
+        def endless(history, new_message, cancel=None):
+            try:
+                while True:
+                    time.sleep(0.001)
+                    yield "x"
+            finally:
+                closed.set()
+
+        llm = MagicMock()
+        llm.stream_chat.side_effect = endless
+        api = ChatApi(_build_store(tmp_path, llm=llm))
+
+        async def scenario():
+            async with _Socket(api) as ws:
+                await ws.op(op="chat", id="c1", message="a")
+                await ws.until(lambda frames: any(f["event"] == "text" for f in frames))
+                await ws.op(op="cancel", id="c1")
+                await ws.until(lambda frames: frames[-1]["event"] == "cancelled")
+                await asyncio.get_running_loop().run_in_executor(None, closed.wait, 5)
+                await ws.op(op="chat", id="c2", message="b")
+                await ws.until(lambda frames: any(f["id"] == "c2" and f["event"] == "text" for f in frames))
+                return ws
+
+        ws = asyncio.run(scenario())
+
+        assert closed.is_set()
+        assert "done" not in ws.events("c1")
+
+    def test_rejects_invalid_ops(self, tmp_path):
+        api = ChatApi(_build_store(tmp_path, _answer), max_streams=1)
+
+        async def scenario():
+            async with _Socket(api) as ws:
+                await ws.op(op="cancel", id="missing")
+                await ws.op(op="dance", id="x")
+                await ws.op(op="submit_roadmap", id="y", profile={"goal": "Rust"})
+                await ws.op(op="submit_roadmap", id="z", profile={}, duration_week=0)
+                await ws.until(lambda frames: len(frames) == 4)
+                return ws
+
+        ws = asyncio.run(scenario())
+
+        assert [f["event"] for f in ws.frames] == ["rejected"] * 4
+        assert ws.frames[0]["data"]["error"]["code"] == "VALIDATION_ERROR"
+        assert ws.accepted["headers"][0][0] == b"set-cookie"
+
+def test_encode_event_is_one_sse_frame():
+    assert encode_event(TextChunk("chào")) == 'event: text\ndata: {"text":"chào"}\n\n'.encode()
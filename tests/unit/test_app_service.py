@@ -0,0 +1,55 @@
+"""
+test_app_service.py
+
+Unit tests for AppService chat context
+
+Key features:
+- Chat context: recent window, plus retrieved turns with IndexedChatHistory
+"""
+from unittest.mock import MagicMock
+
+from domain import ChatMessage
+from memory import ChatMemory, IndexedChatHistory
+from services import AppService, SessionManager
+
+def _build_app(memory=None, **kwargs) -> AppService:
+    kwargs.setdefault("chat_context_messages", 10)
+    return AppService(
+        chat_service=MagicMock(),
+        session_manager=SessionManager(timeout_minutes=30),
+        messages=MagicMock(),
+        memory=memory if memory is not None else ChatMemory(),
+        **kwargs,
+    )
+
+def _turn(app: AppService, i: int) -> None:
+    app._memory.add_message(ChatMessage(role="user", content=f"q{i}"))
+    app._memory.add_message(ChatMessage(role="assistant", content=f"a{i}"))
+
+class TestChatContext:
+    """Tests for the context passed to ChatService"""
+
+    def test_retrieves_relevant_turns_when_enabled(self):
+        app = _build_app(IndexedChatHistory(ChatMemory()), chat_context_messages=2, relevant_turns=1)
+        app._memory.add_message(ChatMessage(role="user", content="Tôi muốn học Kotlin"))
+        app._memory.add_message(ChatMessage(role="assistant", content="Kotlin chạy trên JVM"))
+        for i in range(3):
+            _turn(app, i)
+
+        context = app._get_context("Kotlin")
+
+        assert [m.content for m in context] == ["Tôi muốn học Kotlin", "Kotlin chạy trên JVM", "q2", "a2"]
+
+    def test_indexed_memory_without_relevant_turns_uses_recent_window(self):
+        app = _build_app(IndexedChatHistory(ChatMemory()), chat_context_messages=2)
+        app._memory.add_message(ChatMessage(role="user", content="Tôi muốn học Kotlin"))
+        _turn(app, 0)
+
+        assert [m.content for m in app._get_context("Kotlin")] == ["q0", "a0"]
+
+    def test_plain_memory_uses_recent_window(self):
+        app = _build_app()
+        for i in range(10):
+            _turn(app, i)
+
+        assert len(app._get_context("q1")) == 10
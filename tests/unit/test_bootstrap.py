@@ -0,0 +1,50 @@
+"""
+test_bootstrap.py
+
+Unit tests for the composition root shared by app.py and the API
+
+Key features:
+- build_components: one breaker-guarded client, hedged chat client when enabled, roadmap jobs
+- Sessions share the components and get a thread-safe indexed history
+- build_session_store: the store's factory builds sessions on the shared components
+"""
+from ai import GuardedLLMClient, HedgedLLMClient
+from config import settings
+from memory import ConcurrentChatMemory, IndexedChatHistory
+from services import build_components, build_session_store
+
+def _config(tmp_path, **overrides):
+    values = {
+        "ROADMAP_JOB_DB_PATH": str(tmp_path / "jobs.db"),
+        "SESSION_SPILL_DIR": str(tmp_path / "sessions"),
+    }
+    values.update(overrides)
+    return settings.model_copy(update=values)
+
+class TestBootstrap:
+    """Tests for build_components / build_session_store"""
+
+    def test_sessions_share_components(self, tmp_path):
+        components = build_components(_config(tmp_path, CHAT_HEDGE_ENABLED=False))
+        try:
+            first, second = components.build_application(), components.build_application()
+
+            assert isinstance(components.chat_client, GuardedLLMClient)
+            assert first._chat is not second._chat
+            assert first._chat.llm is second._chat.llm is components.chat_client
+            assert isinstance(first._memory, IndexedChatHistory)
+            assert isinstance(first._memory.inner, ConcurrentChatMemory)
+        finally:
+            components.roadmap_jobs.shutdown(wait=True)
+
+    def test_hedging_and_session_store(self, tmp_path):
+        components = build_components(_config(tmp_path, CHAT_HEDGE_ENABLED=True))
+        try:
+            store = build_session_store(components)
+
+            assert isinstance(components.chat_client, HedgedLLMClient)
+            assert store.get("abc").history_length() == 0
+            assert (tmp_path / "sessions").is_dir()
+            store._registry.stop()
+        finally:
+            components.roadmap_jobs.shutdown(wait=True)
@@ -0,0 +1,156 @@
+"""
+test_cancellation.py
+
+Unit tests for cooperative cancellation and the metrics registry
+
+Key features:
+- CancellationToken: one-shot cancel, callbacks, unregister
+- ChatService stops the LLM stream on cancel, counts it and never caches the partial answer
+- AppService records the partial answer once, and not at all after a reset
+- MetricsRegistry counters/gauges and Prometheus rendering
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from domain import ChatMessage, TextChunk
+from memory import ChatMemory
+from services import AnswerCache, AppService, ChatService, SessionManager
+from services.chat_service import STREAMS_CANCELLED
+from utils import CancellationToken, MetricsRegistry
+
+def _llm(chunks):
+    llm = MagicMock()
+
+    def stream_chat(history, new_message, cancel=None):
+        for chunk in chunks:
+            if cancel is not None and cancel.cancelled:
+                return
+            yield chunk
+
+    llm.stream_chat.side_effect = stream_chat
+    return llm
+
+def _build_app(llm) -> AppService:
+    return AppService(
+        chat_service=ChatService(llm_client=llm),
+        session_manager=SessionManager(timeout_minutes=30),
+        messages=MagicMock(get=lambda key, **kw: str(key)),
+        memory=ChatMemory(),
+        chat_context_messages=10,
+    )
+
+class TestCancellationToken:
+    """Tests for CancellationToken"""
+
+    def test_cancel_runs_callbacks_once(self):
+        token = CancellationToken()
+        calls = []
+        token.on_cancel(lambda: calls.append("a"))
+        unregister = token.on_cancel(lambda: calls.append("b"))
+        unregister()
+
+        assert token.cancel("client") is True
+        assert token.cancel() is False
+        assert calls == ["a"]
+        assert token.cancelled and token.reason == "client"
+
+    def test_callback_after_cancel_runs_immediately(self):
+        token = CancellationToken()
+        token.cancel()
+        calls = []
+
+        token.on_cancel(lambda: calls.append(1))
+
+        assert calls == [1]
+
+class TestChatServiceCancellation:
+    """Tests for cancelling ChatService.stream_response"""
+
+    def test_cancel_stops_stream_without_error_or_cache(self):
+        cache = AnswerCache()
+        service = ChatService(llm_client=_llm(["a", "b", "c"]), answer_cache=cache)
+        token = CancellationToken()
+        before = STREAMS_CANCELLED.value(stage="mid_stream")
+
+        items = []
+        for item in service.stream_response("Python là gì?", [ChatMessage(role="user", content="Python là gì?")], cancel=token):
+            items.append(item)
+            token.cancel()
+
+        assert items == ["a"]
+        assert len(cache) == 0
+        assert STREAMS_CANCELLED.value(stage="mid_stream") == before + 1
+
+    def test_close_counts_cancellation(self):
+        service = ChatService(llm_client=_llm(["a", "b"]))
+        before = STREAMS_CANCELLED.value(stage="mid_stream")
+
+        stream = service.stream_response("hi", [])
+        next(stream)
+        stream.close()
+
+        assert STREAMS_CANCELLED.value(stage="mid_stream") == before + 1
+
+class TestAppServiceCancellation:
+    """Tests for partial answers when AppService.handle_message is cancelled"""
+
+    def test_partial_answer_is_recorded(self):
+        app = _build_app(_llm(["Xin ", "chào", "!"]))
+        token = CancellationToken()
+
+        for event in app.handle_message("hello", cancel=token):
+            if isinstance(event, TextChunk):
+                token.cancel()
+
+        assert [m.content for m in app.iter_history()] == ["hello", "Xin "]
+
+    def test_closed_stream_records_partial_answer(self):
+        app = _build_app(_llm(["Xin ", "chào"]))
+        events = app.handle_message("hello")
+        while not isinstance(next(events), TextChunk):
+            pass
+        events.close()
+
+        assert [m.content for m in app.iter_history()] == ["hello", "Xin "]
+
+    def test_reset_cancels_and_discards_partial_answer(self):
+        app = _build_app(_llm(["Xin ", "chào"]))
+        events = app.handle_message("hello")
+        while not isinstance(next(events), TextChunk):
+            pass
+
+        app.reset_session()
+        remaining = list(events)
+
+        assert remaining == []
+        assert app.history_length() == 0
+
+class TestMetricsRegistry:
+    """Tests for MetricsRegistry"""
+
+    def test_counters_gauges_and_rendering(self):
+        registry = MetricsRegistry()
+        hits = registry.counter("hits_total", "Hits", ("kind",))
+        state = registry.gauge("state", "State")
+        hits.inc(kind="a")
+        hits.inc(2, kind="a")
+        state.set(3)
+        state.dec()
+
+        assert registry.counter("hits_total", "Hits", ("kind",)) is hits
+        assert registry.snapshot() == {"hits_total": {"kind=a": 3.0}, "state": {"": 2.0}}
+        text = registry.render_prometheus()
+        assert '# TYPE hits_total counter\nhits_total{kind="a"} 3\n' in text
+        assert "state 2\n" in text
+
+    def test_rejects_bad_usage(self):
+        registry = MetricsRegistry()
+        hits = registry.counter("hits_total", "Hits", ("kind",))
+
+        with pytest.raises(ValueError):
+            hits.inc()
+        with pytest.raises(ValueError):
+            hits.inc(-1, kind="a")
+        with pytest.raises(ValueError):
+            registry.gauge("hits_total", "Hits", ("kind",))
@@ -5,7 +5,12 @@ Unit tests for ChatMemory (in-memory history storage)
 
 Key features:
 - Initial empty history, add_message, clean_history
+- Windowed reads: load_recent, load_page, iter_reverse, max_messages cap
+- Columnar storage round trip and ring-buffer compaction
+- memory_bytes counts content strings and releases them on compaction
 """
+from datetime import datetime, timedelta, timezone
+
 from domain import ChatMessage
 from memory import ChatMemory
 
@@ -41,4 +46,101 @@ class TestChatMemory:
 
         memory.clean_history()
         history = memory.load_history()
-        assert len(history) == 0
\ No newline at end of file
+        assert len(history) == 0
+
+
+def _filled(n, **kwargs):
+    memory = ChatMemory(**kwargs)
+    for i in range(n):
+        memory.add_message(ChatMessage(role="user", content=f"msg{i}"))
+    return memory
+
+def _contents(messages):
+    return [m.content for m in messages]
+
+class TestChatMemoryWindows:
+    """Tests for windowed reads on ChatMemory"""
+
+    def test_load_recent_returns_tail_in_order(self):
+        memory = _filled(10)
+
+        assert _contents(memory.load_recent(3)) == ["msg7", "msg8", "msg9"]
+        assert len(memory.load_recent(50)) == 10
+        assert memory.load_recent(0) == []
+
+    def test_load_page_walks_backwards(self):
+        memory = _filled(10)
+
+        newest = memory.load_page(None, 4)
+        older = memory.load_page(6, 4)
+        oldest = memory.load_page(2, 4)
+
+        assert _contents(newest) == ["msg6", "msg7", "msg8", "msg9"]
+        assert _contents(older) == ["msg2", "msg3", "msg4", "msg5"]
+        assert _contents(oldest) == ["msg0", "msg1"]
+        assert memory.load_page(0, 4) == []
+
+    def test_iteration_and_len(self):
+        memory = _filled(5)
+
+        assert len(memory) == 5
+        assert _contents(memory) == ["msg0", "msg1", "msg2", "msg3", "msg4"]
+        assert _contents(memory.iter_reverse()) == ["msg4", "msg3", "msg2", "msg1", "msg0"]
+
+    def test_max_messages_keeps_seq_numbering(self):
+        """Trimmed messages leave a seq gap; load_page still addresses by seq"""
+        memory = _filled(10, max_messages=4)
+
+        assert _contents(memory.load_history()) == ["msg6", "msg7", "msg8", "msg9"]
+        assert _contents(memory.load_page(8, 10)) == ["msg6", "msg7"]
+
+    def test_clean_history_restarts_seq(self):
+        memory = _filled(5)
+        memory.clean_history()
+        memory.add_message(ChatMessage(role="user", content="fresh"))
+
+        assert _contents(memory.load_page(1, 5)) == ["fresh"]
+
+class TestChatMemoryColumnar:
+    """Tests for the columnar storage details of ChatMemory"""
+
+    def test_round_trip_preserves_fields(self):
+        """Role, content and naive/aware timestamps come back unchanged"""
+        aware = datetime(2024, 5, 1, 9, 30, tzinfo=timezone(timedelta(hours=7)))
+        messages = [
+            ChatMessage(role="system", content="sys"),
+            ChatMessage(role="user", content="Xin chào", timestamp=aware),
+            ChatMessage(role="assistant", content="Chào bạn", timestamp=datetime(2024, 5, 1, 9, 31, 0, 123456)),
+        ]
+        memory = ChatMemory()
+        for m in messages:
+            memory.add_message(m)
+
+        assert memory.load_history() == messages
+        assert memory.load_history()[1].timestamp.utcoffset() == timedelta(hours=7)
+
+    def test_add_fast_path(self):
+        memory = ChatMemory()
+        memory.add("user", "hi")
+
+        [message] = memory.load_history()
+        assert message.role == "user"
+        assert message.content == "hi"
+
+    def test_ring_buffer_compaction_keeps_window_and_seq(self):
+        """Long capped histories compact the trimmed prefix without losing seq addressing"""
+        memory = _filled(1000, max_messages=10)
+
+        assert len(memory) == 10
+        assert _contents(memory) == [f"msg{i}" for i in range(990, 1000)]
+        assert _contents(memory.load_page(995, 3)) == ["msg992", "msg993", "msg994"]
+        assert _contents(memory.iter_reverse())[:2] == ["msg999", "msg998"]
+
+    def test_memory_bytes_follows_compaction(self):
+        """Trimmed contents are charged until compacted, then released"""
+        capped = _filled(1000, max_messages=10)
+        full = _filled(1000)
+
+        assert capped.memory_bytes() < full.memory_bytes() // 10
+        capped.clean_history()
+        assert capped.memory_bytes() < ChatMemory().memory_bytes() + 100
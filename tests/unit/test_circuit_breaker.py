@@ -0,0 +1,226 @@
+"""
+test_circuit_breaker.py
+
+Unit tests for the LLM circuit breaker and degraded-mode serving
+
+Key features:
+- CircuitBreaker: opens on error rate and slow calls, rejects while open, half-open probe
+  closes or reopens it, state metric
+- GuardedLLMClient: cancellations and invalid input never count as failures
+- ChatService/AppService: an open circuit serves a cached answer or LLM_UNAVAILABLE at once
+- RoadmapJobQueue: an open circuit serves a stored roadmap for the same profile or fails with CIRCUIT_OPEN
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai import GuardedLLMClient
+from config import MessageKey, default_messages
+from domain import ErrorOccurred, TextChunk
+from memory import ChatMemory
+from services import AnswerCache, AppService, ChatService, RoadmapJobQueue, RoadmapJobStore, SessionManager
+from services.chat_service import StreamError
+from services.roadmap_jobs import JobStatus
+from utils import CancellationToken, CircuitBreaker, CircuitOpenError, LLMServiceError, ValidationError
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, STATE
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def _breaker(name: str, clock: FakeClock = None, **kwargs) -> CircuitBreaker:
+    options = {"failure_rate": 0.5, "min_calls": 4, "window": 4, "open_seconds": 10.0}
+    options.update(kwargs)
+    return CircuitBreaker(name, clock=clock or FakeClock(), **options)
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.acquire()
+        breaker.on_failure()
+    assert breaker.state == OPEN
+
+def _app(chat_service: ChatService, roadmap_jobs=None) -> AppService:
+    return AppService(
+        chat_service=chat_service,
+        session_manager=SessionManager(timeout_minutes=30),
+        messages=default_messages,
+        memory=ChatMemory(),
+        chat_context_messages=10,
+        roadmap_jobs=roadmap_jobs,
+        job_poll_interval=0,
+    )
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker state transitions"""
+
+    def test_opens_on_failure_rate(self):
+        breaker = _breaker("t_rate")
+        for ok in (True, False, True):
+            breaker.acquire()
+            breaker.on_success() if ok else breaker.on_failure()
+        assert breaker.state == CLOSED  # below min_calls
+
+        breaker.acquire()
+        breaker.on_failure()
+
+        assert breaker.state == OPEN
+        assert STATE.value(name="t_rate") == 2
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = _breaker("t_slow", slow_call_seconds=1.0)
+        for _ in range(4):
+            breaker.acquire()
+            breaker.on_success(latency=5.0)
+        assert breaker.state == OPEN
+
+    def test_rejects_immediately_while_open(self):
+        breaker = _breaker("t_reject")
+        _open(breaker)
+
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.acquire()
+        assert exc_info.value.status_code == 503
+
+    def test_half_open_probe_success_closes(self):
+        clock = FakeClock()
+        breaker = _breaker("t_probe_ok", clock)
+        _open(breaker)
+
+        clock.now = 10.0
+        assert breaker.state == HALF_OPEN
+        breaker.acquire()
+        with pytest.raises(CircuitOpenError):
+            breaker.acquire()  # only one probe at a time
+        breaker.on_success(latency=0.1)
+
+        assert breaker.state == CLOSED
+        assert STATE.value(name="t_probe_ok") == 0
+
+    def test_half_open_probe_failure_reopens(self):
+        clock = FakeClock()
+        breaker = _breaker("t_probe_fail", clock)
+        _open(breaker)
+
+        clock.now = 10.0
+        breaker.acquire()
+        breaker.on_failure()
+
+        assert breaker.state == OPEN
+        clock.now = 15.0
+        assert breaker.state == OPEN  # open period restarted at the failed probe
+
+    def test_invalid_configuration(self):
+        with pytest.raises(ValueError):
+            CircuitBreaker("t_invalid", min_calls=5, window=4)
+        with pytest.raises(ValueError):
+            CircuitBreaker("t_invalid", failure_rate=0)
+
+class TestGuardedLLMClient:
+    """GuardedLLMClient feeds outcomes to the breaker"""
+
+    def test_upstream_errors_open_circuit(self):
+        breaker = _breaker("t_guard_errors")
+        inner = MagicMock()
+        inner.generate_text.side_effect = LLMServiceError(code="EMPTY_RESPONSE")
+        client = GuardedLLMClient(inner, breaker)
+
+        for _ in range(4):
+            with pytest.raises(LLMServiceError):
+                client.generate_text("p")
+        with pytest.raises(CircuitOpenError):
+            client.generate_text("p")
+
+        assert inner.generate_text.call_count == 4
+        assert not client.available
+
+    def test_cancel_and_invalid_input_are_ignored(self):
+        breaker = _breaker("t_guard_ignored", min_calls=1, window=1)
+        cancel = CancellationToken()
+        cancel.cancel()
+        inner = MagicMock()
+        inner.generate_text.side_effect = ValidationError(code="EMPTY_PROMPT")
+        inner.stream_chat.side_effect = lambda *a, **kw: iter([])
+        client = GuardedLLMClient(inner, breaker)
+
+        with pytest.raises(ValidationError):
+            client.generate_text("")
+        assert list(client.stream_chat([], "hi", cancel=cancel)) == []
+
+        assert breaker.state == CLOSED
+
+    def test_stream_success_reported_on_first_chunk(self):
+        breaker = _breaker("t_guard_stream", min_calls=1, window=1)
+        inner = MagicMock()
+        inner.stream_chat.return_value = iter(["a", "b"])
+
+        assert list(GuardedLLMClient(inner, breaker).stream_chat([], "hi")) == ["a", "b"]
+        assert breaker.state == CLOSED
+
+class TestDegradedChat:
+    """ChatService while the circuit is open"""
+
+    def test_serves_cached_answer_on_any_turn(self):
+        breaker = _breaker("t_chat_cached")
+        _open(breaker)
+        cache = AnswerCache()
+        cache.store("How do I learn Python quickly?", "Practice every day.")
+        inner = MagicMock()
+        service = ChatService(GuardedLLMClient(inner, breaker), answer_cache=cache)
+        history = [MagicMock(), MagicMock()]  # not a first turn
+
+        answer = "".join(service.stream_response("How do I learn Python quickly?", history))
+
+        assert answer == "Practice every day."
+        inner.stream_chat.assert_not_called()
+
+    def test_unavailable_error_without_retry(self):
+        breaker = _breaker("t_chat_unavailable")
+        _open(breaker)
+        inner = MagicMock()
+        app = _app(ChatService(GuardedLLMClient(inner, breaker)))
+
+        events = list(app.handle_message("hello"))
+
+        assert events[-1] == ErrorOccurred("llm", default_messages.get(MessageKey.LLM_UNAVAILABLE))
+        assert not any(isinstance(e, TextChunk) for e in events)
+        inner.stream_chat.assert_not_called()
+
+    def test_stream_error_key(self):
+        llm = MagicMock()
+        llm.stream_chat.side_effect = CircuitOpenError()
+
+        assert list(ChatService(llm).stream_response("hi", [])) == [StreamError(MessageKey.LLM_UNAVAILABLE)]
+        assert llm.stream_chat.call_count == 1
+
+class TestDegradedRoadmap:
+    """Roadmap jobs while the circuit is open"""
+
+    def test_serves_stored_roadmap_for_same_profile(self, sample_user_profile, sample_roadmap):
+        service = MagicMock()
+        service.generate_roadmap.side_effect = [sample_roadmap, CircuitOpenError()]
+        jobs = RoadmapJobQueue(service, RoadmapJobStore(":memory:"), max_workers=1)
+
+        first = jobs.submit_roadmap(sample_user_profile, duration_week=4)
+        second = jobs.submit_roadmap(sample_user_profile, duration_week=4)
+        jobs.shutdown(wait=True)
+
+        assert jobs.get_job(first).status == JobStatus.DONE
+        job = jobs.get_job(second)
+        assert job.status == JobStatus.DONE
+        assert job.roadmap == sample_roadmap
+
+    def test_fails_fast_without_stored_roadmap(self, sample_user_profile):
+        service = MagicMock()
+        service.generate_roadmap.side_effect = CircuitOpenError()
+        jobs = RoadmapJobQueue(service, RoadmapJobStore(":memory:"), max_workers=1)
+
+        job_id = jobs.submit_roadmap(sample_user_profile)
+        jobs.shutdown(wait=True)
+
+        job = jobs.get_job(job_id)
+        assert (job.status, job.error_code) == (JobStatus.FAILED, "CIRCUIT_OPEN")
+        events = list(_app(ChatService(MagicMock()), roadmap_jobs=jobs).poll_roadmap_job(job_id))
+        assert events == [ErrorOccurred("llm", default_messages.get(MessageKey.LLM_UNAVAILABLE))]
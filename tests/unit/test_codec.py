@@ -0,0 +1,93 @@
+"""
+test_codec.py
+
+Unit tests for memory.codec (compact binary roadmaps and histories)
+
+Key features:
+- Round-trip equality for roadmaps (minimal/full) and histories (naive/aware timestamps)
+- Encoded size below JSON; corrupted, foreign or wrongly shaped data rejected with ValidationError
+"""
+from datetime import datetime, timedelta, timezone
+
+import msgpack
+import pytest
+
+from domain import ChatMessage
+from memory import decode_messages, decode_roadmap, encode_messages, encode_roadmap
+from memory.codec import FORMAT_VERSION, unpack_messages
+from utils import ValidationError
+
+class TestRoadmapCodec:
+    """Tests for encode_roadmap / decode_roadmap"""
+
+    @pytest.mark.parametrize("fixture", ["sample_roadmap", "sample_roadmap_minimal"])
+    def test_round_trip(self, request, fixture):
+        """Decoded roadmap equals the original, including URLs and created_at"""
+        roadmap = request.getfixturevalue(fixture)
+
+        decoded = decode_roadmap(encode_roadmap(roadmap))
+
+        assert decoded == roadmap
+        assert decoded.model_dump_json() == roadmap.model_dump_json()
+
+    def test_smaller_than_json(self, sample_roadmap):
+        """Binary encoding is smaller than model_dump_json"""
+        assert len(encode_roadmap(sample_roadmap)) < len(sample_roadmap.model_dump_json())
+
+    def test_rejects_history_payload(self):
+        """Decoding a history snapshot as roadmap raises ValidationError"""
+        with pytest.raises(ValidationError):
+            decode_roadmap(encode_messages([]))
+
+class TestMessagesCodec:
+    """Tests for encode_messages / decode_messages"""
+
+    def test_round_trip_naive_timestamps(self):
+        """Roles, contents and microsecond timestamps survive round trip"""
+        start = datetime(2026, 3, 1, 9, 30, 15, 123456)
+        history = [
+            ChatMessage(role=role, content=f"tin nhắn {i}", timestamp=start + timedelta(seconds=i))
+            for i, role in enumerate(["system", "user", "assistant", "user"])
+        ]
+
+        assert decode_messages(encode_messages(history)) == history
+
+    def test_round_trip_aware_timestamps(self):
+        """Timezone-aware timestamps keep their offset"""
+        tz = timezone(timedelta(hours=7))
+        history = [
+            ChatMessage(role="user", content="xin chào", timestamp=datetime(2026, 1, 1, 8, tzinfo=tz)),
+            ChatMessage(role="assistant", content="chào bạn", timestamp=datetime(2026, 1, 1, 8, 1)),
+        ]
+
+        decoded = decode_messages(encode_messages(history))
+
+        assert decoded == history
+        assert decoded[0].timestamp.utcoffset() == timedelta(hours=7)
+        assert decoded[1].timestamp.tzinfo is None
+
+    def test_empty_history(self):
+        """Empty history round-trips to empty list"""
+        assert decode_messages(encode_messages([])) == []
+
+    def test_corrupted_data_raises(self):
+        """Garbage bytes raise ValidationError"""
+        with pytest.raises(ValidationError):
+            decode_messages(b"\xc1garbage")
+
+    @pytest.mark.parametrize("body", [
+        [b"\x01", ["hi"]],                          # wrong arity
+        [b"\x01\x02", ["hi"], [0], None],           # columns of different length
+        [b"\x09", ["hi"], [0], None],               # unknown role code
+        [b"\x01", ["hi"], ["not-an-int"], None],    # non-int timestamp delta
+    ])
+    def test_wrong_shape_raises_validation_error(self, body):
+        """Valid msgpack with the wrong shape raises ValidationError, not IndexError/TypeError"""
+        with pytest.raises(ValidationError):
+            decode_messages(msgpack.packb([FORMAT_VERSION, 2, *body], use_bin_type=True))
+
+    @pytest.mark.parametrize("record", [[1, "hi"], [-1, "hi", 0, None], ["user", "hi", 0, None]])
+    def test_unpack_messages_wrong_shape_raises_validation_error(self, record):
+        """Malformed per-message records raise ValidationError"""
+        with pytest.raises(ValidationError):
+            unpack_messages([msgpack.packb(record, use_bin_type=True)])
@@ -0,0 +1,91 @@
+"""
+test_concurrent_memory.py
+
+Unit and stress tests for ConcurrentChatMemory (copy-on-write history)
+
+Key features:
+- ChatHistory contract: order, windows across chunk boundaries, clean_history
+- Snapshot isolation: a held snapshot never changes
+- Concurrent writers and readers: no lost appends, per-writer order, consistent snapshots
+"""
+import threading
+
+from domain import ChatMessage
+from memory import ConcurrentChatMemory
+from memory.concurrent_memory import CHUNK_SIZE
+
+def _msg(content: str) -> ChatMessage:
+    return ChatMessage(role="user", content=content)
+
+def _filled(n: int) -> ConcurrentChatMemory:
+    memory = ConcurrentChatMemory()
+    for i in range(n):
+        memory.add_message(_msg(f"msg{i}"))
+    return memory
+
+def _contents(messages):
+    return [m.content for m in messages]
+
+class TestConcurrentChatMemory:
+    """Tests for ConcurrentChatMemory"""
+
+    def test_order_and_windows_across_chunks(self):
+        n = CHUNK_SIZE * 3 + 5
+        memory = _filled(n)
+        expected = [f"msg{i}" for i in range(n)]
+
+        assert len(memory) == n
+        assert _contents(memory) == expected
+        assert _contents(memory.iter_reverse()) == expected[::-1]
+        assert _contents(memory.load_recent(CHUNK_SIZE + 10)) == expected[-(CHUNK_SIZE + 10):]
+        assert _contents(memory.load_page(CHUNK_SIZE + 3, 10)) == expected[CHUNK_SIZE - 7: CHUNK_SIZE + 3]
+        assert memory.load_page(0, 10) == []
+
+    def test_snapshot_is_isolated_from_later_writes(self):
+        memory = _filled(10)
+        snapshot = memory.snapshot()
+
+        memory.add_message(_msg("late"))
+        memory.clean_history()
+
+        assert len(snapshot) == 10
+        assert _contents(snapshot)[-1] == "msg9"
+        assert len(memory) == 0
+
+    def test_concurrent_writers_and_readers(self):
+        """Stress: every append lands once, per-writer order holds, readers see consistent snapshots"""
+        memory = ConcurrentChatMemory()
+        writers, per_writer = 8, 500
+        errors = []
+        done = threading.Event()
+
+        def write(w: int) -> None:
+            for i in range(per_writer):
+                memory.add_message(_msg(f"{w}:{i}"))
+
+        def read() -> None:
+            last = 0
+            while not done.is_set():
+                snap = memory.snapshot()
+                items = list(snap)
+                if len(items) != len(snap) or len(snap) < last:
+                    errors.append((len(items), len(snap), last))
+                last = len(snap)
+                memory.load_recent(20)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+        for t in readers + threads:
+            t.start()
+        for t in threads:
+            t.join()
+        done.set()
+        for t in readers:
+            t.join()
+
+        assert errors == []
+        contents = _contents(memory)
+        assert len(contents) == writers * per_writer
+        for w in range(writers):
+            mine = [int(c.split(":")[1]) for c in contents if c.startswith(f"{w}:")]
+            assert mine == list(range(per_writer))
@@ -5,10 +5,11 @@ Unit tests for GeminiClient (config validation, generate_text, stream_chat, _to_
 """
 import pytest
 from unittest.mock import MagicMock
+from google.api_core import exceptions as google_exceptions
 
 from ai.gemini_client import GeminiClient, _SAFETY_SETTINGS
 from domain import ChatMessage
-from utils import LLMServiceError, ValidationError
+from utils import CancellationToken, LLMServiceError, ValidationError
 
 def test_validate_config_rejects_empty_api_key():
     """Constructor raises ValidationError when api_key is empty or whitespace"""
@@ -135,6 +136,24 @@ def test_generate_text_blocked_by_safety_raises_error(mock_genai_model):
     with pytest.raises(LLMServiceError):
         client.generate_text("dummy-prompt")
 
+def test_generate_text_resource_exhausted_raises_rate_limited(mock_genai_model):
+    """generate_text maps an upstream 429 to LLMServiceError code RATE_LIMITED"""
+    _, model_instance, _ = mock_genai_model
+    model_instance.generate_content.side_effect = google_exceptions.ResourceExhausted("quota")
+
+    client = GeminiClient(
+        api_key="dummy-key",
+        model_name="dummy-model",
+        request_timeout=30,
+        stream_timeout=30,
+        system_prompt="dummy-prompt"
+    )
+
+    with pytest.raises(LLMServiceError) as exc_info:
+        client.generate_text("prompt")
+    assert exc_info.value.code == "RATE_LIMITED"
+    assert exc_info.value.status_code == 429
+
 def test_to_gemini_history_map_roles_correctly():
     """_to_gemini_history maps ChatMessage roles to Gemini format with parts from content"""
     history = [
@@ -186,6 +205,59 @@ def test_stream_chat_happy_path(mock_genai_model):
     assert call_kwargs["request_options"]["timeout"] == 30
     assert call_kwargs["stream"] is True
 
+def test_stream_chat_close_cancels_upstream_call(mock_genai_model):
+    """Closing stream_chat mid-stream cancels the transport call behind the SDK response"""
+    _, model_instance, _ = mock_genai_model
+
+    stream = MagicMock()
+    stream.__iter__.return_value = iter([MagicMock(text="Chunk1"), MagicMock(text="Chunk2")])
+    fake_chat = MagicMock()
+    fake_chat.send_message.return_value = stream
+    model_instance.start_chat.return_value = fake_chat
+
+    client = GeminiClient(
+        api_key="dummy-key",
+        model_name="dummy-model",
+        request_timeout=30,
+        stream_timeout=30,
+        system_prompt="dummy-prompt"
+    )
+
+    chunks = client.stream_chat(history=[], new_message="new_msg")
+    assert next(chunks) == "Chunk1"
+    chunks.close()
+
+    stream._iterator.cancel.assert_called_once()
+
+def test_stream_chat_cancel_token_stops_upstream_quietly(mock_genai_model):
+    """Cancelling the token cancels the transport call; the resulting error is swallowed"""
+    _, model_instance, _ = mock_genai_model
+    token = CancellationToken()
+
+    def fake_stream():
+        yield MagicMock(text="Chunk1")
+        token.cancel()
+        raise google_exceptions.Cancelled("cancelled")
+
+    stream = MagicMock()
+    stream.__iter__.side_effect = fake_stream
+    fake_chat = MagicMock()
+    fake_chat.send_message.return_value = stream
+    model_instance.start_chat.return_value = fake_chat
+
+    client = GeminiClient(
+        api_key="dummy-key",
+        model_name="dummy-model",
+        request_timeout=30,
+        stream_timeout=30,
+        system_prompt="dummy-prompt"
+    )
+
+    chunks = list(client.stream_chat(history=[], new_message="new_msg", cancel=token))
+
+    assert chunks == ["Chunk1"]
+    stream._iterator.cancel.assert_called_once()
+
 def test_stream_chat_empty_new_message_raises_validation_error(mock_genai_model):
     """stream_chat raises ValidationError when new_message is empty or whitespace"""
     client = GeminiClient(
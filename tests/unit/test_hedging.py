@@ -0,0 +1,195 @@
+"""
+test_hedging.py
+
+Unit tests for hedged chat streams
+
+Key features:
+- HedgePolicy: no threshold until warmed up, quantile with a floor, capped hedge rate
+- HedgedLLMClient: a stalled primary is hedged, the first stream to produce a chunk wins and
+  the loser is cancelled; errors are not hedged; caller cancellation reaches every stream
+- Per-stream accounting in llm_hedge_streams_total
+- With a scheduler, a hedge needs a free chat-lane slot and gives it back when its stream ends
+"""
+import threading
+from typing import List, Optional
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai import LANE_CHAT, HedgedLLMClient, HedgePolicy, LLMScheduler
+from ai.hedging import HEDGE_STREAMS, HEDGES_DENIED
+from services import ChatService
+from utils import CancellationToken, LLMServiceError
+
+def _warm_policy(ttft: float = 0.01, **kwargs) -> HedgePolicy:
+    options = {"min_samples": 5, "window": 10, "min_delay": 0.0}
+    options.update(kwargs)
+    policy = HedgePolicy(**options)
+    for _ in range(options["window"]):
+        policy.observe(ttft)
+    return policy
+
+class FakeUpstream:
+    """stream_chat whose n-th call stalls until cancelled, or streams its chunks"""
+    def __init__(self, *behaviours):
+        self.behaviours = list(behaviours)
+        self.tokens: List[CancellationToken] = []
+        self.lock = threading.Lock()
+
+    def stream_chat(self, history, new_message, cancel: Optional[CancellationToken] = None):
+        with self.lock:
+            self.tokens.append(cancel)
+            behaviour = self.behaviours.pop(0)
+        if behaviour == "stall":
+            cancel.wait(5.0)
+            return
+        if isinstance(behaviour, Exception):
+            raise behaviour
+        yield from behaviour
+
+class TestHedgePolicy:
+    """Tests for HedgePolicy"""
+
+    def test_no_threshold_until_warmed_up(self):
+        policy = HedgePolicy(min_samples=3, window=10, min_delay=0.0)
+        policy.observe(1.0)
+        policy.observe(1.0)
+        assert policy.threshold is None
+        policy.observe(1.0)
+        assert policy.threshold == 1.0
+
+    def test_threshold_is_quantile_with_floor(self):
+        policy = HedgePolicy(quantile=0.9, min_samples=10, window=10, min_delay=0.0)
+        for ttft in range(1, 11):
+            policy.observe(float(ttft))
+        assert policy.threshold == 10.0
+        floored = _warm_policy(ttft=0.1, min_delay=2.0)
+        assert floored.threshold == 2.0
+
+    def test_hedge_rate_is_capped(self):
+        policy = HedgePolicy(max_rate=0.1, burst=1.0)
+        denied = HEDGES_DENIED.value(reason="budget")
+
+        assert policy.try_hedge()
+        assert not policy.try_hedge()
+        assert HEDGES_DENIED.value(reason="budget") == denied + 1
+        for _ in range(10):
+            policy.record_call()
+        assert policy.try_hedge()
+
+    def test_zero_rate_never_hedges(self):
+        assert not HedgePolicy(max_rate=0).try_hedge()
+
+class TestHedgedLLMClient:
+    """Tests for HedgedLLMClient.stream_chat"""
+
+    def test_stalled_primary_is_hedged_and_cancelled(self):
+        upstream = FakeUpstream("stall", ["a", "b"])
+        won = HEDGE_STREAMS.value(stream="hedge", outcome="won")
+        lost = HEDGE_STREAMS.value(stream="primary", outcome="lost")
+
+        chunks = list(HedgedLLMClient(upstream, _warm_policy()).stream_chat([], "hi"))
+
+        assert chunks == ["a", "b"]
+        assert len(upstream.tokens) == 2
+        assert upstream.tokens[0].cancelled
+        assert HEDGE_STREAMS.value(stream="hedge", outcome="won") == won + 1
+        assert HEDGE_STREAMS.value(stream="primary", outcome="lost") == lost + 1
+
+    def test_fast_primary_is_not_hedged(self):
+        upstream = FakeUpstream(["a"])
+        client = HedgedLLMClient(upstream, _warm_policy(min_delay=5.0))
+
+        assert list(client.stream_chat([], "hi")) == ["a"]
+        assert len(upstream.tokens) == 1
+
+    def test_no_hedge_without_budget(self):
+        upstream = FakeUpstream(["late"])
+        policy = _warm_policy(max_rate=0)
+
+        assert list(HedgedLLMClient(upstream, policy).stream_chat([], "hi")) == ["late"]
+        assert len(upstream.tokens) == 1
+
+    def test_primary_error_is_raised_not_hedged(self):
+        upstream = FakeUpstream(LLMServiceError(code="STREAM_FAILED"))
+        client = HedgedLLMClient(upstream, _warm_policy(min_delay=5.0))
+
+        with pytest.raises(LLMServiceError):
+            list(client.stream_chat([], "hi"))
+        assert len(upstream.tokens) == 1
+
+    def test_warm_up_observes_without_hedging(self):
+        policy = HedgePolicy(min_samples=1, window=1)
+        upstream = FakeUpstream(["a"])
+
+        assert list(HedgedLLMClient(upstream, policy).stream_chat([], "hi")) == ["a"]
+        assert policy.threshold is not None
+
+    def test_caller_cancel_reaches_every_stream(self):
+        upstream = FakeUpstream("stall", "stall")
+        cancel = CancellationToken()
+        client = HedgedLLMClient(upstream, _warm_policy())
+        threading.Timer(0.1, cancel.cancel).start()
+
+        assert list(client.stream_chat([], "hi", cancel=cancel)) == []
+        assert len(upstream.tokens) == 2
+        assert all(token.cancelled for token in upstream.tokens)
+
+    def test_close_cancels_winner(self):
+        upstream = FakeUpstream(["a", "b", "c"])
+        stream = HedgedLLMClient(upstream, _warm_policy(min_delay=5.0)).stream_chat([], "hi")
+
+        assert next(stream) == "a"
+        stream.close()
+        assert upstream.tokens[0].cancelled
+
+    def test_generate_text_passes_through(self):
+        inner = MagicMock()
+        inner.generate_text.return_value = "roadmap"
+
+        assert HedgedLLMClient(inner, _warm_policy()).generate_text("p") == "roadmap"
+
+    def test_chat_service_streams_hedge_winner(self):
+        upstream = FakeUpstream("stall", ["hello"])
+        service = ChatService(HedgedLLMClient(upstream, _warm_policy()))
+
+        assert list(service.stream_response("hi", [])) == ["hello"]
+
+    def test_no_hedge_when_lane_is_full(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1})
+        primary_slot = scheduler.submit(LANE_CHAT, "session")
+        late = threading.Event()
+
+        def slow():
+            late.wait(0.1)
+            yield "late"
+
+        upstream = FakeUpstream(slow())
+        denied = HEDGES_DENIED.value(reason="lane_full")
+
+        client = HedgedLLMClient(upstream, _warm_policy(), scheduler)
+
+        assert list(client.stream_chat([], "hi")) == ["late"]
+        assert len(upstream.tokens) == 1
+        assert HEDGES_DENIED.value(reason="lane_full") == denied + 1
+        primary_slot.release()
+
+    def test_hedge_holds_lane_slot_until_its_stream_ends(self):
+        scheduler = LLMScheduler({LANE_CHAT: 2})
+        primary_slot = scheduler.submit(LANE_CHAT, "session")
+        more = threading.Event()
+
+        def hedge():
+            yield "a"
+            more.wait(5.0)
+            yield "b"
+
+        upstream = FakeUpstream("stall", hedge())
+        stream = HedgedLLMClient(upstream, _warm_policy(), scheduler).stream_chat([], "hi")
+
+        assert next(stream) == "a"
+        assert scheduler.stats()[LANE_CHAT]["in_flight"] == 2
+        more.set()
+        assert list(stream) == ["b"]
+        primary_slot.release()
+        assert scheduler.stats()[LANE_CHAT]["in_flight"] == 0
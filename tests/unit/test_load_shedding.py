@@ -0,0 +1,182 @@
+"""
+test_load_shedding.py
+
+Unit tests for adaptive LLM concurrency and load shedding
+
+Key features:
+- AIMDLimit: additive increase, multiplicative decrease with cooldown, bounds
+- LLMScheduler: adaptive lanes resize from release feedback; full queues shed with OverloadedError
+- ChatService/AppService: shed or rate-limited chats end with ErrorOccurred("overloaded")
+- RoadmapService does not retry a shed call; roadmap jobs report it as overloaded
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai import AIMDLimit, LANE_CHAT, LANE_ROADMAP, LLMScheduler, ScheduledLLMClient, is_rate_limited
+from config import MessageKey, default_messages
+from domain import ErrorOccurred
+from memory import ChatMemory
+from services import AppService, ChatService, RoadmapService, SessionManager
+from services.chat_service import StreamError
+from services.roadmap_jobs import JobStatus
+from utils import LLMServiceError, OverloadedError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def _rate_limited() -> LLMServiceError:
+    return LLMServiceError(code="RATE_LIMITED", status_code=429)
+
+def _app(chat_service: ChatService, roadmap_jobs=None) -> AppService:
+    return AppService(
+        chat_service=chat_service,
+        session_manager=SessionManager(timeout_minutes=30),
+        messages=default_messages,
+        memory=ChatMemory(),
+        chat_context_messages=10,
+        roadmap_jobs=roadmap_jobs,
+        job_poll_interval=0,
+    )
+
+class TestAIMDLimit:
+    """Tests for AIMDLimit"""
+
+    def test_additive_increase_up_to_max(self):
+        limit = AIMDLimit(4, latency_target=1.0, initial=2)
+        for _ in range(3):  # 2 -> 2.5 -> 2.9 -> 3.24
+            limit.on_sample(0.1)
+        assert limit.limit == 3
+        for _ in range(20):
+            limit.on_sample(0.1)
+        assert limit.limit == 4
+
+    def test_multiplicative_decrease_once_per_cooldown(self):
+        clock = FakeClock()
+        limit = AIMDLimit(16, latency_target=1.0, backoff=0.5, cooldown=1.0, clock=clock)
+
+        limit.on_sample(None, overloaded=True)
+        limit.on_sample(None, overloaded=True)
+        assert limit.limit == 8
+
+        clock.now = 1.5
+        limit.on_sample(5.0)  # slower than target counts as congestion
+        assert limit.limit == 4
+
+    def test_never_below_min(self):
+        clock = FakeClock()
+        limit = AIMDLimit(4, latency_target=1.0, min_limit=2, backoff=0.5, cooldown=0, clock=clock)
+        for _ in range(5):
+            limit.on_sample(None, overloaded=True)
+        assert limit.limit == 2
+
+    def test_no_signal_keeps_limit(self):
+        limit = AIMDLimit(4, latency_target=1.0, initial=2)
+        assert limit.on_sample(None) == 2
+
+    def test_invalid_bounds(self):
+        with pytest.raises(ValueError):
+            AIMDLimit(2, latency_target=1.0, min_limit=3)
+        with pytest.raises(ValueError):
+            AIMDLimit(2, latency_target=1.0, backoff=1.5)
+
+    def test_is_rate_limited(self):
+        assert is_rate_limited(_rate_limited())
+        assert is_rate_limited(RuntimeError("429 Too Many Requests"))
+        assert not is_rate_limited(LLMServiceError(code="STREAM_FAILED"))
+
+class TestSchedulerAdaptiveLanes:
+    """LLMScheduler with AIMDLimit lanes and a bounded queue"""
+
+    def test_overload_feedback_shrinks_lane(self):
+        limiter = AIMDLimit(4, latency_target=1.0, backoff=0.5)
+        scheduler = LLMScheduler({LANE_CHAT: 4}, limiters={LANE_CHAT: limiter})
+        tickets = [scheduler.submit(LANE_CHAT, f"s{i}") for i in range(5)]
+        assert [t.granted for t in tickets] == [True] * 4 + [False]
+
+        tickets[0].release(overloaded=True)
+
+        assert scheduler.stats()[LANE_CHAT]["limit"] == 2
+        assert not tickets[4].granted  # 3 still in flight, over the new limit
+
+    def test_fast_calls_grow_lane(self):
+        limiter = AIMDLimit(3, latency_target=1.0, initial=1)
+        scheduler = LLMScheduler({LANE_CHAT: 3}, limiters={LANE_CHAT: limiter})
+        first = scheduler.submit(LANE_CHAT, "a")
+        waiting = [scheduler.submit(LANE_CHAT, f"s{i}") for i in range(3)]
+
+        first.release(latency=0.1)
+
+        assert scheduler.stats()[LANE_CHAT]["limit"] == 2
+        assert [t.granted for t in waiting] == [True, True, False]
+
+    def test_full_queue_sheds(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1}, max_queue=1)
+        scheduler.submit(LANE_CHAT, "a")
+        scheduler.submit(LANE_CHAT, "b")
+
+        with pytest.raises(OverloadedError) as exc_info:
+            scheduler.submit(LANE_CHAT, "c")
+        assert exc_info.value.status_code == 503
+        assert scheduler.stats()[LANE_CHAT]["waiting"] == 1
+
+    def test_scheduled_client_reports_rate_limit(self):
+        limiter = AIMDLimit(4, latency_target=10.0, backoff=0.5)
+        scheduler = LLMScheduler({LANE_ROADMAP: 4}, limiters={LANE_ROADMAP: limiter})
+        inner = MagicMock()
+        inner.generate_text.side_effect = _rate_limited()
+
+        with pytest.raises(LLMServiceError):
+            ScheduledLLMClient(inner, scheduler, LANE_ROADMAP).generate_text("p")
+
+        assert scheduler.stats()[LANE_ROADMAP] == {"limit": 2, "in_flight": 0, "waiting": 0}
+
+class TestOverloadedChat:
+    """Shed and rate-limited chats surface as ErrorOccurred("overloaded")"""
+
+    def test_shed_chat_fails_fast(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1}, max_queue=0)
+        scheduler.submit(LANE_CHAT, "other")
+        llm = MagicMock()
+        app = _app(ChatService(llm, scheduler=scheduler))
+
+        events = list(app.handle_message("hello"))
+
+        assert events[-1] == ErrorOccurred("overloaded", default_messages.get(MessageKey.OVERLOADED))
+        llm.stream_chat.assert_not_called()
+
+    def test_rate_limited_stream_shrinks_chat_lane(self):
+        limiter = AIMDLimit(4, latency_target=10.0, backoff=0.5)
+        scheduler = LLMScheduler({LANE_CHAT: 4}, limiters={LANE_CHAT: limiter})
+        llm = MagicMock()
+        llm.stream_chat.side_effect = _rate_limited()
+
+        items = list(ChatService(llm, scheduler=scheduler).stream_response("hi", []))
+
+        assert items == [StreamError(MessageKey.OVERLOADED)]
+        assert llm.stream_chat.call_count == 1  # a 429 is not retried
+        assert scheduler.stats()[LANE_CHAT]["limit"] == 2
+
+class TestOverloadedRoadmap:
+    """Roadmap generation under shedding"""
+
+    def test_roadmap_service_does_not_retry_shed_call(self, sample_user_profile):
+        llm = MagicMock()
+        llm.generate_text.side_effect = OverloadedError()
+
+        with pytest.raises(OverloadedError):
+            RoadmapService(llm, max_retries=3).generate_roadmap(sample_user_profile)
+        assert llm.generate_text.call_count == 1
+
+    def test_poll_reports_overloaded_job(self):
+        jobs = MagicMock()
+        jobs.get_job.return_value = MagicMock(status=JobStatus.FAILED, roadmap=None, error_code="OVERLOADED")
+        app = _app(ChatService(MagicMock()), roadmap_jobs=jobs)
+
+        events = list(app.poll_roadmap_job("job-1"))
+
+        assert events == [ErrorOccurred("overloaded", default_messages.get(MessageKey.OVERLOADED))]
@@ -17,6 +17,7 @@ class TestMessageKey:
     EXPECTED_MESSAGE_KEYS = {
         "LLM_ERROR": "llm_error",
         "LLM_STREAM_INTERRUPTED": "llm_stream_interrupted",
+        "LLM_UNAVAILABLE": "llm_unavailable",
         "UNEXPECTED_ERROR": "unexpected_error",
 
         "EMPTY_INPUT": "empty_input",
@@ -25,6 +26,8 @@ class TestMessageKey:
         "FILL_PROFILE": "fill_profile",
 
         "THINKING": "thinking",
+        "QUEUED": "queued",
+        "OVERLOADED": "overloaded",
 
         "PROFILE_ANALYZING": "profile_analyzing",
         "PROFILE_EXTRACTED": "profile_extracted",
@@ -0,0 +1,108 @@
+"""
+test_redis_history.py
+
+Unit tests for RedisChatHistory against an in-process fakeredis server
+
+Key features:
+- Append/load order, tail reads, cap trimming, TTL, clean_history
+- Batches are written in one MULTI/EXEC transaction
+"""
+from datetime import timedelta
+
+import pytest
+
+from domain import ChatMessage
+from memory import RedisChatHistory
+
+fakeredis = pytest.importorskip("fakeredis")
+
+@pytest.fixture
+def redis_client():
+    """Fresh in-process Redis stand-in"""
+    return fakeredis.FakeRedis()
+
+def _messages(n: int):
+    return [
+        ChatMessage(role="user" if i % 2 == 0 else "assistant", content=f"msg{i}")
+        for i in range(n)
+    ]
+
+class TestRedisChatHistory:
+    """Tests for RedisChatHistory"""
+
+    def test_add_and_load_in_order(self, redis_client):
+        """Messages load oldest-first with content and timestamp intact"""
+        history = RedisChatHistory(redis_client, "s1")
+        messages = _messages(5)
+        for m in messages:
+            history.add_message(m)
+
+        assert history.load_history() == messages
+        assert len(history) == 5
+
+    def test_load_recent_returns_tail(self, redis_client):
+        """load_recent(n) returns only the last n messages"""
+        history = RedisChatHistory(redis_client, "s1")
+        messages = _messages(30)
+        history.add_messages(messages)
+
+        assert history.load_recent(3) == messages[-3:]
+        assert history.load_recent(0) == []
+
+    def test_batch_is_one_transaction(self, redis_client):
+        """add_messages runs as MULTI/EXEC so a failed batch leaves nothing behind to duplicate"""
+        history = RedisChatHistory(redis_client, "s1")
+        pipeline = redis_client.pipeline
+        calls = []
+
+        def spy(*args, **kwargs):
+            calls.append(kwargs.get("transaction", args[0] if args else True))
+            return pipeline(*args, **kwargs)
+
+        redis_client.pipeline = spy
+        history.add_messages(_messages(3))
+
+        assert calls == [True]
+        assert len(history) == 3
+
+    def test_list_is_capped(self, redis_client):
+        """Oldest messages beyond max_messages are trimmed"""
+        history = RedisChatHistory(redis_client, "s1", max_messages=4)
+        history.add_messages(_messages(10))
+
+        assert [m.content for m in history.load_history()] == ["msg6", "msg7", "msg8", "msg9"]
+
+    def test_ttl_matches_session_timeout(self, redis_client):
+        """Appends set the key TTL to the configured session timeout"""
+        history = RedisChatHistory(redis_client, "s1", ttl=timedelta(minutes=30))
+        history.add_message(ChatMessage(role="user", content="hi"))
+
+        assert 0 < redis_client.ttl(history.key) <= 1800
+
+    def test_sessions_are_isolated_and_cleanable(self, redis_client):
+        """clean_history only deletes its own session"""
+        a = RedisChatHistory(redis_client, "a")
+        b = RedisChatHistory(redis_client, "b")
+        a.add_messages(_messages(2))
+        b.add_messages(_messages(3))
+
+        a.clean_history()
+
+        assert a.load_history() == []
+        assert len(b) == 3
+
+    def test_load_page_after_trimming(self, redis_client):
+        """seq stays stable when the list is trimmed; pages stop at the oldest kept message"""
+        history = RedisChatHistory(redis_client, "s1", max_messages=6)
+        messages = _messages(10)
+        history.add_messages(messages)
+
+        assert history.load_page(None, 3) == messages[-3:]
+        assert history.load_page(7, 3) == messages[4:7]
+        assert history.load_page(5, 3) == messages[4:5]
+        assert list(history) == messages[4:]
+        assert list(history.iter_reverse()) == messages[4:][::-1]
+
+        history.clean_history()
+        history.add_message(messages[0])
+        assert history.load_page(1, 5) == messages[:1]
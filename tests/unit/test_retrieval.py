@@ -0,0 +1,136 @@
+"""
+test_retrieval.py
+
+Unit tests for Vietnamese tokenization, BM25Index and IndexedChatHistory
+
+Key features:
+- Diacritic folding, stopwords and syllable bigrams
+- BM25 ranking, `before` bound, incremental adds, removal and clear
+- Postings of messages trimmed by a capped backend are evicted
+- memory_bytes counts postings plus the wrapped backend and shrinks with them
+- relevant_context: retrieved whole turns + recent window, seq kept across clean_history
+"""
+from domain import ChatMessage
+from memory import BM25Index, ChatMemory, IndexedChatHistory
+from utils import fold_diacritics, normalize_vi, tokenize_vi
+
+class TestVietnameseText:
+    """Tests for utils.text"""
+
+    def test_normalize_and_fold(self):
+        assert normalize_vi("  Lập trình, PYTHON!! ") == "lập trình python"
+        assert fold_diacritics("Đường đi học máy") == "Duong di hoc may"
+
+    def test_tokenize_matches_with_and_without_accents(self):
+        assert tokenize_vi("Học máy là gì?") == tokenize_vi("hoc may la gi")
+
+    def test_tokenize_drops_stopwords_keeps_bigrams(self):
+        tokens = tokenize_vi("Python là gì")
+
+        assert "python" in tokens
+        assert "la" not in tokens
+        assert "python_la" in tokens
+
+class TestBM25Index:
+    """Tests for BM25Index"""
+
+    def test_ranks_relevant_documents_first(self):
+        index = BM25Index()
+        index.add(0, "Tôi muốn học Python để làm data science")
+        index.add(1, "Hôm nay trời đẹp quá")
+        index.add(2, "Pandas là thư viện Python cho data")
+
+        results = index.search("python data", k=2)
+
+        assert {doc for doc, _ in results} == {0, 2}
+        assert all(score > 0 for _, score in results)
+
+    def test_before_bound_and_clear(self):
+        index = BM25Index()
+        index.add(0, "python")
+        index.add(1, "python python")
+
+        assert [doc for doc, _ in index.search("python", before=1)] == [0]
+        index.clear()
+        assert index.search("python") == []
+        assert len(index) == 0
+
+    def test_remove_and_discard_before(self):
+        index = BM25Index()
+        for doc_id, text in enumerate(["python", "rust", "python go", "go"]):
+            index.add(doc_id, text)
+
+        index.remove(2)
+        assert [doc for doc, _ in index.search("python")] == [0]
+        assert index.discard_before(2) == 2
+        assert [doc for doc, _ in index.search("python go rust")] == [3]
+        assert len(index) == 1
+
+class TestIndexedChatHistory:
+    """Tests for IndexedChatHistory"""
+
+    def _conversation(self) -> IndexedChatHistory:
+        history = IndexedChatHistory(ChatMemory())
+        turns = [
+            ("Mục tiêu của tôi là học SQL cho phân tích dữ liệu", "Bắt đầu với SELECT và JOIN"),
+            ("Giới thiệu về Docker", "Docker đóng gói ứng dụng"),
+            ("Thời tiết thế nào", "Tôi chỉ hỗ trợ học tập"),
+            ("Giải thích vòng lặp for", "Vòng lặp for lặp qua dãy"),
+            ("Cảm ơn", "Không có gì"),
+        ]
+        for question, answer in turns:
+            history.add_message(ChatMessage(role="user", content=question))
+            history.add_message(ChatMessage(role="assistant", content=answer))
+        return history
+
+    def test_relevant_context_adds_whole_older_turns(self):
+        history = self._conversation()
+
+        context = history.relevant_context("ôn lại SQL JOIN", recent=4, turns=1)
+
+        contents = [m.content for m in context]
+        assert contents[:2] == [
+            "Mục tiêu của tôi là học SQL cho phân tích dữ liệu",
+            "Bắt đầu với SELECT và JOIN",
+        ]
+        assert contents[2:] == [m.content for m in history.load_recent(4)]
+
+    def test_no_match_returns_recent_only(self):
+        history = self._conversation()
+
+        assert history.relevant_context("kubernetes", recent=2, turns=3) == history.load_recent(2)
+
+    def test_indexes_existing_messages_and_resets_on_clean(self):
+        inner = ChatMemory()
+        inner.add_message(ChatMessage(role="user", content="học Rust"))
+        inner.add_message(ChatMessage(role="assistant", content="Rust an toàn bộ nhớ"))
+        history = IndexedChatHistory(inner)
+
+        assert len(history.index) == 2
+        history.clean_history()
+        history.add_message(ChatMessage(role="user", content="học Go"))
+        assert len(history.index) == 1
+        assert history.relevant_context("Go", recent=0, turns=1)[0].content == "học Go"
+
+    def test_postings_follow_capped_backend(self):
+        history = IndexedChatHistory(ChatMemory(max_messages=4))
+        history.add_message(ChatMessage(role="user", content="học Kotlin"))
+        for i in range(5):
+            history.add_message(ChatMessage(role="user", content=f"câu hỏi {i}"))
+
+        assert len(history.index) == 4
+        assert history.index.search("Kotlin") == []
+
+    def test_memory_bytes_counts_index_and_backend(self):
+        history = IndexedChatHistory(ChatMemory(max_messages=4))
+        empty = history.memory_bytes()
+        for i in range(100):
+            history.add_message(ChatMessage(role="user", content=f"câu hỏi số {i} về Kotlin"))
+        capped = history.memory_bytes()
+
+        assert capped == history.index.memory_bytes() + history.inner.memory_bytes()
+        assert history.index.memory_bytes() > 0
+        history.clean_history()
+        assert history.index.memory_bytes() == 0
+        assert history.memory_bytes() < capped
+        assert history.memory_bytes() >= empty
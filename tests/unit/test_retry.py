@@ -0,0 +1,226 @@
+"""
+test_retry.py
+
+Unit tests for the unified retry policy
+
+Key features:
+- RetryPolicy: full-jitter backoff, attempts, retryable errors only (429 excluded)
+- RetryBudget: retries bounded by a ratio of calls, denials counted
+- deadline(): retries and client timeouts never outlive the caller's deadline; ChatService's
+  deadline is in effect while its stream is pulled, never in the consumer
+- One retry layer per call path: GeminiClient.generate_text, RoadmapService (invalid output
+  only), ChatService (before the first chunk)
+"""
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from ai.gemini_client import GeminiClient
+from config import MessageKey
+from services import ChatService, RoadmapJobQueue, RoadmapJobStore, RoadmapService
+from services.chat_service import StreamError
+from services.roadmap_jobs import JobStatus
+from utils import (
+    LLMServiceError,
+    RetryBudget,
+    RetryPolicy,
+    ValidationError,
+    deadline,
+    is_retryable,
+    time_remaining,
+)
+from utils.retry import RETRIES, RETRIES_DENIED
+
+def _transient() -> LLMServiceError:
+    error = LLMServiceError(code="STREAM_FAILED")
+    error.__cause__ = google_exceptions.ServiceUnavailable("down")
+    return error
+
+def _policy(name: str, budget: RetryBudget = None, **kwargs) -> RetryPolicy:
+    sleeps = []
+    policy = RetryPolicy(
+        name,
+        budget=budget or RetryBudget(min_per_second=0),
+        sleep=sleeps.append,
+        rng=lambda: 1.0,
+        **kwargs,
+    )
+    policy.sleeps = sleeps
+    return policy
+
+class TestRetryPolicy:
+    """Tests for RetryPolicy and RetryBudget"""
+
+    def test_retries_transient_then_succeeds_with_capped_backoff(self):
+        policy = _policy("t_backoff", max_attempts=4, base_delay=1.0, max_delay=3.0)
+        fn = MagicMock(side_effect=[_transient(), _transient(), _transient(), "ok"])
+
+        assert policy.call(fn) == "ok"
+        assert policy.sleeps == [1.0, 2.0, 3.0]
+        assert RETRIES.value(policy="t_backoff") == 3
+
+    def test_gives_up_after_max_attempts(self):
+        policy = _policy("t_attempts", max_attempts=2)
+        fn = MagicMock(side_effect=_transient())
+
+        with pytest.raises(LLMServiceError):
+            policy.call(fn)
+        assert fn.call_count == 2
+
+    def test_non_retryable_raises_immediately(self):
+        policy = _policy("t_fatal")
+        fn = MagicMock(side_effect=LLMServiceError(code="EMPTY_RESPONSE"))
+
+        with pytest.raises(LLMServiceError):
+            policy.call(fn)
+        assert fn.call_count == 1
+
+    def test_rate_limit_is_not_retryable(self):
+        limited = LLMServiceError(code="RATE_LIMITED")
+        limited.__cause__ = google_exceptions.ResourceExhausted("quota")
+
+        assert not is_retryable(limited)
+        assert is_retryable(google_exceptions.DeadlineExceeded("slow"))
+        assert is_retryable(_transient())
+
+    def test_budget_caps_retries_to_ratio_of_calls(self):
+        budget = RetryBudget(ratio=0.1, capacity=1.0, min_per_second=0)
+        policy = _policy("t_budget", budget=budget)
+
+        assert policy.retry_delay(1, _transient()) is not None
+        assert policy.retry_delay(1, _transient()) is None
+        assert RETRIES_DENIED.value(policy="t_budget", reason="budget") == 1
+
+        for _ in range(10):
+            policy.record_call()
+        assert policy.retry_delay(1, _transient()) is not None
+
+    def test_deadline_denies_retry_that_would_outlive_it(self):
+        policy = _policy("t_deadline", base_delay=1.0)
+
+        with deadline(0.5):
+            assert policy.retry_delay(1, _transient()) is None
+        assert RETRIES_DENIED.value(policy="t_deadline", reason="deadline") == 1
+        assert policy.retry_delay(1, _transient(), remaining=5.0) == 1.0
+
+    def test_nested_deadline_never_extends_outer(self):
+        assert time_remaining() is None
+        with deadline(1.0):
+            with deadline(60.0):
+                assert time_remaining() <= 1.0
+        assert time_remaining() is None
+
+class TestRetryLayers:
+    """Each call path retries in exactly one place"""
+
+    def test_gemini_generate_retries_and_clamps_timeout(self, mock_genai_model):
+        _, model_instance, _ = mock_genai_model
+        response = MagicMock(text="roadmap")
+        model_instance.generate_content.side_effect = [google_exceptions.ServiceUnavailable("down"), response]
+        client = GeminiClient(
+            api_key="dummy-key",
+            model_name="dummy-model",
+            request_timeout=60,
+            stream_timeout=60,
+            system_prompt="dummy-prompt",
+            retry_policy=_policy("t_gemini"),
+        )
+
+        with deadline(10.0):
+            assert client.generate_text("prompt") == "roadmap"
+
+        timeout = model_instance.generate_content.call_args.kwargs["request_options"]["timeout"]
+        assert model_instance.generate_content.call_count == 2
+        assert timeout <= 10.0
+
+    def test_gemini_generate_fails_fast_past_deadline(self, mock_genai_model):
+        _, model_instance, _ = mock_genai_model
+        client = GeminiClient(
+            api_key="dummy-key",
+            model_name="dummy-model",
+            request_timeout=60,
+            stream_timeout=60,
+            system_prompt="dummy-prompt",
+        )
+
+        with deadline(0.0):
+            with pytest.raises(LLMServiceError) as exc_info:
+                client.generate_text("prompt")
+        assert exc_info.value.code == "DEADLINE_EXCEEDED"
+        model_instance.generate_content.assert_not_called()
+
+    def test_roadmap_service_does_not_retry_llm_errors(self, sample_user_profile):
+        llm = MagicMock()
+        llm.generate_text.side_effect = _transient()
+
+        with pytest.raises(ValidationError) as exc_info:
+            RoadmapService(llm, max_retries=3).generate_roadmap(sample_user_profile)
+
+        assert exc_info.value.code == "ROADMAP_GENERATION_FAILED"
+        assert llm.generate_text.call_count == 1
+
+    def test_roadmap_service_retries_invalid_output(self, sample_user_profile):
+        llm = MagicMock()
+        llm.generate_text.return_value = "not json"
+
+        with pytest.raises(ValidationError):
+            RoadmapService(llm, max_retries=3).generate_roadmap(sample_user_profile)
+        assert llm.generate_text.call_count == 3
+
+    def test_chat_retries_transient_error_before_first_chunk(self):
+        llm = MagicMock()
+        llm.stream_chat.side_effect = [_transient(), iter(["hi"])]
+        service = ChatService(llm, retry_policy=_policy("t_chat", max_attempts=2))
+
+        assert list(service.stream_response("hello", [])) == ["hi"]
+        assert llm.stream_chat.call_count == 2
+
+    def test_chat_does_not_retry_when_budget_is_spent(self):
+        llm = MagicMock()
+        llm.stream_chat.side_effect = _transient()
+        budget = RetryBudget(capacity=1.0, min_per_second=0)
+        budget.try_spend()
+        service = ChatService(llm, retry_policy=_policy("t_chat_budget", budget=budget, max_attempts=2))
+
+        assert list(service.stream_response("hello", [])) == [StreamError(MessageKey.LLM_ERROR)]
+        assert llm.stream_chat.call_count == 1
+
+    def test_chat_deadline_stops_retries(self):
+        llm = MagicMock()
+        llm.stream_chat.side_effect = _transient()
+        service = ChatService(llm, retry_policy=_policy("t_chat_deadline", max_attempts=3), deadline=0.1)
+
+        assert list(service.stream_response("hello", [])) == [StreamError(MessageKey.LLM_ERROR)]
+        assert llm.stream_chat.call_count == 1
+
+    def test_chat_deadline_reaches_client_while_pulling_only(self):
+        seen = []
+
+        def stream_chat(history, new_message, cancel=None):
+            seen.append(time_remaining())
+            yield "a"
+            seen.append(time_remaining())
+            yield "b"
+
+        llm = MagicMock()
+        llm.stream_chat.side_effect = stream_chat
+        service = ChatService(llm, deadline=30.0)
+
+        for chunk in service.stream_response("hello", []):
+            assert time_remaining() is None  # never leaked into the consumer
+        assert len(seen) == 2
+        assert all(0 < remaining <= 30.0 for remaining in seen)
+
+    def test_roadmap_job_runs_under_deadline(self, sample_user_profile, sample_roadmap):
+        seen = []
+        service = MagicMock()
+        service.generate_roadmap.side_effect = lambda *a, **kw: seen.append(time_remaining()) or sample_roadmap
+        jobs = RoadmapJobQueue(service, RoadmapJobStore(":memory:"), max_workers=1, job_deadline=30.0)
+
+        job_id = jobs.submit_roadmap(sample_user_profile)
+        jobs.shutdown(wait=True)
+
+        assert jobs.get_job(job_id).status == JobStatus.DONE
+        assert seen and 0 < seen[0] <= 30.0
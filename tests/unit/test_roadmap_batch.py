@@ -0,0 +1,147 @@
+"""
+test_roadmap_batch.py
+
+Unit tests for offline roadmap batch generation (RoadmapBatchRunner, TokenBucket)
+
+Key features:
+- Results streamed as NDJSON, failures broken down by error code
+- Checkpoint makes a rerun skip completed items and invalid records
+- Token buckets reject requests larger than their capacity
+- Validation through a real process pool
+"""
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from services import RoadmapBatchRunner
+from services.roadmap_batch import main
+from utils import LLMServiceError, TokenBucket, ValidationError
+
+def _write_profiles(path, count: int) -> None:
+    """Write `count` valid profile records plus one invalid record"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({
+                "id": f"p{i}",
+                "goal": f"Học Python {i}",
+                "current_level": "beginner",
+                "time_commitment": "1 giờ/ngày",
+            }) + "\n")
+        f.write(json.dumps({"id": "bad", "goal": "thiếu trường"}) + "\n")
+
+def _client(roadmap_json: str):
+    """LLM client that always returns roadmap_json"""
+    client = MagicMock()
+    client.generate_text.return_value = roadmap_json
+    return client
+
+def _read_output(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+class TestRoadmapBatchRunner:
+    """Tests for RoadmapBatchRunner.run"""
+
+    def test_generates_ndjson_and_reports_failures(self, tmp_path, sample_roadmap):
+        """Valid profiles produce ok lines; invalid profiles are counted by error code"""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.ndjson"
+        _write_profiles(input_path, 3)
+        runner = RoadmapBatchRunner(
+            {"key-0": _client(sample_roadmap.model_dump_json())},
+            concurrency=2,
+            rate_per_key=1000,
+            validator_processes=0,
+        )
+
+        report = runner.run(input_path, output_path)
+
+        assert (report.total, report.succeeded, report.failed) == (4, 3, 1)
+        assert report.failures == {"INVALID_PROFILE": 1}
+        lines = {line["id"]: line for line in _read_output(output_path)}
+        assert lines["p0"]["status"] == "ok"
+        assert lines["p0"]["roadmap"]["topic"] == sample_roadmap.topic
+        assert lines["bad"]["status"] == "failed"
+
+    def test_rerun_skips_checkpointed_items(self, tmp_path, sample_roadmap):
+        """Second run skips items completed by the first run, including invalid records"""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.ndjson"
+        _write_profiles(input_path, 2)
+        client = _client(sample_roadmap.model_dump_json())
+        runner = RoadmapBatchRunner({"key-0": client}, rate_per_key=1000, validator_processes=0)
+
+        runner.run(input_path, output_path)
+        report = runner.run(input_path, output_path)
+
+        assert report.skipped == 3
+        assert (report.succeeded, report.failed) == (0, 0)
+        assert client.generate_text.call_count == 2
+        assert [line["id"] for line in _read_output(output_path)].count("bad") == 1
+
+    def test_invalid_output_retried_then_failed(self, tmp_path):
+        """Invalid JSON is retried max_retries times and reported as VALIDATION_ERROR"""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.ndjson"
+        _write_profiles(input_path, 1)
+        client = _client("not json")
+        runner = RoadmapBatchRunner({"key-0": client}, rate_per_key=1000, validator_processes=0, max_retries=2)
+
+        report = runner.run(input_path, output_path)
+
+        assert client.generate_text.call_count == 2
+        assert report.failures["VALIDATION_ERROR"] == 1
+
+    def test_llm_error_code_is_reported(self, tmp_path):
+        """LLM failures are reported with the exception code"""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.ndjson"
+        _write_profiles(input_path, 1)
+        client = MagicMock()
+        client.generate_text.side_effect = LLMServiceError(code="GENERATION_FAILED")
+        runner = RoadmapBatchRunner({"key-0": client}, rate_per_key=1000, validator_processes=0)
+
+        report = runner.run(input_path, output_path)
+
+        assert report.failures["GENERATION_FAILED"] == 1
+
+    def test_process_pool_validation(self, tmp_path, sample_roadmap):
+        """Validation also works through worker processes and multiple keys"""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.ndjson"
+        _write_profiles(input_path, 4)
+        raw = sample_roadmap.model_dump_json()
+        clients = {"key-0": _client(raw), "key-1": _client(raw)}
+        runner = RoadmapBatchRunner(clients, rate_per_key=1000, validator_processes=1)
+
+        report = runner.run(input_path, output_path)
+
+        assert report.succeeded == 4
+        assert clients["key-0"].generate_text.call_count == 2
+        assert clients["key-1"].generate_text.call_count == 2
+
+class TestTokenBucket:
+    """Tests for TokenBucket"""
+
+    def test_try_acquire_respects_capacity_and_refill(self):
+        """Bucket allows a burst up to capacity and refills over time"""
+        now = [0.0]
+        bucket = TokenBucket(rate=2.0, capacity=2.0, clock=lambda: now[0])
+
+        assert bucket.try_acquire()
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+
+        now[0] = 0.5
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+
+    def test_acquire_more_than_capacity_is_rejected(self):
+        """A request the bucket can never hold fails instead of sleeping forever"""
+        bucket = TokenBucket(rate=1.0, capacity=0.5)
+
+        with pytest.raises(ValueError):
+            bucket.acquire()
+
+    def test_burst_below_one_is_rejected(self):
+        """Runner and CLI refuse a per-key burst smaller than one request"""
+        with pytest.raises(ValidationError):
+            RoadmapBatchRunner({"key-0": MagicMock()}, burst_per_key=0.5)
+        with pytest.raises(SystemExit):
+            main(["--input", "in.jsonl", "--output", "out.ndjson", "--burst", "0.5"])
@@ -0,0 +1,183 @@
+"""
+test_roadmap_jobs.py
+
+Unit tests for background roadmap jobs (RoadmapJobStore, RoadmapJobQueue, AppService polling)
+
+Key features:
+- Jobs move queued -> running -> done/failed and persist in SQLite
+- Unfinished jobs are recovered after restart; jobs of a live owner (fresh heartbeat) are not
+- AppService.poll_roadmap_job emits heartbeats then RoadmapReady / ErrorOccurred
+"""
+import threading
+import time
+from unittest.mock import MagicMock
+
+from config import default_messages
+from domain import RoadmapReady, StatusUpdate, ErrorOccurred
+from memory import ChatMemory
+from services import (
+    AppService,
+    JobStatus,
+    RoadmapJobQueue,
+    RoadmapJobStore,
+    SessionManager,
+)
+from utils import ValidationError
+
+def _wait_finished(queue: RoadmapJobQueue, job_id: str, timeout: float = 2.0):
+    """Poll until the job is finished or timeout elapses"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get_job(job_id)
+        if job.status.is_finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+class TestRoadmapJobStore:
+    """Tests for RoadmapJobStore persistence"""
+
+    def test_create_and_complete_job(self, tmp_path, sample_user_profile, sample_roadmap):
+        """Job result survives reopening the database"""
+        path = tmp_path / "jobs.sqlite3"
+        store = RoadmapJobStore(path)
+        store.create("job-1", sample_user_profile, 4)
+        store.set_status("job-1", JobStatus.DONE, roadmap=sample_roadmap)
+        store.close()
+
+        job = RoadmapJobStore(path).get("job-1")
+
+        assert job.status == JobStatus.DONE
+        assert job.profile == sample_user_profile
+        assert job.roadmap.model_dump() == sample_roadmap.model_dump()
+
+    def test_get_unknown_job_returns_none(self):
+        """Unknown job id returns None"""
+        assert RoadmapJobStore(":memory:").get("missing") is None
+
+class TestRoadmapJobQueue:
+    """Tests for RoadmapJobQueue worker behaviour"""
+
+    def test_submit_returns_immediately_and_completes(self, sample_user_profile, sample_roadmap):
+        """submit_roadmap returns a queued job id before generation finishes"""
+        release = threading.Event()
+        service = MagicMock()
+        service.generate_roadmap.side_effect = lambda *a, **kw: release.wait(2) and sample_roadmap
+        queue = RoadmapJobQueue(service, RoadmapJobStore(":memory:"), max_workers=1)
+
+        job_id = queue.submit_roadmap(sample_user_profile)
+        assert not queue.get_job(job_id).status.is_finished
+
+        release.set()
+        job = _wait_finished(queue, job_id)
+        assert job.status == JobStatus.DONE
+        assert job.roadmap.topic == sample_roadmap.topic
+        queue.shutdown()
+
+    def test_failed_job_records_error_code(self, sample_user_profile):
+        """LearnPathException from the service marks the job failed with its code"""
+        service = MagicMock()
+        service.generate_roadmap.side_effect = ValidationError(code="ROADMAP_GENERATION_FAILED")
+        queue = RoadmapJobQueue(service, RoadmapJobStore(":memory:"), max_workers=1)
+
+        job = _wait_finished(queue, queue.submit_roadmap(sample_user_profile))
+
+        assert job.status == JobStatus.FAILED
+        assert job.error_code == "ROADMAP_GENERATION_FAILED"
+        queue.shutdown()
+
+    def test_unfinished_jobs_are_recovered(self, tmp_path, sample_user_profile, sample_roadmap):
+        """Jobs left running by a previous process are re-run on startup"""
+        path = tmp_path / "jobs.sqlite3"
+        store = RoadmapJobStore(path)
+        store.create("job-1", sample_user_profile, None)
+        store.set_status("job-1", JobStatus.RUNNING)
+        store.close()
+
+        service = MagicMock()
+        service.generate_roadmap.return_value = sample_roadmap
+        queue = RoadmapJobQueue(service, RoadmapJobStore(path), max_workers=1)
+
+        assert _wait_finished(queue, "job-1").status == JobStatus.DONE
+        queue.shutdown()
+
+    def test_live_owner_jobs_are_not_stolen(self, tmp_path, sample_user_profile, sample_roadmap):
+        """A second process only takes over a job once its owner's heartbeat is stale"""
+        path = tmp_path / "jobs.sqlite3"
+        store = RoadmapJobStore(path)
+        store.create("job-1", sample_user_profile, None, owner="elsewhere:1:boot")
+        store.set_status("job-1", JobStatus.RUNNING)
+        service = MagicMock()
+        service.generate_roadmap.return_value = sample_roadmap
+
+        second = RoadmapJobQueue(service, RoadmapJobStore(path), max_workers=1, stale_after=60.0)
+        second.shutdown()
+        assert store.get("job-1").status == JobStatus.RUNNING
+        service.generate_roadmap.assert_not_called()
+
+        third = RoadmapJobQueue(service, RoadmapJobStore(path), max_workers=1, stale_after=0.0)
+        job = _wait_finished(third, "job-1")
+        third.shutdown()
+        assert job.status == JobStatus.DONE
+        assert job.owner == third.owner_id
+
+    def test_own_submitted_job_is_not_recovered_twice(self, tmp_path, sample_user_profile, sample_roadmap):
+        """A queue sharing the database with a live queue never re-runs the other's jobs"""
+        path = tmp_path / "jobs.sqlite3"
+        release = threading.Event()
+        calls = []
+
+        def generate(*args, **kwargs):
+            calls.append(1)
+            release.wait(2)
+            return sample_roadmap
+
+        service = MagicMock()
+        service.generate_roadmap.side_effect = generate
+        first = RoadmapJobQueue(service, RoadmapJobStore(path), max_workers=1)
+        job_id = first.submit_roadmap(sample_user_profile)
+
+        second = RoadmapJobQueue(service, RoadmapJobStore(path), max_workers=1)
+        release.set()
+        assert _wait_finished(first, job_id).status == JobStatus.DONE
+        first.shutdown()
+        second.shutdown()
+        assert len(calls) == 1
+
+class TestAppServiceRoadmapPolling:
+    """Tests for AppService.submit_roadmap / poll_roadmap_job"""
+
+    def _app(self, queue):
+        return AppService(
+            chat_service=MagicMock(),
+            session_manager=SessionManager(),
+            messages=default_messages,
+            memory=ChatMemory(),
+            chat_context_messages=20,
+            roadmap_jobs=queue,
+            job_poll_interval=0.01,
+        )
+
+    def test_poll_emits_heartbeats_then_roadmap(self, sample_user_profile, sample_roadmap):
+        """Polling yields generating_roadmap heartbeats and finally RoadmapReady"""
+        service = MagicMock()
+        service.generate_roadmap.side_effect = lambda *a, **kw: time.sleep(0.05) or sample_roadmap
+        app = self._app(RoadmapJobQueue(service, RoadmapJobStore(":memory:"), max_workers=1))
+
+        events = list(app.poll_roadmap_job(app.submit_roadmap(sample_user_profile)))
+
+        assert isinstance(events[0], StatusUpdate)
+        assert events[0].status == "generating_roadmap"
+        assert isinstance(events[-1], RoadmapReady)
+        assert events[-1].roadmap.topic == sample_roadmap.topic
+
+    def test_poll_failed_job_yields_error(self, sample_user_profile):
+        """Failed jobs surface as ErrorOccurred with a localized message"""
+        service = MagicMock()
+        service.generate_roadmap.side_effect = ValidationError(code="ROADMAP_GENERATION_FAILED")
+        app = self._app(RoadmapJobQueue(service, RoadmapJobStore(":memory:"), max_workers=1))
+
+        events = list(app.poll_roadmap_job(app.submit_roadmap(sample_user_profile)))
+
+        assert isinstance(events[-1], ErrorOccurred)
+        assert events[-1].error_type == "llm"
@@ -0,0 +1,197 @@
+"""
+test_roadmap_service.py
+
+Unit tests for RoadmapService (update_roadmap, parse_roadmap)
+
+Key features:
+- update_roadmap regenerates only affected weeks and reuses untouched milestones
+- Goal/level changes fall back to full regeneration; an instruction without weeks covers every week
+- parse_roadmap and milestone parsing distinguish malformed JSON from schema violations
+"""
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from domain import RoadmapChange
+from services import RoadmapService
+from utils import ValidationError
+
+def _milestone_json(week: int, topic: str) -> dict:
+    """Minimal valid milestone payload for the given week"""
+    return {
+        "week": week,
+        "topic": topic,
+        "description": f"Mô tả {topic}",
+        "resources": [
+            {"title": f"Tài liệu {topic}", "url": f"https://example.com/{week}", "type": "article"}
+        ],
+    }
+
+def _service(*responses: str):
+    """RoadmapService with a mocked LLM returning responses in order"""
+    llm = MagicMock()
+    llm.generate_text.side_effect = list(responses)
+    return RoadmapService(llm_client=llm), llm
+
+class TestUpdateRoadmap:
+    """Tests for RoadmapService.update_roadmap"""
+
+    def test_regenerates_only_requested_week(self, sample_roadmap, sample_user_profile):
+        """Only the requested week is replaced; other milestones stay byte-identical"""
+        service, llm = _service(json.dumps([_milestone_json(2, "Hàm nâng cao")]))
+        change = RoadmapChange(profile=sample_user_profile, weeks=[2], instruction="Khó hơn")
+
+        updated = service.update_roadmap(sample_roadmap, change)
+
+        llm.generate_text.assert_called_once()
+        assert updated.milestones[1].topic == "Hàm nâng cao"
+        for week in (1, 3, 4):
+            assert updated.milestones[week - 1] is sample_roadmap.milestones[week - 1]
+            assert (
+                updated.milestones[week - 1].model_dump_json()
+                == sample_roadmap.milestones[week - 1].model_dump_json()
+            )
+        assert updated.duration_week == 4
+        assert updated.created_at == sample_roadmap.created_at
+
+    def test_renumbers_milestones_with_wrong_week_numbers(self, sample_roadmap, sample_user_profile):
+        """Milestones returned with wrong week numbers are renumbered positionally"""
+        service, _ = _service(json.dumps([_milestone_json(1, "A"), _milestone_json(2, "B")]))
+        change = RoadmapChange(profile=sample_user_profile, weeks=[3, 4])
+
+        updated = service.update_roadmap(sample_roadmap, change)
+
+        assert [m.week for m in updated.milestones] == [1, 2, 3, 4]
+        assert updated.milestones[2].topic == "A"
+        assert updated.milestones[3].topic == "B"
+
+    def test_longer_duration_generates_only_new_weeks(self, sample_roadmap, sample_user_profile):
+        """Extending duration generates only the appended weeks"""
+        service, llm = _service(json.dumps({"milestones": [_milestone_json(5, "Dự án cuối khoá")]}))
+        change = RoadmapChange(profile=sample_user_profile, duration_week=5)
+
+        updated = service.update_roadmap(sample_roadmap, change)
+
+        assert updated.duration_week == 5
+        assert updated.milestones[4].topic == "Dự án cuối khoá"
+        assert "Hãy tạo lại NỘI DUNG cho các tuần sau: 5" in llm.generate_text.call_args.args[0]
+
+    def test_shorter_duration_truncates_without_llm_call(self, sample_roadmap, sample_user_profile):
+        """Shortening duration keeps the first weeks and does not call the LLM"""
+        service, llm = _service()
+        change = RoadmapChange(profile=sample_user_profile, duration_week=2)
+
+        updated = service.update_roadmap(sample_roadmap, change)
+
+        llm.generate_text.assert_not_called()
+        assert updated.duration_week == 2
+        assert updated.milestones == sample_roadmap.milestones[:2]
+
+    def test_no_change_returns_existing(self, sample_roadmap, sample_user_profile):
+        """Identical profiles with no weeks return the existing roadmap"""
+        service, llm = _service()
+        change = RoadmapChange(profile=sample_user_profile, previous_profile=sample_user_profile)
+
+        assert service.update_roadmap(sample_roadmap, change) is sample_roadmap
+        llm.generate_text.assert_not_called()
+
+    def test_time_commitment_change_regenerates_all_weeks(self, sample_roadmap, sample_user_profile):
+        """Plan-level profile changes regenerate every milestone but keep the header"""
+        new_profile = sample_user_profile.model_copy(update={"time_commitment": "2 giờ/tuần"})
+        payload = [_milestone_json(w, f"Tuần nhẹ {w}") for w in range(1, 5)]
+        service, _ = _service(json.dumps(payload))
+        change = RoadmapChange(profile=new_profile, previous_profile=sample_user_profile)
+
+        updated = service.update_roadmap(sample_roadmap, change)
+
+        assert [m.topic for m in updated.milestones] == [f"Tuần nhẹ {w}" for w in range(1, 5)]
+        assert updated.title == sample_roadmap.title
+
+    def test_instruction_without_weeks_applies_to_whole_roadmap(self, sample_roadmap, sample_user_profile):
+        """A free-text change naming no weeks regenerates every milestone instead of being dropped"""
+        payload = [_milestone_json(w, f"Thực hành {w}") for w in range(1, 5)]
+        service, llm = _service(json.dumps(payload))
+        change = RoadmapChange(profile=sample_user_profile, instruction="Thêm bài tập thực hành")
+
+        updated = service.update_roadmap(sample_roadmap, change)
+
+        llm.generate_text.assert_called_once()
+        assert "Thêm bài tập thực hành" in llm.generate_text.call_args.args[0]
+        assert [m.topic for m in updated.milestones] == [f"Thực hành {w}" for w in range(1, 5)]
+        assert updated.title == sample_roadmap.title
+
+    def test_goal_change_triggers_full_regeneration(self, sample_roadmap, sample_user_profile):
+        """Goal change delegates to generate_roadmap"""
+        new_profile = sample_user_profile.model_copy(update={"goal": "Học Go"})
+        service, _ = _service()
+        service.generate_roadmap = MagicMock(return_value=sample_roadmap)
+        change = RoadmapChange(profile=new_profile, previous_profile=sample_user_profile)
+
+        service.update_roadmap(sample_roadmap, change)
+
+        service.generate_roadmap.assert_called_once_with(new_profile, duration_week=4)
+
+    def test_retries_then_fails_on_invalid_output(self, sample_roadmap, sample_user_profile):
+        """Invalid LLM output is retried and raises ROADMAP_UPDATE_FAILED after max_retries"""
+        service, llm = _service("not json", json.dumps([]))
+        change = RoadmapChange(profile=sample_user_profile, weeks=[1])
+
+        with pytest.raises(ValidationError) as exc_info:
+            service.update_roadmap(sample_roadmap, change)
+
+        assert exc_info.value.code == "ROADMAP_UPDATE_FAILED"
+        assert llm.generate_text.call_count == 2
+
+    def test_week_out_of_range_raises(self, sample_roadmap, sample_user_profile):
+        """Requesting a week beyond the duration raises ValidationError"""
+        service, _ = _service()
+        change = RoadmapChange(profile=sample_user_profile, weeks=[9])
+
+        with pytest.raises(ValidationError):
+            service.update_roadmap(sample_roadmap, change)
+
+    def test_missing_profile_raises(self, sample_roadmap):
+        """RoadmapChange without any profile is rejected"""
+        service, _ = _service()
+
+        with pytest.raises(ValidationError):
+            service.update_roadmap(sample_roadmap, RoadmapChange(weeks=[1]))
+
+class TestParseRoadmap:
+    """Tests for RoadmapService.parse_roadmap (one-pass JSON validation)"""
+
+    def test_parses_valid_roadmap(self, sample_roadmap):
+        """Valid JSON is parsed straight into a Roadmap"""
+        roadmap = RoadmapService.parse_roadmap(sample_roadmap.model_dump_json())
+
+        assert roadmap.model_dump() == sample_roadmap.model_dump()
+
+    def test_malformed_json_reports_json_error(self):
+        """Malformed JSON raises ValidationError with the JSON message"""
+        with pytest.raises(ValidationError, match="JSON không hợp lệ"):
+            RoadmapService.parse_roadmap("{not json")
+
+    def test_schema_violation_reports_schema_error(self, sample_roadmap):
+        """Valid JSON that violates the schema raises the schema message"""
+        data = sample_roadmap.model_dump(mode="json")
+        data["duration_week"] = 7
+
+        with pytest.raises(ValidationError, match="không hợp lệ theo schema"):
+            RoadmapService.parse_roadmap(json.dumps(data))
+
+    def test_milestones_accept_array_or_wrapped_object(self):
+        """Partial-update output goes through MILESTONES_ADAPTER in either shape"""
+        service, _ = _service()
+        payload = [_milestone_json(1, "A")]
+
+        assert service._parse_milestones(json.dumps(payload), [1])[1].topic == "A"
+        assert service._parse_milestones(json.dumps({"milestones": payload}), [1])[1].topic == "A"
+
+    def test_milestones_wrong_shape_reports_schema_error(self):
+        """A non-array answer or an invalid milestone raises the schema message"""
+        service, _ = _service()
+
+        with pytest.raises(ValidationError, match="JSON không hợp lệ"):
+            service._parse_milestones("[{", [1])
+        with pytest.raises(ValidationError, match="hợp lệ theo schema"):
+            service._parse_milestones(json.dumps({"week": 1}), [1])
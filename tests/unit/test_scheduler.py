@@ -0,0 +1,205 @@
+"""
+test_scheduler.py
+
+Unit tests for the LLM scheduler (priority lanes, weighted fair queueing)
+
+Key features:
+- Lane limits are independent: a full roadmap lane never blocks chat
+- Fair queueing: a session with many queued calls does not delay another session
+- Ticket position, cancel and release bookkeeping; try_acquire grants at once or not at all
+- ScheduledLLMClient holds a slot for the whole stream
+- ChatService yields Queued while waiting; AppService surfaces it as StatusUpdate("queued")
+"""
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai import LANE_CHAT, LANE_ROADMAP, LLMScheduler, ScheduledLLMClient
+from config import MessageKey, default_messages
+from domain import StatusUpdate, TextChunk
+from memory import ChatMemory
+from services import AppService, ChatService, SessionManager
+from services.chat_service import Queued
+from utils import CancellationToken
+
+def _llm(chunks):
+    llm = MagicMock()
+
+    def stream_chat(history, new_message, cancel=None):
+        yield from chunks
+
+    llm.stream_chat.side_effect = stream_chat
+    return llm
+
+class TestLLMScheduler:
+    """Tests for LLMScheduler"""
+
+    def test_lane_limit_and_release(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1, LANE_ROADMAP: 1})
+        first = scheduler.submit(LANE_CHAT, "a")
+        second = scheduler.submit(LANE_CHAT, "b")
+
+        assert first.granted and not second.granted
+        assert second.position == 1
+        assert scheduler.stats()[LANE_CHAT] == {"limit": 1, "in_flight": 1, "waiting": 1}
+
+        first.release()
+        first.release()  # idempotent
+        assert second.granted and second.position == 0
+        assert scheduler.stats()[LANE_CHAT] == {"limit": 1, "in_flight": 1, "waiting": 0}
+
+    def test_lanes_are_isolated(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1, LANE_ROADMAP: 1})
+        scheduler.submit(LANE_ROADMAP, "job-1")
+        queued_roadmap = scheduler.submit(LANE_ROADMAP, "job-2")
+
+        assert not queued_roadmap.granted
+        assert scheduler.submit(LANE_CHAT, "s1").granted
+
+    def test_fair_queueing_across_flows(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1})
+        holder = scheduler.submit(LANE_CHAT, "other")
+        heavy = [scheduler.submit(LANE_CHAT, "heavy") for _ in range(5)]
+        light = scheduler.submit(LANE_CHAT, "light")
+
+        # light arrived last but only competes with heavy's first call
+        assert light.position == 2
+        order = []
+        holder.release()
+        for _ in range(6):
+            granted = next(t for t in heavy + [light] if t.granted)
+            order.append(granted.flow)
+            granted.release()
+        assert order[:2] == ["heavy", "light"]
+
+    def test_weight_gives_larger_share(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1})
+        holder = scheduler.submit(LANE_CHAT, "x")
+        slow = [scheduler.submit(LANE_CHAT, "slow") for _ in range(4)]
+        fast = [scheduler.submit(LANE_CHAT, "fast", weight=3.0) for _ in range(4)]
+
+        order = []
+        holder.release()
+        pending = slow + fast
+        for _ in range(4):
+            granted = next(t for t in pending if t.granted)
+            order.append(granted.flow)
+            pending.remove(granted)
+            granted.release()
+        assert order.count("fast") == 3
+
+    def test_cancel_while_queued(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1})
+        holder = scheduler.submit(LANE_CHAT, "a")
+        waiting = scheduler.submit(LANE_CHAT, "b")
+        behind = scheduler.submit(LANE_CHAT, "c")
+
+        waiting.cancel()
+        assert waiting.cancelled and not waiting.wait(0)
+        assert behind.position == 1
+
+        holder.release()
+        assert behind.granted
+        assert scheduler.stats()[LANE_CHAT]["waiting"] == 0
+
+    def test_acquire_returns_when_token_cancelled(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1})
+        scheduler.submit(LANE_CHAT, "a")
+        token = CancellationToken()
+        threading.Timer(0.05, token.cancel).start()
+
+        ticket = scheduler.acquire(LANE_CHAT, "b", cancel=token)
+
+        assert ticket.cancelled
+        assert scheduler.stats()[LANE_CHAT]["waiting"] == 0
+
+    def test_try_acquire_never_queues(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1})
+        first = scheduler.try_acquire(LANE_CHAT, "a")
+
+        assert first is not None and first.granted
+        assert scheduler.try_acquire(LANE_CHAT, "b") is None
+        queued = scheduler.submit(LANE_CHAT, "c")
+        first.release()
+        assert queued.granted
+        queued.release()
+        assert scheduler.stats()[LANE_CHAT] == {"limit": 1, "in_flight": 0, "waiting": 0}
+
+    def test_invalid_lane_and_limit(self):
+        with pytest.raises(ValueError):
+            LLMScheduler({LANE_CHAT: 0})
+        with pytest.raises(ValueError):
+            LLMScheduler({LANE_CHAT: 1}).submit("nope", "a")
+
+class TestScheduledLLMClient:
+    """Tests for ScheduledLLMClient"""
+
+    def test_stream_holds_slot_until_closed(self):
+        scheduler = LLMScheduler({LANE_ROADMAP: 1})
+        client = ScheduledLLMClient(_llm(["a", "b"]), scheduler, LANE_ROADMAP)
+
+        stream = client.stream_chat([], "hi")
+        assert next(stream) == "a"
+        assert scheduler.stats()[LANE_ROADMAP]["in_flight"] == 1
+        stream.close()
+        assert scheduler.stats()[LANE_ROADMAP]["in_flight"] == 0
+
+    def test_generate_text_releases_on_error(self):
+        inner = MagicMock()
+        inner.generate_text.side_effect = RuntimeError("boom")
+        scheduler = LLMScheduler({LANE_ROADMAP: 1})
+
+        with pytest.raises(RuntimeError):
+            ScheduledLLMClient(inner, scheduler, LANE_ROADMAP).generate_text("p")
+        assert scheduler.stats()[LANE_ROADMAP]["in_flight"] == 0
+
+class TestChatServiceQueueing:
+    """ChatService and AppService behaviour behind a saturated chat lane"""
+
+    def test_queued_then_chunks(self, monkeypatch):
+        monkeypatch.setattr("services.chat_service.QUEUE_STATUS_INTERVAL", 0.01)
+        scheduler = LLMScheduler({LANE_CHAT: 1})
+        holder = scheduler.submit(LANE_CHAT, "other")
+        service = ChatService(_llm(["x", "y"]), scheduler=scheduler)
+
+        stream = service.stream_response("hi", [])
+        assert next(stream) == Queued(1)
+        holder.release()
+        rest = [item for item in stream if not isinstance(item, Queued)]
+
+        assert rest == ["x", "y"]
+        assert scheduler.stats()[LANE_CHAT]["in_flight"] == 0
+
+    def test_cancel_while_queued_skips_llm(self):
+        scheduler = LLMScheduler({LANE_CHAT: 1})
+        scheduler.submit(LANE_CHAT, "other")
+        llm = _llm(["x"])
+        token = CancellationToken()
+        stream = ChatService(llm, scheduler=scheduler).stream_response("hi", [], cancel=token)
+
+        assert next(stream) == Queued(1)
+        token.cancel()
+        assert list(stream) == []
+        llm.stream_chat.assert_not_called()
+        assert scheduler.stats()[LANE_CHAT]["waiting"] == 0
+
+    def test_app_service_emits_queued_status(self, monkeypatch):
+        monkeypatch.setattr("services.chat_service.QUEUE_STATUS_INTERVAL", 0.01)
+        scheduler = LLMScheduler({LANE_CHAT: 1})
+        holder = scheduler.submit(LANE_CHAT, "other")
+        app = AppService(
+            chat_service=ChatService(_llm(["ok"]), scheduler=scheduler),
+            session_manager=SessionManager(timeout_minutes=30),
+            messages=default_messages,
+            memory=ChatMemory(),
+            chat_context_messages=10,
+        )
+
+        events = app.handle_message("hello")
+        queued = [next(events) for _ in range(2)][-1]
+        holder.release()
+        rest = list(events)
+
+        assert queued == StatusUpdate("queued", default_messages.format(MessageKey.QUEUED, position="1"))
+        assert TextChunk("ok") in rest
@@ -0,0 +1,112 @@
+"""
+test_session_registry.py
+
+Unit tests for SessionRegistry and the monotonic SessionManager
+
+Key features:
+- Expiry after the timeout, rescheduling on touch, forget without hooks
+- Cleanup hooks fire once per expired session; a failing hook does not stop the others
+- Background sweeper expires sessions without any request
+- SessionManager expiry uses the monotonic clock; restored wall-clock activity keeps its age
+"""
+import threading
+from datetime import datetime, timedelta
+
+from services import SessionManager, SessionRegistry
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestSessionRegistry:
+    """Tests for SessionRegistry"""
+
+    def test_expires_after_timeout_and_fires_hooks(self):
+        clock = FakeClock()
+        registry = SessionRegistry(timedelta(seconds=10), tick=1, clock=clock)
+        released = []
+        registry.add_hook(released.append)
+        registry.touch("a")
+        registry.touch("b")
+
+        clock.now = 5
+        registry.touch("b")
+        assert registry.sweep() == []
+
+        clock.now = 12
+        assert registry.sweep() == ["a"]
+        assert released == ["a"]
+        assert registry.is_live("b")
+        assert not registry.is_live("a")
+        assert len(registry) == 1
+
+    def test_forget_skips_hooks(self):
+        clock = FakeClock()
+        registry = SessionRegistry(timedelta(seconds=10), tick=1, clock=clock)
+        released = []
+        registry.add_hook(released.append)
+        registry.touch("a")
+        registry.forget("a")
+
+        clock.now = 20
+        assert registry.sweep() == []
+        assert released == []
+
+    def test_failing_hook_does_not_block_others(self):
+        clock = FakeClock()
+        registry = SessionRegistry(timedelta(seconds=1), tick=1, clock=clock)
+        released = []
+
+        def broken(_):
+            raise RuntimeError("boom")
+
+        registry.add_hook(broken)
+        registry.add_hook(released.append)
+        registry.touch("a")
+
+        clock.now = 3
+        registry.sweep()
+        assert released == ["a"]
+
+    def test_background_sweeper_expires_idle_sessions(self):
+        registry = SessionRegistry(timedelta(seconds=0.05), tick=0.01)
+        expired = threading.Event()
+        registry.add_hook(lambda _: expired.set())
+        registry.touch("a")
+
+        registry.start(interval=0.01)
+        try:
+            assert expired.wait(timeout=2)
+        finally:
+            registry.stop()
+        assert len(registry) == 0
+
+class TestSessionManager:
+    """Tests for SessionManager on a monotonic clock"""
+
+    def test_expiry_uses_monotonic_clock(self):
+        clock = FakeClock()
+        manager = SessionManager(timeout_minutes=1, clock=clock)
+        assert not manager.is_expired()
+
+        manager.touch_activity()
+        clock.now = 59
+        assert not manager.is_expired()
+        clock.now = 61
+        assert manager.is_expired()
+
+    def test_restored_activity_keeps_its_age(self):
+        clock = FakeClock()
+        clock.now = 1000
+        manager = SessionManager(timeout_minutes=1, clock=clock)
+
+        manager.set_last_activity(datetime.now() - timedelta(seconds=90))
+        assert manager.is_expired()
+
+        manager.set_last_activity(datetime.now() - timedelta(seconds=10))
+        assert not manager.is_expired()
+        clock.now = 1060
+        assert manager.is_expired()
@@ -0,0 +1,187 @@
+"""
+test_session_store.py
+
+Unit tests for TimerWheel and SessionStore (memory budget, spill/rehydrate, expiry)
+
+Key features:
+- TimerWheel expiry, lazy rescheduling and cancel
+- SessionStore LRU spill over budget, transparent rehydration, registry-driven sweep
+- Checked-out (mid-turn) sessions are neither spilled nor expired
+- Sessions are charged the footprint their history backend reports, index postings included
+"""
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import msgpack
+import pytest
+
+from domain import ChatMessage
+from memory import ChatMemory, ConcurrentChatMemory, IndexedChatHistory
+from services import AppService, SessionManager, SessionRegistry, SessionStore
+from utils import TimerWheel, ValidationError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _build_app(memory=None) -> AppService:
+    return AppService(
+        chat_service=MagicMock(),
+        session_manager=SessionManager(timeout_minutes=30),
+        messages=MagicMock(),
+        memory=memory if memory is not None else ChatMemory(),
+        chat_context_messages=10,
+    )
+
+def _chat(app: AppService, n: int, size: int = 100) -> None:
+    for i in range(n):
+        app._memory.add_message(ChatMessage(role="user", content=f"{i}" + "x" * size))
+
+class TestTimerWheel:
+    """Tests for TimerWheel"""
+
+    def test_expires_due_keys_only(self):
+        clock = FakeClock()
+        wheel = TimerWheel(tick=1, slots=8, clock=clock)
+        wheel.schedule("a", 5)
+        wheel.schedule("b", 20)
+
+        assert wheel.advance(4) == []
+        assert wheel.advance(6) == ["a"]
+        assert wheel.advance(21) == ["b"]
+        assert len(wheel) == 0
+
+    def test_later_deadline_is_rescheduled_lazily(self):
+        clock = FakeClock()
+        wheel = TimerWheel(tick=1, slots=8, clock=clock)
+        wheel.schedule("a", 5)
+        wheel.schedule("a", 30)
+
+        assert wheel.advance(10) == []
+        assert "a" in wheel
+        assert wheel.advance(31) == ["a"]
+
+    def test_cancel(self):
+        wheel = TimerWheel(tick=1, slots=8, clock=FakeClock())
+        wheel.schedule("a", 2)
+        wheel.cancel("a")
+
+        assert wheel.advance(5) == []
+
+class TestSessionStore:
+    """Tests for SessionStore"""
+
+    def _store(self, tmp_path, clock, budget=10_000):
+        return SessionStore(
+            factory=_build_app,
+            spill_dir=tmp_path,
+            memory_budget_bytes=budget,
+            session_timeout=timedelta(seconds=60),
+            registry=SessionRegistry(timedelta(seconds=60), tick=1, clock=clock),
+        )
+
+    def test_get_returns_same_app(self, tmp_path):
+        store = self._store(tmp_path, FakeClock())
+
+        assert store.get("s1") is store.get("s1")
+        assert store.get("s1") is not store.get("s2")
+
+    def test_rejects_unsafe_session_id(self, tmp_path):
+        store = self._store(tmp_path, FakeClock())
+
+        with pytest.raises(ValidationError):
+            store.get("../etc/passwd")
+
+    def test_spills_lru_session_and_rehydrates(self, tmp_path):
+        """Over budget, the least recently active session moves to disk and comes back intact"""
+        store = self._store(tmp_path, FakeClock(), budget=2_500)
+        first = store.get("s1")
+        _chat(first, 10)
+        store.touch("s1")
+        history = list(first.iter_history())
+
+        second = store.get("s2")
+        _chat(second, 10)
+        store.touch("s2")
+
+        assert store.stats()["sessions_in_memory"] == 1
+        assert (tmp_path / "s1.session").exists()
+
+        restored = store.get("s1")
+        assert restored is not first
+        assert list(restored.iter_history()) == history
+        assert not (tmp_path / "s1.session").exists()
+
+    def test_charges_backend_footprint_with_index(self, tmp_path):
+        """An indexed object history is charged its postings and message objects, not a per-message constant"""
+        store = SessionStore(
+            factory=lambda: _build_app(IndexedChatHistory(ConcurrentChatMemory())),
+            spill_dir=tmp_path,
+            session_timeout=timedelta(seconds=60),
+            registry=SessionRegistry(timedelta(seconds=60), tick=1, clock=FakeClock()),
+        )
+        app = store.get("s1")
+        _chat(app, 20)
+        store.touch("s1")
+
+        charged = store.stats()["bytes_in_memory"]
+        assert charged == app.memory_bytes()
+        assert charged > app._memory.inner.memory_bytes() > 20 * 100
+        app.reset_session()
+        store.touch("s1")
+        assert store.stats()["bytes_in_memory"] == app.memory_bytes() < charged
+
+    def test_checked_out_session_is_never_spilled(self, tmp_path):
+        """A session mid-turn stays in memory even as the least recently used one"""
+        store = self._store(tmp_path, FakeClock(), budget=1)
+        busy = store.checkout("s1")
+        _chat(busy, 5)
+
+        _chat(store.get("s2"), 5)
+        store.touch("s2")
+        _chat(busy, 1)  # the turn keeps appending to the same AppService
+
+        assert not (tmp_path / "s1.session").exists()
+        assert store.get("s1") is busy
+        store.checkin("s1")  # unpinned and most recent: now s2 is the one spilled
+        assert (tmp_path / "s2.session").exists()
+        assert store.get("s1").history_length() == 6
+
+    def test_checked_out_session_survives_expiry(self, tmp_path):
+        clock = FakeClock()
+        store = self._store(tmp_path, clock)
+        busy = store.checkout("s1")
+
+        clock.now = 62
+        store.sweep()
+
+        assert store.get("s1") is busy
+        store.checkin("s1")
+
+    @pytest.mark.parametrize("payload", [5, [1, None, [1, 2, b"\x09", ["x"], [0], None]]])
+    def test_malformed_spill_starts_empty_session(self, tmp_path, payload):
+        """A spill file of the wrong shape is discarded instead of failing get()"""
+        (tmp_path / "s1.session").write_bytes(msgpack.packb(payload, use_bin_type=True))
+        store = self._store(tmp_path, FakeClock())
+
+        assert store.get("s1").history_length() == 0
+        assert not (tmp_path / "s1.session").exists()
+
+    def test_sweep_discards_expired_sessions(self, tmp_path):
+        clock = FakeClock()
+        store = self._store(tmp_path, clock, budget=1)
+        _chat(store.get("s1"), 2)
+        store.touch("s1")
+        store.get("s2")
+        assert (tmp_path / "s1.session").exists()
+
+        clock.now = 30
+        store.touch("s2")
+        clock.now = 62
+
+        assert store.sweep() == ["s1"]
+        assert not (tmp_path / "s1.session").exists()
+        assert store.get("s1").history_length() == 0
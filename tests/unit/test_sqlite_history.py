@@ -0,0 +1,150 @@
+"""
+test_sqlite_history.py
+
+Unit tests for SQLiteChatHistory (durable SQLite chat history)
+
+Key features:
+- Append/load order, group commit, tail reads, clean_history
+- Persistence across reopen and isolation between sessions
+- Failed writes can be retried without duplicating messages
+"""
+import sqlite3
+
+import pytest
+
+from domain import ChatMessage
+from memory import SQLiteChatHistory
+
+def _messages(n: int, prefix: str = "msg"):
+    return [
+        ChatMessage(role="user" if i % 2 == 0 else "assistant", content=f"{prefix}{i}")
+        for i in range(n)
+    ]
+
+class TestSQLiteChatHistory:
+    """Tests for SQLiteChatHistory"""
+
+    def test_initial_empty_history(self):
+        """New session has no messages"""
+        history = SQLiteChatHistory(":memory:", "s1")
+
+        assert history.load_history() == []
+        assert len(history) == 0
+
+    def test_add_and_load_in_order(self):
+        """Messages load oldest-first with role, content and timestamp intact"""
+        history = SQLiteChatHistory(":memory:", "s1", batch_size=4)
+        messages = _messages(10)
+        for m in messages:
+            history.add_message(m)
+
+        assert history.load_history() == messages
+        assert len(history) == 10
+
+    def test_load_recent_returns_tail(self):
+        """load_recent(n) returns the last n messages in chronological order"""
+        history = SQLiteChatHistory(":memory:", "s1")
+        messages = _messages(50)
+        history.add_messages(messages)
+
+        assert history.load_recent(5) == messages[-5:]
+        assert history.load_recent(100) == messages
+        assert history.load_recent(0) == []
+
+    def test_persists_across_reopen(self, tmp_path):
+        """Closed history (with pending batch) is readable after reopening"""
+        path = tmp_path / "history.sqlite3"
+        history = SQLiteChatHistory(path, "s1", batch_size=100)
+        messages = _messages(3)
+        for m in messages:
+            history.add_message(m)
+        history.close()
+
+        reopened = SQLiteChatHistory(path, "s1")
+        reopened.add_message(ChatMessage(role="user", content="after"))
+
+        assert [m.content for m in reopened.load_history()] == ["msg0", "msg1", "msg2", "after"]
+        assert len(reopened) == 4
+
+    def test_sessions_are_isolated(self, tmp_path):
+        """Sessions sharing a file do not see each other's messages"""
+        path = tmp_path / "history.sqlite3"
+        a = SQLiteChatHistory(path, "a")
+        b = SQLiteChatHistory(path, "b")
+        a.add_messages(_messages(2, "a"))
+        b.add_messages(_messages(3, "b"))
+
+        assert [m.content for m in a.load_history()] == ["a0", "a1"]
+        assert len(b.load_history()) == 3
+
+    def test_clean_history_clears_session(self):
+        """clean_history removes stored and pending messages"""
+        history = SQLiteChatHistory(":memory:", "s1", batch_size=10)
+        history.add_messages(_messages(3))
+        history.add_message(ChatMessage(role="user", content="pending"))
+
+        history.clean_history()
+
+        assert history.load_history() == []
+        assert len(history) == 0
+
+    def test_load_page_and_iteration(self):
+        """load_page pages backwards by seq; iteration covers pending and committed rows"""
+        history = SQLiteChatHistory(":memory:", "s1", batch_size=8)
+        messages = _messages(20)
+        for m in messages:
+            history.add_message(m)
+
+        assert history.load_page(None, 5) == messages[-5:]
+        assert history.load_page(15, 5) == messages[10:15]
+        assert history.load_page(3, 5) == messages[:3]
+        assert list(history) == messages
+        assert list(history.iter_reverse()) == messages[::-1]
+
+class FlakyConnection:
+    """sqlite3 connection proxy whose next `failures` executemany calls raise"""
+    def __init__(self, conn, failures: int = 1):
+        self._conn = conn
+        self.failures = failures
+
+    def executemany(self, *args):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self._conn.executemany(*args)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+class TestFailedWrites:
+    """A failed write consumes no seq, so retrying it stores each message once"""
+
+    def test_add_messages_retry_stores_once(self):
+        history = SQLiteChatHistory(":memory:", "s1")
+        history._conn = FlakyConnection(history._conn)
+        messages = _messages(3)
+
+        with pytest.raises(sqlite3.OperationalError):
+            history.add_messages(messages)
+        history.add_messages(messages)
+
+        assert history.load_history() == messages
+        assert len(history) == 3
+
+    def test_add_message_retry_keeps_earlier_pending(self):
+        history = SQLiteChatHistory(":memory:", "s1", batch_size=2)
+        history._conn = FlakyConnection(history._conn)
+        first, second = _messages(2)
+        history.add_message(first)
+
+        with pytest.raises(sqlite3.OperationalError):
+            history.add_message(second)
+        history.add_message(second)
+
+        assert history.load_history() == [first, second]
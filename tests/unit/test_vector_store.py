@@ -0,0 +1,123 @@
+"""
+test_vector_store.py
+
+Unit tests for HashingEmbeddingProvider, VectorStore and LongTermMemory
+
+Key features:
+- Deterministic, normalized hashing embeddings
+- Exact search, owner filter, batched search, growth
+- Memory-mapped persistence across reopen; IVF mode agrees with exact search
+- A torn metadata tail is truncated on open, so later appends reload cleanly
+- LongTermMemory remember/recall per learner
+"""
+import numpy as np
+import pytest
+
+from ai import HashingEmbeddingProvider
+from memory import LongTermMemory, VectorStore
+from utils import ValidationError
+
+def _unit(rows: int, dim: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+class TestHashingEmbeddingProvider:
+    """Tests for HashingEmbeddingProvider"""
+
+    def test_deterministic_and_normalized(self):
+        provider = HashingEmbeddingProvider(dim=64)
+        a = provider.embed(["Học Python cơ bản", ""])
+        b = provider.embed(["Học Python cơ bản", ""])
+
+        assert a.dtype == np.float32
+        assert np.array_equal(a, b)
+        assert np.isclose(np.linalg.norm(a[0]), 1.0)
+        assert not a[1].any()
+
+    def test_similar_texts_score_higher(self):
+        provider = HashingEmbeddingProvider()
+        q, near, far = provider.embed(["python là gì", "Python là gì vậy?", "nấu phở bò"])
+
+        assert q @ near > q @ far
+
+class TestVectorStore:
+    """Tests for VectorStore"""
+
+    def test_exact_search_and_owner_filter(self):
+        store = VectorStore(dim=8, capacity=2)
+        vectors = _unit(10, 8)
+        store.add("alice", [f"a{i}" for i in range(5)], vectors[:5])
+        store.add("bob", [f"b{i}" for i in range(5)], vectors[5:])
+
+        [hit] = store.search(vectors[7], k=1)
+        assert (hit.id, hit.owner, hit.text) == (7, "bob", "b2")
+        assert {h.owner for h in store.search(vectors[7], k=3, owner="alice")} == {"alice"}
+        assert store.search(vectors[7], owner="nobody") == []
+        assert [hits[0].id for hits in store.search_many(vectors[[1, 8]], k=1)] == [1, 8]
+
+    def test_rejects_bad_shape(self):
+        store = VectorStore(dim=8)
+
+        with pytest.raises(ValidationError):
+            store.add("a", ["x"], np.zeros((1, 4), dtype=np.float32))
+
+    def test_memmap_persists_across_reopen(self, tmp_path):
+        vectors = _unit(50, 16)
+        store = VectorStore(dim=16, path=tmp_path, capacity=4)
+        store.add("u1", [f"t{i}" for i in range(50)], vectors)
+        del store
+
+        reopened = VectorStore(dim=16, path=tmp_path)
+
+        assert len(reopened) == 50
+        [hit] = reopened.search(vectors[33], k=1)
+        assert (hit.id, hit.text) == (33, "t33")
+
+    def test_torn_metadata_tail_is_truncated_on_open(self, tmp_path):
+        vectors = _unit(3, 16)
+        store = VectorStore(dim=16, path=tmp_path)
+        store.add("u1", ["t0", "t1"], vectors[:2])
+        del store
+        with open(tmp_path / "meta.ndjson", "ab") as f:
+            f.write(b'{"owner": "u1", "te')  # crash mid-append
+
+        reopened = VectorStore(dim=16, path=tmp_path)
+        assert len(reopened) == 2
+        reopened.add("u1", ["t2"], vectors[2:])
+        del reopened
+
+        again = VectorStore(dim=16, path=tmp_path)
+        assert len(again) == 3
+        [hit] = again.search(vectors[2], k=1)
+        assert (hit.id, hit.text) == (2, "t2")
+
+    def test_ivf_matches_exact_for_nearest_item(self):
+        vectors = _unit(3000, 32, seed=1)
+        exact = VectorStore(dim=32, capacity=4096)
+        ivf = VectorStore(dim=32, capacity=4096, ivf_threshold=2000, nprobe=8)
+        texts = [str(i) for i in range(3000)]
+        exact.add("u", texts, vectors)
+        ivf.add("u", texts[:2500], vectors[:2500])
+        ivf.add("u", texts[2500:], vectors[2500:])
+
+        assert ivf.ivf_enabled and not exact.ivf_enabled
+        for i in (0, 1234, 2999):
+            assert ivf.search(vectors[i], k=1)[0].id == exact.search(vectors[i], k=1)[0].id == i
+
+class TestLongTermMemory:
+    """Tests for LongTermMemory"""
+
+    def test_recall_per_owner(self):
+        provider = HashingEmbeddingProvider(dim=256)
+        memory = LongTermMemory(provider, VectorStore(dim=256))
+        memory.remember("learner-1", ["Mục tiêu: trở thành data analyst trong 6 tháng", "Thích học qua video"])
+        memory.remember("learner-2", ["Mục tiêu: học lập trình game"])
+
+        hits = memory.recall("learner-1", "mục tiêu data analyst", k=1)
+
+        assert [h.text for h in hits] == ["Mục tiêu: trở thành data analyst trong 6 tháng"]
+        assert all(h.owner == "learner-2" for h in memory.recall("learner-2", "mục tiêu", k=5))
+
+    def test_dim_mismatch(self):
+        with pytest.raises(ValueError):
+            LongTermMemory(HashingEmbeddingProvider(dim=16), VectorStore(dim=32))
@@ -0,0 +1,194 @@
+"""
+test_write_behind.py
+
+Unit tests for WriteBehindHistory (asynchronous batched persistence)
+
+Key features:
+- Reads served from the front immediately; backend catches up after flush()
+- Batching, ordered clean_history, preload, close draining the queue
+- Retry of failed batches and metrics; one-by-one backends resume without duplicates
+- Appends racing close() are rejected instead of stranded behind the stop marker
+- close() returns while the backend is down and a producer is blocked on a full queue
+"""
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from domain import ChatMessage
+from memory import SQLiteChatHistory, WriteBehindHistory
+
+def _messages(n: int):
+    return [ChatMessage(role="user", content=f"msg{i}") for i in range(n)]
+
+class TestWriteBehindHistory:
+    """Tests for WriteBehindHistory"""
+
+    def test_front_is_immediate_and_backend_catches_up(self):
+        backend = SQLiteChatHistory(":memory:", "s1")
+        history = WriteBehindHistory(backend, flush_interval=0.01)
+        messages = _messages(100)
+        for m in messages:
+            history.add_message(m)
+
+        assert history.load_history() == messages
+        history.flush()
+        assert backend.load_history() == messages
+        stats = history.stats()
+        assert stats["flushed"] == 100
+        assert stats["pending"] == 0
+        history.close()
+
+    def test_writes_in_batches(self):
+        backend = MagicMock()
+        backend.__iter__.return_value = iter([])
+        history = WriteBehindHistory(backend, batch_size=10, flush_interval=5)
+        for m in _messages(30):
+            history.add_message(m)
+        history.flush()
+
+        sizes = [len(call.args[0]) for call in backend.add_messages.call_args_list]
+        assert sizes == [10, 10, 10]
+        history.close()
+
+    def test_clean_history_is_ordered_after_queued_appends(self):
+        backend = SQLiteChatHistory(":memory:", "s1")
+        history = WriteBehindHistory(backend, flush_interval=0.01)
+        history.add_message(ChatMessage(role="user", content="old"))
+        history.clean_history()
+        history.add_message(ChatMessage(role="user", content="new"))
+        history.close()
+
+        assert [m.content for m in backend.load_history()] == ["new"]
+        assert [m.content for m in history.load_history()] == ["new"]
+
+    def test_preload_and_close_drains_queue(self):
+        backend = SQLiteChatHistory(":memory:", "s1")
+        backend.add_messages(_messages(3))
+        history = WriteBehindHistory(backend, flush_interval=10)
+        history.add_message(ChatMessage(role="assistant", content="tail"))
+
+        history.close()
+
+        assert len(history) == 4
+        assert [m.content for m in backend.load_history()][-1] == "tail"
+        with pytest.raises(RuntimeError):
+            history.add_message(ChatMessage(role="user", content="late"))
+
+    def test_failed_batch_is_retried(self):
+        backend = MagicMock()
+        backend.__iter__.return_value = iter([])
+        calls = []
+        def flaky(messages):
+            calls.append(len(messages))
+            if len(calls) == 1:
+                raise ConnectionError("backend down")
+        backend.add_messages.side_effect = flaky
+        history = WriteBehindHistory(backend, flush_interval=0.01, retry_interval=0.01)
+        history.add_message(ChatMessage(role="user", content="x"))
+
+        history.flush()
+
+        assert calls == [1, 1]
+        assert history.stats()["flushed"] == 1
+        history.close()
+
+    def test_one_by_one_retry_resumes_without_duplicates(self):
+        written = []
+        class OneByOne:
+            def __iter__(self):
+                return iter([])
+
+            def add_message(self, message):
+                if len(written) == 1 and not getattr(self, "failed", False):
+                    self.failed = True
+                    raise ConnectionError("backend down")
+                written.append(message.content)
+
+        history = WriteBehindHistory(OneByOne(), batch_size=3, flush_interval=0.2, retry_interval=0.01)
+        for m in _messages(3):
+            history.add_message(m)
+
+        history.flush()
+
+        assert written == ["msg0", "msg1", "msg2"]
+        assert history.stats()["flushed"] == 3
+        history.close()
+
+    def test_append_racing_close_never_strands_flush(self):
+        backend = MagicMock()
+        backend.__iter__.return_value = iter([])
+        history = WriteBehindHistory(backend, flush_interval=0)
+        stop = threading.Event()
+        rejected = []
+
+        def produce():
+            while not stop.is_set():
+                try:
+                    history.add_message(ChatMessage(role="user", content="x"))
+                except RuntimeError:
+                    rejected.append(True)
+                    return
+
+        producers = [threading.Thread(target=produce) for _ in range(4)]
+        for producer in producers:
+            producer.start()
+        history.close()
+        stop.set()
+        for producer in producers:
+            producer.join()
+
+        flusher = threading.Thread(target=history.flush, daemon=True)
+        flusher.start()
+        flusher.join(2)
+        assert not flusher.is_alive()
+        assert history.stats()["pending"] == 0
+
+    def test_bounded_queue_applies_backpressure(self):
+        backend = MagicMock()
+        backend.__iter__.return_value = iter([])
+        gate = threading.Event()
+        backend.add_messages.side_effect = lambda messages: gate.wait()
+        history = WriteBehindHistory(backend, max_queue=2, batch_size=1, flush_interval=0)
+        done = threading.Event()
+
+        def produce():
+            for m in _messages(5):
+                history.add_message(m)
+            done.set()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        assert not done.wait(0.2)
+        gate.set()
+        assert done.wait(2)
+        producer.join()
+        history.close()
+
+    def test_close_with_backend_down_and_full_queue_does_not_hang(self):
+        backend = MagicMock()
+        backend.__iter__.return_value = iter([])
+        backend.add_messages.side_effect = ConnectionError("backend down")
+        history = WriteBehindHistory(backend, max_queue=2, batch_size=1, flush_interval=0, retry_interval=60)
+        errors = []
+
+        def produce():
+            try:
+                for m in _messages(10):
+                    history.add_message(m)
+            except RuntimeError as e:
+                errors.append(e)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        producer.join(0.3)
+        assert producer.is_alive()  # blocked: the queue is full and the flusher is backing off
+
+        closer = threading.Thread(target=history.close, daemon=True)
+        closer.start()
+        closer.join(3)
+        producer.join(3)
+        assert not closer.is_alive()
+        assert not producer.is_alive()
+        assert len(errors) == 1
+        assert history.stats()["failed"] > 0
@@ -6,6 +6,7 @@ Streamlit UI for chat history and input; consumes AppService.handle_message() ev
 Key features:
 - Render existing chat history from AppService memory
 - On user input, stream events (TextChunk, StatusUpdate, ErrorOccurred, SessionExpired) and update UI
+- Stream is closed when the script stops mid-answer, cancelling the upstream LLM call
 """
 from __future__ import annotations
 
@@ -19,6 +20,7 @@ from domain.events import (
     SessionExpired,
 )
 from config import MessageKey
+from utils import closing_stream
 
 if TYPE_CHECKING:
     from services import AppService
@@ -30,8 +32,7 @@ def render_chat_interface(app: AppService) -> None:
     Args:
         app: AppService instance providing history, messages and handle_message()
     """
-    history = app._memory.load_history()
-    for msg in history:
+    for msg in app.iter_history():
         role = "assistant" if msg.role == "assistant" else "user"
         with st.chat_message(role):
             st.markdown(msg.content)
@@ -47,32 +48,34 @@ def render_chat_interface(app: AppService) -> None:
             full = ""
             showing_status = True
 
-            for event in app.handle_message(user_input):
-                match event:
-                    case TextChunk(text=text):
-                        if showing_status:
-                            full = text
-                            showing_status = False
-                        else:
-                            full += text
-                        placeholder.markdown(full)
-                    case StatusUpdate(message=message):
-                        full = message
-                        showing_status = True
-                        placeholder.markdown(full)
-                    case ErrorOccurred(user_message=user_message):
-                        if showing_status:
-                            full = user_message
-                        else:
-                            full += user_message
-                        showing_status = False
-                        placeholder.markdown(full)
-                    case SessionExpired(message=message):
-                        if showing_status:
+            # Closed explicitly if the script is stopped mid-answer (new session, tab closed)
+            with closing_stream(app.handle_message(user_input)) as events:
+                for event in events:
+                    match event:
+                        case TextChunk(text=text):
+                            if showing_status:
+                                full = text
+                                showing_status = False
+                            else:
+                                full += text
+                            placeholder.markdown(full)
+                        case StatusUpdate(message=message):
                             full = message
-                        else:
-                            full += message
-                        showing_status = False
-                        placeholder.markdown(full)
+                            showing_status = True
+                            placeholder.markdown(full)
+                        case ErrorOccurred(user_message=user_message):
+                            if showing_status:
+                                full = user_message
+                            else:
+                                full += user_message
+                            showing_status = False
+                            placeholder.markdown(full)
+                        case SessionExpired(message=message):
+                            if showing_status:
+                                full = message
+                            else:
+                                full += message
+                            showing_status = False
+                            placeholder.markdown(full)
 
             st.rerun()
\ No newline at end of file
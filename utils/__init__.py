@@ -2,21 +2,63 @@
 Utility modules for LearnPath chatbot
 
 Key features:
-- exceptions: LearnPathException, LLMServiceError, ValidationError
+- exceptions: LearnPathException, LLMServiceError, ValidationError, OverloadedError, CircuitOpenError
 - logger: setup_logger, shared logger instance
-- retry: gemini_retry, TRANSIENT_ERRORS
+- retry: RetryPolicy, RetryBudget, retry_budget, deadline, time_remaining, iter_until, is_retryable, TRANSIENT_ERRORS
+- rate_limit: TokenBucket, KeyedRateLimiter
+- timer_wheel: TimerWheel (hashed wheel for mass expiry)
+- text: normalize_vi, fold_diacritics, tokenize_vi (Vietnamese text for retrieval)
+- cancellation: CancellationToken, closing_stream (stop in-flight streams early)
+- metrics: Counter, Gauge, MetricsRegistry and the process-wide metrics registry
+- circuit_breaker: CircuitBreaker (closed / open / half-open) for the LLM dependency
 """
 
-from .exceptions import LearnPathException, LLMServiceError, ValidationError
+from .exceptions import LearnPathException, LLMServiceError, ValidationError, OverloadedError, CircuitOpenError
 from .logger import logger, setup_logger
-from .retry import gemini_retry, TRANSIENT_ERRORS
+from .retry import (
+    RetryPolicy,
+    RetryBudget,
+    retry_budget,
+    deadline,
+    time_remaining,
+    iter_until,
+    is_retryable,
+    TRANSIENT_ERRORS,
+)
+from .rate_limit import TokenBucket, KeyedRateLimiter
+from .timer_wheel import TimerWheel
+from .text import normalize_vi, fold_diacritics, tokenize_vi
+from .cancellation import CancellationToken, closing_stream
+from .metrics import Counter, Gauge, MetricsRegistry, metrics
+from .circuit_breaker import CircuitBreaker
 
 __all__ = [
     "LearnPathException",
     "LLMServiceError",
     "ValidationError",
+    "OverloadedError",
+    "CircuitOpenError",
     "logger",
     "setup_logger",
-    "gemini_retry",
+    "RetryPolicy",
+    "RetryBudget",
+    "retry_budget",
+    "deadline",
+    "time_remaining",
+    "iter_until",
+    "is_retryable",
     "TRANSIENT_ERRORS",
+    "TokenBucket",
+    "KeyedRateLimiter",
+    "TimerWheel",
+    "normalize_vi",
+    "fold_diacritics",
+    "tokenize_vi",
+    "CancellationToken",
+    "closing_stream",
+    "Counter",
+    "Gauge",
+    "MetricsRegistry",
+    "metrics",
+    "CircuitBreaker",
 ]
@@ -0,0 +1,93 @@
+"""
+cancellation.py
+
+Cooperative cancellation for streaming pipelines
+
+Key features:
+- CancellationToken: thread-safe one-shot signal; callbacks registered with on_cancel run
+  once when it fires (e.g. cancel the upstream LLM call from another thread)
+- closing_stream(): context manager that closes a generator-like stream on exit, so closing
+  an outer generator (client cancel or disconnect) closes every stream it was consuming
+  instead of leaving them to garbage collection
+"""
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+from utils.logger import logger
+
+T = TypeVar("T")
+
+class CancellationToken:
+    """
+    One-shot cancellation signal shared by the caller and the layers doing the work
+
+    Responsibilities:
+    - cancel(): mark cancelled once and run registered callbacks (outside the lock)
+    - cancelled / reason: polled between chunks by producers
+    - on_cancel(): register a callback; returns a function that unregisters it
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_id = 0
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Cancel the token; return True if this call cancelled it (False if already cancelled)"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            self._run(callback)
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run callback when the token is cancelled (immediately if it already is)
+
+        Returns:
+            Function removing the callback (no-op once it has run)
+        """
+        with self._lock:
+            if not self._event.is_set():
+                callback_id = self._next_id
+                self._next_id += 1
+                self._callbacks[callback_id] = callback
+                return lambda: self._remove(callback_id)
+        self._run(callback)
+        return lambda: None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or timeout; return whether the token is cancelled"""
+        return self._event.wait(timeout)
+
+    def _remove(self, callback_id: int) -> None:
+        with self._lock:
+            self._callbacks.pop(callback_id, None)
+
+    @staticmethod
+    def _run(callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"Cancellation callback failed: {e}")
+
+@contextmanager
+def closing_stream(stream: Iterable[T]) -> Iterator[Iterable[T]]:
+    """Yield stream and call its close() on exit if it has one (plain iterators are left alone)"""
+    try:
+        yield stream
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,154 @@
+"""
+circuit_breaker.py
+
+Circuit breaker for calls to an external dependency (closed / open / half-open)
+
+Key features:
+- CircuitBreaker: opens when the failure rate over the last `window` calls (slow calls count
+  as failures) reaches `failure_rate`; rejects immediately while open; after `open_seconds`
+  lets `half_open_calls` probes through and closes on success or reopens on failure
+- CircuitOpenError: raised for rejected calls so callers can switch to degraded mode
+- Metrics: circuit_breaker_state{name} (0 closed, 1 half-open, 2 open),
+  circuit_breaker_rejected_total{name}
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional
+
+from utils.exceptions import CircuitOpenError
+from utils.logger import logger
+from utils.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+STATE = metrics.gauge("circuit_breaker_state", "Breaker state: 0 closed, 1 half-open, 2 open", ("name",))
+REJECTED = metrics.counter("circuit_breaker_rejected_total", "Calls rejected by an open breaker", ("name",))
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker
+
+    Responsibilities:
+    - acquire(): admit a call or raise CircuitOpenError
+    - on_success(latency) / on_failure() / on_ignored(): report the admitted call's outcome
+      (exactly one per acquire; on_ignored for calls that say nothing about the dependency)
+    - Track state transitions and publish them as a metric
+    """
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: int = 20,
+        slow_call_seconds: Optional[float] = None,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            name: Label for metrics and logs
+            failure_rate: Share of failed calls in the window that opens the breaker
+            min_calls: Calls needed in the window before the rate is trusted
+            window: Number of most recent outcomes considered
+            slow_call_seconds: Successful calls slower than this count as failures (None: off)
+            open_seconds: Time spent open before probing
+            half_open_calls: Concurrent probes allowed while half-open
+            clock: Monotonic time source (injectable for tests)
+        """
+        if not 0 < failure_rate <= 1:
+            raise ValueError("failure_rate must be in (0, 1]")
+        if not 1 <= min_calls <= window:
+            raise ValueError("Require 1 <= min_calls <= window")
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        STATE.set(_STATE_VALUES[CLOSED], name=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def acquire(self) -> None:
+        """
+        Admit one call
+
+        Raises:
+            CircuitOpenError: While open, or half-open with all probe slots taken
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return
+        REJECTED.inc(name=self.name)
+        raise CircuitOpenError()
+
+    def on_success(self, latency: Optional[float] = None) -> None:
+        """Record a call that completed (a slow one counts as a failure)"""
+        if self.slow_call_seconds is not None and latency is not None and latency > self.slow_call_seconds:
+            self._record(False)
+        else:
+            self._record(True)
+
+    def on_failure(self) -> None:
+        self._record(False)
+
+    def on_ignored(self) -> None:
+        """Release an admitted call without an outcome (cancelled, invalid input)"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _record(self, ok: bool) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if ok:
+                    self._transition(CLOSED)
+                else:
+                    self._trip()
+                return
+            if self._state == OPEN:
+                return  # admitted before the breaker opened
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures >= self.failure_rate * len(self._outcomes):
+                self._trip()
+
+    def _trip(self) -> None:
+        """Open the breaker (caller holds the lock)"""
+        self._opened_at = self._clock()
+        self._transition(OPEN)
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.warning(f"Circuit breaker {self.name}: {self._state} -> {state}")
+        self._state = state
+        self._outcomes.clear()
+        self._probes = 0
+        STATE.set(_STATE_VALUES[state], name=self.name)
@@ -7,6 +7,8 @@ Key features:
 - LearnPathException: base (code, message, status_code, to_dict)
 - LLMServiceError: LLM communication failure
 - ValidationError: input or configuration validation failure
+- OverloadedError: LLM capacity exhausted; request shed instead of queued
+- CircuitOpenError: LLM circuit breaker open; caller should serve degraded
 """
 
 from http import HTTPStatus
@@ -62,4 +64,20 @@ class ValidationError(LearnPathException):
     """
     code = "VALIDATION_ERROR"
     message = "Invalid input data provided"
-    status_code = HTTPStatus.BAD_REQUEST.value
\ No newline at end of file
+    status_code = HTTPStatus.BAD_REQUEST.value
+
+class OverloadedError(LLMServiceError):
+    """
+    Exception raised when an LLM call is shed because the lane's queue is full
+    """
+    code = "OVERLOADED"
+    message = "The LLM service is overloaded, try again later"
+    status_code = HTTPStatus.SERVICE_UNAVAILABLE.value
+
+class CircuitOpenError(LLMServiceError):
+    """
+    Exception raised when a call is rejected because the LLM circuit breaker is open
+    """
+    code = "CIRCUIT_OPEN"
+    message = "The LLM service is temporarily unavailable"
+    status_code = HTTPStatus.SERVICE_UNAVAILABLE.value
@@ -0,0 +1,132 @@
+"""
+metrics.py
+
+In-process metrics registry (counters and gauges) with Prometheus text exposition
+
+Key features:
+- Counter, Gauge: thread-safe, optional label names; values keyed by label values
+- MetricsRegistry: get-or-create by name, snapshot() for tests/logs, render_prometheus()
+  for a /metrics endpoint
+- metrics: process-wide default registry
+"""
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+class Counter:
+    """
+    Monotonic counter
+
+    Responsibilities:
+    - inc(amount, **labels): add to the series selected by label values
+    - value(**labels), samples(): read current values
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the series by amount (must be non-negative)"""
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Current value of one series (0 if never touched)"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[Dict[str, str], float]]:
+        """All series as (labels, value)"""
+        with self._lock:
+            items = list(self._values.items())
+        return [(dict(zip(self.labelnames, key)), value) for key, value in items]
+
+class Gauge(Counter):
+    """Value that can go up and down (set, inc, dec)"""
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+class MetricsRegistry:
+    """
+    Named collection of metrics
+
+    Responsibilities:
+    - counter()/gauge(): return the existing metric of that name or register a new one
+    - snapshot(): {name: {label string: value}}
+    - render_prometheus(): text exposition format 0.0.4
+    """
+    def __init__(self):
+        self._metrics: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def _get_or_create(self, cls: type, name: str, help: str, labelnames: Sequence[str]):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help, labelnames)
+                self._metrics[name] = metric
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Current values keyed by metric name, then by 'k=v,...' label string"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            m.name: {",".join(f"{k}={v}" for k, v in labels.items()): value for labels, value in m.samples()}
+            for m in metrics
+        }
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for labels, value in m.samples():
+                if labels:
+                    rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                    lines.append(f"{m.name}{{{rendered}}} {value:g}")
+                else:
+                    lines.append(f"{m.name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+metrics = MetricsRegistry()
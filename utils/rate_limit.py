@@ -0,0 +1,119 @@
+"""
+rate_limit.py
+
+Token-bucket rate limiting helpers (thread-safe)
+
+Key features:
+- TokenBucket: refill at a fixed rate up to a burst capacity; blocking acquire / non-blocking try_acquire
+- KeyedRateLimiter: one TokenBucket per key (e.g. per API key)
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Hashable
+
+class TokenBucket:
+    """
+    Classic token bucket on a monotonic clock
+
+    Responsibilities:
+    - Refill tokens continuously at `rate` per second, capped at `capacity`
+    - try_acquire: take tokens if available without waiting
+    - acquire: block until tokens are available
+    """
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize a full bucket
+
+        Args:
+            rate: Tokens added per second (must be > 0)
+            capacity: Maximum tokens held (burst size, must be > 0)
+            clock: Monotonic time source (injectable for tests)
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Add tokens for elapsed time (caller holds the lock)"""
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available; return False without waiting otherwise"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Block until tokens are available, then take them
+
+        Raises:
+            ValueError: If tokens exceeds capacity (the bucket could never hold them)
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of capacity {self.capacity}")
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available (after refill)"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+class KeyedRateLimiter:
+    """
+    Independent token buckets per key
+
+    Responsibilities:
+    - Lazily create one TokenBucket per key with shared rate/capacity
+    - acquire(key): block until that key's bucket has a token
+    """
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens per second for each key
+            capacity: Burst capacity for each key (>= 1 so a single acquire can succeed)
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity >= 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key: Hashable) -> TokenBucket:
+        """Return (creating if needed) the bucket for key"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self._buckets[key] = bucket
+            return bucket
+
+    def acquire(self, key: Hashable, tokens: float = 1.0) -> None:
+        """Block until key's bucket has tokens, then take them"""
+        self.bucket(key).acquire(tokens)
@@ -1,39 +1,267 @@
 """
 retry.py
 
-Retry helpers for external API calls (Gemini transient errors)
+Unified retry policy for external API calls (Gemini transient errors)
 
 Key features:
-- gemini_retry: decorator for transient Gemini errors (exponential backoff)
-- TRANSIENT_ERRORS: tuple of retryable Google API exceptions
+- RetryPolicy: capped exponential backoff with full jitter; call() for plain calls,
+  retry_delay() for loops that cannot be wrapped (streams retried before the first chunk)
+- RetryBudget: process-wide token bucket; every call deposits `ratio` tokens and every retry
+  spends one, so retries stay under ~10% of calls during an outage (plus a small per-second reserve)
+- deadline()/time_remaining(): caller deadline in a context variable; retries that would
+  outlive it are denied and clients clamp their request timeout to it
+- iter_until(stream, at): pull a stream under a deadline from inside a generator, the context
+  variable set only while each item is pulled
+- is_retryable: transient Google API errors (directly or as the cause of LLMServiceError);
+  rate limiting (429) is left to the adaptive concurrency limit instead
+- Metrics: retries_total{policy}, retries_denied_total{policy, reason}
 """
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
 
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, before_sleep_log
 from google.api_core import exceptions as google_exceptions
 
+from config import settings
 from utils.logger import logger
+from utils.metrics import metrics
+from utils.rate_limit import TokenBucket
 
+T = TypeVar("T")
+
+# ResourceExhausted (429) is deliberately absent: retrying into a quota only deepens the
+# overload; it shrinks the scheduler lane limit instead (ai.is_rate_limited)
 TRANSIENT_ERRORS = (
     google_exceptions.DeadlineExceeded,
-    google_exceptions.ResourceExhausted,
     google_exceptions.ServiceUnavailable,
     google_exceptions.Aborted
 )
 
-def gemini_retry(max_retries: int = 3):
+RETRIES = metrics.counter("retries_total", "Retries performed", ("policy",))
+RETRIES_DENIED = metrics.counter(
+    "retries_denied_total", "Retries refused by the retry budget or the caller's deadline", ("policy", "reason")
+)
+
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("learnpath_deadline", default=None)
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[float]:
     """
-    Build a tenacity retry decorator for transient Gemini API errors
+    Bound everything called inside the block to `seconds` from now
+
+    Nested deadlines never extend an outer one. Do not enter it inside a generator that
+    yields within the block: the value would leak into the consumer's context.
+
+    Yields:
+        Absolute deadline on the time.monotonic clock
+    """
+    with _deadline_at(time.monotonic() + seconds) as at:
+        yield at
+
+@contextmanager
+def _deadline_at(at: float) -> Iterator[float]:
+    """Set the absolute deadline `at` (time.monotonic) for the block, never past an outer one"""
+    outer = _DEADLINE.get()
+    if outer is not None:
+        at = min(at, outer)
+    token = _DEADLINE.set(at)
+    try:
+        yield at
+    finally:
+        _DEADLINE.reset(token)
+
+def iter_until(stream: Iterable[T], at: Optional[float]) -> Iterator[T]:
+    """
+    Iterate stream with the absolute deadline `at` (time.monotonic) in effect while each item
+    is pulled, so clients called lazily by the stream clamp their timeouts to it
+
+    Safe to use inside a generator: the context variable is reset before every yield.
 
     Args:
-        max_retries: Maximum number of retry attempts before failing
-
-    Returns:
-        Decorator that retries on TRANSIENT_ERRORS with exponential backoff
-    """
-    return retry(
-        reraise=True,
-        stop=stop_after_attempt(max_retries),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        retry=retry_if_exception_type(TRANSIENT_ERRORS),
-        before_sleep=before_sleep_log(logger, "warning")
-    )
\ No newline at end of file
+        stream: Iterable to pull from (e.g. an LLM chat stream)
+        at: Absolute deadline; None leaves the caller's deadline (if any) as is
+    """
+    iterator = iter(stream)
+    while True:
+        with _deadline_at(at) if at is not None else nullcontext():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the current deadline (may be <= 0), or None without a deadline"""
+    at = _DEADLINE.get()
+    return None if at is None else at - time.monotonic()
+
+def is_retryable(error: BaseException) -> bool:
+    """True for transient upstream errors, raised directly or wrapped as the cause"""
+    return any(isinstance(candidate, TRANSIENT_ERRORS) for candidate in (error, error.__cause__))
+
+class RetryBudget:
+    """
+    Process-wide cap on retries relative to calls
+
+    Responsibilities:
+    - record_call(): deposit `ratio` tokens (up to `capacity`) per first attempt
+    - try_spend(): take one token for a retry; fall back to a small time-based reserve
+      so a quiet process can still retry now and then
+    - reset(): refill to capacity
+    """
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        capacity: float = 10.0,
+        min_per_second: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            ratio: Retry tokens earned per call (0.1: retries <= 10% of calls)
+            capacity: Maximum saved tokens (burst of retries after a quiet period)
+            min_per_second: Reserve refill rate independent of traffic
+            clock: Monotonic time source (injectable for tests)
+        """
+        if ratio < 0 or capacity <= 0:
+            raise ValueError("ratio must be >= 0 and capacity > 0")
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._reserve = TokenBucket(rate=min_per_second, capacity=1.0, clock=clock) if min_per_second > 0 else None
+        self._lock = threading.Lock()
+
+    def record_call(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take one retry token; False means the retry must not happen"""
+        with self._lock:
+            if self._tokens >= 1.0 - 1e-9:  # ten deposits of 0.1 sum to 0.999...
+                self._tokens = max(0.0, self._tokens - 1.0)
+                return True
+        return self._reserve is not None and self._reserve.try_acquire()
+
+    def reset(self) -> None:
+        """Refill to capacity"""
+        with self._lock:
+            self._tokens = self.capacity
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            return self._tokens
+
+retry_budget = RetryBudget(ratio=settings.RETRY_BUDGET_RATIO)
+
+class RetryPolicy:
+    """
+    The one retry strategy used by every layer that talks to the LLM
+
+    Responsibilities:
+    - Decide whether a failed attempt may be retried: error kind, attempts left,
+      time left before the deadline, retry budget
+    - Full-jitter backoff: uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+    - Count retries spent and denied per policy name
+    """
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        retry_on: Callable[[BaseException], bool] = is_retryable,
+        budget: Optional[RetryBudget] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+    ):
+        """
+        Args:
+            name: Label for metrics and logs
+            max_attempts: Total attempts including the first
+            base_delay: Backoff cap of the first retry (seconds)
+            max_delay: Backoff cap of any retry (seconds)
+            retry_on: Which errors are worth retrying
+            budget: Retry budget to draw from (default: process-wide retry_budget)
+            sleep: Sleep function (injectable for tests)
+            rng: Uniform [0, 1) source for jitter (injectable for tests)
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be >= 1")
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self.budget = budget if budget is not None else retry_budget
+        self._sleep = sleep
+        self._rng = rng
+
+    def record_call(self) -> None:
+        """Count a first attempt towards the retry budget"""
+        self.budget.record_call()
+
+    def retry_delay(
+        self,
+        attempt: int,
+        error: Optional[BaseException] = None,
+        *,
+        remaining: Optional[float] = None,
+    ) -> Optional[float]:
+        """
+        Decide whether the failed attempt may be retried, spending budget if so
+
+        Args:
+            attempt: 1-based number of the attempt that just failed
+            error: The failure (None: failure without an exception, e.g. an empty stream)
+            remaining: Seconds left for the caller; never extends time_remaining()
+
+        Returns:
+            Seconds to wait before the next attempt, or None to give up
+        """
+        if error is not None and not self.retry_on(error):
+            return None
+        if attempt >= self.max_attempts:
+            return None
+        delay = self._rng() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        context_remaining = time_remaining()
+        if remaining is None or (context_remaining is not None and context_remaining < remaining):
+            remaining = context_remaining
+        if remaining is not None and delay >= remaining:
+            RETRIES_DENIED.inc(policy=self.name, reason="deadline")
+            logger.warning(f"Retry {self.name} denied: deadline in {max(remaining, 0):.1f}s")
+            return None
+        if not self.budget.try_spend():
+            RETRIES_DENIED.inc(policy=self.name, reason="budget")
+            logger.warning(f"Retry {self.name} denied: retry budget exhausted")
+            return None
+        RETRIES.inc(policy=self.name)
+        logger.warning(f"Retry {self.name} attempt {attempt + 1}/{self.max_attempts} in {delay:.2f}s: {error}")
+        return delay
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run fn, retrying failures this policy allows; the last error is re-raised"""
+        self.record_call()
+        attempt = 1
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            self._sleep(delay)
+            attempt += 1
+
+    def __call__(self, fn: Callable[..., T]) -> Callable[..., T]:
+        """Use the policy as a decorator"""
+        def wrapper(*args, **kwargs) -> T:
+            return self.call(fn, *args, **kwargs)
+        wrapper.__name__ = getattr(fn, "__name__", "wrapper")
+        wrapper.__doc__ = fn.__doc__
+        return wrapper
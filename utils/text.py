@@ -0,0 +1,68 @@
+"""
+text.py
+
+Vietnamese text normalization and tokenization for retrieval and caching
+
+Key features:
+- normalize_vi: NFC, lowercase, punctuation to spaces, collapsed whitespace
+- fold_diacritics: strip tone/vowel marks and map đ -> d ("học máy" -> "hoc may"),
+  so accented and unaccented typing match
+- tokenize_vi: syllable unigrams without stopwords plus adjacent-syllable bigrams
+  (Vietnamese words are often two syllables: "lập trình", "học máy")
+- strip_particles: drop trailing sentence particles ("Python là gì vậy?" -> "python là gì")
+"""
+
+import re
+import unicodedata
+from typing import FrozenSet, List
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+_FOLD_TABLE = str.maketrans({"đ": "d", "Đ": "D"})
+
+# Common function words, stored folded (compared after fold_diacritics)
+VI_STOPWORDS: FrozenSet[str] = frozenset({
+    "la", "va", "cua", "co", "khong", "cho", "voi", "cac", "nhung", "mot", "duoc",
+    "trong", "thi", "ma", "nay", "do", "vay", "a", "nhe", "nha", "oi", "toi", "minh",
+    "ban", "em", "anh", "chi", "de", "o", "se", "da", "dang", "rat", "cung",
+    "nhu", "ve", "tu", "khi", "neu", "hay", "hoac", "lam", "sao", "the", "nao", "gi",
+})
+
+# Sentence-final particles that do not change a question's meaning (unfolded)
+VI_PARTICLES: FrozenSet[str] = frozenset({
+    "vậy", "ạ", "à", "nhé", "nha", "ơi", "hả", "thế", "nhỉ", "hen", "đi", "không", "ko", "k",
+})
+
+def normalize_vi(text: str) -> str:
+    """Return NFC-normalized, lowercased text with punctuation replaced by single spaces"""
+    text = unicodedata.normalize("NFC", text).lower()
+    return _NON_WORD.sub(" ", text).strip()
+
+def fold_diacritics(text: str) -> str:
+    """Remove Vietnamese diacritics ("Lập trình" -> "Lap trinh")"""
+    decomposed = unicodedata.normalize("NFD", text.translate(_FOLD_TABLE))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def tokenize_vi(text: str, *, bigrams: bool = True, stopwords: FrozenSet[str] = VI_STOPWORDS) -> List[str]:
+    """
+    Tokenize Vietnamese (or mixed) text into folded syllables and syllable bigrams
+
+    Args:
+        text: Raw text
+        bigrams: Also emit "a_b" for adjacent syllables (stopwords included in pairs)
+        stopwords: Folded unigrams to drop
+
+    Returns:
+        Token list in text order (may contain repeats)
+    """
+    syllables = fold_diacritics(normalize_vi(text)).split()
+    tokens = [s for s in syllables if s not in stopwords]
+    if bigrams:
+        tokens.extend(f"{a}_{b}" for a, b in zip(syllables, syllables[1:]))
+    return tokens
+
+def strip_particles(text: str, particles: FrozenSet[str] = VI_PARTICLES) -> str:
+    """Normalize text and remove trailing sentence-final particles"""
+    words = normalize_vi(text).split()
+    while words and words[-1] in particles:
+        words.pop()
+    return " ".join(words)
@@ -0,0 +1,133 @@
+"""
+timer_wheel.py
+
+Hashed timer wheel for expiring many keys with cheap, frequent rescheduling
+
+Key features:
+- TimerWheel: schedule/cancel keys by monotonic deadline; advance() returns due keys
+- Lazy rescheduling: pushing a deadline later only updates a dict entry; the key
+  is moved to its new slot when the wheel next reaches the old one
+- advance() only visits slots whose tick has passed, so sweeping costs
+  O(keys in those slots) instead of O(all keys)
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Set
+
+class TimerWheel:
+    """
+    Single-level hashed timer wheel on a monotonic clock
+
+    Responsibilities:
+    - Map each deadline to slot (deadline // tick) % slots; far deadlines wait extra revolutions
+    - Keep the authoritative deadline per key so stale slot entries can be skipped or moved
+    - Return expired keys from advance(); expiry is at most one tick late
+    """
+    def __init__(
+        self,
+        tick: float = 1.0,
+        slots: int = 512,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            tick: Slot width in seconds (expiry resolution)
+            slots: Number of slots per revolution
+            clock: Monotonic time source (injectable for tests)
+        """
+        if tick <= 0 or slots <= 0:
+            raise ValueError("tick and slots must be positive")
+        self.tick = tick
+        self.slots = slots
+        self._clock = clock
+        self._wheel: List[Set[Hashable]] = [set() for _ in range(slots)]
+        self._deadlines: Dict[Hashable, float] = {}
+        self._placed: Dict[Hashable, int] = {}
+        self._current_tick = self._tick_of(clock())
+        self._lock = threading.Lock()
+
+    def _tick_of(self, t: float) -> int:
+        return math.floor(t / self.tick)
+
+    def _place(self, key: Hashable, tick: int) -> None:
+        """Put key into the slot for tick (caller holds the lock)"""
+        self._wheel[tick % self.slots].add(key)
+        self._placed[key] = tick
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """
+        Set (or move) the expiry deadline for key
+
+        Args:
+            key: Any hashable id (e.g. session id)
+            deadline: Absolute time on the wheel's clock
+        """
+        with self._lock:
+            tick = max(self._tick_of(deadline), self._current_tick + 1)
+            self._deadlines[key] = deadline
+            placed = self._placed.get(key)
+            # Later deadline: leave the entry where it is and move it lazily on visit
+            if placed is None or tick < placed:
+                self._place(key, tick)
+
+    def schedule_in(self, key: Hashable, delay: float) -> None:
+        """Schedule key to expire `delay` seconds from now"""
+        self.schedule(key, self._clock() + delay)
+
+    def cancel(self, key: Hashable) -> None:
+        """Forget key; its slot entry is dropped when next visited"""
+        with self._lock:
+            self._deadlines.pop(key, None)
+            self._placed.pop(key, None)
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        """Return the scheduled deadline for key, or None"""
+        return self._deadlines.get(key)
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """
+        Move the wheel to `now` and return keys whose deadline has passed
+
+        Args:
+            now: Current time (defaults to the wheel's clock)
+
+        Returns:
+            Expired keys; they are no longer scheduled
+        """
+        if now is None:
+            now = self._clock()
+        target = self._tick_of(now)
+        expired: List[Hashable] = []
+        with self._lock:
+            if target <= self._current_tick:
+                return expired
+            first = self._current_tick + 1
+            # A jump longer than one revolution only needs each slot visited once
+            first = max(first, target - self.slots + 1)
+            for tick in range(first, target + 1):
+                slot = self._wheel[tick % self.slots]
+                if not slot:
+                    continue
+                for key in list(slot):
+                    deadline = self._deadlines.get(key)
+                    if deadline is None:
+                        slot.discard(key)
+                        continue
+                    if deadline <= now:
+                        slot.discard(key)
+                        del self._deadlines[key]
+                        self._placed.pop(key, None)
+                        expired.append(key)
+                        continue
+                    slot.discard(key)
+                    self._place(key, max(self._tick_of(deadline), target + 1))
+            self._current_tick = target
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines